@@ -0,0 +1,3 @@
+"""
+Benchmark harnesses used by the ``benchmark_*`` management commands.
+"""
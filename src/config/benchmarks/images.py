@@ -0,0 +1,405 @@
+"""
+Image compression benchmarks.
+
+Runs `config.utils.compress_image` over a corpus of synthetic images (and
+optionally a directory of sample photos) for every combination of WebP
+encoder method, quality level and resampling filter. Each combination is
+measured for encode time, peak memory, output size and similarity to a
+reference resized from the full-resolution original (SSIM and PSNR), and a
+recommended profile is picked for every image model.
+
+The synthetic corpus is drawn from fixed seeds, so sizes and quality scores
+are comparable between commits; only the timings depend on the machine.
+"""
+
+import math
+import os
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+from io import BytesIO
+
+import PIL
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+from PIL import Image, ImageChops, ImageDraw, ImageFilter, ImageMath, ImageOps, features
+
+from config.utils import compress_image, compression_profile
+
+
+# Encoder settings compared by default; the first of each make up the
+# baseline, the fixed settings all image models used before profiles
+METHODS = (6, 4)
+QUALITIES = (85, 75, 80, 90)
+RESAMPLING = ('LANCZOS', 'BICUBIC', 'BILINEAR')
+
+# Compression profile and typical content of every model that stores images
+IMAGE_MODELS = {
+    'IssueImage': {'profile': 'issue_photo', 'kinds': ('photo',)},
+    'IssueResolutionImage': {'profile': 'resolution_evidence', 'kinds': ('photo',)},
+    'WorkTaskResolutionImage': {'profile': 'resolution_evidence', 'kinds': ('photo',)},
+    'SiteVisitImage': {'profile': 'site_visit_photo', 'kinds': ('photo',)},
+    'IssueReviewCommentImage': {'profile': 'review_attachment', 'kinds': ('photo', 'screenshot')},
+}
+
+# Synthetic images: (name, kind, size, mode, format, seed)
+CORPUS = (
+    ('photo-12mp', 'photo', (4000, 3000), 'RGB', 'JPEG', 1),
+    ('photo-5mp-portrait', 'photo', (1944, 2592), 'RGB', 'JPEG', 2),
+    ('photo-2mp-webp', 'photo', (1600, 1200), 'RGB', 'WEBP', 3),
+    ('screenshot-rgba', 'screenshot', (1170, 2532), 'RGBA', 'PNG', 4),
+    ('screenshot-palette', 'screenshot', (1280, 800), 'P', 'GIF', 5),
+)
+
+# Added with --large: a 48 MP phone photo
+LARGE_CORPUS = (
+    ('photo-48mp', 'photo', (8000, 6000), 'RGB', 'JPEG', 6),
+)
+
+# SSIM is computed on the luma of non-overlapping windows of this size
+SSIM_WINDOW = 8
+SSIM_C1 = (0.01 * 255) ** 2
+SSIM_C2 = (0.03 * 255) ** 2
+
+# Identical images have an infinite PSNR; the report caps it
+MAX_PSNR = 100.0
+
+# Profiles whose output is within this fraction of the smallest are
+# considered equally small, and the fastest of them is recommended
+BYTES_TOLERANCE = 0.05
+
+
+def draw_photo(size, seed):
+    """Smooth gradients, soft shapes and fine detail, like a camera photo"""
+    rng = random.Random(seed)
+    width, height = size
+    gradient = Image.linear_gradient('L')
+    image = Image.merge('RGB', (
+        gradient.resize(size),
+        gradient.rotate(90).resize(size),
+        Image.radial_gradient('L').resize(size),
+    ))
+    draw = ImageDraw.Draw(image)
+    for _ in range(40):
+        x, y = rng.randrange(width), rng.randrange(height)
+        radius = rng.randrange(min(size) // 40, min(size) // 6)
+        colour = tuple(rng.randrange(256) for _ in range(3))
+        draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=colour)
+    image = image.filter(ImageFilter.GaussianBlur(max(1, min(size) // 400)))
+
+    # Texture such as foliage or gravel, which is what costs bytes, and
+    # sensor grain; drawn from the seed so every run gets the same pixels
+    def noise(noise_size):
+        return Image.frombytes('L', noise_size, rng.randbytes(noise_size[0] * noise_size[1]))
+
+    texture = noise((width // 4, height // 4)).resize(size, Image.Resampling.BICUBIC)
+    image = Image.blend(image, Image.merge('RGB', (texture,) * 3), 0.3)
+    return Image.blend(image, Image.merge('RGB', (noise(size),) * 3), 0.06)
+
+
+def draw_screenshot(size, seed):
+    """Flat colours, sharp edges and text-like bars, partly transparent"""
+    rng = random.Random(seed)
+    width, height = size
+    image = Image.new('RGBA', size, (245, 245, 245, 255))
+    draw = ImageDraw.Draw(image)
+    y = 0
+    while y < height:
+        row = rng.randrange(24, 120)
+        draw.rectangle((0, y, width, y + row - 4), fill=(255, 255, 255, 255))
+        x = 16
+        while x < width - 40:
+            word = rng.randrange(12, 90)
+            draw.rectangle((x, y + 8, x + word, y + 20), fill=(40, 40, 40, 255))
+            x += word + 10
+        y += row
+    draw.rectangle((0, 0, width, height // 12), fill=(13, 110, 253, 200))
+    return image
+
+
+def make_corpus(large=False, samples_dir=None):
+    """
+    Build the benchmark images.
+
+    Args:
+        large (bool): Also include a 48 MP photo
+        samples_dir (str, optional): Directory of real images to add, as photos
+
+    Returns:
+        list: Dicts with 'name', 'kind', 'size', 'mode', 'format' and the encoded 'data'
+    """
+    corpus = []
+    for name, kind, size, mode, format, seed in CORPUS + (LARGE_CORPUS if large else ()):
+        image = draw_photo(size, seed) if kind == 'photo' else draw_screenshot(size, seed)
+        if mode == 'P':
+            image = image.convert('RGB').quantize(colors=64)
+        buffer = BytesIO()
+        image.save(buffer, format=format, **({'quality': 92} if format in ('JPEG', 'WEBP') else {}))
+        corpus.append({'name': name, 'kind': kind, 'size': size, 'mode': mode, 'format': format,
+                       'data': buffer.getvalue()})
+
+    if samples_dir:
+        for filename in sorted(os.listdir(samples_dir)):
+            path = os.path.join(samples_dir, filename)
+            try:
+                with Image.open(path) as image:
+                    size, mode, format = image.size, image.mode, image.format
+            except (OSError, Image.DecompressionBombError):
+                continue
+            with open(path, 'rb') as handle:
+                corpus.append({'name': f'sample-{filename}', 'kind': 'photo', 'size': size, 'mode': mode,
+                               'format': format, 'data': handle.read()})
+    return corpus
+
+
+def flatten(image):
+    """Upright RGB version of an image, with transparency composited on white"""
+    image = ImageOps.exif_transpose(image)
+    if image.mode == 'P':
+        image = image.convert('RGBA')
+    if image.mode in ('RGBA', 'LA'):
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def psnr(reference, candidate):
+    """
+    Peak signal-to-noise ratio of two RGB images of the same size, in dB.
+
+    Returns:
+        float: Higher is closer; `MAX_PSNR` for identical images
+    """
+    # One 256-bin histogram of absolute differences per band
+    histogram = ImageChops.difference(reference, candidate).histogram()
+    squared_error = sum(count * (value % 256) ** 2 for value, count in enumerate(histogram))
+    mse = squared_error / (reference.width * reference.height * 3)
+    if mse == 0:
+        return MAX_PSNR
+    return min(MAX_PSNR, 10 * math.log10(255 ** 2 / mse))
+
+
+def ssim(reference, candidate):
+    """
+    Structural similarity of two images of the same size, on luma.
+
+    Means, variances and covariance are taken over `SSIM_WINDOW` pixel
+    blocks with Pillow's box reduction, so no array library is needed.
+
+    Returns:
+        float: 1.0 for identical images, lower for more visible differences
+    """
+    x = reference.convert('L').convert('F')
+    y = candidate.convert('L').convert('F')
+
+    def local_mean(image):
+        return image.reduce(SSIM_WINDOW)
+
+    mean_x, mean_y = local_mean(x), local_mean(y)
+    mean_xx = local_mean(ImageMath.lambda_eval(lambda a: a['x'] * a['x'], x=x))
+    mean_yy = local_mean(ImageMath.lambda_eval(lambda a: a['y'] * a['y'], y=y))
+    mean_xy = local_mean(ImageMath.lambda_eval(lambda a: a['x'] * a['y'], x=x, y=y))
+
+    index = ImageMath.lambda_eval(
+        lambda a: (
+            (a['mx'] * a['my'] * 2 + SSIM_C1)
+            * ((a['mxy'] - a['mx'] * a['my']) * 2 + SSIM_C2)
+            / ((a['mx'] * a['mx'] + a['my'] * a['my'] + SSIM_C1)
+               * (a['mxx'] - a['mx'] * a['mx'] + a['myy'] - a['my'] * a['my'] + SSIM_C2))
+        ),
+        mx=mean_x, my=mean_y, mxx=mean_xx, myy=mean_yy, mxy=mean_xy,
+    )
+    # Reducing to a single pixel averages the whole index map
+    return index.reduce(index.size).getpixel((0, 0))
+
+
+def model_max_size(model):
+    """Target box of a model's configured compression profile"""
+    profile = settings.IMAGE_COMPRESSION_PROFILES[IMAGE_MODELS[model]['profile']]
+    return profile['max_width'], profile['max_height']
+
+
+def measure(item, options, repeat=3):
+    """
+    Compress one image with one set of `compress_image` options.
+
+    Returns:
+        dict: Median 'time_ms', 'peak_pixel_kb' (from compress_image),
+        'peak_python_kb' (tracemalloc), 'output_bytes', 'ssim' and 'psnr'
+    """
+    timings = []
+    for _ in range(repeat):
+        upload = SimpleUploadedFile(f"{item['name']}.{item['format'].lower()}", item['data'])
+        stats = {}
+        tracemalloc.start()
+        try:
+            started = time.perf_counter()
+            result = compress_image(upload, stats=stats, **options)
+            timings.append((time.perf_counter() - started) * 1000)
+            _, peak_python = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    output = result.read()
+    with Image.open(BytesIO(output)) as compressed:
+        candidate = flatten(compressed)
+    with Image.open(BytesIO(item['data'])) as original:
+        # The reference is resized from a full decode of the original
+        reference = flatten(original).resize(candidate.size, Image.Resampling.LANCZOS)
+
+    return {
+        'time_ms': round(statistics.median(timings), 2),
+        'peak_pixel_kb': round(stats['peak_bytes'] / 1024, 1),
+        'peak_python_kb': round(peak_python / 1024, 1),
+        'output_bytes': len(output),
+        'quality': stats['quality'],
+        'ssim': round(ssim(reference, candidate), 4),
+        'psnr': round(psnr(reference, candidate), 2),
+    }
+
+
+def profile_key(method, quality, resample):
+    return f'webp-m{method}-q{quality}-{resample.lower()}'
+
+
+def summarize(results):
+    """Means (and the worst SSIM) of one profile over a set of images"""
+    return {
+        'images': len(results),
+        'mean_time_ms': round(statistics.mean(r['time_ms'] for r in results), 2),
+        'mean_output_bytes': round(statistics.mean(r['output_bytes'] for r in results)),
+        'mean_ssim': round(statistics.mean(r['ssim'] for r in results), 4),
+        'min_ssim': min(r['ssim'] for r in results),
+        'mean_psnr': round(statistics.mean(r['psnr'] for r in results), 2),
+    }
+
+
+def recommend(profiles, kinds, corpus, min_ssim):
+    """
+    Pick the profile for a model: the smallest output whose worst SSIM on the
+    model's kind of images is at least ``min_ssim``, preferring the fastest of
+    those within `BYTES_TOLERANCE` of the smallest.
+
+    Returns:
+        dict: The chosen profile and its summary, or None if none qualifies
+    """
+    names = {item['name'] for item in corpus if item['kind'] in kinds}
+    candidates = []
+    for key, profile in profiles.items():
+        results = [result for name, result in profile['images'].items() if name in names]
+        if not results:
+            continue
+        summary = summarize(results)
+        if summary['min_ssim'] >= min_ssim:
+            candidates.append((key, profile, summary))
+    if not candidates:
+        return None
+
+    smallest = min(summary['mean_output_bytes'] for _, _, summary in candidates)
+    small_enough = [c for c in candidates if c[2]['mean_output_bytes'] <= smallest * (1 + BYTES_TOLERANCE)]
+    key, profile, summary = min(small_enough, key=lambda c: c[2]['mean_time_ms'])
+    return {
+        'profile': key,
+        'method': profile['method'],
+        'quality': profile['quality'],
+        'resample': profile['resample'],
+        **summary,
+    }
+
+
+def run_benchmarks(models=None, qualities=QUALITIES, methods=METHODS, resampling=RESAMPLING,
+                   repeat=3, min_ssim=0.97, large=False, samples_dir=None, progress=None):
+    """
+    Compress the corpus with every profile for each distinct model target size,
+    and with each model's configured profile from ``IMAGE_COMPRESSION_PROFILES``.
+
+    Args:
+        models: Model names to recommend profiles for (defaults to all of `IMAGE_MODELS`)
+        qualities: WebP quality levels to compare
+        methods: WebP encoder methods to compare
+        resampling: Names of `Image.Resampling` filters to compare
+        repeat: Runs per measurement; the median time is reported
+        min_ssim: Lowest acceptable SSIM for a recommended profile
+        large: Also include a 48 MP photo
+        samples_dir: Directory of real images to add to the corpus
+        progress: Optional callable receiving a line of progress text
+
+    Returns:
+        dict: JSON-serialisable benchmark report
+    """
+    models = models or list(IMAGE_MODELS)
+    corpus = make_corpus(large=large, samples_dir=samples_dir)
+    targets = sorted({model_max_size(model) for model in models})
+
+    results = {}
+    for max_size in targets:
+        profiles = {}
+        for method in methods:
+            for quality in qualities:
+                for resample in resampling:
+                    key = profile_key(method, quality, resample)
+                    if progress:
+                        progress(f'{max_size[0]}x{max_size[1]} {key}')
+                    options = {
+                        'max_width': max_size[0],
+                        'max_height': max_size[1],
+                        'quality': quality,
+                        'method': method,
+                        'resample': getattr(Image.Resampling, resample),
+                    }
+                    profiles[key] = {
+                        'method': method,
+                        'quality': quality,
+                        'resample': resample,
+                        'images': {item['name']: measure(item, options, repeat=repeat) for item in corpus},
+                    }
+        for profile in profiles.values():
+            profile['summary'] = summarize(list(profile['images'].values()))
+        results[max_size] = profiles
+
+    recommended, configured = {}, {}
+    for model in models:
+        spec = IMAGE_MODELS[model]
+        recommended[model] = recommend(results[model_max_size(model)], spec['kinds'], corpus, min_ssim)
+
+        if progress:
+            progress(f"{model} {spec['profile']}")
+        options = compression_profile(spec['profile'])
+        images = {
+            item['name']: measure(item, options, repeat=repeat)
+            for item in corpus if item['kind'] in spec['kinds']
+        }
+        configured[model] = {
+            'profile': spec['profile'],
+            'options': options,
+            'images': images,
+            'summary': summarize(list(images.values())),
+        }
+
+    return {
+        'generated_at': timezone.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'pillow': PIL.__version__,
+            'libwebp': features.version('webp'),
+            'libavif': features.version('avif'),
+            'machine': platform.machine(),
+        },
+        'settings': {'repeat': repeat, 'min_ssim': min_ssim, 'ssim_window': SSIM_WINDOW},
+        # The fixed settings every model used before compression profiles
+        'baseline_profile': profile_key(METHODS[0], QUALITIES[0], RESAMPLING[0]),
+        'corpus': [
+            {key: item[key] for key in ('name', 'kind', 'mode', 'format')}
+            | {'size': list(item['size']), 'bytes': len(item['data'])}
+            for item in corpus
+        ],
+        'targets': {
+            f'{max_size[0]}x{max_size[1]}': profiles for max_size, profiles in results.items()
+        },
+        'configured': configured,
+        'recommended': recommended,
+    }
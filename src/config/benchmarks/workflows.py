@@ -0,0 +1,330 @@
+"""
+Role workflow benchmarks.
+
+Replays scripted request sequences for every role through the Django test
+client against a seeded database, and collects per-request latency, query
+counts and peak Python memory for each scenario.
+"""
+
+import math
+import time
+import tracemalloc
+from datetime import timedelta
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+
+PASSWORD = 'benchmark-pass-123'
+
+
+def percentile(values, pct):
+    """
+    Return the ``pct`` percentile of ``values`` using linear interpolation.
+
+    Args:
+        values: Iterable of numbers
+        pct: Percentile between 0 and 100
+
+    Returns:
+        float: The interpolated percentile, or 0.0 for an empty input
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * (pct / 100.0)
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    if lower == upper:
+        return float(ordered[int(rank)])
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def make_test_image(name='photo.jpg', size=(1600, 1200)):
+    """Build an in-memory JPEG upload similar to a phone camera photo"""
+    image = Image.new('RGB', size)
+    # A gradient compresses like a real photo far better than a flat colour
+    pixels = image.load()
+    for x in range(0, size[0], 8):
+        for y in range(0, size[1], 8):
+            pixels[x, y] = (x % 256, y % 256, (x + y) % 256)
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', quality=90)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class InstrumentedClient:
+    """
+    Thin wrapper around the test client that times every request and counts
+    the SQL queries it executes.
+    """
+
+    def __init__(self, user):
+        self.client = Client()
+        self.client.force_login(user)
+        self.samples = []
+
+    def _record(self, method, label, url, data=None, expected=None):
+        if expected is None:
+            # Successful form posts redirect; a 200 means the form was re-rendered with errors
+            expected = (302,) if method == 'post' else (200,)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(self.client, method)(url, data or {})
+            elapsed = (time.perf_counter() - started) * 1000
+        if response.status_code not in expected:
+            raise RuntimeError(
+                f'{method.upper()} {url} ({label}) returned {response.status_code}'
+            )
+        self.samples.append({
+            'label': label,
+            'latency_ms': elapsed,
+            'queries': len(queries.captured_queries),
+        })
+        return response
+
+    def get(self, label, url, **kwargs):
+        return self._record('get', label, url, **kwargs)
+
+    def post(self, label, url, data=None, **kwargs):
+        return self._record('post', label, url, data, **kwargs)
+
+
+def seed_database(issue_count=50):
+    """
+    Create an organization with one user per role and ``issue_count`` issues
+    spread across its space, each with a comment, a work task and a site visit.
+
+    Returns:
+        dict: Seeded objects keyed by role and kind
+    """
+    from core.models import Organization, Space, User
+    from issue_management.models import Issue, IssueComment, WorkTask, SiteVisit
+
+    org = Organization.objects.create(name='Benchmark Org')
+    space = Space.objects.create(name='Benchmark Space', org=org)
+
+    users = {}
+    for index, role in enumerate(['central_admin', 'space_admin', 'supervisor', 'maintainer', 'reviewer']):
+        users[role] = User.objects.create_user(
+            phone_number=f'+91900000{index:04d}',
+            email=f'{role}@benchmark.local',
+            password=PASSWORD,
+            user_type=role,
+            organization=org,
+            first_name=role.replace('_', ' ').title(),
+        )
+    users['space_admin'].spaces.add(space)
+    users['space_admin'].active_space = space
+    users['space_admin'].save(skip_validation=True)
+
+    issues = []
+    for index in range(issue_count):
+        issue = Issue.objects.create(
+            title=f'Benchmark issue {index}',
+            description='Seeded issue used for workflow benchmarks.',
+            reporter=users['central_admin'],
+            org=org,
+            space=space,
+            priority=['low', 'medium', 'high', 'critical'][index % 4],
+            status='assigned',
+            assigned_to=users['supervisor'],
+            assigned_by=users['central_admin'],
+        )
+        issue.reviewers.add(users['reviewer'])
+        IssueComment.objects.create(issue=issue, user=users['central_admin'], comment='Seed comment')
+        WorkTask.objects.create(
+            issue=issue,
+            title=f'Seed task {index}',
+            description='Seed task',
+            assigned_to=users['maintainer'],
+        )
+        SiteVisit.objects.create(
+            issue=issue,
+            title=f'Seed visit {index}',
+            description='Seed visit',
+            created_by=users['supervisor'],
+            assigned_to=users['maintainer'],
+            scheduled_date=timezone.now() + timedelta(days=1),
+        )
+        issues.append(issue)
+
+    return {'org': org, 'space': space, 'users': users, 'issues': issues}
+
+
+def central_admin_workflow(client, fixtures, iteration):
+    """List, create an issue with photos, open it and assign it"""
+    from issue_management.models import Issue
+
+    users = fixtures['users']
+    client.get('issue_list', reverse('issue_management:central_admin:issue_list'))
+    client.get('issue_create_form', reverse('issue_management:central_admin:issue_create'))
+    client.post('issue_create', reverse('issue_management:central_admin:issue_create'), {
+        'title': f'Leaking tap {iteration}',
+        'description': 'Water leaking from the tap in the restroom.',
+        'priority': 'high',
+        'space': fixtures['space'].pk,
+        'image1': make_test_image('one.jpg'),
+        'image2': make_test_image('two.jpg'),
+        'image3': make_test_image('three.jpg'),
+    })
+    issue = Issue.objects.filter(reporter=users['central_admin']).latest('created_at')
+    client.get('issue_detail', reverse('issue_management:central_admin:issue_detail', args=[issue.slug]))
+    client.post('issue_assign', reverse('issue_management:central_admin:issue_assign', args=[issue.slug]), {
+        'assigned_to': users['supervisor'].pk,
+    })
+    client.get('dashboard', reverse('dashboard:central_admin_dashboard'))
+
+
+def space_admin_workflow(client, fixtures, iteration):
+    """Dashboard, issue list and issue detail inside the active space"""
+    issue = fixtures['issues'][iteration % len(fixtures['issues'])]
+    client.get('dashboard', reverse('dashboard:space_admin_dashboard'))
+    client.get('issue_list', reverse('issue_management:space_admin:issue_list'))
+    client.get('issue_detail', reverse('issue_management:space_admin:issue_detail', args=[issue.slug]))
+
+
+def supervisor_workflow(client, fixtures, iteration):
+    """Review assigned issues and plan a work task and a site visit"""
+    users = fixtures['users']
+    issue = fixtures['issues'][iteration % len(fixtures['issues'])]
+    client.get('issue_list', reverse('issue_management:supervisor:issue_list'))
+    client.get('issue_detail', reverse('issue_management:supervisor:issue_detail', args=[issue.slug]))
+    client.post('work_task_create', reverse('issue_management:supervisor:work_task_create', args=[issue.slug]), {
+        'title': f'Replace washer {iteration}',
+        'description': 'Replace the worn washer.',
+        'assigned_to': users['maintainer'].pk,
+    })
+    client.post('site_visit_create', reverse('issue_management:supervisor:site_visit_create', args=[issue.slug]), {
+        'title': f'Inspect plumbing {iteration}',
+        'description': 'Inspect the plumbing line.',
+        'location': 'Block A restroom',
+        'assigned_to': users['maintainer'].pk,
+        'scheduled_date': (timezone.now() + timedelta(days=2)).strftime('%Y-%m-%dT%H:%M'),
+    })
+    client.get('work_task_list', reverse('issue_management:supervisor:work_task_list'))
+
+
+def maintainer_workflow(client, fixtures, iteration):
+    """Work through the task list and toggle a task complete and back"""
+    from issue_management.models import WorkTask
+
+    task = WorkTask.objects.filter(assigned_to=fixtures['users']['maintainer'], completed=False).first()
+    client.get('work_task_list', reverse('issue_management:maintainer:work_task_list'))
+    client.get('work_task_detail', reverse('issue_management:maintainer:work_task_detail', args=[task.slug]))
+    toggle_url = reverse('issue_management:maintainer:work_task_toggle_complete', args=[task.slug])
+    client.post('work_task_complete', toggle_url, {'resolution_notes': 'Replaced the washer.'})
+    client.post('work_task_reopen', toggle_url)
+    client.get('site_visit_list', reverse('issue_management:maintainer:site_visit_list'))
+
+
+def reviewer_workflow(client, fixtures, iteration):
+    """Open an issue under review and leave comments"""
+    issue = fixtures['issues'][iteration % len(fixtures['issues'])]
+    detail_url = reverse('issue_management:reviewer:issue_detail', args=[issue.slug])
+    client.get('issue_list', reverse('issue_management:reviewer:issue_list'))
+    client.get('issue_detail', detail_url)
+    client.post('comment_create', reverse('issue_management:comment_create', args=[issue.slug]), {
+        'comment': f'Looks good so far ({iteration}).',
+    }, expected=(200,))  # Replies with the new comment fragment
+    client.post('review_comment_create', reverse('issue_management:review_comment_create', args=[issue.slug]), {
+        'comment': 'Please attach a photo of the finished work.',
+    })
+
+
+SCENARIOS = {
+    'central_admin': central_admin_workflow,
+    'space_admin': space_admin_workflow,
+    'supervisor': supervisor_workflow,
+    'maintainer': maintainer_workflow,
+    'reviewer': reviewer_workflow,
+}
+
+
+def summarize(samples):
+    """Reduce raw request samples to latency percentiles and query counts"""
+    latencies = [sample['latency_ms'] for sample in samples]
+    queries = [sample['queries'] for sample in samples]
+    return {
+        'requests': len(samples),
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50), 2),
+            'p95': round(percentile(latencies, 95), 2),
+            'p99': round(percentile(latencies, 99), 2),
+            'max': round(max(latencies), 2) if latencies else 0.0,
+        },
+        'queries_per_request': {
+            'mean': round(sum(queries) / len(queries), 2) if queries else 0.0,
+            'max': max(queries) if queries else 0,
+        },
+    }
+
+
+def run_scenario(name, fixtures, iterations=10, warmup=1):
+    """
+    Run one role scenario ``iterations`` times and return its report.
+
+    Warmup iterations are executed but excluded from the figures so that
+    template compilation and URL resolver caches do not skew the numbers.
+    The timed iterations run without tracemalloc, whose tracing slows every
+    allocation; one more traced iteration measures the peak memory.
+    """
+    workflow = SCENARIOS[name]
+    client = InstrumentedClient(fixtures['users'][name])
+
+    for iteration in range(warmup):
+        workflow(client, fixtures, iteration)
+    client.samples = []
+
+    for iteration in range(warmup, warmup + iterations):
+        workflow(client, fixtures, iteration)
+    # The traced iteration's requests are not part of the latency figures
+    timed, client.samples = client.samples, []
+
+    tracemalloc.start()
+    try:
+        workflow(client, fixtures, warmup + iterations)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    by_label = {}
+    for sample in timed:
+        by_label.setdefault(sample['label'], []).append(sample)
+
+    report = summarize(timed)
+    report['iterations'] = iterations
+    report['peak_memory_kb'] = round(peak / 1024, 1)
+    report['steps'] = {label: summarize(samples) for label, samples in by_label.items()}
+    return report
+
+
+def run_benchmarks(scenarios=None, iterations=10, issue_count=50, warmup=1):
+    """
+    Seed the current database and run the requested scenarios.
+
+    Args:
+        scenarios: Scenario names to run (defaults to every role)
+        iterations: Measured iterations per scenario
+        issue_count: Number of issues to seed
+        warmup: Unmeasured iterations run before measuring
+
+    Returns:
+        dict: JSON-serialisable benchmark report
+    """
+    fixtures = seed_database(issue_count=issue_count)
+    results = {}
+    for name in scenarios or SCENARIOS:
+        results[name] = run_scenario(name, fixtures, iterations=iterations, warmup=warmup)
+    return {
+        'generated_at': timezone.now().isoformat(),
+        'database': connection.vendor,
+        'seeded_issues': issue_count,
+        'scenarios': results,
+    }
@@ -0,0 +1,195 @@
+"""
+Helpers for linking to, removing and reconciling stored media files.
+
+Model `pre_delete` receivers call `delete_stored_file()`. Normally the file is
+removed straight away; inside `defer_file_deletion()` the names are collected
+instead so that bulk deletions can remove them afterwards with batched
+multi-object deletes.
+
+The listing helpers stream storage contents and compare them with the file
+fields of every model for the `reconcile_media` management command.
+"""
+
+import logging
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone as dt_timezone
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.db.models import FileField
+
+logger = logging.getLogger(__name__)
+
+# S3 DeleteObjects accepts at most 1000 keys per request
+DELETE_BATCH_SIZE = 1000
+
+_deferred_file_names = ContextVar('deferred_file_names', default=None)
+
+
+@contextmanager
+def defer_file_deletion():
+    """
+    Collect file names passed to `delete_stored_file()` instead of deleting them.
+
+    Yields:
+        list: The collected names, to be passed to `delete_files()` once the
+        database rows are gone
+    """
+    names = []
+    token = _deferred_file_names.set(names)
+    try:
+        yield names
+    finally:
+        _deferred_file_names.reset(token)
+
+
+def media_url(field_file, valid_for=None):
+    """
+    URL of a stored file that stays valid for at least ``valid_for`` seconds.
+
+    `config.storages.MediaStorage` caches its signed URLs and hands out one
+    with enough time left, or signs a longer-lived one. Other storages return
+    plain URLs that do not expire.
+
+    Args:
+        field_file: The FieldFile (e.g. `instance.image`)
+        valid_for (int, optional): Seconds the URL is needed for, e.g. the
+            lifetime of a push notification that shows the image
+
+    Returns:
+        str: The URL, or None if there is no file
+    """
+    if not field_file:
+        return None
+    storage = field_file.storage
+    if valid_for and hasattr(storage, 'signs_urls'):
+        return storage.url(field_file.name, expire=valid_for)
+    return field_file.url
+
+
+def delete_stored_file(field_file):
+    """
+    Delete the file behind a FieldFile, or queue it when deletion is deferred.
+
+    Args:
+        field_file: The FieldFile (e.g. `instance.image`) to remove
+    """
+    if not field_file:
+        return
+    deferred = _deferred_file_names.get()
+    if deferred is not None:
+        deferred.append(field_file.name)
+    else:
+        field_file.delete(save=False)
+
+
+def delete_files(names, storage=None, batch_size=DELETE_BATCH_SIZE):
+    """
+    Delete many stored files using as few storage calls as possible.
+
+    Storages that implement `delete_many()` (see `config.storages.MediaStorage`)
+    receive the names in batches of `batch_size`; other storages fall back to
+    one `delete()` per file.
+
+    Args:
+        names: Iterable of storage names
+        storage: Storage to delete from (defaults to `default_storage`)
+        batch_size: Maximum number of names per batch
+
+    Returns:
+        int: Number of names submitted for deletion
+    """
+    storage = storage or default_storage
+    names = [name for name in names if name]
+    for start in range(0, len(names), batch_size):
+        batch = names[start:start + batch_size]
+        if hasattr(storage, 'delete_many'):
+            storage.delete_many(batch)
+        else:
+            for name in batch:
+                storage.delete(name)
+    return len(names)
+
+
+def iter_file_fields():
+    """
+    Yield every concrete ``(model, field_name)`` pair that stores files.
+
+    Covers FileField and its subclasses such as ImageField across all
+    installed apps.
+    """
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, FileField):
+                yield model, field.name
+
+
+def iter_stored_files(storage=None, prefix=''):
+    """
+    Stream ``(name, size, modified)`` for every stored file without building
+    the full listing in memory.
+
+    S3 storages are listed with the ListObjectsV2 paginator (1000 keys per
+    page); filesystem storages are walked from their location, which is
+    `MEDIA_ROOT` in development.
+
+    Args:
+        storage: Storage to list (defaults to `default_storage`)
+        prefix: Only list names starting with this prefix (e.g. "public/")
+    """
+    storage = storage or default_storage
+
+    if hasattr(storage, 'bucket'):
+        location = storage.location.strip('/')
+        key_prefix = f'{location}/' if location else ''
+        paginator = storage.bucket.meta.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=storage.bucket_name, Prefix=key_prefix + prefix):
+            for obj in page.get('Contents', []):
+                yield obj['Key'][len(key_prefix):], obj['Size'], obj['LastModified']
+        return
+
+    root = storage.location
+    start = os.path.join(root, prefix) if prefix else root
+    for directory, _, files in os.walk(start):
+        for filename in files:
+            path = os.path.join(directory, filename)
+            stat = os.stat(path)
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            yield name, stat.st_size, datetime.fromtimestamp(stat.st_mtime, tz=dt_timezone.utc)
+
+
+def referenced_names(names):
+    """
+    Return the subset of ``names`` that at least one file field points to.
+
+    Runs one ``values_list`` query per file field, restricted to the given
+    batch, so memory stays proportional to the batch size.
+    """
+    found = set()
+    for model, field_name in iter_file_fields():
+        found.update(
+            model._base_manager.filter(**{f'{field_name}__in': names}).values_list(field_name, flat=True)
+        )
+    return found
+
+
+def iter_missing_files(storage=None, chunk_size=2000):
+    """
+    Yield ``(model, pk, field_name, name)`` for rows whose file is missing from storage.
+
+    Rows are streamed with ``values_list(...).iterator()``; every name costs
+    one existence check on the storage.
+    """
+    storage = storage or default_storage
+    for model, field_name in iter_file_fields():
+        rows = (
+            model._base_manager.exclude(**{field_name: ''})
+            .exclude(**{f'{field_name}__isnull': True})
+            .values_list('pk', field_name)
+            .iterator(chunk_size=chunk_size)
+        )
+        for pk, name in rows:
+            if not storage.exists(name):
+                yield model, pk, field_name, name
@@ -22,6 +22,7 @@ class RedirectLoggedinUsers(AccessMixin):
         "is_supervisor": "issue_management:supervisor:issue_list",
         "is_maintainer": "issue_management:maintainer:work_task_list",
         "is_reviewer": "issue_management:reviewer:issue_list",
+        "is_general_user": "issue_management:general_user:issue_report",
     }
 
     default_redirect = "home"
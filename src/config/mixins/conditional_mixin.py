@@ -0,0 +1,50 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib import messages
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from config.versions import get_version_token, user_scope
+
+
+class ConditionalGetMixin:
+    """
+    Answer repeated GET requests with 304 Not Modified while nothing the page
+    shows has changed.
+
+    The ETag is built from the change versions of the scopes returned by
+    `get_version_scopes()` (see config/versions.py) plus the viewer, so it is
+    computed from the cache before the view runs a single query. Put this
+    mixin after the access mixin so permissions are checked first.
+    """
+
+    def get_version_scopes(self):
+        """Scopes (org, space, issue or user) whose changes alter this page"""
+        return []
+
+    def get_etag(self, request, *args, **kwargs):
+        user = request.user
+        parts = [
+            settings.RELEASE_VERSION,
+            request.get_full_path(),
+            user.pk,
+            user.user_type,
+            user.active_space_id,
+            # Pages embed the CSRF token and relative dates
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+            timezone.localdate().isoformat(),
+            get_version_token(user_scope(user.pk), *self.get_version_scopes()),
+        ]
+        return hashlib.md5('|'.join(map(str, parts)).encode()).hexdigest()
+
+    def dispatch(self, request, *args, **kwargs):
+        # Flash messages are shown once, so a page carrying them is always rendered
+        if request.method not in ('GET', 'HEAD') or not request.user.is_authenticated or len(messages.get_messages(request)):
+            return super().dispatch(request, *args, **kwargs)
+
+        response = condition(etag_func=self.get_etag)(super().dispatch)(request, *args, **kwargs)
+        # Browsers must revalidate, shared caches must not store per-user pages
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
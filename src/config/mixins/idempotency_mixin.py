@@ -0,0 +1,94 @@
+from django.contrib import messages
+from django.http import HttpResponse, HttpResponseBadRequest
+
+from issue_management.utils.idempotency import (
+    MAX_KEY_LENGTH,
+    KeyInProgress,
+    KeyReused,
+    request_fingerprint,
+    request_key,
+    run_once,
+)
+
+# Headers kept with a stored response, for the browser or HTMX to act on
+REPLAYED_HEADERS = ('Location', 'HX-Redirect', 'HX-Refresh', 'HX-Trigger', 'Upload-Offset', 'Upload-Length')
+
+
+def stored_response(response, with_content=False):
+    """
+    What to keep of a response to replay it, or None if it must not be kept.
+
+    Redirects and JSON answers are kept; other successful content only with
+    ``with_content``, since a 200 from a form view is usually the form shown
+    again with its errors. Errors are never kept, so the request can be retried.
+    """
+    content_type = response.get('Content-Type', '')
+    if response.streaming or response.status_code >= 400:
+        return None
+    if not (300 <= response.status_code < 400 or with_content or content_type.startswith('application/json')):
+        return None
+    if hasattr(response, 'render'):
+        response.render()
+    return {
+        'status': response.status_code,
+        'content_type': content_type,
+        'content': response.content.decode(response.charset),
+        'headers': {name: response[name] for name in REPLAYED_HEADERS if response.has_header(name)},
+    }
+
+
+def replayed_response(stored):
+    """Rebuild a response kept by `stored_response()`"""
+    response = HttpResponse(stored['content'], content_type=stored['content_type'], status=stored['status'])
+    for name, value in stored['headers'].items():
+        response[name] = value
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+class IdempotentPostMixin:
+    """
+    Run each POST at most once per client idempotency key.
+
+    Forms get a fresh ``idempotency_key`` for every submission from
+    form-submit-handler.js (API clients send an ``Idempotency-Key`` header).
+    The first request with a key runs the view and keeps its response; a
+    repeat, such as a double click or a retry after a lost response, gets the
+    same response back without running the view again, or a 409 while the
+    first is still running. The view runs outside any transaction of the key,
+    as without it. POSTs without a key run as before. Put this mixin after the access mixin so permissions are
+    checked first.
+
+    Views answering with content instead of a redirect set ``replay_content``
+    and must answer form errors with a 4xx status.
+    """
+    replay_content = False
+
+    def dispatch(self, request, *args, **kwargs):
+        key = request_key(request) if request.method == 'POST' and request.user.is_authenticated else ''
+        if not key:
+            return super().dispatch(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return HttpResponseBadRequest('Invalid idempotency key')
+
+        view_dispatch = super().dispatch
+        response = None
+
+        def apply():
+            nonlocal response
+            response = view_dispatch(request, *args, **kwargs)
+            return stored_response(response, self.replay_content)
+
+        try:
+            stored = run_once(request.user, key, self.__class__.__name__, apply, request_fingerprint(request))
+        except KeyReused:
+            return HttpResponse('This form was already submitted with different data.', status=422)
+        except KeyInProgress:
+            response = HttpResponse('This form is still being processed. Please wait a moment.', status=409)
+            response['Retry-After'] = '5'
+            return response
+        if stored is None or not stored.get('duplicate'):
+            return response
+        if 300 <= stored['status'] < 400:
+            messages.info(request, 'This was already submitted; it was not repeated.')
+        return replayed_response(stored)
@@ -0,0 +1,303 @@
+"""
+Publish/subscribe brokers for live server-sent events.
+
+Messages are small JSON-serialisable dicts published on named channels (see
+`issue_management.utils.events` for the channel names). Publishing is
+transactional: subscribers only see messages of committed transactions.
+
+Two brokers are available:
+
+- `InProcessBroker` delivers messages to subscribers in the same process. It
+  is enough for development and for a single server process.
+- `PostgresBroker` sends messages with ``pg_notify()`` and keeps one
+  ``LISTEN`` connection per process, so every process serving event streams
+  receives messages published by any other process.
+
+`get_broker()` uses the class named by the optional ``PUBSUB_BACKEND``
+setting, or `PostgresBroker` when the default database is PostgreSQL and
+`InProcessBroker` otherwise.
+
+Subscribing may open a database connection and run ``LISTEN``, which must
+not happen on an event loop; async consumers use `asubscribe()`, which does
+that work in a worker thread.
+"""
+
+import asyncio
+import json
+import logging
+import queue
+import re
+import select
+import threading
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Channels are used as LISTEN identifiers, so keep them to safe characters
+CHANNEL_RE = re.compile(r'^[a-z0-9_]{1,63}$')
+
+# Messages kept per subscriber before the oldest are dropped
+SUBSCRIBER_BUFFER = 100
+
+
+class Subscription:
+    """
+    Messages published on a set of channels, buffered for one consumer.
+
+    Created inside a running event loop, messages are read with `aget()` and
+    the subscription is ended with `aclose()`; otherwise with the blocking
+    `get()` and `close()`. Brokers may deliver from any thread.
+    """
+
+    def __init__(self, broker, channels):
+        self.broker = broker
+        self.channels = set(channels)
+        try:
+            self.loop = asyncio.get_running_loop()
+            self.queue = asyncio.Queue(maxsize=SUBSCRIBER_BUFFER)
+        except RuntimeError:
+            self.loop = None
+            self.queue = queue.Queue(maxsize=SUBSCRIBER_BUFFER)
+
+    def _put(self, message):
+        # A slow consumer loses the oldest messages rather than blocking the broker
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+            except (asyncio.QueueEmpty, queue.Empty):
+                pass
+        self.queue.put_nowait(message)
+
+    def deliver(self, message):
+        if self.loop is not None:
+            if not self.loop.is_closed():
+                self.loop.call_soon_threadsafe(self._put, message)
+        else:
+            self._put(message)
+
+    def get(self, timeout=None):
+        """Block for the next message; returns None on timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    async def aget(self, timeout=None):
+        """Wait for the next message; returns None on timeout"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    async def aclose(self):
+        # UNLISTEN talks to the database, so not on the event loop
+        await sync_to_async(self.broker.unsubscribe, thread_sensitive=False)(self)
+
+
+class InProcessBroker:
+    """Deliver messages to subscribers of the current process only"""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        """Send ``message`` to ``channel`` once the current transaction commits"""
+        if not CHANNEL_RE.match(channel):
+            raise ValueError(f'Invalid channel name: {channel!r}')
+        transaction.on_commit(lambda: self.dispatch(channel, message))
+
+    def dispatch(self, channel, message):
+        """Hand a message to every local subscriber of ``channel``"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(message)
+
+    def subscribe(self, channels):
+        """
+        Start receiving messages published on ``channels``.
+
+        Returns:
+            Subscription: Call `close()` on it when the consumer goes away
+        """
+        return self.attach(Subscription(self, channels))
+
+    async def asubscribe(self, channels):
+        """
+        `subscribe()` for async consumers: the subscription queues messages
+        on the running event loop, while the broker's blocking setup runs in
+        a worker thread.
+
+        Returns:
+            Subscription: Await `aclose()` on it when the consumer goes away
+        """
+        subscription = Subscription(self, channels)
+        return await sync_to_async(self.attach, thread_sensitive=False)(subscription)
+
+    def attach(self, subscription):
+        """Start delivering messages on the channels of ``subscription`` to it"""
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """
+        Stop delivering to ``subscription``.
+
+        Returns:
+            list: Channels that no longer have any local subscriber
+        """
+        emptied = []
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel]
+                    emptied.append(channel)
+        return emptied
+
+
+class PostgresBroker(InProcessBroker):
+    """
+    Fan messages out across processes with PostgreSQL LISTEN/NOTIFY.
+
+    ``pg_notify()`` runs on the request's own connection, so PostgreSQL only
+    delivers the notification if that transaction commits. Each process keeps
+    a single extra connection that LISTENs on the channels its local
+    subscribers need and dispatches notifications from a background thread.
+    """
+
+    poll_interval = 5
+
+    def __init__(self, using='default'):
+        super().__init__()
+        self.using = using
+        self._listen_connection = None
+        self._listen_lock = threading.Lock()
+        self._thread = None
+
+    def publish(self, channel, message):
+        if not CHANNEL_RE.match(channel):
+            raise ValueError(f'Invalid channel name: {channel!r}')
+        with connections[self.using].cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [channel, json.dumps(message)])
+
+    def attach(self, subscription):
+        super().attach(subscription)
+        self._listen(subscription.channels)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        emptied = super().unsubscribe(subscription)
+        if emptied and self._listen_connection is not None:
+            self._execute(''.join(f'UNLISTEN "{channel}";' for channel in emptied))
+        return emptied
+
+    def _execute(self, sql):
+        try:
+            with self._listen_lock:
+                with self._listen_connection.cursor() as cursor:
+                    cursor.execute(sql)
+        except Exception:
+            logger.exception('LISTEN connection failed; it will be reopened')
+            self._reset()
+
+    def _connect(self):
+        wrapper = connections[self.using]
+        raw = wrapper.get_new_connection(wrapper.get_connection_params())
+        raw.autocommit = True
+        return raw
+
+    def _reset(self):
+        with self._listen_lock:
+            if self._listen_connection is not None:
+                try:
+                    self._listen_connection.close()
+                except Exception:
+                    pass
+            self._listen_connection = None
+
+    def _listen(self, channels):
+        with self._listen_lock:
+            if self._listen_connection is None:
+                self._listen_connection = self._connect()
+                # Re-subscribe everything local subscribers still need
+                with self._lock:
+                    channels = set(channels) | set(self._subscribers)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='pubsub-listener', daemon=True)
+                self._thread.start()
+        self._execute(''.join(f'LISTEN "{channel}";' for channel in sorted(channels)))
+
+    def _run(self):
+        while True:
+            # Checked under the listen lock so a concurrent subscribe() either
+            # sees this thread alive or starts a new one
+            with self._listen_lock, self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            raw = self._listen_connection
+            if raw is None:
+                with self._lock:
+                    channels = set(self._subscribers)
+                try:
+                    self._listen(channels)
+                except Exception:
+                    logger.exception('Could not reopen LISTEN connection')
+                    threading.Event().wait(self.poll_interval)
+                continue
+            try:
+                ready, _, _ = select.select([raw], [], [], self.poll_interval)
+                if not ready:
+                    continue
+                with self._listen_lock:
+                    raw.poll()
+                    notifies = list(raw.notifies)
+                    raw.notifies.clear()
+            except Exception:
+                logger.exception('LISTEN connection lost; reconnecting')
+                self._reset()
+                continue
+            for notify in notifies:
+                try:
+                    message = json.loads(notify.payload)
+                except ValueError:
+                    logger.warning('Ignoring malformed notification on %s', notify.channel)
+                    continue
+                self.dispatch(notify.channel, message)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Return the process-wide broker, creating it on first use"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, 'PUBSUB_BACKEND', None)
+                if not path:
+                    path = 'config.pubsub.PostgresBroker' if connection.vendor == 'postgresql' else 'config.pubsub.InProcessBroker'
+                _broker = import_string(path)()
+    return _broker
+
+
+def publish(channel, message):
+    """Publish ``message`` on ``channel`` through the configured broker"""
+    get_broker().publish(channel, message)
@@ -103,6 +103,18 @@ else:
         'default': dj_database_url.parse(env('DATABASE_URL', default='postgresql://'))
     }
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Section caches and change versions (config/versions.py) must be shared by all
+# processes in production, e.g. CACHE_URL=rediscache://... or dbcache://cache_table
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# Changes with every deploy so ETags of pages rendered by older templates expire
+RELEASE_VERSION = env('RELEASE_VERSION', default='')
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -147,6 +159,16 @@ if ENVIRONMENT == 'development':
 
     STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
+    STORAGES = {
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+        },
+        "default": {
+            # Emulates presigned uploads to object storage on the local filesystem
+            "BACKEND": "config.storages.LocalMediaStorage",
+        },
+    }
+
 else:
     # DigitalOcean Spaces Configuration
     AWS_ACCESS_KEY_ID = env('AWS_ACCESS_KEY_ID', default="aws_access_key")
@@ -257,4 +279,81 @@ else:
 # CSRF Trusted Origins
 CSRF_TRUSTED_ORIGINS = [
     url.strip() for url in env('CSRF_TRUSTED_ORIGINS', default='https://example.com').split(',')
-]
\ No newline at end of file
+]
+
+# Compression of uploaded images, by purpose (see config.utils.compression_profile).
+# Images over target_bytes are encoded at the highest quality, down to
+# min_quality, that fits. AVIF falls back to WebP where Pillow cannot encode it;
+# its quality scale differs, hence the avif_ levels.
+IMAGE_FORMAT = env('IMAGE_FORMAT', default='WEBP')
+IMAGE_COMPRESSION_PROFILES = {
+    # Photos of reported problems
+    'issue_photo': {
+        'max_width': 1920, 'max_height': 1920,
+        'quality': 85, 'min_quality': 60, 'avif_quality': 65, 'avif_min_quality': 40,
+        'target_bytes': 350 * 1024,
+    },
+    # Proof that work was done; kept a little sharper
+    'resolution_evidence': {
+        'max_width': 1920, 'max_height': 1920,
+        'quality': 85, 'min_quality': 70, 'avif_quality': 65, 'avif_min_quality': 50,
+        'target_bytes': 450 * 1024,
+    },
+    'site_visit_photo': {
+        'max_width': 1920, 'max_height': 1920,
+        'quality': 85, 'min_quality': 60, 'avif_quality': 65, 'avif_min_quality': 40,
+        'target_bytes': 350 * 1024,
+    },
+    # Screenshots and documents attached to review comments
+    'review_attachment': {
+        'max_width': 1920, 'max_height': 1920,
+        'quality': 80, 'min_quality': 55, 'avif_quality': 60, 'avif_min_quality': 40,
+        'target_bytes': 250 * 1024,
+    },
+}
+
+# Uploaded images with more pixels are refused before they are decoded
+# (a 48 MP phone photo has 48 million)
+IMAGE_MAX_PIXELS = env.int('IMAGE_MAX_PIXELS', default=100_000_000)
+
+# Voice notes are transcoded to mono Opus by the transcode_voice_notes worker
+FFMPEG_BINARY = env('FFMPEG_BINARY', default='ffmpeg')
+FFPROBE_BINARY = env('FFPROBE_BINARY', default='ffprobe')
+VOICE_NOTE_BITRATE = env.int('VOICE_NOTE_BITRATE', default=24000)
+# Longer recordings are cut off at this many seconds
+VOICE_NOTE_MAX_SECONDS = env.int('VOICE_NOTE_MAX_SECONDS', default=600)
+
+# Form uploads are streamed to temporary files and checked against the limits
+# of their field while they arrive (see config/upload_handlers.py); the same
+# limits as the form validation. Other file fields take up to UPLOAD_MAX_FILE_SIZE.
+FILE_UPLOAD_HANDLERS = ['config.upload_handlers.StreamingUploadHandler']
+IMAGE_UPLOAD_LIMITS = {
+    'max_size': 10 * 1024 * 1024,
+    'types': ['image/jpeg', 'image/png', 'image/gif', 'image/webp'],
+}
+VOICE_UPLOAD_LIMITS = {
+    'max_size': 50 * 1024 * 1024,
+    'types': [
+        'audio/mpeg', 'audio/mp3', 'audio/wav', 'audio/x-wav',
+        'audio/m4a', 'audio/mp4', 'audio/aac', 'audio/ogg', 'audio/webm',
+    ],
+}
+UPLOAD_FIELD_LIMITS = {
+    'images': IMAGE_UPLOAD_LIMITS,
+    'image1': IMAGE_UPLOAD_LIMITS,
+    'image2': IMAGE_UPLOAD_LIMITS,
+    'image3': IMAGE_UPLOAD_LIMITS,
+    'voice': VOICE_UPLOAD_LIMITS,
+}
+UPLOAD_MAX_FILE_SIZE = 50 * 1024 * 1024
+
+# Issues a general user may report per window (see issue_management/utils/reporting.py)
+ISSUE_REPORT_RATE_LIMIT = env.int('ISSUE_REPORT_RATE_LIMIT', default=10)
+ISSUE_REPORT_RATE_WINDOW = env.int('ISSUE_REPORT_RATE_WINDOW', default=60 * 60)
+
+# Seconds a client idempotency key is remembered; a repeat within this time gets
+# the first response back (see issue_management/utils/idempotency.py)
+IDEMPOTENCY_KEY_TTL = env.int('IDEMPOTENCY_KEY_TTL', default=24 * 60 * 60)
+
+# Partial files of resumable uploads; must be shared by all application servers
+RESUMABLE_UPLOAD_ROOT = env('RESUMABLE_UPLOAD_ROOT', default=os.path.join(BASE_DIR, 'tmp', 'resumable_uploads'))
@@ -1,5 +1,22 @@
+import hashlib
+import time
+
 from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name
 from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.urls import reverse
+from django.utils.encoding import filepath_to_uri
+
+# How long a presigned upload policy stays valid
+PRESIGNED_POST_EXPIRY = 15 * 60
+
+# Cached signed URLs are handed out until this many seconds before they expire,
+# so a page rendered from the cache still has time to load its images
+SIGNED_URL_MARGIN = 5 * 60
+SIGNED_URL_CACHE_PREFIX = "media-url:"
 
 class StaticStorage(S3Boto3Storage):
     """
@@ -27,4 +44,148 @@ class MediaStorage(S3Boto3Storage):
         if name.startswith("media/public/"):
             params["ACL"] = "public-read"
 
-        return params
\ No newline at end of file
+        return params
+
+    def is_public(self, name):
+        """Whether a file is stored public-read (see `get_object_parameters()`)"""
+        return clean_name(name).lstrip("/").startswith("public/")
+
+    @property
+    def signs_urls(self):
+        """Whether `url()` signs; a custom domain is only signed through CloudFront"""
+        return bool(self.querystring_auth and (not self.custom_domain or self.cloudfront_signer))
+
+    def url(self, name, parameters=None, expire=None, http_method=None):
+        """
+        URL of a stored file.
+
+        Public files get a plain URL without any signing. Private files get a
+        presigned URL that is kept in the shared cache, keyed by the object
+        key, and reused until `SIGNED_URL_MARGIN` seconds before it expires,
+        so pages listing many images do not sign every one of them on every
+        render.
+
+        Args:
+            name (str): Storage name of the file
+            parameters (dict, optional): Extra request parameters; such URLs
+                are signed every time
+            expire (int, optional): Seconds the URL must stay valid at least;
+                defaults to the margin
+            http_method (str, optional): Method the URL is signed for
+
+        Returns:
+            str: The URL
+        """
+        if parameters or http_method:
+            return super().url(name, parameters, expire, http_method)
+        if self.is_public(name):
+            return self.public_url(name)
+        if not self.signs_urls:
+            return super().url(name)
+
+        key = self._normalize_name(clean_name(name))
+        cache_key = SIGNED_URL_CACHE_PREFIX + hashlib.sha256(f"{self.bucket_name}/{key}".encode()).hexdigest()
+        valid_for = expire or SIGNED_URL_MARGIN
+        now = time.time()
+        cached = cache.get(cache_key)
+        if cached and cached[1] - now >= valid_for:
+            return cached[0]
+
+        lifetime = max(self.querystring_expire, valid_for + SIGNED_URL_MARGIN)
+        url = super().url(name, expire=lifetime)
+        cache.set(cache_key, (url, now + lifetime), timeout=lifetime - SIGNED_URL_MARGIN)
+        return url
+
+    def public_url(self, name):
+        """Unsigned URL of a public file, on the custom domain when there is one"""
+        key = self._normalize_name(clean_name(name))
+        if self.custom_domain:
+            return f"{self.url_protocol}//{self.custom_domain}/{filepath_to_uri(key)}"
+        # Built by the unsigned client: no credentials, no HMAC
+        return self.unsigned_connection.meta.client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket_name, "Key": key},
+        )
+
+    def presigned_post(self, name, content_type, max_size, expires_in=PRESIGNED_POST_EXPIRY):
+        """
+        Build a presigned POST policy so a browser can upload one object directly.
+
+        The policy pins the key, the content type and the size range, and gives
+        the object the same ACL and parameters as files saved through `save()`.
+
+        Args:
+            name (str): Storage name of the object (e.g. 'public/issue_images/x.jpg')
+            content_type (str): Content type the client must send
+            max_size (int): Largest accepted object in bytes
+            expires_in (int): Seconds the policy stays valid
+
+        Returns:
+            dict: ``{'url': ..., 'fields': {...}}`` to post as multipart form
+            data, with the file in a last field named ``file``
+        """
+        key = self._normalize_name(clean_name(name))
+        params = self.get_object_parameters(key)
+        fields = {"Content-Type": content_type}
+        acl = params.get("ACL", self.default_acl)
+        if acl:
+            fields["acl"] = acl
+        if "CacheControl" in params:
+            fields["Cache-Control"] = params["CacheControl"]
+        conditions = [{field: value} for field, value in fields.items()]
+        conditions.append(["content-length-range", 1, max_size])
+        return self.bucket.meta.client.generate_presigned_post(
+            Bucket=self.bucket_name,
+            Key=key,
+            Fields=fields,
+            Conditions=conditions,
+            ExpiresIn=expires_in,
+        )
+
+    def delete_many(self, names):
+        """
+        Delete up to 1000 files with a single DeleteObjects request.
+        Missing keys are ignored, matching `delete()`.
+        """
+        keys = [{"Key": self._normalize_name(clean_name(name))} for name in names]
+        if not keys:
+            return
+        response = self.bucket.meta.client.delete_objects(
+            Bucket=self.bucket_name,
+            Delete={"Objects": keys, "Quiet": True},
+        )
+        errors = response.get("Errors", [])
+        if errors:
+            raise IOError(f"Failed to delete {len(errors)} object(s), first error: {errors[0]}")
+
+
+class LocalMediaStorage(FileSystemStorage):
+    """
+    Filesystem media storage for development and tests that emulates
+    `MediaStorage.presigned_post()`. The browser posts to `LocalUploadView`,
+    which checks the signed policy and writes the file under MEDIA_ROOT.
+    """
+    policy_salt = "config.storages.LocalMediaStorage"
+
+    def presigned_post(self, name, content_type, max_size, expires_in=PRESIGNED_POST_EXPIRY):
+        policy = signing.dumps({
+            "key": name,
+            "content_type": content_type,
+            "max_size": max_size,
+            "expires": int(time.time()) + expires_in,
+        }, salt=self.policy_salt)
+        return {
+            "url": reverse("local_media_upload"),
+            "fields": {"key": name, "Content-Type": content_type, "policy": policy},
+        }
+
+    def load_policy(self, policy):
+        """
+        Return the policy issued by `presigned_post()`.
+
+        Raises:
+            signing.BadSignature: If the policy was tampered with or has expired
+        """
+        data = signing.loads(policy, salt=self.policy_salt)
+        if data["expires"] < time.time():
+            raise signing.BadSignature("Upload policy expired")
+        return data
@@ -0,0 +1,145 @@
+"""
+Upload handler that streams form uploads to temporary files.
+
+Django's default handlers keep files under 2.5 MB in memory and read every
+file completely before a form can look at it. `StreamingUploadHandler`
+writes every file to a temporary file in small chunks instead and applies
+the limits of its form field while the data arrives:
+
+- A file of a type its field does not take (``UPLOAD_FIELD_LIMITS``) is not
+  stored at all.
+- A file that grows past the field's size limit is discarded once it
+  crosses the limit; the rest of it is read and dropped.
+
+Rejected files reach the form as an empty `RejectedUpload` carrying the
+declared type, the number of bytes seen and the limit they broke. A plain
+FileField would accept it as a file, so every form field taking files must
+refuse it: with `validate_accepted_upload`, with its own size and type
+checks, or, for image fields, by failing to open it. Accepted files carry
+the SHA-256 of their content, computed while they were written, in
+``sha256``.
+
+Memory per upload request is bounded by the chunk size, whatever the number
+or size of the files.
+"""
+
+import hashlib
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import TemporaryUploadedFile, UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+
+
+class RejectedUpload(UploadedFile):
+    """Placeholder for a file dropped by `StreamingUploadHandler`; has no content"""
+
+    def __init__(self, name, content_type, size, reason, charset=None, content_type_extra=None, max_size=None):
+        super().__init__(BytesIO(), name, content_type, size, charset, content_type_extra)
+        self.reason = reason
+        self.max_size = max_size
+        self.sha256 = None
+
+
+def validate_accepted_upload(upload):
+    """
+    Form field validator refusing a file `StreamingUploadHandler` dropped
+    for breaking the limits of its field.
+
+    Raises:
+        ValidationError: If ``upload`` is a `RejectedUpload`
+    """
+    if not isinstance(upload, RejectedUpload):
+        return
+    if upload.reason == 'type':
+        raise ValidationError(
+            'Files of type %(type)s are not accepted here.',
+            code='upload_type',
+            params={'type': upload.content_type},
+        )
+    raise ValidationError(
+        'File is too large. Maximum size is %(max_size)d MB.',
+        code='upload_size',
+        params={'max_size': (upload.max_size or 0) // (1024 * 1024)},
+    )
+
+
+def field_limits(field_name):
+    """
+    Limits for uploads of a form field.
+
+    Returns:
+        dict: 'max_size' in bytes and 'types', the accepted content types
+        (None accepts any)
+    """
+    limits = settings.UPLOAD_FIELD_LIMITS.get(field_name, {})
+    return {
+        'max_size': limits.get('max_size', settings.UPLOAD_MAX_FILE_SIZE),
+        'types': limits.get('types'),
+    }
+
+
+class StreamingUploadHandler(FileUploadHandler):
+    """
+    Streams each file to a temporary file while hashing it, and drops files
+    that break the limits of their field as early as possible.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        limits = field_limits(self.field_name)
+        self.max_size = limits['max_size']
+        self.received = 0
+        self.file = None
+        self.reason = None
+        if limits['types'] is not None and self.content_type not in limits['types']:
+            self.reason = 'type'
+        elif self.content_length and self.content_length > self.max_size:
+            # Declared too large; not worth storing any of it
+            self.reason = 'size'
+        else:
+            self.hash = hashlib.sha256()
+            self.file = TemporaryUploadedFile(
+                self.file_name, self.content_type, 0, self.charset, self.content_type_extra
+            )
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.file is None:
+            return None
+        if self.received > self.max_size:
+            self.reason = 'size'
+            self.discard()
+            return None
+        self.hash.update(raw_data)
+        self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if self.file is None:
+            size = max(file_size, self.received, self.content_length or 0)
+            return RejectedUpload(
+                self.file_name, self.content_type, size, self.reason, self.charset, self.content_type_extra,
+                max_size=self.max_size,
+            )
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.sha256 = self.hash.hexdigest()
+        return self.file
+
+    def discard(self):
+        """Close and remove the temporary file of the current upload"""
+        if getattr(self, 'file', None) is None:
+            return
+        temp_location = self.file.temporary_file_path()
+        try:
+            self.file.close()
+            os.remove(temp_location)
+        except FileNotFoundError:
+            pass
+        self.file = None
+
+    def upload_interrupted(self):
+        self.discard()
@@ -18,7 +18,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from .views import HomePageView, ServiceWorkerView
+from .views import HomePageView, LocalUploadView, ServiceWorkerView
 
 urlpatterns = [
     # Admin interface
@@ -33,6 +33,12 @@ urlpatterns = [
     # Firebase service worker (must be at root for proper scope)
     path('firebase-messaging-sw.js', ServiceWorkerView.as_view(), name='firebase-sw'),
     
+    # Offline worker for the maintainer pages
+    path('maintainer-sw.js', ServiceWorkerView.as_view(script_name='maintainer-sw.js'), name='maintainer-sw'),
+    
+    # Presigned upload endpoint emulated for local media storage
+    path('media-uploads/', LocalUploadView.as_view(), name='local_media_upload'),
+    
     # Core application URLs
     path('core/', include('core.urls')),
     
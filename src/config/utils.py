@@ -1,10 +1,11 @@
 import random
+import shutil
 import string
-from PIL import Image
-from io import BytesIO
-from django.core.files.uploadedfile import InMemoryUploadedFile
+from tempfile import SpooledTemporaryFile
+from PIL import Image, features
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
 from django.core.files.storage import default_storage
-import sys
 
 
 def generate_alphanumeric_filename(original_filename=None, length=16, extension=None):
@@ -66,23 +67,311 @@ def generate_unique_image_filename(upload_path='', length=16, extension='webp',
     raise ValueError(f"Could not generate unique filename after {max_attempts} attempts")
 
 
-def compress_image(image_field, max_width=1920, max_height=1920, quality=85, format='WEBP', upload_path=''):
+# Content type and file extension for each output format
+IMAGE_FORMATS = {
+    'AVIF': ('image/avif', 'avif'),
+    'WEBP': ('image/webp', 'webp'),
+    'JPEG': ('image/jpeg', 'jpg'),
+    'PNG': ('image/png', 'png'),
+}
+
+# Uploads already encoded by the browser are kept as-is only below this size
+# per pixel; a quality-85 WebP photo is typically 0.1-0.3 bytes per pixel
+MAX_PRECOMPRESSED_BYTES_PER_PIXEL = 0.5
+
+# EXIF orientation tag; anything but 1 (upright) needs the pixels rotated
+EXIF_ORIENTATION = 0x0112
+
+
+def is_within_target(img, size, max_width, max_height, format):
+    """
+    Checks from the image header alone whether an upload already matches the target.
+    
+    Browsers running the upload component resize and encode photos before
+    sending them, so these files would only lose quality (and cost CPU) by
+    being decoded and encoded again. Files carrying EXIF or XMP metadata
+    (GPS position, camera, orientation) are re-encoded anyway, which strips
+    it; canvas-encoded files from the browser carry none.
+    
+    Args:
+        img: PIL image opened lazily (only the header has been read)
+        size (int): File size in bytes
+        max_width (int): Maximum width in pixels
+        max_height (int): Maximum height in pixels
+        format (str): Target format ('WEBP', 'JPEG' or 'PNG')
+    
+    Returns:
+        bool: True if the file can be stored unchanged
+    """
+    width, height = img.size
+    return (
+        img.format == format
+        and width <= max_width
+        and height <= max_height
+        and not getattr(img, 'is_animated', False)
+        and not img.getexif()
+        and not any(img.info.get(key) for key in ('exif', 'xmp', 'XML:com.adobe.xmp'))
+        and size <= width * height * MAX_PRECOMPRESSED_BYTES_PER_PIXEL
+    )
+
+
+# Pillow transpose that turns the pixels upright for each EXIF orientation
+EXIF_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+# Images are reduced by an integer factor (JPEG draft decoding or a box
+# reduction) until they are within this many times the target size, and only
+# then resampled; from 2 on the result is indistinguishable from resampling
+# the full image (see Image.thumbnail)
+REDUCING_GAP = 2.0
+
+
+def check_pixel_limit(img):
+    """
+    Refuses images with more pixels than ``IMAGE_MAX_PIXELS`` from the header alone,
+    before anything is decoded.
+    
+    Args:
+        img: PIL image opened lazily
+    
+    Raises:
+        Image.DecompressionBombError: If the image is over the limit
+    """
+    width, height = img.size
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise Image.DecompressionBombError(
+            f"Image of {width}x{height} pixels exceeds the limit of {settings.IMAGE_MAX_PIXELS} pixels"
+        )
+
+
+def pixel_bytes(img):
+    """Memory Pillow holds for an image's pixels (multi-band modes take 4 bytes a pixel)"""
+    if img.mode in ('1', 'L', 'P'):
+        per_pixel = 1
+    elif img.mode.startswith('I;16'):
+        per_pixel = 2
+    else:
+        per_pixel = 4
+    return img.width * img.height * per_pixel
+
+
+def fit_within(width, height, max_width, max_height):
+    """Size of a ``width`` x ``height`` image scaled down to fit the bounds, keeping its aspect ratio"""
+    if width <= max_width and height <= max_height:
+        return width, height
+    scale_factor = min(max_width / width, max_height / height)
+    return max(1, int(width * scale_factor)), max(1, int(height * scale_factor))
+
+
+def decode_image(img, max_width, max_height):
+    """
+    Decodes an image at the smallest scale that still resizes well to the target.
+    
+    JPEGs are decoded by libjpeg directly at 1/2, 1/4 or 1/8 scale (draft mode),
+    so a 48 MP photo for a 1920 px target never exists in memory at full size.
+    Other formats are decoded in full.
+    
+    Args:
+        img: PIL image opened lazily
+        max_width (int): Maximum width of the upright result in pixels
+        max_height (int): Maximum height of the upright result in pixels
+    
+    Returns:
+        tuple: (decoded image, final size in stored orientation, source box for
+        `Image.resize` or None)
+    """
+    # The bounds apply to the upright image; decoding works on the stored one
+    if img.getexif().get(EXIF_ORIENTATION, 1) in (5, 6, 7, 8):
+        max_width, max_height = max_height, max_width
+    final_size = fit_within(img.width, img.height, max_width, max_height)
+    
+    box = None
+    if final_size != img.size:
+        drafted = img.draft(None, (int(final_size[0] * REDUCING_GAP), int(final_size[1] * REDUCING_GAP)))
+        if drafted is not None:
+            # The decoded image is rounded up; the box is the original area in it
+            box = drafted[1]
+    img.load()
+    return img, final_size, box
+
+
+# libavif encoder speed (0 slowest, 10 fastest); on photos 8 is ten times
+# faster than the default of 6 for about the same size
+AVIF_SPEED = 8
+
+# The quality for a byte budget is searched with the fastest encoder settings,
+# which on photos come within a few percent of the final encode's size
+BUDGET_SEARCH_METHOD = 0
+BUDGET_SEARCH_AVIF_SPEED = 10
+
+
+def output_format(format):
+    """The format to encode in: AVIF falls back to WebP when Pillow cannot write it"""
+    if format == 'AVIF' and not features.check('avif'):
+        return 'WEBP'
+    return format
+
+
+class ByteCounter:
+    """Write-only file that keeps nothing but the number of bytes written"""
+    
+    def __init__(self):
+        self.size = 0
+    
+    def write(self, data):
+        self.size += len(data)
+        return len(data)
+    
+    def tell(self):
+        return self.size
+
+
+def spooled_file():
+    """
+    Temporary file for encoded images: in memory up to
+    ``FILE_UPLOAD_MAX_MEMORY_SIZE``, on disk beyond it.
+    """
+    return SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+
+
+def encode_image(img, format, quality, method=6, speed=AVIF_SPEED, output=None):
+    """
+    Encodes a decoded image.
+    
+    Args:
+        img: PIL image in a mode the format supports
+        format (str): 'AVIF', 'WEBP', 'JPEG' or 'PNG'
+        quality (int): Image quality (1-100), ignored for PNG
+        method (int): WebP encoder effort (0-6)
+        speed (int): AVIF encoder speed (0-10)
+        output (optional): File to write to; a new `spooled_file()` by default
+    
+    Returns:
+        The file written to, positioned at the end
+    """
+    output = spooled_file() if output is None else output
+    if format == 'AVIF':
+        img.save(output, format='AVIF', quality=quality, speed=speed)
+    elif format == 'WEBP':
+        img.save(output, format='WEBP', quality=quality, method=method, lossless=False)
+    elif format == 'JPEG':
+        # Pillow's JPEG writer wants a file descriptor, so a spooled file goes to disk
+        img.save(output, format='JPEG', quality=quality, optimize=True)
+    else:  # PNG
+        img.save(output, format='PNG', optimize=True)
+    return output
+
+
+def encode_within_budget(img, format, quality, min_quality, target_bytes, method=6):
+    """
+    Encodes at the highest quality between ``min_quality`` and ``quality``
+    whose output fits in ``target_bytes``.
+    
+    The quality is found by binary search with fast encoder settings, then the
+    image is encoded once at that quality with the requested ones, so the
+    result meets the budget approximately. Simple images such as screenshots
+    fit at ``quality`` after a single trial. Images that do not fit even at
+    ``min_quality`` are encoded at ``min_quality``.
+    
+    Trial encodes are only counted, never kept.
+    
+    Returns:
+        tuple: (file with the encoded image, quality used, number of encodes)
+    """
+    if format == 'PNG' or min_quality >= quality:
+        return encode_image(img, format, quality, method), quality, 1
+    
+    def fits(trial_quality):
+        trial = encode_image(img, format, trial_quality, BUDGET_SEARCH_METHOD, BUDGET_SEARCH_AVIF_SPEED, ByteCounter())
+        return trial.size <= target_bytes
+    
+    encodes = 1
+    if fits(quality):
+        chosen = quality
+    else:
+        chosen, low, high = min_quality, min_quality, quality - 1
+        while low <= high:
+            middle = (low + high) // 2
+            encodes += 1
+            if fits(middle):
+                chosen = middle
+                low = middle + 1
+            else:
+                high = middle - 1
+    return encode_image(img, format, chosen, method), chosen, encodes + 1
+
+
+def compress_image(image_field, max_width=1920, max_height=1920, quality=85, format='WEBP', upload_path='',
+                   method=6, resample=Image.Resampling.LANCZOS, target_bytes=None, min_quality=None, stats=None):
     """
     Compresses an image while maintaining aspect ratio and renames it with unique alphanumeric name.
+    Images that are already in the target format and bounds (see `is_within_target`)
+    are only renamed.
+    
+    The image is decoded at a reduced scale where the format allows it (see
+    `decode_image`) and turned upright following its EXIF orientation.
     
     Args:
         image_field: Django ImageField instance
         max_width (int): Maximum width in pixels. Defaults to 1920.
         max_height (int): Maximum height in pixels. Defaults to 1920.
         quality (int): Image quality (1-100). Defaults to 85.
-        format (str): Output format ('WEBP', 'JPEG', or 'PNG'). Defaults to 'WEBP'.
+        format (str): Output format ('AVIF', 'WEBP', 'JPEG', or 'PNG'). Defaults to 'WEBP'.
+            AVIF falls back to WebP where Pillow cannot encode it.
         upload_path (str): The upload path where file will be stored (for uniqueness check). Defaults to ''.
+        method (int): WebP encoder effort (0-6, slower is smaller). Defaults to 6.
+        resample: Resampling filter for resizing. Defaults to LANCZOS.
+        target_bytes (int, optional): Byte budget; the quality is lowered (see
+            `encode_within_budget`) until the image fits. Defaults to None.
+        min_quality (int, optional): Lowest quality used to meet ``target_bytes``.
+            Defaults to ``quality``.
+        stats (dict, optional): Filled with the 'source_size' and 'decoded_size'
+            in pixels, 'peak_bytes', the most pixel memory held at once, and
+            the 'quality' used.
     
     Returns:
-        InMemoryUploadedFile: Compressed image file with unique alphanumeric name
+        UploadedFile: Compressed image with unique alphanumeric name, in a
+        spooled temporary file (see `spooled_file`)
+    
+    Raises:
+        Image.DecompressionBombError: If the image has more than ``IMAGE_MAX_PIXELS`` pixels
     """
-    # Open the image
+    stats = {} if stats is None else stats
+    format = output_format(format)
+    
+    # Open the image (reads the header only)
     img = Image.open(image_field)
+    check_pixel_limit(img)
+    stats.update(source_size=img.size, decoded_size=(0, 0), peak_bytes=0, quality=None)
+    
+    if (is_within_target(img, image_field.size, max_width, max_height, format)
+            and (target_bytes is None or image_field.size <= target_bytes)):
+        content_type, file_extension = IMAGE_FORMATS[format]
+        image_field.seek(0)
+        output = spooled_file()
+        shutil.copyfileobj(image_field, output)
+        size = output.tell()
+        output.seek(0)
+        new_name = generate_unique_image_filename(upload_path=upload_path, extension=file_extension)
+        return UploadedFile(output, new_name, content_type, size)
+    
+    orientation = img.getexif().get(EXIF_ORIENTATION, 1)
+    img, final_size, box = decode_image(img, max_width, max_height)
+    stats['decoded_size'] = img.size
+    
+    def replace(current, new):
+        # Both images are alive until the new one replaces the current one
+        stats['peak_bytes'] = max(stats['peak_bytes'], pixel_bytes(current) + pixel_bytes(new))
+        return new
+    
+    stats['peak_bytes'] = pixel_bytes(img)
     
     # Convert to RGB if needed (WebP supports RGBA, but JPEG doesn't)
     if format == 'JPEG' and img.mode in ('RGBA', 'LA', 'P'):
@@ -91,62 +380,84 @@ def compress_image(image_field, max_width=1920, max_height=1920, quality=85, for
         if img.mode == 'P':
             img = img.convert('RGBA')
         background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-        img = background
-    elif format == 'WEBP' and img.mode == 'P':
-        # Convert palette mode to RGBA for WebP
-        img = img.convert('RGBA')
-    elif format not in ('WEBP', 'PNG') and img.mode not in ('RGB', 'RGBA'):
-        img = img.convert('RGB')
-    
-    # Get original dimensions
-    width, height = img.size
+        img = replace(img, background)
+    elif format in ('WEBP', 'AVIF') and img.mode == 'P':
+        # Convert palette mode to RGBA for WebP and AVIF
+        img = replace(img, img.convert('RGBA'))
+    elif format not in ('WEBP', 'AVIF', 'PNG') and img.mode not in ('RGB', 'RGBA'):
+        img = replace(img, img.convert('RGB'))
     
-    # Calculate new dimensions while maintaining aspect ratio
-    if width > max_width or height > max_height:
-        # Calculate scaling factor
-        width_ratio = max_width / width
-        height_ratio = max_height / height
-        scale_factor = min(width_ratio, height_ratio)
-        
-        new_width = int(width * scale_factor)
-        new_height = int(height * scale_factor)
-        
-        # Resize image with high-quality resampling
-        img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+    # Resize image with high-quality resampling, box-reducing large images first
+    if img.size != final_size:
+        img = replace(img, img.resize(final_size, resample, box=box, reducing_gap=REDUCING_GAP))
     
-    # Save to BytesIO object
-    output = BytesIO()
+    # Turn upright after resizing, when there are fewer pixels to move
+    if orientation in EXIF_TRANSPOSE:
+        img = replace(img, img.transpose(EXIF_TRANSPOSE[orientation]))
     
     # Save with compression based on format
-    if format == 'WEBP':
-        img.save(output, format='WEBP', quality=quality, method=6, lossless=False)
-        content_type = 'image/webp'
-        file_extension = 'webp'
-    elif format == 'JPEG':
-        img.save(output, format='JPEG', quality=quality, optimize=True)
-        content_type = 'image/jpeg'
-        file_extension = 'jpg'
-    else:  # PNG
-        img.save(output, format='PNG', optimize=True)
-        content_type = 'image/png'
-        file_extension = 'png'
+    if target_bytes:
+        output, stats['quality'], stats['encodes'] = encode_within_budget(
+            img, format, quality, quality if min_quality is None else min_quality, target_bytes, method,
+        )
+    else:
+        output, stats['quality'] = encode_image(img, format, quality, method), quality
+    content_type, file_extension = IMAGE_FORMATS[format]
     
+    size = output.tell()
     output.seek(0)
     
     # Generate UNIQUE alphanumeric filename by checking storage
     new_name = generate_unique_image_filename(upload_path=upload_path, extension=file_extension)
     
-    # Create InMemoryUploadedFile
-    compressed_image = InMemoryUploadedFile(
-        output,
-        'ImageField',
-        new_name,
-        content_type,
-        sys.getsizeof(output),
-        None
-    )
+    return UploadedFile(output, new_name, content_type, size)
+
+
+def compression_profile(name):
+    """
+    Settings for compress_image from a named profile in ``IMAGE_COMPRESSION_PROFILES``.
+    
+    Profiles give 'max_width', 'max_height', 'quality' and optionally
+    'format' (``IMAGE_FORMAT`` by default), 'target_bytes' and 'min_quality'.
+    When the format is AVIF, 'avif_quality' and 'avif_min_quality' replace
+    the WebP quality levels, as the two scales differ.
+    
+    Args:
+        name (str): Profile name, e.g. 'issue_photo'
+    
+    Returns:
+        dict: Keyword arguments for `compress_image`
+    
+    Raises:
+        KeyError: If there is no such profile
+    """
+    profile = settings.IMAGE_COMPRESSION_PROFILES[name]
+    format = output_format(profile.get('format', settings.IMAGE_FORMAT))
+    prefix = 'avif_' if format == 'AVIF' else ''
+    return {
+        'max_width': profile['max_width'],
+        'max_height': profile['max_height'],
+        'format': format,
+        'quality': profile.get(f'{prefix}quality', profile['quality']),
+        'min_quality': profile.get(f'{prefix}min_quality', profile.get('min_quality')),
+        'target_bytes': profile.get('target_bytes'),
+    }
+
+
+def compress_with_profile(image_field, profile, upload_path='', stats=None):
+    """
+    Compresses an image with a named profile (see `compression_profile`).
     
-    return compressed_image
+    Args:
+        image_field: Django ImageField instance
+        profile (str): Name of a profile in ``IMAGE_COMPRESSION_PROFILES``
+        upload_path (str): The upload path where file will be stored (for uniqueness check)
+        stats (dict, optional): Passed to `compress_image`
+    
+    Returns:
+        UploadedFile: Compressed image file with unique alphanumeric name
+    """
+    return compress_image(image_field, upload_path=upload_path, stats=stats, **compression_profile(profile))
 
 
 def generate_unique_slug(instance, base_slug, max_length=50):
@@ -165,7 +476,7 @@ def generate_unique_slug(instance, base_slug, max_length=50):
         str: A unique slug in the format "{truncated_base_slug}-{unique_code}".
     
     Raises:
-        AttributeError: If the model class does not have a `objects.filter` method
+        AttributeError: If the model class does not have a `_base_manager.filter` method
             to query the database.
     """
     def generate_code():
@@ -182,7 +493,7 @@ def generate_unique_slug(instance, base_slug, max_length=50):
     model_class = instance.__class__
     
     # Ensure the generated slug doesn't exceed max_length
-    while len(slug) > max_length or model_class.objects.filter(slug=slug).exists():
+    while len(slug) > max_length or model_class._base_manager.filter(slug=slug).exists():
         code = generate_code()
         slug = f"{base_slug}-{code}"
         
@@ -208,13 +519,14 @@ def generate_unique_code(model, no_of_char=6, unique_field='id'):
     Notes:
         - The function generates random codes consisting of lowercase letters and digits.
         - It checks the database to ensure the generated code does not already exist in the specified field.
-        - The function assumes the model has a manager named 'objects' and supports the 'filter' and 'exists' methods.
+        - Uniqueness is checked through the model's base manager so rows hidden by the
+          default manager (e.g. pending deletion) are still taken into account.
     """
     def generate_code():
         return ''.join(random.choices(string.ascii_lowercase + string.digits, k=no_of_char))
     
     code = generate_code()
     filter_kwargs = {unique_field: code}
-    while model.objects.filter(**filter_kwargs).exists():
+    while model._base_manager.filter(**filter_kwargs).exists():
         code = generate_code()
     return code
\ No newline at end of file
@@ -0,0 +1,93 @@
+"""
+Change-version counters for cache invalidation.
+
+A scope is a short string naming a set of data, such as ``issue:12:tasks``.
+Signals call `bump()` whenever something in a scope changes, and readers
+build cache keys and ETags from `get_versions()`, so a stale cache entry is
+never read again and simply expires.
+
+The page-level scopes follow the role inboxes: everything of an
+organization, of a space, of one issue and of one user's own lists.
+
+Counters live in the default cache. When a counter is missing (first use or
+evicted) it is seeded from the clock rather than from zero, so a reset can
+never bring back a version number that an old cache entry was stored under.
+"""
+
+import time
+
+from django.core.cache import cache
+
+KEY_PREFIX = 'version:'
+
+
+def org_scope(org_id):
+    return f'org:{org_id}'
+
+
+def space_scope(space_id):
+    return f'space:{space_id}'
+
+
+def issue_scope(issue_slug):
+    # Keyed by slug so detail views can check it before loading the issue
+    return f'issue:{issue_slug}'
+
+
+def user_scope(user_id):
+    return f'user:{user_id}'
+
+
+def issue_page_scopes(issue, user_ids=()):
+    """Scopes of the pages that show ``issue``: its detail page and the inboxes listing it"""
+    scopes = [issue_scope(issue.slug), org_scope(issue.org_id)]
+    if issue.space_id:
+        scopes.append(space_scope(issue.space_id))
+    scopes.extend(user_scope(user_id) for user_id in sorted({issue.assigned_to_id, *user_ids} - {None}))
+    return scopes
+
+
+def _key(scope):
+    return f'{KEY_PREFIX}{scope}'
+
+
+def _seed():
+    return time.time_ns()
+
+
+def get_versions(*scopes):
+    """
+    Return the current version of every scope.
+
+    Args:
+        *scopes: Scope names
+
+    Returns:
+        dict: ``{scope: version}``
+    """
+    keys = {_key(scope): scope for scope in scopes}
+    found = cache.get_many(list(keys))
+    versions = {}
+    for key, scope in keys.items():
+        if key not in found:
+            cache.add(key, _seed(), timeout=None)
+            found[key] = cache.get(key)
+        versions[scope] = found[key]
+    return versions
+
+
+def get_version_token(*scopes):
+    """Combine the versions of ``scopes`` into one string for cache keys and ETags"""
+    versions = get_versions(*scopes)
+    return '.'.join(str(versions[scope]) for scope in scopes)
+
+
+def bump(*scopes):
+    """Mark every scope in ``scopes`` as changed"""
+    for scope in scopes:
+        key = _key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Missing counter: any fresh seed is newer than what readers saw
+            cache.set(key, _seed(), timeout=None)
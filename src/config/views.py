@@ -1,7 +1,11 @@
 from django.views.generic import TemplateView
 from django.views import View
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse
 from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
 import os
 
 class HomePageView(TemplateView):
@@ -9,12 +13,15 @@ class HomePageView(TemplateView):
 
 class ServiceWorkerView(View):
     """
-    Serve the Firebase messaging service worker from the root path.
-    Service workers need to be served from the root to have proper scope.
+    Serve a service worker script (the Firebase messaging worker by default)
+    from the root path. Service workers need to be served from the root to
+    have proper scope.
     """
+    script_name = 'firebase-messaging-sw.js'
+    
     def get(self, request):
         # Path to the service worker file
-        sw_path = os.path.join(settings.BASE_DIR, 'static', 'js', 'firebase-messaging-sw.js')
+        sw_path = os.path.join(settings.BASE_DIR, 'static', 'js', self.script_name)
         
         try:
             with open(sw_path, 'r', encoding='utf-8') as f:
@@ -25,4 +32,33 @@ class ServiceWorkerView(View):
             response['Service-Worker-Allowed'] = '/'
             return response
         except FileNotFoundError:
-            return HttpResponse('Service worker not found', status=404)
\ No newline at end of file
+            return HttpResponse('Service worker not found', status=404)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class LocalUploadView(View):
+    """
+    Stand-in for the object storage POST endpoint when media is stored with
+    `LocalMediaStorage`. Like the real endpoint it is authorised by the
+    signed policy alone and answers 204 when the object is stored.
+    """
+    
+    def post(self, request):
+        if not hasattr(default_storage, 'load_policy'):
+            raise Http404
+        try:
+            policy = default_storage.load_policy(request.POST.get('policy', ''))
+        except signing.BadSignature:
+            return HttpResponse('Invalid or expired policy', status=403)
+        
+        upload = request.FILES.get('file')
+        if (
+            request.POST.get('key') != policy['key']
+            or request.POST.get('Content-Type') != policy['content_type']
+            or upload is None
+            or not 1 <= upload.size <= policy['max_size']
+        ):
+            return HttpResponse('Upload does not match the policy', status=400)
+        
+        default_storage.save(policy['key'], upload)
+        return HttpResponse(status=204)
@@ -30,6 +30,19 @@ class OrganizationAdmin(admin.ModelAdmin):
         qs = super().get_queryset(request)
         return qs.prefetch_related('spaces')
     
+    actions = ['schedule_deletion']
+    
+    def schedule_deletion(self, request, queryset):
+        """Hide the organizations and let the process_deletions worker remove them in chunks"""
+        from issue_management.utils.deletion import schedule_organization_deletion
+        
+        count = 0
+        for organization in queryset:
+            schedule_organization_deletion(organization)
+            count += 1
+        self.message_user(request, f'{count} organization(s) scheduled for background deletion.')
+    schedule_deletion.short_description = 'Schedule selected organizations for background deletion'
+    
     def get_urls(self):
         urls = super().get_urls()
         custom_urls = [
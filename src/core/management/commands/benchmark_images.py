@@ -0,0 +1,82 @@
+import json
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from config.benchmarks.images import IMAGE_MODELS, METHODS, QUALITIES, RESAMPLING, run_benchmarks
+
+
+class Command(BaseCommand):
+    """
+    Compress a fixed image corpus with every combination of WebP method,
+    quality and resampling filter, and report time, memory, size and
+    SSIM/PSNR with a recommended profile per image model as JSON.
+    Runs offline; nothing is written to the database or media storage.
+    """
+    help = 'Benchmark image compression profiles (time, memory, bytes, SSIM/PSNR) and print JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            action='append',
+            choices=sorted(IMAGE_MODELS),
+            help='Image model to recommend a profile for (repeatable). Defaults to all.',
+        )
+        parser.add_argument('--quality', action='append', type=int, help=f'WebP quality (repeatable, default: {QUALITIES})')
+        parser.add_argument('--method', action='append', type=int, help=f'WebP method 0-6 (repeatable, default: {METHODS})')
+        parser.add_argument(
+            '--resample',
+            action='append',
+            choices=['NEAREST', 'BOX', 'BILINEAR', 'HAMMING', 'BICUBIC', 'LANCZOS'],
+            help=f'Resampling filter (repeatable, default: {RESAMPLING})',
+        )
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement; the median time is reported')
+        parser.add_argument(
+            '--min-ssim',
+            type=float,
+            default=0.97,
+            help='Lowest SSIM a recommended profile may reach on any image (default: 0.97)',
+        )
+        parser.add_argument('--large', action='store_true', help='Include a 48 MP photo in the corpus')
+        parser.add_argument('--samples', help='Directory of real images to add to the corpus')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+        if any(not 0 <= method <= 6 for method in options['method'] or ()):
+            raise CommandError('--method must be between 0 and 6')
+        if any(not 1 <= quality <= 100 for quality in options['quality'] or ()):
+            raise CommandError('--quality must be between 1 and 100')
+        if options['samples'] and not os.path.isdir(options['samples']):
+            raise CommandError(f"{options['samples']} is not a directory")
+
+        # compress_image checks storage for a free file name; keep that local
+        with tempfile.TemporaryDirectory() as media_root, override_settings(
+            MEDIA_ROOT=media_root,
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+        ):
+            report = run_benchmarks(
+                models=options['model'],
+                qualities=options['quality'] or QUALITIES,
+                methods=options['method'] or METHODS,
+                resampling=options['resample'] or RESAMPLING,
+                repeat=options['repeat'],
+                min_ssim=options['min_ssim'],
+                large=options['large'],
+                samples_dir=options['samples'],
+                progress=lambda line: self.stderr.write(line),
+            )
+
+        payload = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(payload)
+            self.stdout.write(self.style.SUCCESS(f"Benchmark report written to {options['output']}"))
+        else:
+            self.stdout.write(payload)
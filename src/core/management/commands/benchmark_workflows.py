@@ -0,0 +1,72 @@
+import json
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from config.benchmarks.workflows import SCENARIOS, run_benchmarks
+
+
+class Command(BaseCommand):
+    """
+    Replay scripted role workflows against a freshly seeded throwaway database
+    and report latency percentiles, queries per request and memory as JSON.
+    """
+    help = 'Benchmark role workflows (p50/p95/p99 latency, queries per request, memory) and print JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            choices=sorted(SCENARIOS),
+            help='Scenario to run (repeatable). Defaults to every role.',
+        )
+        parser.add_argument('--iterations', type=int, default=10, help='Measured iterations per scenario')
+        parser.add_argument('--warmup', type=int, default=1, help='Unmeasured warmup iterations per scenario')
+        parser.add_argument('--issues', type=int, default=50, help='Number of issues to seed')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Reuse the benchmark database between runs instead of recreating it',
+        )
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1')
+
+        # Never seed the real database: benchmark against a test database and
+        # keep uploaded media in a temporary directory
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            if options['keepdb']:
+                # A kept database still holds the previous run's seed
+                call_command('flush', interactive=False, verbosity=0)
+            with tempfile.TemporaryDirectory() as media_root, override_settings(
+                MEDIA_ROOT=media_root,
+                STORAGES={
+                    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+                },
+            ):
+                report = run_benchmarks(
+                    scenarios=options['scenario'],
+                    iterations=options['iterations'],
+                    issue_count=options['issues'],
+                    warmup=options['warmup'],
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        payload = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(payload)
+            self.stdout.write(self.style.SUCCESS(f"Benchmark report written to {options['output']}"))
+        else:
+            self.stdout.write(payload)
@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.template.defaultfilters import filesizeformat
+from django.utils import timezone
+
+from config.media import delete_files, iter_missing_files, iter_stored_files, referenced_names
+
+
+class Command(BaseCommand):
+    """
+    Find stored files that no ImageField/FileField references (orphans) and,
+    optionally, rows whose file no longer exists in storage (dangling rows).
+
+    The storage listing is streamed and compared against the database one
+    batch at a time, so memory use depends on --batch-size, not bucket size.
+    """
+    help = 'Report (and optionally delete) orphaned media files in storage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='', help='Only scan names under this prefix, e.g. "public/issue_images/"')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Names compared against the database per batch (default: 1000)')
+        parser.add_argument(
+            '--min-age-hours',
+            type=float,
+            default=24,
+            help='Ignore files newer than this, as their rows may not be committed yet (default: 24)',
+        )
+        parser.add_argument('--delete', action='store_true', help='Delete orphaned files in batches')
+        parser.add_argument('--check-missing', action='store_true', help='Also report rows whose file is missing (one existence check per file)')
+        parser.add_argument('--output', help='Write orphaned file names to this file, one per line')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        cutoff = timezone.now() - timedelta(hours=options['min_age_hours'])
+        output = open(options['output'], 'w') if options['output'] else None
+
+        scanned = orphans = orphan_bytes = deleted = 0
+        batch = {}
+
+        def flush(batch):
+            nonlocal orphans, orphan_bytes, deleted
+            referenced = referenced_names(list(batch))
+            orphaned = [name for name in batch if name not in referenced]
+            for name in orphaned:
+                orphan_bytes += batch[name]
+                if output:
+                    output.write(f'{name}\n')
+                elif options['verbosity'] > 1:
+                    self.stdout.write(f'Orphan: {name}')
+            orphans += len(orphaned)
+            if options['delete'] and orphaned:
+                deleted += delete_files(orphaned)
+
+        try:
+            for name, size, modified in iter_stored_files(prefix=options['prefix']):
+                scanned += 1
+                if modified > cutoff:
+                    continue
+                batch[name] = size
+                if len(batch) >= batch_size:
+                    flush(batch)
+                    batch = {}
+            if batch:
+                flush(batch)
+        finally:
+            if output:
+                output.close()
+
+        self.stdout.write(f'Scanned {scanned} stored file(s)')
+        self.stdout.write(f'Found {orphans} orphaned file(s) using {filesizeformat(orphan_bytes)}')
+        if options['delete']:
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} orphaned file(s)'))
+
+        if options['check_missing']:
+            missing = 0
+            for model, pk, field_name, name in iter_missing_files():
+                missing += 1
+                self.stdout.write(f'Missing: {model._meta.label}(pk={pk}).{field_name} -> {name}')
+            self.stdout.write(f'Found {missing} row(s) pointing at missing files')
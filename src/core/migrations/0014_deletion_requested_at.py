@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-19 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_user_fcm_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organization',
+            name='deletion_requested_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, help_text='Set when the organization is scheduled for background deletion', null=True),
+        ),
+        migrations.AddField(
+            model_name='space',
+            name='deletion_requested_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, help_text='Set when the space is scheduled for background deletion', null=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-19 10:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_deletion_requested_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserWorkloadStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='workload_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('reported_total', models.PositiveIntegerField(default=0)),
+                ('reported_resolved', models.PositiveIntegerField(default=0)),
+                ('assigned_open', models.PositiveIntegerField(default=0)),
+                ('assigned_assigned', models.PositiveIntegerField(default=0)),
+                ('assigned_in_progress', models.PositiveIntegerField(default=0)),
+                ('assigned_resolved', models.PositiveIntegerField(default=0)),
+                ('assigned_escalated', models.PositiveIntegerField(default=0)),
+                ('assigned_closed', models.PositiveIntegerField(default=0)),
+                ('assigned_cancelled', models.PositiveIntegerField(default=0)),
+                ('open_tasks', models.PositiveIntegerField(default=0, help_text='Incomplete work tasks assigned to the user')),
+                ('open_visits', models.PositiveIntegerField(default=0, help_text='Scheduled or in-progress site visits assigned to the user')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'user workload stats',
+            },
+        ),
+    ]
@@ -406,12 +406,27 @@ class User(AbstractBaseUser, PermissionsMixin):
 
 
 
+class PendingDeletionExcludedManager(models.Manager):
+    """
+    Default manager for models that are deleted in the background.
+    Rows scheduled for deletion are hidden everywhere except through
+    the `all_objects` manager used by the deletion worker.
+    """
+    
+    def get_queryset(self):
+        return super().get_queryset().filter(deletion_requested_at__isnull=True)
+
+
 class Organization(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
     address_line_one = models.CharField(max_length=255, blank=True, null=True)
     address_line_two = models.CharField(max_length=255, blank=True, null=True)
     slug = models.SlugField(unique=True, blank=True)
+    deletion_requested_at = models.DateTimeField(blank=True, null=True, db_index=True, editable=False, help_text="Set when the organization is scheduled for background deletion")
+    
+    objects = PendingDeletionExcludedManager()
+    all_objects = models.Manager()
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -429,6 +444,10 @@ class Space(models.Model):
     description = models.TextField(blank=True, null=True)
     org = models.ForeignKey(Organization, related_name='spaces', on_delete=models.CASCADE)
     slug = models.SlugField(unique=True, blank=True)
+    deletion_requested_at = models.DateTimeField(blank=True, null=True, db_index=True, editable=False, help_text="Set when the space is scheduled for background deletion")
+    
+    objects = PendingDeletionExcludedManager()
+    all_objects = models.Manager()
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -458,3 +477,38 @@ class Update(models.Model):
     
     def __str__(self):
         return self.title
+
+
+class UserWorkloadStats(models.Model):
+    """
+    Denormalised issue counters for one user, kept current by the issue,
+    work task and site visit signals (see `issue_management.utils.workload`)
+    and rebuilt nightly by the `reconcile_workload_stats` command.
+    """
+    user = models.OneToOneField(User, primary_key=True, related_name='workload_stats', on_delete=models.CASCADE)
+    reported_total = models.PositiveIntegerField(default=0)
+    reported_resolved = models.PositiveIntegerField(default=0)
+    assigned_open = models.PositiveIntegerField(default=0)
+    assigned_assigned = models.PositiveIntegerField(default=0)
+    assigned_in_progress = models.PositiveIntegerField(default=0)
+    assigned_resolved = models.PositiveIntegerField(default=0)
+    assigned_escalated = models.PositiveIntegerField(default=0)
+    assigned_closed = models.PositiveIntegerField(default=0)
+    assigned_cancelled = models.PositiveIntegerField(default=0)
+    open_tasks = models.PositiveIntegerField(default=0, help_text="Incomplete work tasks assigned to the user")
+    open_visits = models.PositiveIntegerField(default=0, help_text="Scheduled or in-progress site visits assigned to the user")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'user workload stats'
+
+    @property
+    def assigned_total(self):
+        return (
+            self.assigned_open + self.assigned_assigned + self.assigned_in_progress
+            + self.assigned_resolved + self.assigned_escalated + self.assigned_closed
+            + self.assigned_cancelled
+        )
+
+    def __str__(self):
+        return f"Workload stats for {self.user}"
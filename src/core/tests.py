@@ -1,3 +1,48 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import StringIO
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.models import Organization
+from issue_management.models import Issue, IssueImage
+from issue_management.testing import create_member
+
+
+class ReconcileMediaCommandTests(TestCase):
+    """Test the orphaned media scanner"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+        org = Organization.objects.create(name='Test Org')
+        user = create_member(org)
+        issue = Issue.objects.create(title='Leak', description='Leak', reporter=user, org=org)
+        self.kept = default_storage.save('public/issue_images/kept.webp', ContentFile(b'kept'))
+        self.orphan = default_storage.save('public/issue_images/orphan.webp', ContentFile(b'orphan'))
+        IssueImage.objects.bulk_create([IssueImage(issue=issue, image=self.kept, slug='kept')])
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_reports_orphans_without_deleting(self):
+        out = StringIO()
+        call_command('reconcile_media', '--min-age-hours=0', '--batch-size=1', stdout=out)
+        self.assertIn('Found 1 orphaned file(s)', out.getvalue())
+        self.assertTrue(default_storage.exists(self.orphan))
+
+    def test_deletes_orphans(self):
+        call_command('reconcile_media', '--min-age-hours=0', '--delete', stdout=StringIO())
+        self.assertFalse(default_storage.exists(self.orphan))
+        self.assertTrue(default_storage.exists(self.kept))
+
+    def test_recent_files_are_skipped(self):
+        out = StringIO()
+        call_command('reconcile_media', stdout=out)
+        self.assertIn('Found 0 orphaned file(s)', out.getvalue())
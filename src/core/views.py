@@ -30,6 +30,7 @@ from .forms import (
 from .models import Update, User, Space
 from django.views.generic import ListView, CreateView, TemplateView, DetailView, UpdateView, DeleteView
 from config.mixins.access_mixin import CentralAdminOnlyAccessMixin, RedirectLoggedinUsers
+from config.mixins.idempotency_mixin import IdempotentPostMixin
 
 
 class CustomPasswordResetView(auth_views.PasswordResetView):
@@ -75,25 +76,37 @@ class PeopleListView(CentralAdminOnlyAccessMixin, ListView):
     template_name = 'core/people_list.html'
     context_object_name = 'users'
 
+    paginate_by = 24
+
     def get_queryset(self):
-        from django.db.models import Count, Q
-        # Filter users by the central admin's organization and only show active users
+        from django.db.models import Value
+        from django.db.models.functions import Coalesce
+        # Filter users by the central admin's organization and only show active users.
+        # Issue counts come from the precomputed workload stats instead of aggregating issues.
         admin_organization = self.request.user.organization
+
+        def stat(field):
+            return Coalesce(f'workload_stats__{field}', Value(0))
+
         return User.objects.filter(
             organization=admin_organization,
             is_active=True
         ).select_related('organization').prefetch_related('spaces').annotate(
-            total_reported_issues=Count('reported_issues', distinct=True),
-            total_assigned_issues=Count('assigned_issues', distinct=True),
-            resolved_reported_issues_count=Count('reported_issues', filter=Q(reported_issues__status='resolved'), distinct=True),
-            open_issues_count=Count('assigned_issues', filter=Q(assigned_issues__status='open'), distinct=True),
-            in_progress_issues_count=Count('assigned_issues', filter=Q(assigned_issues__status='in_progress'), distinct=True),
-            resolved_issues_count=Count('assigned_issues', filter=Q(assigned_issues__status='resolved'), distinct=True),
-            closed_issues_count=Count('assigned_issues', filter=Q(assigned_issues__status='closed'), distinct=True),
-        ).order_by('first_name', 'last_name')
+            total_reported_issues=stat('reported_total'),
+            total_assigned_issues=(
+                stat('assigned_open') + stat('assigned_assigned') + stat('assigned_in_progress')
+                + stat('assigned_resolved') + stat('assigned_escalated') + stat('assigned_closed')
+                + stat('assigned_cancelled')
+            ),
+            resolved_reported_issues_count=stat('reported_resolved'),
+            open_issues_count=stat('assigned_open'),
+            in_progress_issues_count=stat('assigned_in_progress'),
+            resolved_issues_count=stat('assigned_resolved'),
+            closed_issues_count=stat('assigned_closed'),
+        ).order_by('first_name', 'last_name', 'pk')
     
 
-class PeopleCreateView(CentralAdminOnlyAccessMixin, CreateView):
+class PeopleCreateView(CentralAdminOnlyAccessMixin, IdempotentPostMixin, CreateView):
     """
     View to create a new user with role-specific forms
     """
@@ -281,6 +294,8 @@ class SetPinView(FormView):
             return 'issue_management:maintainer:work_task_list'
         elif user.is_reviewer:
             return 'issue_management:reviewer:issue_list'
+        elif user.is_general_user:
+            return 'issue_management:general_user:issue_report'
         else:
             return 'home'
     
@@ -352,7 +367,7 @@ class UpdateListView(ListView):
         return Update.objects.all().order_by('-created_at')
 
 
-class SpaceCreateView(CentralAdminOnlyAccessMixin, CreateView):
+class SpaceCreateView(CentralAdminOnlyAccessMixin, IdempotentPostMixin, CreateView):
     """
     View to create a new space
     """
@@ -494,51 +509,31 @@ class SpaceDeleteView(CentralAdminOnlyAccessMixin, DeleteView):
     success_url = reverse_lazy('core:space_list')
 
     def get_queryset(self):
-        return Space.objects.select_related('org').prefetch_related(
-            'users', 
-            'issues__images', 
-            'issues__comments', 
-            'issues__work_tasks__shares'
-        )
+        return Space.objects.select_related('org')
 
-    def delete(self, request, *args, **kwargs):
-        """Override delete to add success message and handle related objects"""
-        self.object = self.get_object()
-        space_name = self.object.name
-        
-        # Clear active_space for all users who have this space selected
-        User.objects.filter(active_space=self.object).update(active_space=None)
+    def form_valid(self, form):
+        """Schedule the space for background deletion instead of cascading in the request"""
+        from issue_management.utils.deletion import schedule_space_deletion
         
-        # Django's CASCADE will automatically delete:
-        # - Issues (related via space)
-        # - IssueImage instances (related via issues)
-        # - IssueComment instances (related via issues)
-        # - WorkTask instances (related via issues)
-        # - WorkTaskShare instances (related via work_tasks)
+        space_name = self.object.name
         
-        success_url = self.get_success_url()
-        self.object.delete()
+        # Hide the space right away and clear it as the active space of its users.
+        # The process_deletions worker removes issues, images, comments, work tasks
+        # and shares in small chunks and deletes the stored files in batches.
+        schedule_space_deletion(self.object)
         
-        messages.success(request, f'Space "{space_name}" and all its related data have been permanently deleted.')
+        messages.success(self.request, f'Space "{space_name}" has been scheduled for deletion. Its related data is being removed in the background.')
         
-        return redirect(success_url)
+        return redirect(self.get_success_url())
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Add counts of related objects that will be deleted
-        from issue_management.models import WorkTask
-        
-        issues = self.object.issues.all()
-        all_work_tasks = WorkTask.objects.filter(issue__in=issues)
-        
-        context['related_counts'] = {
-            'users': self.object.users.count(),
-            'issues': issues.count(),
-            'images': sum(issue.images.count() for issue in issues),
-            'comments': sum(issue.comments.count() for issue in issues),
-            'work_tasks': all_work_tasks.count(),
-            'work_task_shares': sum(task.shares.count() for task in all_work_tasks),
-        }
+        # Add counts of related objects that will be deleted (one aggregate query per model)
+        from issue_management.utils.cascade import space_cascade_impact
+        
+        related_counts = space_cascade_impact(self.object)
+        related_counts['users'] = self.object.users.count()
+        context['related_counts'] = related_counts
         return context
 
 
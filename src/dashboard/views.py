@@ -6,6 +6,8 @@ from django.views.generic import TemplateView
 
 from issue_management.models import Issue, WorkTask
 from config.mixins.access_mixin import CentralAdminOnlyAccessMixin, SpaceAdminOnlyAccessMixin, SpaceAdminWithActiveSpaceMixin
+from config.mixins.conditional_mixin import ConditionalGetMixin
+from config.versions import org_scope, space_scope
 
 
 class DashboardDataMixin:
@@ -285,9 +287,12 @@ class DashboardDataMixin:
         return context
 
 
-class CentralAdminDashboardView(CentralAdminOnlyAccessMixin, DashboardDataMixin, TemplateView):
+class CentralAdminDashboardView(CentralAdminOnlyAccessMixin, ConditionalGetMixin, DashboardDataMixin, TemplateView):
     template_name = 'central_admin/dashboard.html'
 
+    def get_version_scopes(self):
+        return [org_scope(self.request.user.organization_id)]
+
     def get_issue_list_route_name(self):
         return 'issue_management:central_admin:issue_list'
 
@@ -295,9 +300,12 @@ class CentralAdminDashboardView(CentralAdminOnlyAccessMixin, DashboardDataMixin,
         return 'issue_management:central_admin:issue_detail'
 
 
-class SpaceAdminDashboardView(SpaceAdminWithActiveSpaceMixin, DashboardDataMixin, TemplateView):
+class SpaceAdminDashboardView(SpaceAdminWithActiveSpaceMixin, ConditionalGetMixin, DashboardDataMixin, TemplateView):
     template_name = 'space_admin/dashboard.html'
 
+    def get_version_scopes(self):
+        return [space_scope(self.request.user.active_space_id)]
+
     def get_issue_list_route_name(self):
         return 'issue_management:space_admin:issue_list'
 
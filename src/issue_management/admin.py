@@ -5,8 +5,10 @@ from django.utils.safestring import mark_safe
 from .models import (
     Issue, IssueImage, IssueComment, WorkTask, WorkTaskResolutionImage, 
     WorkTaskShare, SiteVisit, SiteVisitImage, IssueReviewComment, IssueReviewCommentImage,
-    IssueActivity, PurchaseRequest, ShoppingList, ShoppingListItem
+    IssueActivity, PurchaseRequest, ShoppingList, ShoppingListItem, IdempotencyKey,
+    DirectUpload
 )
+from .utils import lifecycle
 
 
 class IssueImageInline(admin.TabularInline):
@@ -53,7 +55,7 @@ class IssueAdmin(admin.ModelAdmin):
             'fields': ('org', 'space')
         }),
         ('Media', {
-            'fields': ('voice', 'voice_player'),
+            'fields': ('voice', 'voice_player', 'voice_duration', 'voice_processed'),
             'classes': ('collapse',)
         }),
         ('Timestamps', {
@@ -62,7 +64,7 @@ class IssueAdmin(admin.ModelAdmin):
         }),
     )
     
-    readonly_fields = ['created_at', 'updated_at', 'voice_player']
+    readonly_fields = ['created_at', 'updated_at', 'voice_player', 'voice_duration', 'voice_processed']
     
     inlines = [IssueImageInline, IssueCommentInline]
     
@@ -82,8 +84,9 @@ class IssueAdmin(admin.ModelAdmin):
     def voice_player(self, obj):
         if obj.voice:
             return format_html(
-                '<audio controls style="width: 300px;"><source src="{}" type="audio/mpeg">Your browser does not support the audio element.</audio>',
-                obj.voice.url
+                '<audio controls preload="none" style="width: 300px;"><source src="{}" type="{}">Your browser does not support the audio element.</audio>',
+                obj.voice.url,
+                obj.voice_content_type
             )
         return 'No voice recording'
     voice_player.short_description = 'Voice Player'
@@ -94,19 +97,21 @@ class IssueAdmin(admin.ModelAdmin):
     
     actions = ['mark_as_resolved', 'mark_as_closed', 'mark_as_in_progress']
     
+    # Through the lifecycle, so the changes are recorded as activities and
+    # issues whose status does not allow the change are left alone
     def mark_as_resolved(self, request, queryset):
-        updated = queryset.update(status='resolved')
-        self.message_user(request, f'{updated} issues marked as resolved.')
+        updated = lifecycle.resolve(queryset, request.user)
+        self.message_user(request, f'{len(updated)} issues marked as resolved.')
     mark_as_resolved.short_description = 'Mark selected issues as resolved'
     
     def mark_as_closed(self, request, queryset):
-        updated = queryset.update(status='closed')
-        self.message_user(request, f'{updated} issues marked as closed.')
+        updated = lifecycle.close(queryset, request.user)
+        self.message_user(request, f'{len(updated)} issues marked as closed.')
     mark_as_closed.short_description = 'Mark selected issues as closed'
     
     def mark_as_in_progress(self, request, queryset):
-        updated = queryset.update(status='in_progress')
-        self.message_user(request, f'{updated} issues marked as in progress.')
+        updated = lifecycle.start_work(queryset, request.user)
+        self.message_user(request, f'{len(updated)} issues marked as in progress.')
     mark_as_in_progress.short_description = 'Mark selected issues as in progress'
 
 
@@ -702,3 +707,23 @@ class ShoppingListItemAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         qs = super().get_queryset(request)
         return qs.select_related('shopping_list', 'purchase_request')
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ['key', 'action', 'user', 'created_at']
+    list_filter = ['action', 'created_at']
+    search_fields = ['key', 'user__email']
+    readonly_fields = ['user', 'key', 'action', 'response', 'created_at']
+    date_hierarchy = 'created_at'
+    ordering = ['-created_at']
+
+
+@admin.register(DirectUpload)
+class DirectUploadAdmin(admin.ModelAdmin):
+    list_display = ['key', 'target', 'status', 'user', 'size', 'created_at']
+    list_filter = ['target', 'status', 'created_at']
+    search_fields = ['key', 'parent_slug', 'user__email']
+    readonly_fields = ['user', 'target', 'parent_slug', 'key', 'content_type', 'size', 'object_id', 'created_at', 'completed_at', 'processed_at']
+    date_hierarchy = 'created_at'
+    ordering = ['-created_at']
@@ -1,18 +1,35 @@
 from config.mixins.form_mixin import BootstrapFormMixin
+from config.upload_handlers import validate_accepted_upload
+from config.utils import check_pixel_limit
 from django import forms
+from PIL import Image
 from .models import Issue, WorkTask, IssueComment, SiteVisit, IssueReviewComment, PurchaseRequest
+from .utils.bulk_actions import ACTION_CHOICES
+
+
+def validate_pixel_count(image):
+    """Refuse an uploaded image with too many pixels to decode safely, from its header alone"""
+    try:
+        check_pixel_limit(Image.open(image))
+    except Image.DecompressionBombError:
+        raise forms.ValidationError(f"Image '{image.name}' has too many pixels. Please upload a smaller photo.")
+    except OSError:
+        raise forms.ValidationError(f"Image '{image.name}' could not be read. Please upload a valid image.")
+    finally:
+        image.seek(0)
+
 
 class IssueForm(BootstrapFormMixin, forms.ModelForm):
     # Add image fields for up to 3 images
-    image1 = forms.ImageField(required=False, widget=forms.FileInput(attrs={
+    image1 = forms.ImageField(required=False, validators=[validate_pixel_count], widget=forms.FileInput(attrs={
         'class': 'form-control',
         'accept': 'image/*'
     }))
-    image2 = forms.ImageField(required=False, widget=forms.FileInput(attrs={
+    image2 = forms.ImageField(required=False, validators=[validate_pixel_count], widget=forms.FileInput(attrs={
         'class': 'form-control',
         'accept': 'image/*'
     }))
-    image3 = forms.ImageField(required=False, widget=forms.FileInput(attrs={
+    image3 = forms.ImageField(required=False, validators=[validate_pixel_count], widget=forms.FileInput(attrs={
         'class': 'form-control',
         'accept': 'image/*'
     }))
@@ -34,6 +51,7 @@ class IssueForm(BootstrapFormMixin, forms.ModelForm):
     def __init__(self, *args, **kwargs):
         self.current_user = kwargs.pop('current_user', None)
         super().__init__(*args, **kwargs)
+        self.fields['voice'].validators.append(validate_accepted_upload)
         # Make space field optional
         self.fields['space'].required = False
         self.fields['space'].empty_label = "Select a space (optional)"
@@ -52,15 +70,15 @@ class SpaceAdminIssueForm(BootstrapFormMixin, forms.ModelForm):
     Excludes the space field since it's auto-assigned from active_space.
     """
     # Add image fields for up to 3 images
-    image1 = forms.ImageField(required=False, widget=forms.FileInput(attrs={
+    image1 = forms.ImageField(required=False, validators=[validate_pixel_count], widget=forms.FileInput(attrs={
         'class': 'form-control',
         'accept': 'image/*'
     }))
-    image2 = forms.ImageField(required=False, widget=forms.FileInput(attrs={
+    image2 = forms.ImageField(required=False, validators=[validate_pixel_count], widget=forms.FileInput(attrs={
         'class': 'form-control',
         'accept': 'image/*'
     }))
-    image3 = forms.ImageField(required=False, widget=forms.FileInput(attrs={
+    image3 = forms.ImageField(required=False, validators=[validate_pixel_count], widget=forms.FileInput(attrs={
         'class': 'form-control',
         'accept': 'image/*'
     }))
@@ -80,6 +98,7 @@ class SpaceAdminIssueForm(BootstrapFormMixin, forms.ModelForm):
         self.current_user = kwargs.pop('current_user', None)
         self.active_space = kwargs.pop('active_space', None)
         super().__init__(*args, **kwargs)
+        self.fields['voice'].validators.append(validate_accepted_upload)
 
     def clean(self):
         cleaned_data = super().clean()
@@ -254,15 +273,15 @@ class MultipleFileField(forms.FileField):
 class WorkTaskCompleteForm(BootstrapFormMixin, forms.ModelForm):
     """Form for completing work tasks - resolution notes and images"""
     # Add image fields for up to 3 images
-    image1 = forms.ImageField(required=False, widget=forms.FileInput(attrs={
+    image1 = forms.ImageField(required=False, validators=[validate_pixel_count], widget=forms.FileInput(attrs={
         'class': 'form-control',
         'accept': 'image/*'
     }))
-    image2 = forms.ImageField(required=False, widget=forms.FileInput(attrs={
+    image2 = forms.ImageField(required=False, validators=[validate_pixel_count], widget=forms.FileInput(attrs={
         'class': 'form-control',
         'accept': 'image/*'
     }))
-    image3 = forms.ImageField(required=False, widget=forms.FileInput(attrs={
+    image3 = forms.ImageField(required=False, validators=[validate_pixel_count], widget=forms.FileInput(attrs={
         'class': 'form-control',
         'accept': 'image/*'
     }))
@@ -289,15 +308,15 @@ class WorkTaskCompleteForm(BootstrapFormMixin, forms.ModelForm):
 class IssueResolveForm(BootstrapFormMixin, forms.ModelForm):
     """Form for resolving issues with resolution notes and images"""
     # Add image fields for up to 3 images
-    image1 = forms.ImageField(required=False, widget=forms.FileInput(attrs={
+    image1 = forms.ImageField(required=False, validators=[validate_pixel_count], widget=forms.FileInput(attrs={
         'class': 'form-control',
         'accept': 'image/*'
     }))
-    image2 = forms.ImageField(required=False, widget=forms.FileInput(attrs={
+    image2 = forms.ImageField(required=False, validators=[validate_pixel_count], widget=forms.FileInput(attrs={
         'class': 'form-control',
         'accept': 'image/*'
     }))
-    image3 = forms.ImageField(required=False, widget=forms.FileInput(attrs={
+    image3 = forms.ImageField(required=False, validators=[validate_pixel_count], widget=forms.FileInput(attrs={
         'class': 'form-control',
         'accept': 'image/*'
     }))
@@ -342,6 +361,22 @@ class IssueCommentForm(BootstrapFormMixin, forms.ModelForm):
         self.fields['comment'].label = ""  # Remove label for cleaner UI
 
 
+def validate_image_upload(image):
+    """Check the size, type and pixel count of one uploaded image"""
+    max_size = 10 * 1024 * 1024  # 10MB per image
+    allowed_types = ['image/jpeg', 'image/png', 'image/gif', 'image/webp']
+    
+    # Check file size
+    if hasattr(image, 'size') and image.size > max_size:
+        raise forms.ValidationError(f"Image '{image.name}' is too large. Maximum size is 10MB.")
+    
+    # Check content type
+    if hasattr(image, 'content_type') and image.content_type not in allowed_types:
+        raise forms.ValidationError(f"Image '{image.name}' has an unsupported format. Please use JPEG, PNG, GIF, or WebP.")
+    
+    validate_pixel_count(image)
+
+
 class AdditionalImageUploadForm(BootstrapFormMixin, forms.Form):
     """Form for uploading additional images to existing issues"""
     images = MultipleFileField(
@@ -374,22 +409,63 @@ class AdditionalImageUploadForm(BootstrapFormMixin, forms.Form):
         if len(images) > max_images:
             raise forms.ValidationError(f"You can upload a maximum of {max_images} images at once.")
         
-        # Validate each image
-        max_size = 10 * 1024 * 1024  # 10MB per image
-        allowed_types = ['image/jpeg', 'image/png', 'image/gif', 'image/webp']
-        
         for image in images:
-            # Check file size
-            if hasattr(image, 'size') and image.size > max_size:
-                raise forms.ValidationError(f"Image '{image.name}' is too large. Maximum size is 10MB.")
-            
-            # Check content type
-            if hasattr(image, 'content_type') and image.content_type not in allowed_types:
-                raise forms.ValidationError(f"Image '{image.name}' has an unsupported format. Please use JPEG, PNG, GIF, or WebP.")
+            validate_image_upload(image)
         
         return images
 
 
+class IssueReportForm(BootstrapFormMixin, forms.ModelForm):
+    """
+    Form for general users reporting an issue from their phone.
+    Photos are optional; ``key`` identifies the submission so a resent
+    form creates the issue only once.
+    """
+    images = MultipleFileField(
+        widget=MultipleFileInput(attrs={
+            'class': 'form-control',
+            'accept': 'image/*',
+            'multiple': True
+        }),
+        required=False
+    )
+    key = forms.CharField(max_length=64, widget=forms.HiddenInput())
+    
+    MAX_IMAGES = 3
+    
+    class Meta:
+        model = Issue
+        fields = ['title', 'description', 'space']
+        widgets = {
+            'description': forms.Textarea(attrs={
+                'rows': 4,
+                'placeholder': 'What is the problem and where exactly is it?'
+            }),
+        }
+    
+    def __init__(self, *args, **kwargs):
+        self.current_user = kwargs.pop('current_user', None)
+        super().__init__(*args, **kwargs)
+        self.fields['images'].label = "Photos"
+        self.fields['space'].required = False
+        self.fields['space'].empty_label = "Select a space (optional)"
+        if self.current_user:
+            self.fields['space'].queryset = self.fields['space'].queryset.filter(
+                org=self.current_user.organization
+            ).order_by('name')
+    
+    def clean_images(self):
+        """Validate uploaded photos"""
+        images = self.cleaned_data.get('images') or []
+        if not isinstance(images, list):
+            images = [images]
+        if len(images) > self.MAX_IMAGES:
+            raise forms.ValidationError(f"You can add a maximum of {self.MAX_IMAGES} photos.")
+        for image in images:
+            validate_image_upload(image)
+        return images
+
+
 class VoiceUploadForm(BootstrapFormMixin, forms.Form):
     """Form for adding voice recording to existing issues"""
     voice = forms.FileField(
@@ -522,6 +598,45 @@ class IssueReviewerSelectionForm(BootstrapFormMixin, forms.Form):
         return reviewers
 
 
+class BulkIssueActionForm(BootstrapFormMixin, forms.Form):
+    """Form for applying one action to several issues selected in an issue list"""
+    
+    issues = forms.ModelMultipleChoiceField(queryset=None, to_field_name='slug')
+    action = forms.ChoiceField(choices=[('', 'Choose an action')] + ACTION_CHOICES)
+    assigned_to = forms.ModelChoiceField(queryset=None, required=False, empty_label="Select a supervisor")
+    priority = forms.ChoiceField(choices=[('', 'Select a priority')] + Issue.PRIORITY_CHOICES, required=False)
+    reviewers = forms.ModelMultipleChoiceField(queryset=None, required=False)
+    
+    # The field each action needs
+    ACTION_FIELDS = {
+        'assign': ('assigned_to', "Select a supervisor to assign the issues to."),
+        'priority': ('priority', "Select the new priority."),
+        'reviewers': ('reviewers', "Select at least one reviewer."),
+    }
+    
+    def __init__(self, *args, **kwargs):
+        # The issues the user may act on, and their organization
+        issues = kwargs.pop('issues')
+        org = kwargs.pop('org')
+        super().__init__(*args, **kwargs)
+        
+        self.fields['issues'].queryset = issues
+        self.fields['issues'].error_messages['required'] = "Select at least one issue."
+        self.fields['assigned_to'].queryset = org.users.filter(user_type='supervisor', is_active=True)
+        self.fields['reviewers'].queryset = org.users.filter(
+            user_type='reviewer',
+            is_active=True
+        ).order_by('first_name', 'last_name')
+    
+    def clean(self):
+        """Require the field the chosen action needs"""
+        cleaned_data = super().clean()
+        field_name, message = self.ACTION_FIELDS.get(cleaned_data.get('action'), (None, None))
+        if field_name and not cleaned_data.get(field_name):
+            self.add_error(field_name, message)
+        return cleaned_data
+
+
 class SiteVisitForm(BootstrapFormMixin, forms.ModelForm):
     """Form for creating site visits - simplified with only essential fields"""
     
@@ -589,15 +704,15 @@ class SiteVisitForm(BootstrapFormMixin, forms.ModelForm):
 class SiteVisitUpdateForm(BootstrapFormMixin, forms.ModelForm):
     """Form for updating site visits (basic info and scheduling)"""
     # Add image fields for adding more images during update
-    image1 = forms.ImageField(required=False, widget=forms.FileInput(attrs={
+    image1 = forms.ImageField(required=False, validators=[validate_pixel_count], widget=forms.FileInput(attrs={
         'class': 'form-control',
         'accept': 'image/*'
     }))
-    image2 = forms.ImageField(required=False, widget=forms.FileInput(attrs={
+    image2 = forms.ImageField(required=False, validators=[validate_pixel_count], widget=forms.FileInput(attrs={
         'class': 'form-control',
         'accept': 'image/*'
     }))
-    image3 = forms.ImageField(required=False, widget=forms.FileInput(attrs={
+    image3 = forms.ImageField(required=False, validators=[validate_pixel_count], widget=forms.FileInput(attrs={
         'class': 'form-control',
         'accept': 'image/*'
     }))
@@ -672,15 +787,15 @@ class SiteVisitUpdateForm(BootstrapFormMixin, forms.ModelForm):
 class SiteVisitCompleteForm(BootstrapFormMixin, forms.ModelForm):
     """Form for completing site visits with findings, actions, and recommendations"""
     # Add image fields for completion images
-    image1 = forms.ImageField(required=False, widget=forms.FileInput(attrs={
+    image1 = forms.ImageField(required=False, validators=[validate_pixel_count], widget=forms.FileInput(attrs={
         'class': 'form-control',
         'accept': 'image/*'
     }))
-    image2 = forms.ImageField(required=False, widget=forms.FileInput(attrs={
+    image2 = forms.ImageField(required=False, validators=[validate_pixel_count], widget=forms.FileInput(attrs={
         'class': 'form-control',
         'accept': 'image/*'
     }))
-    image3 = forms.ImageField(required=False, widget=forms.FileInput(attrs={
+    image3 = forms.ImageField(required=False, validators=[validate_pixel_count], widget=forms.FileInput(attrs={
         'class': 'form-control',
         'accept': 'image/*'
     }))
@@ -727,7 +842,8 @@ class IssueReviewCommentForm(BootstrapFormMixin, forms.ModelForm):
     """Form for adding review comments to issues with optional images"""
     # Add image fields for up to 3 images with explicit IDs
     image1 = forms.ImageField(
-        required=False, 
+        required=False,
+        validators=[validate_pixel_count],
         label='Image 1',
         widget=forms.FileInput(attrs={
             'class': 'form-control',
@@ -737,6 +853,7 @@ class IssueReviewCommentForm(BootstrapFormMixin, forms.ModelForm):
     )
     image2 = forms.ImageField(
         required=False,
+        validators=[validate_pixel_count],
         label='Image 2', 
         widget=forms.FileInput(attrs={
             'class': 'form-control',
@@ -746,6 +863,7 @@ class IssueReviewCommentForm(BootstrapFormMixin, forms.ModelForm):
     )
     image3 = forms.ImageField(
         required=False,
+        validators=[validate_pixel_count],
         label='Image 3', 
         widget=forms.FileInput(attrs={
             'class': 'form-control',
@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class WorkerCommand(BaseCommand):
+    """
+    Base for the background workers. Each run works through one batch with
+    `run_batch`, which returns a stats dict saying whether work is
+    'remaining'. Run from cron with --limit, or as a long-running process
+    with --loop.
+    """
+    # Plural of what the worker works on, for help texts and messages
+    noun = 'items'
+    # Help text of --limit; None when the worker limits its batches otherwise
+    limit_help = 'Stop after this many {noun}; the next run continues where this one stopped'
+    default_sleep = 2.0
+
+    def add_arguments(self, parser):
+        if self.limit_help:
+            parser.add_argument('--limit', type=int, help=self.limit_help.format(noun=self.noun))
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help=f'Keep polling for new {self.noun} instead of exiting when done',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=self.default_sleep,
+            help=f'Seconds to wait between polls when --loop is set (default: {self.default_sleep:g})',
+        )
+
+    def run_batch(self, options):
+        """Work through one batch and return its stats"""
+        raise NotImplementedError
+
+    def report(self, stats):
+        """Write what a batch did"""
+
+    def busy(self, stats):
+        """Whether to start the next batch without waiting"""
+        return stats['remaining']
+
+    def handle(self, *args, **options):
+        if options.get('limit') is not None and options['limit'] < 1:
+            raise CommandError('--limit must be at least 1')
+
+        while True:
+            stats = self.run_batch(options)
+            self.report(stats)
+
+            if not options['loop']:
+                if stats['remaining']:
+                    self.stdout.write(f'More {self.noun} are pending; run the command again to continue.')
+                break
+            # Keep going straight away while there is a backlog, otherwise wait
+            if not self.busy(stats):
+                time.sleep(options['sleep'])
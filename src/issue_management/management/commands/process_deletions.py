@@ -0,0 +1,50 @@
+from django.core.management.base import CommandError
+
+from issue_management.management.base import WorkerCommand
+from issue_management.utils.deletion import DEFAULT_CHUNK_SIZE, process_pending_deletions
+
+
+class Command(WorkerCommand):
+    """
+    Background worker for issues, spaces and organizations scheduled for deletion.
+    Run it from cron with --max-chunks, or as a long-running process with --loop.
+    """
+    help = 'Delete issues, spaces and organizations scheduled for deletion in bounded chunks'
+    noun = 'deletions'
+    limit_help = None
+    default_sleep = 5.0
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f'Maximum rows deleted per transaction (default: {DEFAULT_CHUNK_SIZE})',
+        )
+        parser.add_argument(
+            '--max-chunks',
+            type=int,
+            help='Stop after this many chunks; the next run continues where this one stopped',
+        )
+        super().add_arguments(parser)
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+        super().handle(*args, **options)
+
+    def run_batch(self, options):
+        return process_pending_deletions(
+            chunk_size=options['chunk_size'],
+            max_chunks=options['max_chunks'],
+        )
+
+    def report(self, stats):
+        for label, count in sorted(stats['rows'].items()):
+            self.stdout.write(f'Deleted {count} {label} row(s)')
+        if stats['rows']:
+            self.stdout.write(self.style.SUCCESS(f"Removed {stats['files']} stored file(s)"))
+
+    def busy(self, stats):
+        # Keep going straight away while there is progress
+        return bool(stats['rows'])
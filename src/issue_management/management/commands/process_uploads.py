@@ -0,0 +1,27 @@
+import resource
+
+from issue_management.management.base import WorkerCommand
+from issue_management.utils.direct_uploads import process_pending_uploads
+
+
+class Command(WorkerCommand):
+    """
+    Background worker for files uploaded straight to storage.
+    Compresses registered images and expires uploads that were never completed.
+    Run it from cron with --limit, or as a long-running process with --loop.
+    """
+    help = 'Compress images uploaded directly to storage and expire abandoned uploads'
+    noun = 'uploads'
+    limit_help = 'Stop after processing this many uploads; the next run continues where this one stopped'
+
+    def run_batch(self, options):
+        return process_pending_uploads(limit=options['limit'])
+
+    def report(self, stats):
+        if stats['processed'] or stats['failed'] or stats['expired']:
+            # ru_maxrss is the high-water mark of the worker process in KB
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            self.stdout.write(
+                f"Processed {stats['processed']}, failed {stats['failed']}, expired {stats['expired']} upload(s); "
+                f"peak memory {peak:.0f} MB"
+            )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from issue_management.utils.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    """
+    Delete idempotency keys older than IDEMPOTENCY_KEY_TTL.
+    Expired keys are never replayed, so this only keeps the table small;
+    run it daily from cron.
+    """
+    help = 'Delete expired idempotency keys'
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_keys()
+        self.stdout.write(f"Deleted {deleted} expired idempotency key(s)")
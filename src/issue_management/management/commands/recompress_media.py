@@ -0,0 +1,123 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.template.defaultfilters import filesizeformat
+
+from issue_management.utils.recompression import (
+    IMAGE_MODELS,
+    MIN_SAVING,
+    load_checkpoint,
+    recompress_file,
+    recompress_model,
+)
+
+MODELS_BY_NAME = {model.__name__: model for model in IMAGE_MODELS}
+
+
+class Command(BaseCommand):
+    """
+    Recompress stored images with their model's current compression profile.
+    Files are compressed in a pool of worker processes; rows are updated with
+    a conditional update and the old files deleted. Progress is checkpointed
+    after every chunk, so an interrupted run continues where it stopped.
+    Use --dry-run first to see how much storage would be saved.
+    """
+    help = 'Recompress existing images with the current compression profiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            action='append',
+            choices=sorted(MODELS_BY_NAME),
+            help='Image model to recompress (repeatable). Defaults to all.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Worker processes compressing files; 0 compresses in this process (default: number of CPUs)',
+        )
+        parser.add_argument('--chunk-size', type=int, default=200, help='Rows read and handed out at once (default: 200)')
+        parser.add_argument('--limit', type=int, help='Stop after this many images per model')
+        parser.add_argument(
+            '--min-saving',
+            type=float,
+            default=MIN_SAVING,
+            help=f'Keep files unless recompressing saves at least this fraction of their size (default: {MIN_SAVING})',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Compress without saving anything and report the bytes that would be saved')
+        parser.add_argument(
+            '--checkpoint',
+            default='recompress_media.checkpoint.json',
+            help='File recording the last image done per model (default: recompress_media.checkpoint.json)',
+        )
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start from the first image')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 0:
+            raise CommandError('--workers cannot be negative')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+        if options['limit'] is not None and options['limit'] < 1:
+            raise CommandError('--limit must be at least 1')
+        if not 0 <= options['min_saving'] < 1:
+            raise CommandError('--min-saving must be between 0 and 1')
+
+        models = [MODELS_BY_NAME[name] for name in options['model']] if options['model'] else list(IMAGE_MODELS)
+        checkpoint_path = None if options['dry_run'] else options['checkpoint']
+        checkpoint = {} if options['restart'] or options['dry_run'] else load_checkpoint(checkpoint_path)
+
+        executor = None
+        if options['workers']:
+            # Spawned workers set Django up afresh instead of sharing this
+            # process's database and storage connections
+            executor = ProcessPoolExecutor(
+                max_workers=options['workers'],
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup,
+            )
+
+        def run(calls):
+            if executor is None:
+                return [recompress_file(*call) for call in calls]
+            chunksize = max(1, len(calls) // (options['workers'] * 4))
+            return list(executor.map(recompress_file, *zip(*calls), chunksize=chunksize))
+
+        def progress(label, stats):
+            if options['verbosity'] > 1:
+                self.stdout.write(f"{label}: {stats['scanned']} scanned, {stats['recompressed']} recompressed")
+
+        before = after = 0
+        try:
+            for model in models:
+                stats = recompress_model(
+                    model,
+                    run,
+                    dry_run=options['dry_run'],
+                    chunk_size=options['chunk_size'],
+                    min_saving=options['min_saving'],
+                    checkpoint=checkpoint,
+                    checkpoint_path=checkpoint_path,
+                    limit=options['limit'],
+                    progress=progress,
+                )
+                before += stats['bytes_before']
+                after += stats['bytes_after']
+                verb = 'would be recompressed' if options['dry_run'] else 'recompressed'
+                self.stdout.write(
+                    f"{model._meta.label}: {stats['scanned']} scanned, {stats['recompressed']} {verb}, "
+                    f"{stats['skipped']} kept, {stats['failed']} failed; "
+                    f"{filesizeformat(stats['bytes_before'])} -> {filesizeformat(stats['bytes_after'])}"
+                )
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        saved = filesizeformat(before - after)
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'Dry run: recompressing would save {saved}'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Saved {saved}'))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import User
+from issue_management.utils.workload import refresh_user_stats
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the per-user workload counters from the issue, work task and site
+    visit tables. The signals keep them current; this nightly run corrects
+    drift from bulk updates or failed transactions.
+    """
+    help = 'Recompute UserWorkloadStats for every user and report corrected rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Users recomputed per batch (default: 500)')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        checked = corrected = 0
+        user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+        batch = []
+        for user_id in user_ids.iterator(chunk_size=batch_size):
+            batch.append(user_id)
+            if len(batch) >= batch_size:
+                corrected += refresh_user_stats(batch)
+                checked += len(batch)
+                batch = []
+        if batch:
+            corrected += refresh_user_stats(batch)
+            checked += len(batch)
+
+        self.stdout.write(f'Checked {checked} user(s)')
+        self.stdout.write(self.style.SUCCESS(f'Corrected workload stats for {corrected} user(s)'))
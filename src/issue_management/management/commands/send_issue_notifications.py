@@ -0,0 +1,20 @@
+from issue_management.management.base import WorkerCommand
+from issue_management.utils.reporting import send_pending_notifications
+
+
+class Command(WorkerCommand):
+    """
+    Background worker for push notifications of issues reported by general
+    users, which are not sent during the reporting request.
+    Run it from cron with --limit, or as a long-running process with --loop.
+    """
+    help = 'Notify central admins of newly reported issues'
+    noun = 'issues'
+    limit_help = 'Stop after notifying this many issues; the next run continues where this one stopped'
+
+    def run_batch(self, options):
+        return send_pending_notifications(limit=options['limit'])
+
+    def report(self, stats):
+        if stats['notified']:
+            self.stdout.write(f"Notified {stats['notified']} issue(s)")
@@ -0,0 +1,41 @@
+from django.core.management.base import CommandError
+
+from issue_management.management.base import WorkerCommand
+from issue_management.utils.voice_notes import process_pending_voice_notes
+
+
+class Command(WorkerCommand):
+    """
+    Background worker that transcodes issue voice notes to Opus and records
+    their duration and waveform. Without --loop it works through every
+    recording not processed yet, which also backfills existing recordings.
+    """
+    help = 'Transcode voice notes to Opus and store their duration and waveform'
+    noun = 'voice notes'
+    default_sleep = 5.0
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Process voice notes again even if they were processed before',
+        )
+
+    def handle(self, *args, **options):
+        if options['force'] and options['loop']:
+            raise CommandError('--force cannot be combined with --loop')
+        super().handle(*args, **options)
+
+    def run_batch(self, options):
+        try:
+            return process_pending_voice_notes(limit=options['limit'], force=options['force'])
+        except FileNotFoundError as e:
+            raise CommandError(f'ffmpeg is not available: {e}')
+
+    def report(self, stats):
+        if stats['processed'] or stats['failed'] or stats['skipped']:
+            self.stdout.write(
+                f"Processed {stats['processed']}, failed {stats['failed']}, "
+                f"skipped {stats['skipped']} voice note(s)"
+            )
@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-19 10:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issue_management', '0025_make_issue_id_mandatory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='voice_size',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, help_text='Size of the stored voice note in bytes', null=True),
+        ),
+        migrations.AddField(
+            model_name='issueimage',
+            name='file_size',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, help_text='Size of the stored file in bytes', null=True),
+        ),
+        migrations.AddField(
+            model_name='issueresolutionimage',
+            name='file_size',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, help_text='Size of the stored file in bytes', null=True),
+        ),
+        migrations.AddField(
+            model_name='issuereviewcommentimage',
+            name='file_size',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, help_text='Size of the stored file in bytes', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitevisitimage',
+            name='file_size',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, help_text='Size of the stored file in bytes', null=True),
+        ),
+        migrations.AddField(
+            model_name='worktaskresolutionimage',
+            name='file_size',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, help_text='Size of the stored file in bytes', null=True),
+        ),
+    ]
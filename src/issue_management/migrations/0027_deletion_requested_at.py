@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issue_management', '0026_file_sizes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='deletion_requested_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, help_text='Set when the issue is scheduled for background deletion', null=True),
+        ),
+    ]
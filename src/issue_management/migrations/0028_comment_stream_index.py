@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-19 10:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issue_management', '0027_deletion_requested_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issuecomment',
+            index=models.Index(fields=['issue', 'created_at', 'id'], name='issue_comment_stream_idx'),
+        ),
+    ]
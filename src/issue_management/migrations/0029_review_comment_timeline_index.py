@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-19 10:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issue_management', '0028_comment_stream_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issuereviewcomment',
+            index=models.Index(fields=['issue', '-created_at'], name='issue_manag_issue_i_4400f6_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2 on 2026-10-19 11:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issue_management', '0030_idempotency_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirectUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target', models.CharField(max_length=50)),
+                ('parent_slug', models.CharField(max_length=255)),
+                ('key', models.CharField(help_text='Storage name the client uploads to', max_length=255, unique=True)),
+                ('content_type', models.CharField(max_length=100)),
+                ('size', models.PositiveBigIntegerField(blank=True, help_text='Size of the uploaded object in bytes', null=True)),
+                ('object_id', models.PositiveBigIntegerField(blank=True, help_text='Primary key of the row the file was registered on', null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('uploaded', 'Uploaded'), ('processing', 'Processing'), ('processed', 'Processed'), ('failed', 'Failed'), ('expired', 'Expired')], default='pending', max_length=20)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='direct_uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Direct Upload',
+                'verbose_name_plural': 'Direct Uploads',
+                'indexes': [models.Index(fields=['status', 'created_at'], name='direct_upload_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-19 11:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issue_management', '0031_direct_upload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='voice_duration',
+            field=models.FloatField(blank=True, editable=False, help_text='Length of the voice note in seconds', null=True),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='voice_processed',
+            field=models.BooleanField(default=False, editable=False, help_text='Whether the voice note has been transcoded'),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='voice_waveform',
+            field=models.JSONField(blank=True, editable=False, help_text='Peak levels (0-100) for drawing the voice note', null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-19 11:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issue_management', '0032_issue_voice_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='directupload',
+            name='length',
+            field=models.PositiveBigIntegerField(blank=True, help_text='Size declared by the client in bytes', null=True),
+        ),
+        migrations.AddField(
+            model_name='directupload',
+            name='offset',
+            field=models.PositiveBigIntegerField(blank=True, help_text='Bytes received so far by a resumable upload', null=True),
+        ),
+        migrations.AddField(
+            model_name='directupload',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-19 11:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_user_workload_stats'),
+        ('issue_management', '0033_resumable_upload'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='notify_pending',
+            field=models.BooleanField(default=False, editable=False, help_text='Creation notifications are left to the send_issue_notifications worker'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(condition=models.Q(('notify_pending', True)), fields=['created_at'], name='issue_notify_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 12:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issue_management', '0035_idempotency_key_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='in_progress',
+            field=models.BooleanField(default=False, help_text='Claimed by a request that has not finished yet'),
+        ),
+    ]
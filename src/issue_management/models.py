@@ -1,8 +1,22 @@
 from django.db import models
 from django.utils import timezone
 from datetime import timedelta
-from config.utils import generate_unique_slug, generate_unique_code, compress_image
+from config.utils import generate_unique_slug, generate_unique_code, compress_with_profile
 from django.utils.text import slugify
+from core.models import PendingDeletionExcludedManager
+from config.media import delete_stored_file
+
+
+# Content types of the voice note formats accepted by VoiceUploadForm, by extension
+VOICE_CONTENT_TYPES = {
+    'mp3': 'audio/mpeg',
+    'wav': 'audio/wav',
+    'm4a': 'audio/mp4',
+    'aac': 'audio/aac',
+    'ogg': 'audio/ogg',
+    'opus': 'audio/ogg',
+    'webm': 'audio/webm',
+}
 
 
 class Issue(models.Model):
@@ -27,12 +41,21 @@ class Issue(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     voice = models.FileField(upload_to='public/issue_voices/', blank=True, null=True)
+    voice_size = models.PositiveBigIntegerField(blank=True, null=True, editable=False, help_text="Size of the stored voice note in bytes")
+    voice_duration = models.FloatField(blank=True, null=True, editable=False, help_text="Length of the voice note in seconds")
+    voice_waveform = models.JSONField(blank=True, null=True, editable=False, help_text="Peak levels (0-100) for drawing the voice note")
+    voice_processed = models.BooleanField(default=False, editable=False, help_text="Whether the voice note has been transcoded")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
     priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES, default='medium')
     resolution_notes = models.TextField(blank=True, null=True, help_text="Notes describing how the issue was resolved")
+    notify_pending = models.BooleanField(default=False, editable=False, help_text="Creation notifications are left to the send_issue_notifications worker")
     
     class Meta:
         ordering = ['-created_at']  # Default ordering, overridden in views with priority
+        indexes = [
+            # Worker polling for issues whose creation has not been notified yet
+            models.Index(fields=['created_at'], condition=models.Q(notify_pending=True), name='issue_notify_pending_idx'),
+        ]
     
     # Issue assignment fields
     assigned_to = models.ForeignKey(
@@ -77,6 +100,10 @@ class Issue(models.Model):
     space = models.ForeignKey('core.Space', related_name='issues', on_delete=models.CASCADE, blank=True, null=True)
     issue_id = models.CharField(max_length=20, unique=True, help_text="Unique identifier for the issue")
     slug = models.SlugField(unique=True)
+    deletion_requested_at = models.DateTimeField(blank=True, null=True, db_index=True, editable=False, help_text="Set when the issue is scheduled for background deletion")
+    
+    objects = PendingDeletionExcludedManager()
+    all_objects = models.Manager()
      
     def save(self, *args, **kwargs):
         if not self.issue_id:
@@ -86,32 +113,70 @@ class Issue(models.Model):
         if not self.slug:
             base_slug = slugify(self.title)
             self.slug = generate_unique_slug(self, base_slug)
+        # Keep the recorded voice note size in step with the file; a new
+        # recording waits for the transcode_voice_notes worker again
+        if not self.voice:
+            self.voice_size = None
+            self.reset_voice_metadata()
+        elif not self.voice._committed:
+            self.voice_size = self.voice.size
+            self.reset_voice_metadata()
         super().save(*args, **kwargs)
+    
+    def reset_voice_metadata(self):
+        self.voice_duration = None
+        self.voice_waveform = None
+        self.voice_processed = False
+    
+    @property
+    def voice_content_type(self):
+        """Content type of the stored voice note for <audio> sources"""
+        extension = self.voice.name.rsplit('.', 1)[-1].lower() if self.voice else ''
+        return VOICE_CONTENT_TYPES.get(extension, 'audio/mpeg')
+    
+    @property
+    def voice_duration_display(self):
+        """Voice note length as m:ss"""
+        if self.voice_duration is None:
+            return ''
+        minutes, seconds = divmod(round(self.voice_duration), 60)
+        return f"{minutes}:{seconds:02d}"
+    
+    @property
+    def voice_waveform_path(self):
+        """SVG path of the waveform bars in a viewBox of (number of levels) x 100"""
+        return ''.join(
+            f"M{index + 0.15:g},{50 - level / 2:g}h0.7v{max(level, 1):g}h-0.7z"
+            for index, level in enumerate(self.voice_waveform or [])
+        )
         
     def __str__(self):
         return self.title
     
 
 class IssueImage(models.Model):
+    # Settings for compress_image, from IMAGE_COMPRESSION_PROFILES
+    COMPRESSION_PROFILE = 'issue_photo'
+    
     issue = models.ForeignKey(Issue, related_name='images', on_delete=models.CASCADE)
     image = models.ImageField(upload_to='public/issue_images/')
     slug = models.SlugField(unique=True)
+    file_size = models.PositiveBigIntegerField(blank=True, null=True, editable=False, help_text="Size of the stored file in bytes")
     
     def save(self, *args, **kwargs):
         if not self.slug:
             # Generate slug using unique code instead of filename
             self.slug = generate_unique_code(IssueImage, no_of_char=12, unique_field='slug')
         
-        # Compress and convert image to WebP with unique alphanumeric name if it's a new upload or has been changed
-        if self.image and (not self.pk or self._state.adding):
-            self.image = compress_image(
-                self.image, 
-                max_width=1920, 
-                max_height=1920, 
-                quality=85, 
-                format='WEBP',
+        # Compress with the model's profile under a unique alphanumeric name if it's a new upload or has been changed.
+        # Files already in storage (direct uploads) are compressed by the process_uploads worker instead.
+        if self.image and (not self.pk or self._state.adding) and not self.image._committed:
+            self.image = compress_with_profile(
+                self.image,
+                self.COMPRESSION_PROFILE,
                 upload_path='public/issue_images/'
             )
+            self.file_size = self.image.size
         
         super().save(*args, **kwargs)
     
@@ -128,6 +193,10 @@ class IssueComment(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Keyset pagination of an issue's comment stream
+            models.Index(fields=['issue', 'created_at', 'id'], name='issue_comment_stream_idx'),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -166,10 +235,14 @@ class WorkTask(models.Model):
 
 class WorkTaskResolutionImage(models.Model):
     """Images attached to work task resolutions"""
+    # Settings for compress_image, from IMAGE_COMPRESSION_PROFILES
+    COMPRESSION_PROFILE = 'resolution_evidence'
+    
     work_task = models.ForeignKey(WorkTask, related_name='resolution_images', on_delete=models.CASCADE)
     image = models.ImageField(upload_to='public/work_task_resolution_images/')
     uploaded_at = models.DateTimeField(auto_now_add=True)
     slug = models.SlugField(unique=True)
+    file_size = models.PositiveBigIntegerField(blank=True, null=True, editable=False, help_text="Size of the stored file in bytes")
     
     class Meta:
         ordering = ['uploaded_at']
@@ -179,16 +252,15 @@ class WorkTaskResolutionImage(models.Model):
             # Generate slug using unique code instead of filename
             self.slug = generate_unique_code(WorkTaskResolutionImage, no_of_char=12, unique_field='slug')
         
-        # Compress and convert image to WebP with unique alphanumeric name if it's a new upload or has been changed
-        if self.image and (not self.pk or self._state.adding):
-            self.image = compress_image(
-                self.image, 
-                max_width=1920, 
-                max_height=1920, 
-                quality=85, 
-                format='WEBP',
+        # Compress with the model's profile under a unique alphanumeric name if it's a new upload or has been changed.
+        # Files already in storage (direct uploads) are compressed by the process_uploads worker instead.
+        if self.image and (not self.pk or self._state.adding) and not self.image._committed:
+            self.image = compress_with_profile(
+                self.image,
+                self.COMPRESSION_PROFILE,
                 upload_path='public/work_task_resolution_images/'
             )
+            self.file_size = self.image.size
         
         super().save(*args, **kwargs)
     
@@ -198,10 +270,14 @@ class WorkTaskResolutionImage(models.Model):
 
 class IssueResolutionImage(models.Model):
     """Images attached to issue resolutions"""
+    # Settings for compress_image, from IMAGE_COMPRESSION_PROFILES
+    COMPRESSION_PROFILE = 'resolution_evidence'
+    
     issue = models.ForeignKey(Issue, related_name='resolution_images', on_delete=models.CASCADE)
     image = models.ImageField(upload_to='public/issue_resolution_images/')
     uploaded_at = models.DateTimeField(auto_now_add=True)
     slug = models.SlugField(unique=True)
+    file_size = models.PositiveBigIntegerField(blank=True, null=True, editable=False, help_text="Size of the stored file in bytes")
     
     class Meta:
         ordering = ['uploaded_at']
@@ -211,16 +287,15 @@ class IssueResolutionImage(models.Model):
             # Generate slug using unique code instead of filename
             self.slug = generate_unique_code(IssueResolutionImage, no_of_char=12, unique_field='slug')
         
-        # Compress and convert image to WebP with unique alphanumeric name if it's a new upload or has been changed
-        if self.image and (not self.pk or self._state.adding):
-            self.image = compress_image(
-                self.image, 
-                max_width=1920, 
-                max_height=1920, 
-                quality=85, 
-                format='WEBP',
+        # Compress with the model's profile under a unique alphanumeric name if it's a new upload or has been changed.
+        # Files already in storage (direct uploads) are compressed by the process_uploads worker instead.
+        if self.image and (not self.pk or self._state.adding) and not self.image._committed:
+            self.image = compress_with_profile(
+                self.image,
+                self.COMPRESSION_PROFILE,
                 upload_path='public/issue_resolution_images/'
             )
+            self.file_size = self.image.size
         
         super().save(*args, **kwargs)
     
@@ -464,11 +539,15 @@ class SiteVisit(models.Model):
 
 class SiteVisitImage(models.Model):
     """Images captured during site visits"""
+    # Settings for compress_image, from IMAGE_COMPRESSION_PROFILES
+    COMPRESSION_PROFILE = 'site_visit_photo'
+    
     site_visit = models.ForeignKey(SiteVisit, related_name='images', on_delete=models.CASCADE)
     image = models.ImageField(upload_to='public/site_visit_images/')
     caption = models.CharField(max_length=200, blank=True, null=True, help_text="Optional caption for the image")
     uploaded_at = models.DateTimeField(auto_now_add=True)
     slug = models.SlugField(unique=True)
+    file_size = models.PositiveBigIntegerField(blank=True, null=True, editable=False, help_text="Size of the stored file in bytes")
     
     class Meta:
         ordering = ['uploaded_at']
@@ -480,16 +559,15 @@ class SiteVisitImage(models.Model):
             # Generate slug using unique code instead of filename
             self.slug = generate_unique_code(SiteVisitImage, no_of_char=12, unique_field='slug')
         
-        # Compress and convert image to WebP with unique alphanumeric name if it's a new upload or has been changed
-        if self.image and (not self.pk or self._state.adding):
-            self.image = compress_image(
-                self.image, 
-                max_width=1920, 
-                max_height=1920, 
-                quality=85, 
-                format='WEBP',
+        # Compress with the model's profile under a unique alphanumeric name if it's a new upload or has been changed.
+        # Files already in storage (direct uploads) are compressed by the process_uploads worker instead.
+        if self.image and (not self.pk or self._state.adding) and not self.image._committed:
+            self.image = compress_with_profile(
+                self.image,
+                self.COMPRESSION_PROFILE,
                 upload_path='public/site_visit_images/'
             )
+            self.file_size = self.image.size
         
         super().save(*args, **kwargs)
     
@@ -501,15 +579,23 @@ class SiteVisitImage(models.Model):
 from django.db.models.signals import pre_delete
 from django.dispatch import receiver
 
+@receiver(pre_delete, sender=Issue)
+def delete_issue_voice_file(sender, instance, **kwargs):
+    """
+    Delete the voice note from storage when an Issue instance is deleted.
+    This ensures orphaned files don't accumulate in storage.
+    """
+    delete_stored_file(instance.voice)
+
+
 @receiver(pre_delete, sender=WorkTaskResolutionImage)
 def delete_resolution_image_file(sender, instance, **kwargs):
     """
     Delete the image file from storage when a WorkTaskResolutionImage instance is deleted.
     This ensures orphaned files don't accumulate in storage.
     """
-    if instance.image:
-        # Delete the file from storage
-        instance.image.delete(save=False)
+    # Delete the file from storage (batched when deletion is deferred)
+    delete_stored_file(instance.image)
 
 
 @receiver(pre_delete, sender=IssueImage)
@@ -518,9 +604,8 @@ def delete_issue_image_file(sender, instance, **kwargs):
     Delete the image file from storage when an IssueImage instance is deleted.
     This ensures orphaned files don't accumulate in storage.
     """
-    if instance.image:
-        # Delete the file from storage
-        instance.image.delete(save=False)
+    # Delete the file from storage (batched when deletion is deferred)
+    delete_stored_file(instance.image)
 
 
 @receiver(pre_delete, sender=IssueResolutionImage)
@@ -529,9 +614,8 @@ def delete_issue_resolution_image_file(sender, instance, **kwargs):
     Delete the image file from storage when an IssueResolutionImage instance is deleted.
     This ensures orphaned files don't accumulate in storage.
     """
-    if instance.image:
-        # Delete the file from storage
-        instance.image.delete(save=False)
+    # Delete the file from storage (batched when deletion is deferred)
+    delete_stored_file(instance.image)
 
 
 @receiver(pre_delete, sender=SiteVisitImage)
@@ -540,9 +624,8 @@ def delete_site_visit_image_file(sender, instance, **kwargs):
     Delete the image file from storage when a SiteVisitImage instance is deleted.
     This ensures orphaned files don't accumulate in storage.
     """
-    if instance.image:
-        # Delete the file from storage
-        instance.image.delete(save=False)
+    # Delete the file from storage (batched when deletion is deferred)
+    delete_stored_file(instance.image)
 
 
 class IssueReviewComment(models.Model):
@@ -561,6 +644,9 @@ class IssueReviewComment(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Issue Review Comment'
         verbose_name_plural = 'Issue Review Comments'
+        indexes = [
+            models.Index(fields=['issue', '-created_at']),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -574,10 +660,14 @@ class IssueReviewComment(models.Model):
 
 class IssueReviewCommentImage(models.Model):
     """Images attached to review comments"""
+    # Settings for compress_image, from IMAGE_COMPRESSION_PROFILES
+    COMPRESSION_PROFILE = 'review_attachment'
+    
     review_comment = models.ForeignKey(IssueReviewComment, related_name='images', on_delete=models.CASCADE)
     image = models.ImageField(upload_to='public/review_comment_images/')
     uploaded_at = models.DateTimeField(auto_now_add=True)
     slug = models.SlugField(unique=True)
+    file_size = models.PositiveBigIntegerField(blank=True, null=True, editable=False, help_text="Size of the stored file in bytes")
     
     class Meta:
         ordering = ['uploaded_at']
@@ -589,16 +679,15 @@ class IssueReviewCommentImage(models.Model):
             # Generate slug using unique code instead of filename
             self.slug = generate_unique_code(IssueReviewCommentImage, no_of_char=12, unique_field='slug')
         
-        # Compress and convert image to WebP with unique alphanumeric name if it's a new upload or has been changed
-        if self.image and (not self.pk or self._state.adding):
-            self.image = compress_image(
-                self.image, 
-                max_width=1920, 
-                max_height=1920, 
-                quality=85, 
-                format='WEBP',
+        # Compress with the model's profile under a unique alphanumeric name if it's a new upload or has been changed.
+        # Files already in storage (direct uploads) are compressed by the process_uploads worker instead.
+        if self.image and (not self.pk or self._state.adding) and not self.image._committed:
+            self.image = compress_with_profile(
+                self.image,
+                self.COMPRESSION_PROFILE,
                 upload_path='public/review_comment_images/'
             )
+            self.file_size = self.image.size
         
         super().save(*args, **kwargs)
     
@@ -612,9 +701,8 @@ def delete_review_comment_image_file(sender, instance, **kwargs):
     Delete the image file from storage when an IssueReviewCommentImage instance is deleted.
     This ensures orphaned files don't accumulate in storage.
     """
-    if instance.image:
-        # Delete the file from storage
-        instance.image.delete(save=False)
+    # Delete the file from storage (batched when deletion is deferred)
+    delete_stored_file(instance.image)
 
 
 class IssueActivity(models.Model):
@@ -798,3 +886,78 @@ class ShoppingListItem(models.Model):
     
     def __str__(self):
         return f"{self.item_snapshot} in {self.shopping_list.title}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Records a client-generated key for an action that must run at most once,
+    such as a form submitted twice or a field action queued offline and
+    replayed when back online. The stored response is returned again for
+    every repeat of the key (see utils/idempotency.py).
+    """
+    user = models.ForeignKey('core.User', related_name='idempotency_keys', on_delete=models.CASCADE)
+    key = models.CharField(max_length=64)
+    action = models.CharField(max_length=50)
+    fingerprint = models.CharField(max_length=64, blank=True, help_text="Digest of the request the key was first used for")
+    response = models.JSONField(default=dict, blank=True)
+    in_progress = models.BooleanField(default=False, help_text="Claimed by a request that has not finished yet")
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Idempotency Key'
+        verbose_name_plural = 'Idempotency Keys'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key_per_user'),
+        ]
+        indexes = [
+            # Expired keys are purged by age
+            models.Index(fields=['created_at'], name='idempotency_key_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.action} {self.key}"
+
+
+class DirectUpload(models.Model):
+    """
+    A file the browser uploads straight to object storage with a presigned
+    POST policy, or in resumable chunks through the application (``offset``
+    is set). The row is created when the upload starts and registered against
+    its model when the client reports the upload complete; images are then
+    compressed by the `process_uploads` worker.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('uploaded', 'Uploaded'),
+        ('processing', 'Processing'),
+        ('processed', 'Processed'),
+        ('failed', 'Failed'),
+        ('expired', 'Expired'),
+    ]
+    
+    user = models.ForeignKey('core.User', related_name='direct_uploads', on_delete=models.CASCADE)
+    target = models.CharField(max_length=50)
+    parent_slug = models.CharField(max_length=255)
+    key = models.CharField(max_length=255, unique=True, help_text="Storage name the client uploads to")
+    content_type = models.CharField(max_length=100)
+    length = models.PositiveBigIntegerField(blank=True, null=True, help_text="Size declared by the client in bytes")
+    offset = models.PositiveBigIntegerField(blank=True, null=True, help_text="Bytes received so far by a resumable upload")
+    size = models.PositiveBigIntegerField(blank=True, null=True, help_text="Size of the uploaded object in bytes")
+    object_id = models.PositiveBigIntegerField(blank=True, null=True, help_text="Primary key of the row the file was registered on")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        verbose_name = 'Direct Upload'
+        verbose_name_plural = 'Direct Uploads'
+        indexes = [
+            # Worker polling for uploads to process or expire
+            models.Index(fields=['status', 'created_at'], name='direct_upload_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.target} {self.key}"
@@ -5,6 +5,7 @@ app_name = "central_admin"
 
 urlpatterns = [
     path('', central_admin.IssueListView.as_view(), name='issue_list'),
+    path('bulk/', central_admin.IssueBulkActionView.as_view(), name='issue_bulk_action'),
     path('create/', central_admin.IssueCreateView.as_view(), name='issue_create'),
     path('site-visits/', central_admin.SiteVisitListView.as_view(), name='site_visit_list'),
     path('performance-report/', central_admin.PerformanceReportView.as_view(), name='performance_report'),
@@ -25,6 +26,7 @@ urlpatterns = [
     
     path('<slug:issue_slug>/edit/', central_admin.IssueUpdateView.as_view(), name='issue_update'),
     path('<slug:issue_slug>/', central_admin.IssueDetailView.as_view(), name='issue_detail'),
+    path('<slug:issue_slug>/sections/<str:section>/', central_admin.IssueDetailSectionView.as_view(), name='issue_detail_section'),
     path('<slug:issue_slug>/assign/', central_admin.IssueAssignmentView.as_view(), name='issue_assign'),
     path('<slug:issue_slug>/select-reviewers/', central_admin.IssueReviewerSelectionView.as_view(), name='issue_select_reviewers'),
     path('<slug:issue_slug>/resolve/', central_admin.IssueResolveView.as_view(), name='issue_resolve'),
@@ -0,0 +1,10 @@
+from django.urls import path
+from ..views import general_user
+
+app_name = "general_user"
+
+urlpatterns = [
+    # Issue reporting for occupants; reports are listed, not managed
+    path('report/', general_user.IssueReportView.as_view(), name='issue_report'),
+    path('reports/', general_user.IssueListView.as_view(), name='issue_list'),
+]
@@ -15,4 +15,7 @@ urlpatterns = [
     path('site-visits/<slug:site_visit_slug>/start/', maintainer.SiteVisitStartView.as_view(), name='site_visit_start'),
     path('site-visits/<slug:site_visit_slug>/complete/', maintainer.SiteVisitCompleteView.as_view(), name='site_visit_complete'),
     path('site-visits/<slug:site_visit_slug>/cancel/', maintainer.SiteVisitCancelView.as_view(), name='site_visit_cancel'),
+    
+    # Actions queued offline by the maintainer service worker
+    path('offline-actions/', maintainer.OfflineActionSyncView.as_view(), name='offline_action_sync'),
 ]
@@ -5,6 +5,7 @@ app_name = "space_admin"
 
 urlpatterns = [
     path('', space_admin.IssueListView.as_view(), name='issue_list'),
+    path('bulk/', space_admin.IssueBulkActionView.as_view(), name='issue_bulk_action'),
     path('create/', space_admin.IssueCreateView.as_view(), name='issue_create'),
     path('site-visits/', space_admin.SiteVisitListView.as_view(), name='site_visit_list'),
     path('<slug:issue_slug>/edit/', space_admin.IssueUpdateView.as_view(), name='issue_update'),
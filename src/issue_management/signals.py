@@ -1,8 +1,18 @@
 from django.db.models.signals import post_save, pre_save, post_delete, pre_delete, m2m_changed
+from django.db import transaction
 from django.dispatch import receiver
-from .models import Issue, WorkTask, IssueImage, SiteVisit, IssueActivity
+from .models import (
+    Issue, WorkTask, IssueImage, SiteVisit, IssueActivity, IssueComment, WorkTaskResolutionImage,
+    SiteVisitImage, PurchaseRequest, IssueResolutionImage, IssueReviewComment, IssueReviewCommentImage,
+    WorkTaskShare,
+)
 from .utils.firebase_notifications import send_issue_created_notification
-from core.models import User
+from .utils.deletion import is_cascade_deleting
+from .utils import workload
+from .utils.detail_sections import part_scope
+from .utils.events import publish_issue_event
+from core.models import Space, User
+from config.versions import bump, issue_page_scopes, issue_scope, org_scope, space_scope, user_scope
 
 
 # Dictionary to store old values of instances before saving
@@ -17,6 +27,9 @@ def store_issue_old_values(sender, instance, **kwargs):
     if instance.pk:
         try:
             old_instance = Issue.objects.get(pk=instance.pk)
+            instance._previous_assignee_id = old_instance.assigned_to_id
+            instance._workload_state = workload.issue_state(old_instance)
+            instance._previous_status = old_instance.status
             _issue_pre_save_data[instance.pk] = {
                 'status': old_instance.status,
                 'priority': old_instance.priority,
@@ -43,7 +56,10 @@ def track_issue_creation_and_changes(sender, instance, created, **kwargs):
             description=f'Issue "{instance.title}" was created by {instance.reporter.get_full_name() or instance.reporter}'
         )
         
-        # Send push notifications to central admins in the same organization
+        # Send push notifications to central admins in the same organization,
+        # unless the send_issue_notifications worker does it later
+        if instance.notify_pending:
+            return
         central_admins = User.objects.filter(
             user_type='central_admin',
             organization=instance.org,
@@ -236,6 +252,8 @@ def store_work_task_old_values(sender, instance, **kwargs):
     if instance.pk:
         try:
             old_instance = WorkTask.objects.get(pk=instance.pk)
+            instance._previous_assignee_id = old_instance.assigned_to_id
+            instance._workload_state = workload.work_task_state(old_instance)
             _work_task_pre_save_data[instance.pk] = {
                 'completed': old_instance.completed,
                 'title': old_instance.title,
@@ -303,6 +321,10 @@ def track_work_task_changes(sender, instance, created, **kwargs):
 @receiver(pre_delete, sender=WorkTask)
 def track_work_task_deletion(sender, instance, **kwargs):
     """Track when work tasks are deleted"""
+    # The whole issue is being removed by the deletion worker, nothing to track
+    if is_cascade_deleting():
+        return
+    
     # Use pre_delete to ensure the issue still exists when creating activity
     try:
         IssueActivity.objects.create(
@@ -331,6 +353,10 @@ def track_image_addition(sender, instance, created, **kwargs):
 @receiver(pre_delete, sender=IssueImage)
 def track_image_deletion(sender, instance, **kwargs):
     """Track when images are deleted"""
+    # The whole issue is being removed by the deletion worker, nothing to track
+    if is_cascade_deleting():
+        return
+    
     # Use pre_delete to ensure the issue still exists when creating activity
     try:
         IssueActivity.objects.create(
@@ -350,6 +376,8 @@ def store_site_visit_old_values(sender, instance, **kwargs):
     if instance.pk:
         try:
             old_instance = SiteVisit.objects.get(pk=instance.pk)
+            instance._previous_assignee_id = old_instance.assigned_to_id
+            instance._workload_state = workload.site_visit_state(old_instance)
             _site_visit_pre_save_data[instance.pk] = {
                 'status': old_instance.status,
                 'title': old_instance.title,
@@ -409,3 +437,155 @@ def track_site_visit_changes(sender, instance, created, **kwargs):
         # Clean up old data after processing
         if instance.pk in _site_visit_pre_save_data:
             del _site_visit_pre_save_data[instance.pk]
+
+
+def _update_workload(kind, instance, created, state):
+    """Apply the workload counter change of a saved issue, work task or site visit"""
+    before = instance.__dict__.pop('_workload_state', None)
+    if before is None and not created:
+        # Previous values are unknown (e.g. the row was hidden from the default manager)
+        workload.refresh_user_stats(user_id for user_id in state[:-1] if user_id)
+        return
+    workload.apply_change(kind, before, state)
+
+
+@receiver(post_save, sender=Issue, dispatch_uid="update_issue_workload_stats")
+def update_issue_workload_stats(sender, instance, created, **kwargs):
+    """Keep reporter and assignee workload counters current"""
+    _update_workload('issue', instance, created, workload.issue_state(instance))
+
+
+@receiver(post_save, sender=WorkTask, dispatch_uid="update_work_task_workload_stats")
+def update_work_task_workload_stats(sender, instance, created, **kwargs):
+    """Keep the assignee's open task counter current"""
+    _update_workload('work_task', instance, created, workload.work_task_state(instance))
+
+
+@receiver(post_save, sender=SiteVisit, dispatch_uid="update_site_visit_workload_stats")
+def update_site_visit_workload_stats(sender, instance, created, **kwargs):
+    """Keep the assignee's open visit counter current"""
+    _update_workload('site_visit', instance, created, workload.site_visit_state(instance))
+
+
+@receiver(post_delete, sender=Issue, dispatch_uid="remove_issue_workload_stats")
+def remove_issue_workload_stats(sender, instance, **kwargs):
+    workload.apply_change('issue', workload.issue_state(instance), None, create_missing=False)
+
+
+@receiver(post_delete, sender=WorkTask, dispatch_uid="remove_work_task_workload_stats")
+def remove_work_task_workload_stats(sender, instance, **kwargs):
+    workload.apply_change('work_task', workload.work_task_state(instance), None, create_missing=False)
+
+
+@receiver(post_delete, sender=SiteVisit, dispatch_uid="remove_site_visit_workload_stats")
+def remove_site_visit_workload_stats(sender, instance, **kwargs):
+    workload.apply_change('site_visit', workload.site_visit_state(instance), None, create_missing=False)
+
+
+@receiver(post_save, sender=Issue, dispatch_uid="publish_issue_status_event")
+def publish_issue_status_event(sender, instance, created, **kwargs):
+    """Push status changes to open issue pages and role inboxes"""
+    # New issues are announced by their 'created' activity event
+    previous_status = instance.__dict__.pop('_previous_status', None)
+    if previous_status is not None and previous_status != instance.status:
+        publish_issue_event(instance, 'status', {
+            'status': instance.status,
+            'status_display': instance.get_status_display(),
+        })
+
+
+@receiver(post_save, sender=IssueActivity, dispatch_uid="publish_issue_activity_event")
+def publish_issue_activity_event(sender, instance, created, **kwargs):
+    """Push new activity entries to open issue pages and role inboxes"""
+    if created and not is_cascade_deleting():
+        publish_issue_event(instance.issue, 'activity', {
+            'activity_type': instance.activity_type,
+            'description': instance.description[:200],
+        })
+
+
+@receiver(post_save, sender=IssueComment, dispatch_uid="publish_issue_comment_event")
+def publish_issue_comment_event(sender, instance, created, **kwargs):
+    """Tell open issue pages to fetch new comments"""
+    if created:
+        publish_issue_event(instance.issue, 'comment', {'comment': instance.pk}, inbox=False)
+
+
+
+def _bump_after_commit(*scopes):
+    # After commit, so a concurrent reader cannot cache the old rows under the new version
+    transaction.on_commit(lambda: bump(*scopes))
+
+
+@receiver(post_save, sender=Issue, dispatch_uid="bump_issue_versions")
+def bump_issue_versions(sender, instance, created, **kwargs):
+    """Expire cached pages and validators that show the issue"""
+    user_ids = {instance.__dict__.pop('_previous_assignee_id', None)}
+    if not created:
+        user_ids.update(instance.reviewers.values_list('pk', flat=True))
+    _bump_after_commit(*issue_page_scopes(instance, user_ids))
+
+
+@receiver(post_delete, sender=Issue, dispatch_uid="bump_deleted_issue_versions")
+def bump_deleted_issue_versions(sender, instance, **kwargs):
+    _bump_after_commit(*issue_page_scopes(instance))
+
+
+@receiver(m2m_changed, sender=Issue.reviewers.through, dispatch_uid="bump_reviewer_versions")
+def bump_reviewer_versions(sender, instance, action, reverse, pk_set, **kwargs):
+    """Added and removed reviewers see the issue appear in or leave their lists"""
+    if reverse or action not in ('post_add', 'post_remove') or not pk_set:
+        return
+    _bump_after_commit(issue_scope(instance.slug), *(user_scope(user_id) for user_id in sorted(pk_set)))
+
+
+@receiver(post_save, sender=User, dispatch_uid="bump_user_versions")
+def bump_user_versions(sender, instance, **kwargs):
+    """Profile and active space changes show up in every page of the user"""
+    _bump_after_commit(user_scope(instance.pk))
+
+
+@receiver(post_save, sender=Space, dispatch_uid="bump_space_versions")
+@receiver(post_delete, sender=Space, dispatch_uid="bump_deleted_space_versions")
+def bump_space_versions(sender, instance, **kwargs):
+    """Space names show up in the filters and rows of the organization's and the space's pages"""
+    _bump_after_commit(org_scope(instance.org_id), space_scope(instance.pk))
+
+
+# Rows that belong to an issue: the cached detail data they feed and how to reach their issue
+ISSUE_CHILD_DEPENDENCIES = [
+    (WorkTask, ('tasks',), lambda row: row.issue),
+    (WorkTaskShare, ('tasks',), lambda row: row.work_task.issue),
+    (WorkTaskResolutionImage, ('tasks',), lambda row: row.work_task.issue),
+    (SiteVisit, ('visits',), lambda row: row.issue),
+    (SiteVisitImage, ('visits',), lambda row: row.site_visit.issue),
+    (PurchaseRequest, ('purchases',), lambda row: row.issue),
+    (IssueImage, (), lambda row: row.issue),
+    (IssueResolutionImage, ('media',), lambda row: row.issue),
+    (IssueReviewComment, ('media', 'timeline'), lambda row: row.issue),
+    (IssueReviewCommentImage, ('media', 'timeline'), lambda row: row.review_comment.issue),
+    (IssueActivity, ('timeline',), lambda row: row.issue),
+    (IssueComment, ('timeline',), lambda row: row.issue),
+]
+
+
+def _issue_child_invalidator(parts, issue_of):
+    def invalidate_issue_child(sender, instance, **kwargs):
+        # Cached data of a deleted issue is never read again
+        if is_cascade_deleting():
+            return
+        issue = issue_of(instance)
+        # Work tasks and site visits also appear in their assignees' lists
+        user_ids = {getattr(instance, 'assigned_to_id', None), instance.__dict__.pop('_previous_assignee_id', None)}
+        scopes = [part_scope(issue.pk, part) for part in parts]
+        _bump_after_commit(*scopes, *issue_page_scopes(issue, user_ids))
+    return invalidate_issue_child
+
+
+for _model, _parts, _issue_of in ISSUE_CHILD_DEPENDENCIES:
+    _handler = _issue_child_invalidator(_parts, _issue_of)
+    for _signal in (post_save, post_delete):
+        _signal.connect(
+            _handler, sender=_model, weak=False,
+            dispatch_uid=f"invalidate_issue_child_{_model.__name__}_{_signal is post_save}",
+        )
@@ -0,0 +1,34 @@
+"""
+Shared setup for the tests of the issue management and core apps.
+"""
+import itertools
+
+from core.models import User
+
+PASSWORD = 'pass12345'
+
+_numbers = itertools.count(1)
+
+
+def create_member(org, user_type='central_admin', **extra):
+    """
+    Create a user of ``user_type`` in ``org`` with the test password and a
+    phone number and email no other test user has.
+
+    Args:
+        org: The user's organization
+        user_type: The user's role
+        **extra: Other fields of the user, e.g. fcm_token
+
+    Returns:
+        User: The new user
+    """
+    number = next(_numbers)
+    return User.objects.create_user(
+        phone_number=f'+9198{number:08d}',
+        email=f'{user_type}{number}@example.com',
+        password=PASSWORD,
+        user_type=user_type,
+        organization=org,
+        **extra,
+    )
@@ -0,0 +1,104 @@
+"""
+Tests for bulk issue operations from the admin issue lists
+"""
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.urls import reverse
+
+from core.models import Organization, UserWorkloadStats
+from issue_management.models import Issue, IssueActivity
+from issue_management.testing import create_member
+
+
+class BulkIssueActionTests(TestCase):
+    """Test that bulk actions change many issues in a few queries, record activities and notify once"""
+
+    def setUp(self):
+        self.org = Organization.objects.create(name='Test Org')
+        self.admin = create_member(self.org)
+        self.supervisor = create_member(self.org, 'supervisor', fcm_token='supervisor-token')
+        self.reviewer = create_member(self.org, 'reviewer', fcm_token='reviewer-token')
+        self.issues = [
+            Issue.objects.create(title=f'Leak {n}', description='Leak', reporter=self.admin, org=self.org)
+            for n in range(5)
+        ]
+        self.url = reverse('issue_management:central_admin:issue_bulk_action')
+
+    def post(self, action, issues=None, **data):
+        return self.client.post(self.url, {
+            'issues': [issue.slug for issue in (issues or self.issues)],
+            'action': action,
+            **data,
+        })
+
+    @patch('issue_management.utils.firebase_notifications.send_push_notification')
+    def test_bulk_assign(self, send_push):
+        self.client.force_login(self.admin)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post('assign', assigned_to=self.supervisor.pk)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Issue.objects.filter(assigned_to=self.supervisor, status='assigned').count(), 5)
+        self.assertEqual(IssueActivity.objects.filter(activity_type='assigned', user=self.admin).count(), 5)
+        self.assertEqual(UserWorkloadStats.objects.get(user=self.supervisor).assigned_assigned, 5)
+        # One notification for all five issues
+        send_push.assert_called_once()
+        self.assertEqual(send_push.call_args.args[:2], ('supervisor-token', '5 issues assigned to you'))
+
+    def test_bulk_priority_and_status(self):
+        self.client.force_login(self.admin)
+        Issue.objects.filter(pk=self.issues[0].pk).update(priority='critical')
+
+        self.post('priority', priority='critical')
+        self.post('close', issues=self.issues[:2])
+
+        self.assertEqual(Issue.objects.filter(priority='critical').count(), 5)
+        self.assertEqual(IssueActivity.objects.filter(activity_type='priority_changed').count(), 4)
+        self.assertEqual(Issue.objects.filter(status='closed').count(), 2)
+        self.assertEqual(IssueActivity.objects.filter(activity_type='closed').count(), 2)
+
+    @patch('issue_management.utils.firebase_notifications.send_push_notification')
+    def test_bulk_request_review(self, send_push):
+        self.client.force_login(self.admin)
+        self.issues[0].reviewers.add(self.reviewer)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post('reviewers', reviewers=[self.reviewer.pk])
+
+        self.assertEqual(Issue.reviewers.through.objects.filter(user=self.reviewer).count(), 5)
+        self.assertEqual(Issue.objects.filter(requires_review=True).count(), 4)
+        self.assertEqual(
+            IssueActivity.objects.filter(activity_type='review_requested', user=self.admin).count(), 4,
+        )
+        send_push.assert_called_once()
+        self.assertEqual(send_push.call_args.args[1], 'Review requested on 4 issues')
+
+    def test_other_organizations_issues_are_refused(self):
+        other_org = Organization.objects.create(name='Other Org')
+        foreign = Issue.objects.create(title='Foreign', description='Foreign', reporter=self.admin, org=other_org)
+        self.client.force_login(self.admin)
+
+        self.post('close', issues=[foreign, self.issues[0]])
+
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.status, 'open')
+        self.assertFalse(Issue.objects.filter(status='closed').exists())
+
+    def test_action_needs_its_field(self):
+        self.client.force_login(self.admin)
+
+        response = self.post('assign')
+
+        self.assertFalse(Issue.objects.filter(assigned_to__isnull=False).exists())
+        self.assertEqual(response.status_code, 302)
+
+    def test_list_offers_bulk_actions(self):
+        self.client.force_login(self.admin)
+
+        response = self.client.get(reverse('issue_management:central_admin:issue_list'))
+
+        self.assertContains(response, 'id="bulk-form"')
+        self.assertContains(response, f'value="{self.issues[0].slug}" form="bulk-form"')
+        self.assertContains(response, f'<option value="{self.supervisor.pk}">')
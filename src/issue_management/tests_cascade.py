@@ -0,0 +1,55 @@
+"""
+Tests for the cascade impact calculator used by delete confirmation pages
+"""
+from django.test import TestCase
+from core.models import Organization, Space
+from issue_management.models import Issue, IssueComment, WorkTask, WorkTaskShare, IssueImage
+from issue_management.testing import create_member
+from issue_management.utils.cascade import space_cascade_impact, issue_cascade_impact
+
+
+class CascadeImpactTests(TestCase):
+    """Test aggregated deletion previews"""
+
+    def setUp(self):
+        self.org = Organization.objects.create(name='Test Org')
+        self.space = Space.objects.create(name='Block A', org=self.org)
+        self.user = create_member(self.org)
+        self.issues = []
+        for index in range(3):
+            issue = Issue.objects.create(
+                title=f'Issue {index}', description='Broken', reporter=self.user,
+                org=self.org, space=self.space,
+            )
+            IssueComment.objects.create(issue=issue, user=self.user, comment='First')
+            IssueComment.objects.create(issue=issue, user=self.user, comment='Second')
+            task = WorkTask.objects.create(
+                issue=issue, title='Fix', description='Fix it', assigned_to=self.user,
+            )
+            WorkTaskShare.objects.create(work_task=task, created_by=self.user)
+            # bulk_create skips the compression step in save()
+            IssueImage.objects.bulk_create([IssueImage(issue=issue, image='public/issue_images/a.webp', slug=f'img{index}', file_size=1000)])
+            self.issues.append(issue)
+
+    def test_space_counts(self):
+        """Every dependent kind is counted across the whole space"""
+        impact = space_cascade_impact(self.space)
+        self.assertEqual(impact['issues'], 3)
+        self.assertEqual(impact['comments'], 6)
+        self.assertEqual(impact['work_tasks'], 3)
+        self.assertEqual(impact['work_task_shares'], 3)
+        self.assertEqual(impact['images'], 3)
+        self.assertEqual(impact['storage_bytes'], 3000)
+        self.assertEqual(impact['unsized_files'], 0)
+
+    def test_issue_counts(self):
+        """Counts are limited to the selected issue"""
+        impact = issue_cascade_impact(self.issues[0])
+        self.assertEqual(impact['issues'], 1)
+        self.assertEqual(impact['comments'], 2)
+        self.assertEqual(impact['work_task_shares'], 1)
+
+    def test_query_count_is_constant(self):
+        """One aggregate query per model regardless of the number of issues"""
+        with self.assertNumQueries(13):
+            space_cascade_impact(self.space)
@@ -0,0 +1,68 @@
+"""
+Tests for the cursor-paginated comment stream
+"""
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Organization
+from issue_management.models import Issue, IssueComment
+from issue_management.testing import create_member
+from issue_management.utils.pagination import encode_cursor
+from issue_management.views.common import COMMENT_PAGE_SIZE
+
+
+class CommentStreamTests(TestCase):
+    """Test newest-first pages, older pages and polling"""
+
+    def setUp(self):
+        self.org = Organization.objects.create(name='Test Org')
+        self.user = create_member(self.org)
+        self.issue = Issue.objects.create(title='Leak', description='Leak', reporter=self.user, org=self.org)
+        start = timezone.now() - timedelta(days=1)
+        comments = [
+            IssueComment(issue=self.issue, user=self.user, comment=f'Comment {index}', slug=f'comment-{index}')
+            for index in range(COMMENT_PAGE_SIZE + 5)
+        ]
+        IssueComment.objects.bulk_create(comments)
+        # Give every comment a distinct, increasing timestamp
+        for index, comment in enumerate(IssueComment.objects.order_by('pk')):
+            IssueComment.objects.filter(pk=comment.pk).update(created_at=start + timedelta(minutes=index))
+
+        self.client.force_login(self.user)
+        self.list_url = reverse('issue_management:comment_list', kwargs={'issue_slug': self.issue.slug})
+
+    def test_first_load_returns_newest_page(self):
+        response = self.client.get(self.list_url)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENT_PAGE_SIZE)
+        self.assertEqual(comments[-1].comment, f'Comment {COMMENT_PAGE_SIZE + 4}')
+        self.assertTrue(response.context['has_older'])
+        self.assertContains(response, 'Load older comments')
+
+    def test_load_older_returns_remaining_comments(self):
+        first = self.client.get(self.list_url)
+        response = self.client.get(self.list_url, {'before': first.context['older_cursor']})
+        self.assertEqual([c.comment for c in response.context['comments']], [f'Comment {i}' for i in range(5)])
+        self.assertFalse(response.context['has_older'])
+
+    def test_poll_without_changes_returns_204(self):
+        latest = IssueComment.objects.order_by('-created_at').first()
+        response = self.client.get(self.list_url, {'since': encode_cursor(latest)})
+        self.assertEqual(response.status_code, 204)
+
+    def test_create_returns_only_new_comments(self):
+        latest = IssueComment.objects.order_by('-created_at').first()
+        url = reverse('issue_management:comment_create', kwargs={'issue_slug': self.issue.slug})
+        response = self.client.post(url, {'comment': 'Fresh', 'since': encode_cursor(latest)})
+        self.assertEqual([c.comment for c in response.context['comments']], ['Fresh'])
+        self.assertContains(response, 'id="comments-cursor"')
+
+        response = self.client.get(self.list_url, {'since': response.context['cursor']})
+        self.assertEqual(response.status_code, 204)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(self.list_url, {'before': 'nonsense'})
+        self.assertEqual(response.status_code, 400)
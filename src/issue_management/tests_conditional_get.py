@@ -0,0 +1,73 @@
+"""
+Tests for ETag validation of issue pages
+"""
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from core.models import Organization, Space
+from issue_management.models import Issue, IssueComment, WorkTask, WorkTaskShare
+from issue_management.testing import create_member
+
+
+class ConditionalGetTests(TestCase):
+    """Test that unchanged pages are answered with 304 Not Modified"""
+
+    def setUp(self):
+        cache.clear()
+        self.org = Organization.objects.create(name='Test Org')
+        self.user = create_member(self.org)
+        self.issue = Issue.objects.create(title='Leak', description='Leak', reporter=self.user, org=self.org)
+        self.client.force_login(self.user)
+
+    def revalidate(self, url):
+        # The first visit also sets the CSRF cookie, which is part of the ETag
+        self.client.get(url)
+        etag = self.client.get(url)['ETag']
+        return etag, self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_detail_page_is_not_modified_until_issue_changes(self):
+        url = reverse('issue_management:central_admin:issue_detail', kwargs={'issue_slug': self.issue.slug})
+        etag, response = self.revalidate(url)
+        self.assertEqual(response.status_code, 304)
+        self.assertIn('private', response['Cache-Control'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            IssueComment.objects.create(issue=self.issue, user=self.user, comment='On it')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_and_dashboard_follow_org_changes(self):
+        for url in (reverse('issue_management:central_admin:issue_list'), reverse('dashboard:central_admin_dashboard')):
+            etag, response = self.revalidate(url)
+            self.assertEqual(response.status_code, 304)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.issue.status = 'in_progress'
+                self.issue.save()
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detail_page_follows_task_shares(self):
+        task = WorkTask.objects.create(issue=self.issue, title='Fix', description='Fix', assigned_to=self.user)
+        url = reverse('issue_management:central_admin:issue_detail', kwargs={'issue_slug': self.issue.slug})
+        etag, response = self.revalidate(url)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            WorkTaskShare.objects.create(work_task=task, created_by=self.user)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_shows_the_organization_and_follows_its_spaces(self):
+        other_org = Organization.objects.create(name='Other Org')
+        foreign = Issue.objects.create(title='Foreign', description='Foreign', reporter=self.user, org=other_org)
+        url = reverse('issue_management:central_admin:issue_list')
+        etag, response = self.revalidate(url)
+        self.assertEqual(response.status_code, 304)
+        self.assertNotContains(self.client.get(url), foreign.slug)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Space.objects.create(name='Block B', org=self.org)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Block B')
@@ -0,0 +1,101 @@
+"""
+Tests for background chunked cascade deletion
+"""
+import shutil
+import tempfile
+from io import BytesIO
+from unittest.mock import MagicMock
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from config.media import delete_files
+from core.models import Organization, Space
+from issue_management.models import Issue, IssueImage, IssueComment, WorkTask, IssueActivity
+from issue_management.testing import create_member
+from issue_management.utils.deletion import (
+    process_pending_deletions,
+    schedule_issue_deletion,
+    schedule_space_deletion,
+)
+
+
+def make_image(name='photo.jpg'):
+    buffer = BytesIO()
+    Image.new('RGB', (64, 64), 'red').save(buffer, format='JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class BackgroundDeletionTests(TestCase):
+    """Test scheduling and chunked processing of deletions"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+        self.org = Organization.objects.create(name='Test Org')
+        self.space = Space.objects.create(name='Block A', org=self.org)
+        self.user = create_member(self.org, 'space_admin')
+        self.user.spaces.add(self.space)
+        self.user.active_space = self.space
+        self.user.save(skip_validation=True)
+
+        self.issues = []
+        for index in range(3):
+            issue = Issue.objects.create(
+                title=f'Issue {index}', description='Broken', reporter=self.user,
+                org=self.org, space=self.space,
+            )
+            IssueImage.objects.create(issue=issue, image=make_image())
+            IssueComment.objects.create(issue=issue, user=self.user, comment='Noted')
+            WorkTask.objects.create(issue=issue, title='Fix', description='Fix it', assigned_to=self.user)
+            self.issues.append(issue)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_scheduled_space_is_hidden_immediately(self):
+        schedule_space_deletion(self.space)
+        self.assertFalse(Space.objects.filter(pk=self.space.pk).exists())
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.active_space)
+        # Nothing has been deleted yet
+        self.assertTrue(Space.all_objects.filter(pk=self.space.pk).exists())
+        self.assertEqual(IssueImage.objects.count(), 3)
+
+    def test_space_deleted_in_chunks(self):
+        image_names = list(IssueImage.objects.values_list('image', flat=True))
+        schedule_space_deletion(self.space)
+
+        stats = process_pending_deletions(chunk_size=2, max_chunks=1)
+        self.assertTrue(stats['remaining'])
+
+        stats = process_pending_deletions(chunk_size=2)
+        self.assertFalse(stats['remaining'])
+        self.assertFalse(Space.all_objects.filter(pk=self.space.pk).exists())
+        self.assertFalse(Issue.all_objects.exists())
+        self.assertFalse(IssueImage.objects.exists())
+        self.assertFalse(IssueActivity.objects.exists())
+        for name in image_names:
+            self.assertFalse(default_storage.exists(name))
+
+    def test_single_issue_deletion_leaves_others(self):
+        schedule_issue_deletion(self.issues[0])
+        process_pending_deletions()
+        self.assertEqual(Issue.all_objects.count(), 2)
+        self.assertEqual(WorkTask.objects.count(), 2)
+        self.assertTrue(Space.objects.filter(pk=self.space.pk).exists())
+
+
+class DeleteFilesTests(TestCase):
+    """Test batched storage deletes"""
+
+    def test_uses_delete_many_in_batches_of_1000(self):
+        storage = MagicMock()
+        delete_files([f'public/issue_images/{i}.webp' for i in range(2500)], storage=storage)
+        self.assertEqual(storage.delete_many.call_count, 3)
+        self.assertEqual(len(storage.delete_many.call_args_list[0].args[0]), 1000)
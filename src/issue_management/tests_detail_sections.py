@@ -0,0 +1,55 @@
+"""
+Tests for the lazily loaded issue detail sections
+"""
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from core.models import Organization
+from issue_management.models import Issue, WorkTask
+from issue_management.testing import create_member
+
+
+class DetailSectionTests(TestCase):
+    """Test the section endpoint and its versioned cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.org = Organization.objects.create(name='Test Org')
+        self.user = create_member(self.org)
+        self.issue = Issue.objects.create(title='Leak', description='Leak', reporter=self.user, org=self.org)
+        self.client.force_login(self.user)
+
+    def section_url(self, section):
+        return reverse('issue_management:central_admin:issue_detail_section', kwargs={
+            'issue_slug': self.issue.slug, 'section': section,
+        })
+
+    def test_detail_page_defers_sections(self):
+        url = reverse('issue_management:central_admin:issue_detail', kwargs={'issue_slug': self.issue.slug})
+        response = self.client.get(url)
+        self.assertNotIn('work_tasks', response.context)
+        self.assertContains(response, self.section_url('tasks'))
+        self.assertContains(response, self.section_url('media'))
+
+    def test_section_is_served_from_cache_until_data_changes(self):
+        WorkTask.objects.create(issue=self.issue, title='Fix pipe', description='', assigned_to=self.user)
+        response = self.client.get(self.section_url('tasks'))
+        self.assertContains(response, 'Fix pipe')
+
+        # A second change is invisible until its commit bumps the version
+        WorkTask.objects.filter(issue=self.issue).update(title='Replace pipe')
+        self.assertContains(self.client.get(self.section_url('tasks')), 'Fix pipe')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            WorkTask.objects.create(issue=self.issue, title='Check valve', description='', assigned_to=self.user)
+        response = self.client.get(self.section_url('tasks'))
+        self.assertContains(response, 'Replace pipe')
+        self.assertContains(response, 'Check valve')
+
+    def test_unknown_section_and_other_org(self):
+        self.assertEqual(self.client.get(self.section_url('secrets')).status_code, 404)
+        other_org = Organization.objects.create(name='Other Org')
+        self.issue.org = other_org
+        self.issue.save()
+        self.assertEqual(self.client.get(self.section_url('tasks')).status_code, 404)
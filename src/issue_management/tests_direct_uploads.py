@@ -0,0 +1,143 @@
+"""
+Tests for uploads sent straight to storage with presigned POST policies
+"""
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from core.models import Organization
+from issue_management.models import DirectUpload, Issue, IssueImage
+from issue_management.testing import create_member
+from issue_management.utils.direct_uploads import process_pending_uploads
+
+
+def jpeg_bytes():
+    buffer = BytesIO()
+    Image.new('RGB', (640, 480), (200, 80, 40)).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class DirectUploadTests(TestCase):
+    """Test the policy, the local storage emulation, registration and processing"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            STORAGES={
+                'default': {'BACKEND': 'config.storages.LocalMediaStorage'},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.org = Organization.objects.create(name='Test Org')
+        self.user = create_member(self.org)
+        self.issue = Issue.objects.create(title='Leak', description='Leak', reporter=self.user, org=self.org)
+        self.client.force_login(self.user)
+
+    def start(self, data, issue=None):
+        return self.client.post(reverse('issue_management:direct_upload_start'), {
+            'target': 'issue_image',
+            'parent': (issue or self.issue).slug,
+            'content_type': 'image/jpeg',
+            'size': len(data),
+        })
+
+    def send(self, policy, data):
+        return self.client.post(policy['url'], {
+            **policy['fields'],
+            'file': SimpleUploadedFile('photo.jpg', data, content_type='image/jpeg'),
+        })
+
+    def test_upload_is_registered_then_compressed(self):
+        data = jpeg_bytes()
+        policy = self.start(data).json()
+        self.assertTrue(policy['fields']['key'].startswith('public/issue_images/'))
+        self.assertEqual(self.send(policy, data).status_code, 204)
+
+        response = self.client.post(reverse('issue_management:direct_upload_complete'), {'upload': policy['upload']})
+        self.assertEqual(response.json()['uploads'][0]['status'], 'uploaded')
+        image = IssueImage.objects.get(issue=self.issue)
+        self.assertEqual(image.image.name, policy['fields']['key'])
+        self.assertEqual(image.file_size, len(data))
+
+        stats = process_pending_uploads()
+        self.assertEqual(stats['processed'], 1)
+        image.refresh_from_db()
+        self.assertTrue(image.image.name.endswith('.webp'))
+        self.assertFalse(default_storage.exists(policy['fields']['key']))
+
+    def test_policy_limits_key_and_size(self):
+        data = jpeg_bytes()
+        policy = self.start(data).json()
+        tampered = {**policy, 'fields': {**policy['fields'], 'key': 'public/issue_images/other.jpg'}}
+        self.assertEqual(self.send(tampered, data).status_code, 400)
+        self.assertEqual(self.send(policy, data + b'extra').status_code, 400)
+
+    def test_start_refuses_issue_of_another_org(self):
+        other_org = Organization.objects.create(name='Other Org')
+        other_issue = Issue.objects.create(title='Other', description='Other', reporter=self.user, org=other_org)
+        response = self.start(jpeg_bytes(), issue=other_issue)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(DirectUpload.objects.exists())
+
+    def test_abandoned_upload_expires(self):
+        data = jpeg_bytes()
+        policy = self.start(data).json()
+        self.send(policy, data)
+        DirectUpload.objects.update(created_at=timezone.now() - timedelta(days=1))
+
+        self.assertEqual(process_pending_uploads()['expired'], 1)
+        self.assertEqual(DirectUpload.objects.get().status, 'expired')
+        self.assertFalse(default_storage.exists(policy['fields']['key']))
+
+    def complete(self, data):
+        policy = self.start(data).json()
+        self.send(policy, data)
+        # Failed uploads are deleted from storage on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('issue_management:direct_upload_complete'), {'upload': policy['upload']})
+        return policy, response.json()['uploads'][0]
+
+    def test_completion_refuses_what_is_not_an_image(self):
+        policy, result = self.complete(b'not an image' * 100)
+
+        self.assertEqual(result['status'], 'failed')
+        self.assertFalse(IssueImage.objects.exists())
+        self.assertFalse(default_storage.exists(policy['fields']['key']))
+
+    def test_failed_processing_removes_the_original(self):
+        policy, result = self.complete(jpeg_bytes())
+        self.assertEqual(result['status'], 'uploaded')
+
+        with mock.patch('issue_management.utils.direct_uploads.compress_with_profile', side_effect=OSError('broken')):
+            stats = process_pending_uploads()
+
+        self.assertEqual(stats['failed'], 1)
+        self.assertFalse(IssueImage.objects.exists())
+        self.assertFalse(default_storage.exists(policy['fields']['key']))
+
+    def test_worker_command_works_through_the_backlog_in_batches(self):
+        self.complete(jpeg_bytes())
+        self.complete(jpeg_bytes())
+        out = StringIO()
+
+        call_command('process_uploads', '--limit=1', stdout=out)
+        self.assertIn('Processed 1, failed 0, expired 0 upload(s)', out.getvalue())
+        self.assertIn('More uploads are pending', out.getvalue())
+
+        call_command('process_uploads', stdout=out)
+        self.assertEqual(DirectUpload.objects.filter(status='processed').count(), 2)
@@ -0,0 +1,98 @@
+"""
+Tests for live issue events
+"""
+import asyncio
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from config.pubsub import InProcessBroker, get_broker
+from core.models import Organization
+from issue_management.models import Issue, IssueComment
+from issue_management.testing import create_member
+from issue_management.utils.events import issue_channel
+
+
+class IssueEventTests(TestCase):
+    """Test that signals publish events after commit and streams relay them"""
+
+    def setUp(self):
+        self.org = Organization.objects.create(name='Test Org')
+        self.user = create_member(self.org)
+        self.issue = Issue.objects.create(title='Leak', description='Leak', reporter=self.user, org=self.org)
+        self.subscription = get_broker().subscribe([issue_channel(self.issue.pk), f'org_{self.org.pk}'])
+        self.addCleanup(self.subscription.close)
+
+    def drain(self):
+        messages = []
+        while (message := self.subscription.get(timeout=0)) is not None:
+            messages.append(message)
+        return messages
+
+    def test_status_change_is_published_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.issue.status = 'in_progress'
+            self.issue.save()
+        self.assertEqual(self.drain(), [])
+
+        for callback in callbacks:
+            callback()
+        events = [message['event'] for message in self.drain()]
+        # Once on the issue channel and once on the organization inbox
+        self.assertEqual(events.count('status'), 2)
+        self.assertIn('activity', events)
+
+    def test_comment_is_published_to_issue_only(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            IssueComment.objects.create(issue=self.issue, user=self.user, comment='On it')
+        events = [message['event'] for message in self.drain()]
+        self.assertEqual(events, ['comment'])
+
+    @override_settings(DEBUG=True)
+    def test_stream_endpoint(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('issue_management:issue_events', kwargs={'issue_slug': self.issue.slug}))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(next(iter(response.streaming_content)), b'retry: 5000\n\n')
+        response.close()
+
+    def test_no_stream_under_wsgi_in_production(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('issue_management:issue_events', kwargs={'issue_slug': self.issue.slug}))
+        self.assertEqual(response.status_code, 204)
+
+
+class InProcessBrokerTests(TestCase):
+    """Test local fan-out"""
+
+    def test_unsubscribe_reports_emptied_channels(self):
+        broker = InProcessBroker()
+        first = broker.subscribe(['issue_1'])
+        second = broker.subscribe(['issue_1', 'issue_2'])
+        broker.dispatch('issue_1', {'event': 'status'})
+        self.assertEqual(first.get(timeout=0), {'event': 'status'})
+        self.assertEqual(second.get(timeout=0), {'event': 'status'})
+        self.assertEqual(broker.unsubscribe(first), [])
+        self.assertEqual(sorted(broker.unsubscribe(second)), ['issue_1', 'issue_2'])
+
+    def test_async_subscribe_sets_up_off_the_event_loop(self):
+        class RecordingBroker(InProcessBroker):
+            def attach(self, subscription):
+                try:
+                    asyncio.get_running_loop()
+                    self.on_loop = True
+                except RuntimeError:
+                    self.on_loop = False
+                return super().attach(subscription)
+
+        async def consume(broker):
+            subscription = await broker.asubscribe(['issue_1'])
+            broker.dispatch('issue_1', {'event': 'status'})
+            message = await subscription.aget(timeout=1)
+            await subscription.aclose()
+            return message
+
+        broker = RecordingBroker()
+        self.assertEqual(asyncio.run(consume(broker)), {'event': 'status'})
+        self.assertFalse(broker.on_loop)
+        self.assertEqual(dict(broker._subscribers), {})
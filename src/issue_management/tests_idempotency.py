@@ -0,0 +1,128 @@
+"""
+Tests for idempotency keys on form submissions
+"""
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Organization
+from issue_management.models import IdempotencyKey, Issue, IssueComment, WorkTask
+from issue_management.testing import create_member
+from issue_management.utils.idempotency import purge_expired_keys, run_once
+
+
+class IdempotentPostTests(TestCase):
+    """Test that repeated submissions with one key run once and get the first response"""
+
+    def setUp(self):
+        self.org = Organization.objects.create(name='Test Org')
+        self.admin = create_member(self.org)
+        self.maintainer = create_member(self.org, 'maintainer')
+        self.issue = Issue.objects.create(title='Leak', description='Leak', reporter=self.admin, org=self.org)
+        self.task = WorkTask.objects.create(issue=self.issue, title='Fix pipe', description='', assigned_to=self.maintainer)
+
+    def create_issue(self, key, title='Broken window'):
+        return self.client.post(reverse('issue_management:central_admin:issue_create'), {
+            'title': title,
+            'description': 'Glass cracked',
+            'priority': 'medium',
+            'idempotency_key': key,
+        })
+
+    def test_repeated_create_makes_one_issue(self):
+        self.client.force_login(self.admin)
+
+        first = self.create_issue('key-1')
+        again = self.create_issue('key-1')
+
+        self.assertEqual(first.status_code, 302)
+        self.assertEqual(again.status_code, 302)
+        self.assertEqual(again['Location'], first['Location'])
+        self.assertEqual(again['Idempotent-Replayed'], 'true')
+        self.assertEqual(Issue.objects.filter(title='Broken window').count(), 1)
+
+    def test_key_reused_for_other_data_is_refused(self):
+        self.client.force_login(self.admin)
+        self.create_issue('key-1')
+
+        response = self.create_issue('key-1', title='Another window')
+
+        self.assertEqual(response.status_code, 422)
+        self.assertFalse(Issue.objects.filter(title='Another window').exists())
+
+    def test_form_errors_release_the_key(self):
+        self.client.force_login(self.admin)
+
+        invalid = self.create_issue('key-1', title='')
+        valid = self.create_issue('key-1')
+
+        self.assertEqual(invalid.status_code, 200)
+        self.assertEqual(valid.status_code, 302)
+        self.assertEqual(Issue.objects.filter(title='Broken window').count(), 1)
+
+    def test_repeated_toggle_does_not_revert(self):
+        self.client.force_login(self.maintainer)
+        url = reverse('issue_management:maintainer:work_task_toggle_complete', kwargs={'work_task_slug': self.task.slug})
+        data = {'resolution_notes': 'Replaced washer', 'idempotency_key': 'key-1'}
+
+        self.client.post(url, data)
+        self.client.post(url, data)
+
+        self.task.refresh_from_db()
+        self.assertTrue(self.task.completed)
+
+    def test_content_is_replayed_for_htmx_comments(self):
+        self.client.force_login(self.admin)
+        url = reverse('issue_management:comment_create', kwargs={'issue_slug': self.issue.slug})
+        data = {'comment': 'On my way', 'idempotency_key': 'key-1'}
+
+        first = self.client.post(url, data)
+        again = self.client.post(url, data)
+
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.content, first.content)
+        self.assertEqual(IssueComment.objects.filter(issue=self.issue).count(), 1)
+
+    def test_expired_keys_are_purged_and_run_again(self):
+        self.client.force_login(self.maintainer)
+        url = reverse('issue_management:maintainer:work_task_toggle_complete', kwargs={'work_task_slug': self.task.slug})
+        data = {'resolution_notes': 'Replaced washer', 'idempotency_key': 'key-1'}
+        self.client.post(url, data)
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+
+        self.client.post(url, data)
+
+        self.task.refresh_from_db()
+        self.assertFalse(self.task.completed)
+        self.assertEqual(purge_expired_keys(now=timezone.now() + timedelta(days=2)), 1)
+
+    def test_repeat_while_first_runs_is_refused(self):
+        self.client.force_login(self.admin)
+        IdempotencyKey.objects.create(user=self.admin, key='key-1', action='IssueCreateView', in_progress=True)
+
+        response = self.create_issue('key-1')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Issue.objects.filter(title='Broken window').exists())
+
+    def test_abandoned_claim_is_taken_over(self):
+        self.client.force_login(self.admin)
+        IdempotencyKey.objects.create(user=self.admin, key='key-1', action='IssueCreateView', in_progress=True)
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(hours=1))
+
+        response = self.create_issue('key-1')
+
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(IdempotencyKey.objects.get(key='key-1').in_progress)
+
+    def test_failing_action_releases_the_key(self):
+        def fail():
+            raise RuntimeError('storage down')
+
+        with self.assertRaises(RuntimeError):
+            run_once(self.admin, 'key-1', 'upload', fail)
+
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(run_once(self.admin, 'key-1', 'upload', lambda: {'done': True}), {'done': True})
@@ -0,0 +1,191 @@
+"""
+Tests for server-side handling of photos resized in the browser
+"""
+import random
+from io import BytesIO
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from config.benchmarks.images import psnr, ssim
+from config.utils import compress_image, compress_with_profile, compression_profile
+from core.models import Organization
+from issue_management.models import Issue
+from issue_management.testing import create_member
+
+
+def make_upload(size, format, name='photo', **save_kwargs):
+    buffer = BytesIO()
+    Image.linear_gradient('L').convert('RGB').resize(size).save(buffer, format=format, **save_kwargs)
+    return SimpleUploadedFile(f'{name}.{format.lower()}', buffer.getvalue(), content_type=f'image/{format.lower()}')
+
+
+class CompressImageTests(TestCase):
+    """Test that already optimised uploads skip the re-encode"""
+
+    def test_webp_within_target_is_kept(self):
+        upload = make_upload((800, 600), 'WEBP', quality=85)
+        original = upload.read()
+        upload.seek(0)
+        result = compress_image(upload, upload_path='issue_images/')
+        self.assertEqual(result.read(), original)
+        self.assertTrue(result.name.endswith('.webp'))
+        self.assertNotEqual(result.name, 'photo.webp')
+
+    def test_oversized_webp_is_resized(self):
+        upload = make_upload((2400, 1200), 'WEBP', quality=85)
+        result = compress_image(upload, upload_path='issue_images/')
+        self.assertEqual(Image.open(result).size, (1920, 960))
+
+    def test_jpeg_is_reencoded(self):
+        upload = make_upload((800, 600), 'JPEG', quality=95)
+        result = compress_image(upload, upload_path='issue_images/')
+        self.assertEqual(Image.open(result).format, 'WEBP')
+
+    def test_rotated_webp_is_reencoded(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        upload = make_upload((800, 600), 'WEBP', quality=85, exif=exif)
+        original = upload.read()
+        upload.seek(0)
+        result = compress_image(upload, upload_path='issue_images/')
+        self.assertNotEqual(result.read(), original)
+
+    def test_webp_with_location_is_stripped(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'PhoneMaker'
+        exif.get_ifd(0x8825)[1] = 'N'
+        upload = make_upload((800, 600), 'WEBP', quality=85, exif=exif)
+        original = upload.read()
+        upload.seek(0)
+        result = compress_image(upload, upload_path='issue_images/')
+        stored = result.read()
+        self.assertNotEqual(stored, original)
+        stored_image = Image.open(BytesIO(stored))
+        self.assertFalse(stored_image.getexif())
+        self.assertNotIn('exif', stored_image.info)
+
+
+class DecodeImageTests(TestCase):
+    """Test the reduced-scale decode, orientation and pixel limit"""
+
+    def test_large_jpeg_is_decoded_at_reduced_scale(self):
+        upload = make_upload((8000, 6000), 'JPEG', quality=90)
+        stats = {}
+        result = compress_image(upload, upload_path='issue_images/', stats=stats)
+        self.assertEqual(Image.open(result).size, (1920, 1440))
+        self.assertEqual(stats['source_size'], (8000, 6000))
+        self.assertEqual(stats['decoded_size'], (4000, 3000))
+        # Far below the 192 MB a full decode takes
+        self.assertLess(stats['peak_bytes'], 8000 * 6000 * 4 / 3)
+
+    def test_exif_orientation_is_applied(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        upload = make_upload((4000, 3000), 'JPEG', quality=90, exif=exif)
+        result = compress_image(upload, upload_path='issue_images/')
+        self.assertEqual(Image.open(result).size, (1440, 1920))
+
+    @override_settings(IMAGE_MAX_PIXELS=1000 * 1000)
+    def test_pixel_limit_is_enforced_before_decoding(self):
+        upload = make_upload((1200, 1000), 'JPEG')
+        with self.assertRaises(Image.DecompressionBombError):
+            compress_image(upload, upload_path='issue_images/')
+
+
+class ImageQualityMetricTests(TestCase):
+    """Test the SSIM and PSNR used by the compression benchmark"""
+
+    def test_identical_images_score_highest(self):
+        image = Image.linear_gradient('L').convert('RGB')
+        self.assertAlmostEqual(ssim(image, image), 1.0, places=4)
+        self.assertEqual(psnr(image, image), 100.0)
+
+    def test_stronger_compression_scores_lower(self):
+        image = Image.effect_mandelbrot((256, 256), (-2, -1.5, 1, 1.5), 100).convert('RGB')
+        scores = []
+        for quality in (90, 20):
+            buffer = BytesIO()
+            image.save(buffer, format='JPEG', quality=quality)
+            compressed = Image.open(buffer).convert('RGB')
+            scores.append((ssim(image, compressed), psnr(image, compressed)))
+        self.assertGreater(scores[0][0], scores[1][0])
+        self.assertGreater(scores[0][1], scores[1][1])
+
+
+def noisy_upload(size=(1600, 1200)):
+    """A JPEG with per-pixel detail, which costs bytes like a real photo"""
+    rng = random.Random(1)
+    small = (size[0] // 4, size[1] // 4)
+    noise = Image.frombytes('L', small, rng.randbytes(small[0] * small[1])).resize(size, Image.Resampling.BICUBIC)
+    buffer = BytesIO()
+    Image.merge('RGB', (noise, Image.linear_gradient('L').resize(size), noise)).save(buffer, format='JPEG', quality=95)
+    return SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+
+PROFILES = {
+    'photo': {
+        'max_width': 1920, 'max_height': 1920, 'format': 'WEBP',
+        'quality': 85, 'min_quality': 40, 'avif_quality': 60, 'avif_min_quality': 30,
+        'target_bytes': 400 * 1024,
+    },
+}
+
+
+@override_settings(IMAGE_COMPRESSION_PROFILES=PROFILES, IMAGE_FORMAT='WEBP')
+class CompressionProfileTests(TestCase):
+    """Test named profiles, byte budgets and the AVIF fallback"""
+
+    def test_budget_lowers_quality_until_image_fits(self):
+        unbudgeted = compress_image(noisy_upload(), quality=85)
+        self.assertGreater(unbudgeted.size, 400 * 1024)
+
+        stats = {}
+        result = compress_with_profile(noisy_upload(), 'photo', stats=stats)
+        self.assertLess(stats['quality'], 85)
+        self.assertGreaterEqual(stats['quality'], 40)
+        # The final encode may differ slightly from the fast search encodes
+        self.assertLess(result.size, 400 * 1024 * 1.1)
+
+    def test_simple_image_keeps_full_quality(self):
+        stats = {}
+        compress_with_profile(make_upload((800, 600), 'PNG'), 'photo', stats=stats)
+        self.assertEqual(stats['quality'], 85)
+
+    def test_avif_profile_uses_avif_quality_or_falls_back_to_webp(self):
+        with override_settings(IMAGE_FORMAT='AVIF'):
+            profile = PROFILES['photo'] | {'format': 'AVIF'}
+            with override_settings(IMAGE_COMPRESSION_PROFILES={'photo': profile}):
+                with mock.patch('config.utils.features.check', return_value=False):
+                    options = compression_profile('photo')
+                    result = compress_with_profile(make_upload((800, 600), 'JPEG'), 'photo')
+                self.assertEqual(options['format'], 'WEBP')
+                self.assertEqual(options['quality'], 85)
+                self.assertTrue(result.name.endswith('.webp'))
+
+                with mock.patch('config.utils.features.check', return_value=True):
+                    options = compression_profile('photo')
+                self.assertEqual((options['format'], options['quality'], options['min_quality']), ('AVIF', 60, 30))
+
+
+@override_settings(IMAGE_MAX_PIXELS=1000 * 1000)
+class UploadFormPixelLimitTests(TestCase):
+    """Test that upload forms refuse images over the pixel limit before saving anything"""
+
+    def test_issue_create_refuses_oversized_image(self):
+        org = Organization.objects.create(name='Test Org')
+        self.client.force_login(create_member(org))
+
+        response = self.client.post(reverse('issue_management:central_admin:issue_create'), {
+            'title': 'Leak',
+            'description': 'Leak',
+            'priority': 'medium',
+            'image1': make_upload((1200, 1000), 'JPEG'),
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('has too many pixels', str(response.context['form'].errors['image1']))
+        self.assertFalse(Issue.objects.exists())
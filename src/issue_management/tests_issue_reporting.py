@@ -0,0 +1,130 @@
+"""
+Tests for issue reporting by general users
+"""
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from core.models import Organization, User
+from issue_management.models import DirectUpload, Issue, IssueImage
+from issue_management.testing import create_member
+from issue_management.utils.direct_uploads import process_pending_uploads
+from issue_management.utils.reporting import NOTIFY_UPLOAD_WAIT, send_pending_notifications
+
+
+def jpeg_upload():
+    buffer = BytesIO()
+    Image.new('RGB', (640, 480), (200, 80, 40)).save(buffer, format='JPEG')
+    return SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+
+class IssueReportTests(TestCase):
+    """Test idempotent reports, the rate limit and the deferred photo and notification work"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            STORAGES={
+                'default': {'BACKEND': 'config.storages.LocalMediaStorage'},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+
+        self.org = Organization.objects.create(name='Test Org')
+        self.admin = create_member(self.org, fcm_token='admin-token')
+        self.user = User.objects.create_user(phone_number='+919000000002', organization=self.org)
+        self.client.force_login(self.user)
+        self.url = reverse('issue_management:general_user:issue_report')
+
+    def report(self, key='key-1', **extra):
+        return self.client.post(self.url, {
+            'title': 'Broken tap',
+            'description': 'The tap in room 12 leaks',
+            'key': key,
+            **extra,
+        })
+
+    @mock.patch('issue_management.signals.send_issue_created_notification')
+    def test_report_is_created_once_per_key(self, send):
+        form = self.client.get(self.url)
+        self.assertEqual(len(form.context['form'].initial['key']), 32)
+
+        first = self.report()
+        second = self.report()
+
+        self.assertRedirects(first, reverse('issue_management:general_user:issue_list'))
+        self.assertEqual(second.status_code, 302)
+        issue = Issue.objects.get()
+        self.assertEqual(issue.reporter, self.user)
+        self.assertEqual(issue.org, self.org)
+        self.assertTrue(issue.notify_pending)
+        send.assert_not_called()
+        self.assertContains(self.client.get(second.url), issue.issue_id)
+
+    def test_photos_are_stored_for_the_worker(self):
+        self.report(images=[jpeg_upload(), jpeg_upload()])
+
+        issue = Issue.objects.get()
+        uploads = DirectUpload.objects.filter(parent_slug=issue.slug)
+        self.assertEqual(uploads.count(), 2)
+        self.assertTrue(all(upload.status == 'uploaded' for upload in uploads))
+        # Stored as sent; the process_uploads worker compresses them
+        self.assertTrue(all(image.image.name.endswith('.jpg') for image in IssueImage.objects.filter(issue=issue)))
+
+    @override_settings(ISSUE_REPORT_RATE_LIMIT=2)
+    def test_rate_limit(self):
+        self.report('a')
+        self.report('b')
+        response = self.report('c')
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(Issue.objects.count(), 2)
+
+    @mock.patch('issue_management.utils.reporting.send_issue_created_notification')
+    def test_worker_sends_pending_notifications_once(self, send):
+        self.report()
+
+        self.assertEqual(send_pending_notifications()['notified'], 1)
+        self.assertEqual(send_pending_notifications()['notified'], 0)
+        issue, admins = send.call_args.args
+        self.assertFalse(Issue.objects.get().notify_pending)
+        self.assertEqual(list(admins), [self.admin])
+
+    @mock.patch('issue_management.utils.reporting.send_issue_created_notification')
+    def test_notification_waits_for_the_photos(self, send):
+        self.report(images=[jpeg_upload()])
+
+        self.assertEqual(send_pending_notifications(), {'notified': 0, 'remaining': False})
+        process_pending_uploads()
+        self.assertEqual(send_pending_notifications()['notified'], 1)
+        self.assertTrue(send.call_args.kwargs['include_image'])
+
+    @mock.patch('issue_management.utils.reporting.send_issue_created_notification')
+    def test_stuck_photos_are_left_out(self, send):
+        self.report(images=[jpeg_upload()])
+        Issue.objects.update(created_at=timezone.now() - NOTIFY_UPLOAD_WAIT)
+
+        self.assertEqual(send_pending_notifications()['notified'], 1)
+        self.assertFalse(send.call_args.kwargs['include_image'])
+
+    def test_other_roles_cannot_report(self):
+        self.client.force_login(self.admin)
+
+        response = self.report()
+
+        self.assertRedirects(response, reverse('core:login'), fetch_redirect_response=False)
+        self.assertFalse(Issue.objects.exists())
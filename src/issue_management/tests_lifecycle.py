@@ -0,0 +1,104 @@
+"""
+Tests for compare-and-set issue transitions
+"""
+from django.test import TestCase
+from django.urls import reverse
+
+from core.models import Organization, UserWorkloadStats
+from issue_management.models import Issue, IssueActivity
+from issue_management.testing import create_member
+from issue_management.utils import lifecycle
+from issue_management.utils.workload import compute_user_stats
+
+
+class IssueLifecycleTests(TestCase):
+    """Test that transitions apply once, lose cleanly to concurrent changes and work in batches"""
+
+    def setUp(self):
+        self.org = Organization.objects.create(name='Test Org')
+        self.admin = create_member(self.org)
+        self.supervisor = create_member(self.org, 'supervisor')
+        self.issue = Issue.objects.create(title='Leak', description='Leak', reporter=self.admin, org=self.org)
+
+    def assertStatsMatch(self, user):
+        stats = UserWorkloadStats.objects.filter(user=user).values(*compute_user_stats([user.pk])[user.pk]).first()
+        self.assertEqual(stats, compute_user_stats([user.pk])[user.pk])
+
+    def test_stale_status_loses(self):
+        seen = Issue.objects.get(pk=self.issue.pk)
+        Issue.objects.filter(pk=self.issue.pk).update(status='resolved')
+
+        self.assertEqual(lifecycle.start_work([seen], self.admin), [])
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.status, 'resolved')
+        self.assertFalse(IssueActivity.objects.filter(activity_type='status_changed').exists())
+
+    def test_batch_start_work(self):
+        other = Issue.objects.create(title='Crack', description='Crack', reporter=self.admin, org=self.org)
+        closed = Issue.objects.create(title='Old', description='Old', reporter=self.admin, org=self.org, status='closed')
+
+        changed = lifecycle.start_work(Issue.objects.filter(pk__in=[self.issue.pk, other.pk, closed.pk]), self.admin)
+
+        self.assertCountEqual([issue.pk for issue in changed], [self.issue.pk, other.pk])
+        self.assertEqual(Issue.objects.filter(status='in_progress').count(), 2)
+        activities = IssueActivity.objects.filter(activity_type='status_changed')
+        self.assertEqual(activities.count(), 2)
+        self.assertEqual(set(activities.values_list('user', flat=True)), {self.admin.pk})
+
+    def test_assign_resolve_reopen_keep_counters(self):
+        lifecycle.assign([self.issue], self.admin, self.supervisor)
+        self.assertEqual(self.issue.status, 'assigned')
+        self.assertTrue(IssueActivity.objects.filter(issue=self.issue, activity_type='assigned').exists())
+        self.assertEqual(UserWorkloadStats.objects.get(user=self.supervisor).assigned_assigned, 1)
+
+        lifecycle.resolve([self.issue], self.supervisor, 'Fixed')
+        lifecycle.reopen([self.issue], self.admin)
+
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.status, 'assigned')
+        self.assertIsNone(self.issue.resolution_notes)
+        self.assertTrue(IssueActivity.objects.filter(issue=self.issue, activity_type='reopened').exists())
+        self.assertStatsMatch(self.supervisor)
+        self.assertStatsMatch(self.admin)
+
+    def test_start_work_view_refuses_resolved_issue(self):
+        self.client.force_login(self.admin)
+        Issue.objects.filter(pk=self.issue.pk).update(status='resolved')
+
+        response = self.client.post(
+            reverse('issue_management:central_admin:issue_start_work', kwargs={'issue_slug': self.issue.slug}),
+            follow=True,
+        )
+
+        self.assertContains(response, 'Cannot start work on resolved issues')
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.status, 'resolved')
+
+    def test_assignment_view(self):
+        self.client.force_login(self.admin)
+
+        response = self.client.post(
+            reverse('issue_management:central_admin:issue_assign', kwargs={'issue_slug': self.issue.slug}),
+            {'assigned_to': self.supervisor.pk},
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.assigned_to, self.supervisor)
+        self.assertEqual(self.issue.assigned_by, self.admin)
+        self.assertEqual(self.issue.status, 'assigned')
+
+    def test_view_compares_the_status_the_user_saw(self):
+        self.client.force_login(self.admin)
+        # The page showed the issue resolved; someone closed it since
+        Issue.objects.filter(pk=self.issue.pk).update(status='closed')
+
+        response = self.client.post(
+            reverse('issue_management:central_admin:issue_reopen', kwargs={'issue_slug': self.issue.slug}),
+            {'seen_status': 'resolved'},
+            follow=True,
+        )
+
+        self.assertContains(response, 'changed by someone else')
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.status, 'closed')
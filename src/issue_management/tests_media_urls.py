@@ -0,0 +1,59 @@
+"""
+Tests for cached signed URLs of private media
+"""
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from config.storages import SIGNED_URL_MARGIN, MediaStorage
+
+
+class MediaStorageUrlTests(SimpleTestCase):
+    """Test that public files are not signed and signed URLs are reused"""
+
+    def setUp(self):
+        cache.clear()
+        self.storage = MediaStorage(
+            bucket_name='media-bucket',
+            access_key='key',
+            secret_key='secret',
+            region_name='us-east-1',
+            custom_domain=None,
+            querystring_expire=3600,
+        )
+
+    def test_public_files_are_not_signed(self):
+        url = self.storage.url('public/issue_images/photo.webp')
+
+        self.assertIn('media/public/issue_images/photo.webp', url)
+        self.assertNotIn('Signature', url)
+
+    def test_public_files_use_the_custom_domain(self):
+        self.storage.custom_domain = 'cdn.example.com'
+
+        url = self.storage.url('public/issue_images/photo.webp')
+
+        self.assertEqual(url, 'https://cdn.example.com/media/public/issue_images/photo.webp')
+
+    def test_signed_url_is_cached_per_key(self):
+        client = self.storage.connection.meta.client
+        with mock.patch.object(client, 'generate_presigned_url', wraps=client.generate_presigned_url) as sign:
+            first = self.storage.url('private/report.pdf')
+            second = self.storage.url('private/report.pdf')
+            other = self.storage.url('private/other.pdf')
+
+        self.assertIn('Signature', first)
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(sign.call_count, 2)
+
+    def test_longer_validity_signs_again(self):
+        client = self.storage.connection.meta.client
+        with mock.patch.object(client, 'generate_presigned_url', wraps=client.generate_presigned_url) as sign:
+            self.storage.url('private/report.pdf')
+            self.storage.url('private/report.pdf', expire=48 * 3600)
+            self.storage.url('private/report.pdf', expire=3600)
+
+        self.assertEqual(sign.call_count, 2)
+        self.assertEqual(sign.call_args.kwargs['ExpiresIn'], 48 * 3600 + SIGNED_URL_MARGIN)
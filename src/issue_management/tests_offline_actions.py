@@ -0,0 +1,60 @@
+"""
+Tests for replaying maintainer actions queued offline
+"""
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Organization
+from issue_management.models import IdempotencyKey, Issue, SiteVisit, WorkTask
+from issue_management.testing import create_member
+
+
+class OfflineActionSyncTests(TestCase):
+    """Test idempotent replays and server-side conflict resolution"""
+
+    def setUp(self):
+        self.org = Organization.objects.create(name='Test Org')
+        self.maintainer = create_member(self.org, 'maintainer')
+        self.issue = Issue.objects.create(title='Leak', description='Leak', reporter=self.maintainer, org=self.org)
+        self.task = WorkTask.objects.create(issue=self.issue, title='Fix pipe', description='', assigned_to=self.maintainer)
+        self.client.force_login(self.maintainer)
+        self.url = reverse('issue_management:maintainer:offline_action_sync')
+
+    def sync(self, action, slug, key, **fields):
+        return self.client.post(self.url, {'offline_action': action, 'slug': slug, 'idempotency_key': key, **fields}).json()
+
+    def test_replay_with_same_key_applies_once(self):
+        first = self.sync('complete_task', self.task.slug, 'key-1', resolution_notes='Replaced washer')
+        self.assertEqual(first['status'], 'applied')
+        self.task.refresh_from_db()
+        self.assertTrue(self.task.completed)
+
+        # Someone reopens the task; a late replay of the same request must not complete it again
+        WorkTask.objects.filter(pk=self.task.pk).update(completed=False)
+        again = self.sync('complete_task', self.task.slug, 'key-1', resolution_notes='Replaced washer')
+        self.assertTrue(again['duplicate'])
+        self.assertEqual(again['status'], 'applied')
+        self.task.refresh_from_db()
+        self.assertFalse(self.task.completed)
+        self.assertEqual(IdempotencyKey.objects.filter(user=self.maintainer).count(), 1)
+
+    def test_intent_already_met_is_resolved(self):
+        self.task.completed = True
+        self.task.save()
+        result = self.sync('complete_task', self.task.slug, 'key-2', resolution_notes='Done')
+        self.assertEqual(result['status'], 'resolved')
+
+    def test_cancelled_visit_conflicts(self):
+        visit = SiteVisit.objects.create(
+            issue=self.issue, title='Inspect', created_by=self.maintainer, assigned_to=self.maintainer,
+            scheduled_date=timezone.now(), status='cancelled',
+        )
+        result = self.sync('complete_visit', visit.slug, 'key-3', findings='Wet wall', actions_taken='None')
+        self.assertEqual(result['status'], 'conflict')
+        visit.refresh_from_db()
+        self.assertEqual(visit.status, 'cancelled')
+
+    def test_malformed_request(self):
+        response = self.client.post(self.url, {'offline_action': 'delete_everything', 'slug': 'x', 'idempotency_key': 'k'})
+        self.assertEqual(response.status_code, 400)
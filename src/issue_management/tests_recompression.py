@@ -0,0 +1,90 @@
+"""
+Tests for recompressing stored images with the current profiles
+"""
+import json
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from core.models import Organization
+from issue_management.models import Issue, IssueImage
+from issue_management.testing import create_member
+
+
+def large_png():
+    buffer = BytesIO()
+    Image.linear_gradient('L').convert('RGB').resize((1200, 900)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class RecompressMediaTests(TestCase):
+    """Test the dry run, the swap of recompressed files and checkpoints"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.checkpoint = os.path.join(self.media_root, 'checkpoint.json')
+
+        org = Organization.objects.create(name='Test Org')
+        user = create_member(org)
+        issue = Issue.objects.create(title='Leak', description='Leak', reporter=user, org=org)
+        # Stored before compression existed: saved without going through save()
+        self.images = []
+        for index in range(3):
+            name = default_storage.save(f'public/issue_images/old{index}.png', ContentFile(large_png()))
+            image = IssueImage(issue=issue, image=name, slug=f'old-image-{index}')
+            IssueImage.objects.bulk_create([image])
+            self.images.append(IssueImage.objects.get(slug=image.slug))
+
+    def recompress(self, **options):
+        out = StringIO()
+        call_command(
+            'recompress_media', model=['IssueImage'], workers=0, chunk_size=2,
+            checkpoint=self.checkpoint, stdout=out, **options,
+        )
+        return out.getvalue()
+
+    def test_dry_run_changes_nothing(self):
+        output = self.recompress(dry_run=True)
+        self.assertIn('3 would be recompressed', output)
+        for image in self.images:
+            image.refresh_from_db()
+            self.assertTrue(image.image.name.endswith('.png'))
+            self.assertTrue(default_storage.exists(image.image.name))
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_images_are_swapped_and_originals_deleted(self):
+        self.recompress()
+        for image in self.images:
+            old_name = image.image.name
+            image.refresh_from_db()
+            self.assertTrue(image.image.name.endswith('.webp'))
+            self.assertTrue(default_storage.exists(image.image.name))
+            self.assertFalse(default_storage.exists(old_name))
+            self.assertEqual(image.file_size, default_storage.size(image.image.name))
+
+    def test_run_resumes_from_checkpoint(self):
+        self.recompress(limit=2)
+        with open(self.checkpoint) as handle:
+            self.assertEqual(json.load(handle), {'issue_management.IssueImage': self.images[1].pk})
+
+        output = self.recompress()
+        self.assertIn('1 scanned, 1 recompressed', output)
+        self.images[2].refresh_from_db()
+        self.assertTrue(self.images[2].image.name.endswith('.webp'))
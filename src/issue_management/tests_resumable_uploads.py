@@ -0,0 +1,136 @@
+"""
+Tests for uploads sent in resumable chunks
+"""
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core.models import Organization
+from issue_management.models import DirectUpload, Issue, IssueImage
+from issue_management.testing import create_member
+from issue_management.utils.direct_uploads import expire_stale_uploads
+from issue_management.utils.resumable_uploads import OffsetMismatch, append_chunk
+
+
+def jpeg_bytes():
+    buffer = BytesIO()
+    Image.new('RGB', (640, 480), (40, 120, 200)).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class ResumableUploadTests(TestCase):
+    """Test creating, resuming, finishing and cancelling chunked uploads"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            RESUMABLE_UPLOAD_ROOT=os.path.join(self.media_root, 'partial'),
+            STORAGES={
+                'default': {'BACKEND': 'config.storages.LocalMediaStorage'},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.org = Organization.objects.create(name='Test Org')
+        self.user = create_member(self.org)
+        self.issue = Issue.objects.create(title='Leak', description='Leak', reporter=self.user, org=self.org)
+        self.client.force_login(self.user)
+
+    def create(self, data):
+        return self.client.post(reverse('issue_management:resumable_upload_create'), {
+            'target': 'issue_image',
+            'parent': self.issue.slug,
+            'content_type': 'image/jpeg',
+            'size': len(data),
+        })
+
+    def patch(self, url, chunk, offset):
+        return self.client.generic(
+            'PATCH', url, chunk,
+            content_type='application/offset+octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def test_upload_resumes_from_server_offset(self):
+        data = jpeg_bytes()
+        half = len(data) // 2
+        response = self.create(data)
+        self.assertEqual(response.status_code, 201)
+        url, upload_id = response.json()['url'], response.json()['upload']
+
+        response = self.patch(url, data[:half], 0)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response['Upload-Offset'], str(half))
+
+        # A retry of the first chunk is refused with the offset to resume from
+        response = self.patch(url, data[:half], 0)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Upload-Offset'], str(half))
+        self.assertEqual(self.client.head(url)['Upload-Offset'], str(half))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.patch(url, data[half:], half)
+        self.assertEqual(response['Upload-Offset'], str(len(data)))
+        upload = DirectUpload.objects.get(pk=upload_id)
+        with default_storage.open(upload.key) as stored:
+            self.assertEqual(stored.read(), data)
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, 'partial', f'{upload_id}.part')))
+
+        response = self.client.post(reverse('issue_management:direct_upload_complete'), {'upload': upload_id})
+        self.assertEqual(response.json()['uploads'][0]['status'], 'uploaded')
+        self.assertEqual(IssueImage.objects.get(issue=self.issue).file_size, len(data))
+
+    def test_chunk_past_declared_length_is_refused(self):
+        data = jpeg_bytes()
+        url = self.create(data).json()['url']
+        self.assertEqual(self.patch(url, data + b'extra', 0).status_code, 413)
+
+    def test_incomplete_upload_cannot_be_completed(self):
+        data = jpeg_bytes()
+        upload_id = self.create(data).json()['upload']
+        self.client.post(reverse('issue_management:direct_upload_complete'), {'upload': upload_id})
+        self.assertFalse(IssueImage.objects.filter(issue=self.issue).exists())
+
+    def test_cancel_and_expiry_remove_partial_files(self):
+        data = jpeg_bytes()
+        first = self.create(data).json()
+        self.patch(first['url'], data[:100], 0)
+        self.assertEqual(self.client.delete(first['url']).status_code, 204)
+        self.assertEqual(self.client.head(first['url']).status_code, 404)
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, 'partial', f"{first['upload']}.part")))
+
+        second = self.create(data).json()
+        DirectUpload.objects.filter(pk=second['upload']).update(
+            updated_at=DirectUpload.objects.get(pk=second['upload']).created_at - timedelta(days=2),
+        )
+        expire_stale_uploads()
+        self.assertEqual(DirectUpload.objects.get(pk=second['upload']).status, 'expired')
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, 'partial', f"{second['upload']}.part")))
+
+
+    def test_chunk_that_lost_the_race_is_dropped(self):
+        data = jpeg_bytes()
+        upload_id = self.create(data).json()['upload']
+
+        class RacingStream(BytesIO):
+            # Another request appends while this one is still reading its body
+            def read(self, size=-1):
+                DirectUpload.objects.filter(pk=upload_id).update(offset=10)
+                return super().read(size)
+
+        with self.assertRaises(OffsetMismatch) as raised:
+            append_chunk(self.user, upload_id, 0, RacingStream(data[:100]))
+
+        self.assertEqual(raised.exception.offset, 10)
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'partial')), [f'{upload_id}.part'])
@@ -0,0 +1,75 @@
+"""
+Tests for streaming form uploads with per-field limits
+"""
+import hashlib
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from config.upload_handlers import RejectedUpload, StreamingUploadHandler
+from issue_management.forms import AdditionalImageUploadForm, IssueForm, SpaceAdminIssueForm
+
+LIMITS = {'images': {'max_size': 1024, 'types': ['image/png']}}
+
+
+@override_settings(UPLOAD_FIELD_LIMITS=LIMITS, UPLOAD_MAX_FILE_SIZE=4096)
+class StreamingUploadHandlerTests(SimpleTestCase):
+    """Test that files are hashed and that files over their field's limits are dropped"""
+
+    def post(self, **files):
+        request = RequestFactory().post('/upload/', files)
+        request.upload_handlers = [StreamingUploadHandler(request)]
+        return request.FILES
+
+    def test_accepted_file_is_hashed_on_disk(self):
+        data = b'\x89PNG' + b'x' * 500
+        upload = self.post(images=SimpleUploadedFile('a.png', data, content_type='image/png'))['images']
+
+        self.assertNotIsInstance(upload, RejectedUpload)
+        self.assertTrue(upload.temporary_file_path())
+        self.assertEqual(upload.size, len(data))
+        self.assertEqual(upload.sha256, hashlib.sha256(data).hexdigest())
+        self.assertEqual(upload.read(), data)
+
+    def test_oversized_file_is_dropped(self):
+        upload = self.post(images=SimpleUploadedFile('big.png', b'x' * 200_000, content_type='image/png'))['images']
+
+        self.assertIsInstance(upload, RejectedUpload)
+        self.assertEqual(upload.reason, 'size')
+        self.assertEqual(upload.size, 200_000)
+        self.assertEqual(upload.read(), b'')
+
+    def test_wrong_type_is_not_stored(self):
+        upload = self.post(images=SimpleUploadedFile('a.txt', b'hello', content_type='text/plain'))['images']
+
+        self.assertIsInstance(upload, RejectedUpload)
+        self.assertEqual(upload.reason, 'type')
+
+    def test_other_fields_use_the_default_limit(self):
+        files = self.post(
+            file=SimpleUploadedFile('a.bin', b'x' * 3000),
+            other=SimpleUploadedFile('b.bin', b'x' * 5000),
+        )
+
+        self.assertNotIsInstance(files['file'], RejectedUpload)
+        self.assertIsInstance(files['other'], RejectedUpload)
+
+    def test_form_reports_rejected_upload(self):
+        files = self.post(images=SimpleUploadedFile('big.png', b'x' * 20 * 1024 * 1024, content_type='image/png'))
+        form = AdditionalImageUploadForm({}, files)
+
+        self.assertFalse(form.is_valid())
+        self.assertIn('too large', form.errors['images'][0])
+
+    @override_settings(UPLOAD_FIELD_LIMITS={'voice': {'max_size': 1024, 'types': ['audio/webm']}})
+    def test_issue_forms_refuse_rejected_voice(self):
+        data = {'title': 'Leak', 'description': 'Leak', 'priority': 'medium'}
+        for form_class in (IssueForm, SpaceAdminIssueForm):
+            for voice, message in (
+                (SimpleUploadedFile('v.m4a', b'x' * 500, content_type='audio/x-m4a'), 'not accepted'),
+                (SimpleUploadedFile('v.webm', b'x' * 5000, content_type='audio/webm'), 'too large'),
+            ):
+                form = form_class(data, self.post(voice=voice))
+
+                self.assertFalse(form.is_valid())
+                self.assertIn(message, form.errors['voice'][0])
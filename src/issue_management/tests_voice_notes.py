@@ -0,0 +1,92 @@
+"""
+Tests for voice note transcoding and waveform extraction
+"""
+import shutil
+import struct
+import tempfile
+from io import BytesIO
+from unittest import skipUnless
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from core.models import Organization
+from issue_management.models import Issue
+from issue_management.testing import create_member
+from issue_management.utils.voice_notes import (
+    WAVEFORM_BLOCK_SAMPLES, block_peaks, downsample, process_pending_voice_notes,
+)
+
+
+def pcm(*levels):
+    """One waveform block of 16-bit samples per level, alternating sign"""
+    samples = []
+    for level in levels:
+        samples.extend([level, -level] * (WAVEFORM_BLOCK_SAMPLES // 2))
+    return struct.pack(f'<{len(samples)}h', *samples)
+
+
+def wav_bytes(seconds=1, rate=8000):
+    import wave
+    buffer = BytesIO()
+    with wave.open(buffer, 'wb') as output:
+        output.setnchannels(1)
+        output.setsampwidth(2)
+        output.setframerate(rate)
+        output.writeframes(struct.pack(f'<{rate * seconds}h', *[(i % 40 - 20) * 500 for i in range(rate * seconds)]))
+    return buffer.getvalue()
+
+
+class VoiceNoteTests(TestCase):
+    """Test the waveform maths, metadata resets and the worker"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.org = Organization.objects.create(name='Test Org')
+        self.user = create_member(self.org)
+        self.issue = Issue.objects.create(
+            title='Leak', description='Leak', reporter=self.user, org=self.org,
+            voice=SimpleUploadedFile('note.wav', wav_bytes(), content_type='audio/wav'),
+        )
+
+    def test_waveform_levels(self):
+        peaks = block_peaks(BytesIO(pcm(1000, 4000, 2000, 0)))
+        self.assertEqual(peaks, [1000, 4000, 2000, 0])
+        self.assertEqual(downsample(peaks), [25, 100, 50, 0])
+        self.assertEqual(downsample(peaks, points=2), [100, 50])
+
+    def test_new_recording_resets_metadata(self):
+        Issue.objects.filter(pk=self.issue.pk).update(voice_duration=3.0, voice_waveform=[10, 20], voice_processed=True)
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.voice_content_type, 'audio/wav')
+        self.assertEqual(self.issue.voice_duration_display, '0:03')
+
+        self.issue.voice = SimpleUploadedFile('other.mp3', b'ID3', content_type='audio/mpeg')
+        self.issue.save()
+        self.assertIsNone(self.issue.voice_duration)
+        self.assertIsNone(self.issue.voice_waveform)
+        self.assertFalse(self.issue.voice_processed)
+
+    @override_settings(FFPROBE_BINARY='false')
+    def test_unreadable_recording_is_not_retried(self):
+        stats = process_pending_voice_notes()
+        self.assertEqual(stats['failed'], 1)
+        self.assertFalse(stats['remaining'])
+        self.issue.refresh_from_db()
+        self.assertTrue(self.issue.voice_processed)
+        self.assertTrue(self.issue.voice.name.endswith('.wav'))
+
+    @skipUnless(shutil.which('ffmpeg') and shutil.which('ffprobe'), 'ffmpeg is not installed')
+    def test_recording_is_transcoded_to_opus(self):
+        stats = process_pending_voice_notes()
+        self.assertEqual(stats['processed'], 1)
+        self.issue.refresh_from_db()
+        self.assertTrue(self.issue.voice.name.endswith('.ogg'))
+        self.assertEqual(self.issue.voice_content_type, 'audio/ogg')
+        self.assertAlmostEqual(self.issue.voice_duration, 1.0, delta=0.1)
+        self.assertEqual(len(self.issue.voice_waveform), 10)
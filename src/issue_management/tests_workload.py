@@ -0,0 +1,69 @@
+"""
+Tests for the per-user workload counters
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import Organization, UserWorkloadStats
+from issue_management.models import Issue, WorkTask
+from issue_management.testing import create_member
+from issue_management.utils.deletion import process_pending_deletions, schedule_issue_deletion
+from issue_management.utils.workload import compute_user_stats
+
+
+class WorkloadStatsTests(TestCase):
+    """Test that signals keep the counters in line with the issue tables"""
+
+    def setUp(self):
+        self.org = Organization.objects.create(name='Test Org')
+        self.reporter = create_member(self.org)
+        self.maintainer = create_member(self.org, 'maintainer')
+
+    def assertStatsMatch(self, user):
+        stats = UserWorkloadStats.objects.filter(user=user).values(*compute_user_stats([user.pk])[user.pk]).first()
+        self.assertEqual(stats, compute_user_stats([user.pk])[user.pk])
+
+    def test_counters_follow_issue_lifecycle(self):
+        issue = Issue.objects.create(title='Leak', description='Leak', reporter=self.reporter, org=self.org)
+        self.assertEqual(self.reporter.workload_stats.reported_total, 1)
+
+        issue.assigned_to = self.maintainer
+        issue.status = 'in_progress'
+        issue.save()
+        task = WorkTask.objects.create(issue=issue, title='Fix', description='Fix it', assigned_to=self.maintainer)
+
+        stats = UserWorkloadStats.objects.get(user=self.maintainer)
+        self.assertEqual(stats.assigned_in_progress, 1)
+        self.assertEqual(stats.open_tasks, 1)
+
+        task.completed = True
+        task.save()
+        issue.status = 'resolved'
+        issue.save()
+
+        stats.refresh_from_db()
+        self.assertEqual(stats.assigned_in_progress, 0)
+        self.assertEqual(stats.assigned_resolved, 1)
+        self.assertEqual(stats.open_tasks, 0)
+        self.assertStatsMatch(self.reporter)
+        self.assertStatsMatch(self.maintainer)
+
+    def test_background_deletion_refreshes_counters(self):
+        issue = Issue.objects.create(
+            title='Leak', description='Leak', reporter=self.reporter, org=self.org, assigned_to=self.maintainer,
+        )
+        schedule_issue_deletion(issue)
+        process_pending_deletions()
+        self.assertEqual(UserWorkloadStats.objects.get(user=self.reporter).reported_total, 0)
+        self.assertEqual(UserWorkloadStats.objects.get(user=self.maintainer).assigned_open, 0)
+
+    def test_reconcile_command_fixes_drift(self):
+        Issue.objects.create(title='Leak', description='Leak', reporter=self.reporter, org=self.org)
+        UserWorkloadStats.objects.filter(user=self.reporter).update(reported_total=7)
+
+        out = StringIO()
+        call_command('reconcile_workload_stats', stdout=out)
+        self.assertIn('Corrected workload stats for 2 user(s)', out.getvalue())
+        self.assertStatsMatch(self.reporter)
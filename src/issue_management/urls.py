@@ -8,9 +8,17 @@ urlpatterns = [
     path('issues/<slug:issue_slug>/comments/', common.IssueCommentListView.as_view(), name='comment_list'),
     path('issues/<slug:issue_slug>/comments/create/', common.IssueCommentCreateView.as_view(), name='comment_create'),
     path('issues/<slug:issue_slug>/review-comments/create/', common.IssueReviewCommentCreateView.as_view(), name='review_comment_create'),
+    path('issues/<slug:issue_slug>/timeline/', common.IssueTimelineView.as_view(), name='issue_timeline'),
+    path('issues/<slug:issue_slug>/events/', common.IssueEventStreamView.as_view(), name='issue_events'),
+    path('events/inbox/', common.InboxEventStreamView.as_view(), name='inbox_events'),
+    path('uploads/', common.DirectUploadStartView.as_view(), name='direct_upload_start'),
+    path('uploads/complete/', common.DirectUploadCompleteView.as_view(), name='direct_upload_complete'),
+    path('uploads/resumable/', common.ResumableUploadCreateView.as_view(), name='resumable_upload_create'),
+    path('uploads/resumable/<int:upload_id>/', common.ResumableUploadView.as_view(), name='resumable_upload'),
     
     # Role-based URL patterns for issue management
     path('central-admin/', include('issue_management.role_urls.central_admin')),
+    path('general-user/', include('issue_management.role_urls.general_user')),
     path('maintainer/', include('issue_management.role_urls.maintainer')),
     path('reviewer/', include('issue_management.role_urls.reviewer')),
     path('space-admin/', include('issue_management.role_urls.space_admin')),
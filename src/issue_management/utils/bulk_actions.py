@@ -0,0 +1,111 @@
+"""
+Utility module for bulk issue operations from the central and space admin
+issue lists.
+
+`apply()` runs one action over the selected issues through `lifecycle`, so
+triaging a few hundred issues costs a handful of set-based queries rather
+than a save (and its signals) per issue, and each issue still gets its
+activity entries. Everyone the action concerns (the new assignee, the added
+reviewers) gets one notification summing up their issues instead of one per
+issue.
+"""
+
+import logging
+
+from django.db import transaction
+
+from core.models import User
+from issue_management.utils import lifecycle
+from issue_management.utils.firebase_notifications import send_issues_summary_notification
+
+logger = logging.getLogger(__name__)
+
+ACTION_CHOICES = [
+    ('assign', 'Assign to supervisor'),
+    ('priority', 'Change priority'),
+    ('start_work', 'Start work'),
+    ('close', 'Close'),
+    ('cancel', 'Cancel'),
+    ('reopen', 'Reopen'),
+    ('reviewers', 'Request review'),
+]
+
+# Actions that are a plain status transition
+STATUS_ACTIONS = {
+    'start_work': lifecycle.start_work,
+    'close': lifecycle.close,
+    'cancel': lifecycle.cancel,
+    'reopen': lifecycle.reopen,
+}
+
+
+def _issue_count(issues):
+    return f"{len(issues)} issue{'s' if len(issues) != 1 else ''}"
+
+
+def _notify(issues_by_user, user, title, notification_type):
+    """
+    Send each user one notification about their issues, once committed.
+
+    Args:
+        issues_by_user (dict): User id -> list of issues
+        user: The user who made the change; not notified
+        title: Title format with an ``{issues}`` placeholder for the count
+        notification_type: Value of 'notification_type' in the data payload
+    """
+    issues_by_user = {
+        user_id: issues for user_id, issues in issues_by_user.items()
+        if issues and user_id != user.pk
+    }
+    if not issues_by_user:
+        return
+
+    def send():
+        recipients = User.objects.filter(
+            pk__in=issues_by_user, is_active=True,
+        ).exclude(fcm_token__isnull=True).exclude(fcm_token='')
+        for recipient in recipients:
+            issues = issues_by_user[recipient.pk]
+            try:
+                send_issues_summary_notification(
+                    recipient, issues, title.format(issues=_issue_count(issues)), notification_type,
+                )
+            except Exception:
+                # Notifications are best effort and must not fail the action
+                logger.exception("Notifying user %s of a bulk update failed", recipient.pk)
+
+    transaction.on_commit(send)
+
+
+def apply(action, issues, user, assignee=None, priority=None, reviewers=()):
+    """
+    Apply a bulk action to issues.
+
+    Args:
+        action: Key of `ACTION_CHOICES`
+        issues: Issues as loaded for the request
+        user: The user making the change
+        assignee: The supervisor to assign to ('assign')
+        priority: The new priority ('priority')
+        reviewers: The reviewers to add ('reviewers')
+
+    Returns:
+        list: The issues that changed; the others were not in a state the
+        action applies to, or were changed by someone else meanwhile
+    """
+    issues = list(issues)
+    if action == 'assign':
+        changed = lifecycle.assign(issues, user, assignee, requires_review=None)
+        _notify({assignee.pk: changed}, user, '{issues} assigned to you', 'issues_assigned')
+        return changed
+    if action == 'priority':
+        return lifecycle.set_priority(issues, user, priority)
+    if action == 'reviewers':
+        added = lifecycle.request_review(issues, user, reviewers)
+        issues_by_reviewer = {}
+        for issue, new in added.items():
+            for reviewer in new:
+                issues_by_reviewer.setdefault(reviewer.pk, []).append(issue)
+        _notify(issues_by_reviewer, user, 'Review requested on {issues}', 'review_requested')
+        return list(added)
+    return STATUS_ACTIONS[action](issues, user)
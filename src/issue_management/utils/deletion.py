@@ -0,0 +1,202 @@
+"""
+Utility module for background cascade deletion of issues, spaces and organizations.
+
+Views only mark the object as pending deletion, which hides it immediately
+(see `core.models.PendingDeletionExcludedManager`). The `process_deletions`
+management command then removes dependents in bounded chunks, each in its own
+short transaction, and deletes the stored files of every chunk with batched
+storage calls once the rows are gone.
+"""
+
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from config.media import defer_file_deletion, delete_files
+from core.models import Organization, Space, Update, User
+from issue_management.utils.workload import defer_workload_updates, refresh_user_stats
+from issue_management.models import (
+    Issue,
+    IssueImage,
+    IssueResolutionImage,
+    WorkTaskResolutionImage,
+    SiteVisitImage,
+    IssueReviewCommentImage,
+    IssueComment,
+    IssueReviewComment,
+    WorkTask,
+    WorkTaskShare,
+    SiteVisit,
+    PurchaseRequest,
+    IssueActivity,
+    ShoppingList,
+    ShoppingListItem,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+
+# Dependents of pending issues, leaves first: (model, lookup path to Issue).
+# Activities go last so nothing recreates them while the issue is being emptied.
+ISSUE_DEPENDENTS = [
+    (IssueReviewCommentImage, 'review_comment__issue'),
+    (IssueReviewComment, 'issue'),
+    (WorkTaskResolutionImage, 'work_task__issue'),
+    (WorkTaskShare, 'work_task__issue'),
+    (WorkTask, 'issue'),
+    (SiteVisitImage, 'site_visit__issue'),
+    (SiteVisit, 'issue'),
+    (IssueImage, 'issue'),
+    (IssueResolutionImage, 'issue'),
+    (IssueComment, 'issue'),
+    (ShoppingListItem, 'purchase_request__issue'),
+    (PurchaseRequest, 'issue'),
+    (Update, 'related_issue'),
+    (IssueActivity, 'issue'),
+]
+
+_cascade_deleting = ContextVar('cascade_deleting', default=False)
+
+
+def is_cascade_deleting():
+    """True while the deletion worker is running (signals skip activity tracking)"""
+    return _cascade_deleting.get()
+
+
+@contextmanager
+def cascade_deletion():
+    token = _cascade_deleting.set(True)
+    try:
+        yield
+    finally:
+        _cascade_deleting.reset(token)
+
+
+def schedule_issue_deletion(issue):
+    """Hide an issue immediately and queue it for background deletion"""
+    Issue.all_objects.filter(pk=issue.pk).update(deletion_requested_at=timezone.now())
+
+
+def schedule_space_deletion(space):
+    """Hide a space immediately and queue it (and its issues) for background deletion"""
+    with transaction.atomic():
+        Space.all_objects.filter(pk=space.pk).update(deletion_requested_at=timezone.now())
+        # Clear active_space for all users who have this space selected
+        User.objects.filter(active_space=space).update(active_space=None)
+
+
+def schedule_organization_deletion(organization):
+    """Hide an organization, deactivate its users and queue it for background deletion"""
+    with transaction.atomic():
+        Organization.all_objects.filter(pk=organization.pk).update(deletion_requested_at=timezone.now())
+        User.objects.filter(organization=organization).update(is_active=False)
+
+
+class _ChunkBudget:
+    """Caps how many chunks one worker run may delete"""
+
+    def __init__(self, max_chunks=None):
+        self.max_chunks = max_chunks
+        self.used = 0
+
+    @property
+    def exhausted(self):
+        return self.max_chunks is not None and self.used >= self.max_chunks
+
+
+def _delete_in_chunks(queryset, chunk_size, budget, stats):
+    """
+    Delete the rows of ``queryset`` ``chunk_size`` at a time.
+
+    Each chunk runs in its own transaction; stored files of the chunk are
+    collected by the model `pre_delete` receivers and removed with batched
+    storage deletes after the transaction commits. Workload counters of the
+    users involved are recomputed once per chunk rather than once per row.
+    """
+    model = queryset.model
+    label = model._meta.label
+    while not budget.exhausted:
+        pks = list(queryset.order_by('pk').values_list('pk', flat=True)[:chunk_size])
+        if not pks:
+            break
+        with defer_file_deletion() as file_names, defer_workload_updates() as user_ids:
+            with transaction.atomic():
+                model._base_manager.filter(pk__in=pks).delete()
+        stats['files'] += delete_files(file_names)
+        refresh_user_stats(user_ids)
+        stats['rows'][label] = stats['rows'].get(label, 0) + len(pks)
+        budget.used += 1
+
+
+def _expand_pending_parents():
+    """Mark the spaces and issues of pending organizations and spaces as pending too"""
+    now = timezone.now()
+    pending_orgs = Organization.all_objects.filter(deletion_requested_at__isnull=False)
+    Space.all_objects.filter(org__in=pending_orgs, deletion_requested_at__isnull=True).update(deletion_requested_at=now)
+    Issue.all_objects.filter(org__in=pending_orgs, deletion_requested_at__isnull=True).update(deletion_requested_at=now)
+
+    pending_spaces = Space.all_objects.filter(deletion_requested_at__isnull=False)
+    Issue.all_objects.filter(space__in=pending_spaces, deletion_requested_at__isnull=True).update(deletion_requested_at=now)
+
+
+def process_pending_deletions(chunk_size=DEFAULT_CHUNK_SIZE, max_chunks=None):
+    """
+    Delete everything scheduled for deletion, one bounded chunk at a time.
+
+    Args:
+        chunk_size: Maximum number of rows deleted per transaction
+        max_chunks: Stop after this many chunks (None for no limit); the next
+            run picks up where this one stopped
+
+    Returns:
+        dict: ``rows`` deleted per model label, ``files`` removed from storage
+        and whether work ``remaining`` is left for a later run
+    """
+    stats = {'rows': {}, 'files': 0}
+    budget = _ChunkBudget(max_chunks)
+
+    with cascade_deletion():
+        _expand_pending_parents()
+
+        # Dependents of pending issues, then the issues themselves
+        for model, path in ISSUE_DEPENDENTS:
+            queryset = model._base_manager.filter(**{f'{path}__deletion_requested_at__isnull': False})
+            _delete_in_chunks(queryset, chunk_size, budget, stats)
+        _delete_in_chunks(Issue.all_objects.filter(deletion_requested_at__isnull=False), chunk_size, budget, stats)
+
+        # Space-level records, then spaces that have no issues left
+        pending_spaces = Space.all_objects.filter(deletion_requested_at__isnull=False)
+        _delete_in_chunks(ShoppingListItem.objects.filter(purchase_request__space__in=pending_spaces), chunk_size, budget, stats)
+        _delete_in_chunks(PurchaseRequest.objects.filter(space__in=pending_spaces), chunk_size, budget, stats)
+        _delete_in_chunks(Update.objects.filter(space__in=pending_spaces), chunk_size, budget, stats)
+        _delete_in_chunks(
+            pending_spaces.filter(~Exists(Issue.all_objects.filter(space=OuterRef('pk')))),
+            chunk_size, budget, stats,
+        )
+
+        # Organization-level records, users, then organizations that are empty
+        pending_orgs = Organization.all_objects.filter(deletion_requested_at__isnull=False)
+        _delete_in_chunks(ShoppingListItem.objects.filter(shopping_list__org__in=pending_orgs), chunk_size, budget, stats)
+        _delete_in_chunks(ShoppingList.objects.filter(org__in=pending_orgs), chunk_size, budget, stats)
+        _delete_in_chunks(PurchaseRequest.objects.filter(org__in=pending_orgs), chunk_size, budget, stats)
+        _delete_in_chunks(Update.objects.filter(org__in=pending_orgs), chunk_size, budget, stats)
+        empty_orgs = pending_orgs.filter(
+            ~Exists(Issue.all_objects.filter(org=OuterRef('pk'))),
+            ~Exists(Space.all_objects.filter(org=OuterRef('pk'))),
+        )
+        _delete_in_chunks(User.objects.filter(organization__in=empty_orgs), chunk_size, budget, stats)
+        _delete_in_chunks(empty_orgs, chunk_size, budget, stats)
+
+    stats['remaining'] = (
+        Issue.all_objects.filter(deletion_requested_at__isnull=False).exists()
+        or Space.all_objects.filter(deletion_requested_at__isnull=False).exists()
+        or Organization.all_objects.filter(deletion_requested_at__isnull=False).exists()
+    )
+    if stats['rows']:
+        logger.info("Deleted %s rows and %s files in %s chunk(s)", sum(stats['rows'].values()), stats['files'], budget.used)
+    return stats
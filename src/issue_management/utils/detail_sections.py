@@ -0,0 +1,115 @@
+"""
+Utility module for the lazily loaded sections of the issue detail page.
+
+The detail page renders only the issue itself; work tasks, site visits,
+purchase requests and media are fetched by HTMX once the page is shown.
+Each section's rows are cached per issue under a key built from the issue's
+``updated_at`` and the change versions of the data the section reads (see
+`config.versions`), so the signals only have to bump a counter and an
+unchanged issue is served without touching the database.
+
+The evaluated rows are cached rather than the rendered HTML: sections contain
+CSRF tokens and per-user controls that must be rendered for each request.
+"""
+
+from django.core.cache import cache
+
+from config.versions import get_version_token
+from issue_management.models import (
+    IssueResolutionImage, IssueReviewComment, PurchaseRequest, SiteVisit, WorkTask,
+)
+from issue_management.utils.pagination import to_micros
+
+SECTION_CACHE_TIMEOUT = 60 * 60
+
+# Data sets, invalidated by the signals when one of their rows changes
+PARTS = ('tasks', 'visits', 'purchases', 'media', 'timeline')
+
+
+def _tasks(issue):
+    return {
+        'work_tasks': list(
+            WorkTask.objects.filter(issue=issue)
+            .select_related('assigned_to')
+            .prefetch_related('resolution_images')
+            .order_by('completed', 'due_date')
+        ),
+    }
+
+
+def _visits(issue):
+    return {
+        'site_visits': list(
+            SiteVisit.objects.filter(issue=issue)
+            .select_related('created_by', 'assigned_to')
+            .prefetch_related('images')
+        ),
+    }
+
+
+def _purchases(issue):
+    return {
+        'purchase_requests': list(
+            PurchaseRequest.objects.filter(issue=issue).select_related('requested_by', 'reviewed_by')
+        ),
+    }
+
+
+def _media(issue):
+    return {
+        'resolution_images': list(IssueResolutionImage.objects.filter(issue=issue)),
+        'review_comments': list(
+            IssueReviewComment.objects.filter(issue=issue)
+            .select_related('user')
+            .prefetch_related('images')
+        ),
+    }
+
+
+# section name -> (data part, loader)
+SECTIONS = {
+    'tasks': ('tasks', _tasks),
+    'visits': ('visits', _visits),
+    'visit_summary': ('visits', _visits),
+    'purchases': ('purchases', _purchases),
+    'media': ('media', _media),
+}
+
+
+def part_scope(issue_id, part):
+    return f'issue:{issue_id}:{part}'
+
+
+def section_cache_key(issue, part):
+    """Cache key for ``part`` of ``issue``, changing whenever its data does"""
+    version = get_version_token(part_scope(issue.pk, part))
+    return f'issue-section:{issue.pk}:{part}:{to_micros(issue.updated_at)}:{version}'
+
+
+def cached_part(issue, part, load):
+    """
+    Return the cached result of ``load(issue)`` for ``part``, loading it on a miss.
+
+    Args:
+        issue: The Issue the data belongs to
+        part: Data part name from PARTS
+        load: Callable returning a picklable value for the issue
+    """
+    key = section_cache_key(issue, part)
+    data = cache.get(key)
+    if data is None:
+        data = load(issue)
+        cache.set(key, data, SECTION_CACHE_TIMEOUT)
+    return data
+
+
+def section_context(issue, section):
+    """
+    Return the template context for one detail section.
+
+    Raises:
+        KeyError: If ``section`` is unknown
+    """
+    part, load = SECTIONS[section]
+    return cached_part(issue, part, load)
+
@@ -0,0 +1,433 @@
+"""
+Utility module for images and voice notes uploaded straight to object storage.
+
+Uploads take three steps, so no Django worker waits on a slow mobile
+connection while the file is transferred:
+
+1. `start_upload()` checks the target and parent object, picks the final
+   storage name under the model's ``public/...`` prefix and returns a
+   presigned POST policy (see `config.storages.MediaStorage.presigned_post`).
+2. The browser posts the file to storage.
+3. `complete_uploads()` checks the object arrived within the size limit,
+   that images are images within the pixel limit (from the header alone)
+   and registers it on its model. Images are compressed afterwards by the
+   `process_uploads` management command, which also expires policies that
+   were never used. If compressing fails, the record and the original are
+   deleted, so no unprocessed file stays attached.
+
+Large files on unreliable connections can instead be sent in chunks through
+the application and resumed after a dropped connection (see
+`resumable_uploads`); they end with the same completion call.
+
+Development and tests use `config.storages.LocalMediaStorage`, which emulates
+the presigned POST on the local filesystem.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image
+
+from config.media import delete_files
+from config.storages import PRESIGNED_POST_EXPIRY
+from config.utils import check_pixel_limit, compress_with_profile, generate_alphanumeric_filename
+from issue_management.models import (
+    DirectUpload,
+    Issue,
+    IssueImage,
+    IssueResolutionImage,
+    SiteVisit,
+    SiteVisitImage,
+    WorkTask,
+    WorkTaskResolutionImage,
+)
+from issue_management.utils.workers import batch
+
+logger = logging.getLogger(__name__)
+
+# Same limits as AdditionalImageUploadForm and VoiceUploadForm
+IMAGE_TYPES = {'image/jpeg': 'jpg', 'image/png': 'png', 'image/gif': 'gif', 'image/webp': 'webp'}
+AUDIO_TYPES = {
+    'audio/mpeg': 'mp3', 'audio/mp3': 'mp3', 'audio/wav': 'wav', 'audio/x-wav': 'wav',
+    'audio/m4a': 'm4a', 'audio/mp4': 'm4a', 'audio/aac': 'aac', 'audio/ogg': 'ogg', 'audio/webm': 'webm',
+}
+# Formats Pillow must recognise in an uploaded image's header
+IMAGE_FORMATS = {'JPEG', 'PNG', 'GIF', 'WEBP'}
+MAX_IMAGE_SIZE = 10 * 1024 * 1024
+MAX_VOICE_SIZE = 50 * 1024 * 1024
+
+# Uploads completed in one request (the image upload pages allow 5)
+MAX_UPLOADS_PER_COMPLETION = 10
+
+# Pending uploads are expired a while after their policy stops working
+UPLOAD_EXPIRY = timedelta(seconds=PRESIGNED_POST_EXPIRY) + timedelta(hours=1)
+
+# Resumable uploads may pause for a long time on a poor connection; this
+# counts from the last chunk received
+RESUMABLE_UPLOAD_EXPIRY = timedelta(hours=24)
+
+
+def _managed_issues(user):
+    """Issues the user may add media to, following the issue detail pages"""
+    if user.is_central_admin:
+        return Issue.objects.filter(org=user.organization)
+    if user.is_space_admin and user.active_space:
+        return Issue.objects.filter(space=user.active_space)
+    if user.is_supervisor:
+        return Issue.objects.filter(assigned_to=user)
+    return Issue.objects.none()
+
+
+def _work_tasks(user):
+    if user.is_central_admin:
+        return WorkTask.objects.filter(issue__org=user.organization)
+    return WorkTask.objects.filter(assigned_to=user)
+
+
+def _site_visits(user):
+    if user.is_central_admin:
+        return SiteVisit.objects.filter(issue__org=user.organization)
+    return SiteVisit.objects.filter(Q(assigned_to=user) | Q(created_by=user))
+
+
+def _check_image(key):
+    """Refuse stored objects that are not images, or have too many pixels, from the header alone"""
+    try:
+        with default_storage.open(key) as stored:
+            img = Image.open(stored)
+            check_pixel_limit(img)
+            image_format = img.format
+    except Image.DecompressionBombError:
+        raise ValueError('The image has too many pixels. Please upload a smaller photo.')
+    except OSError:
+        raise ValueError('The file is not a valid image.')
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError('File type not supported.')
+
+
+def _compress(upload, instance, field_name):
+    """Replace the uploaded original with a copy compressed with the model's profile"""
+    field_file = getattr(instance, field_name)
+    stats = {}
+    with default_storage.open(upload.key) as original:
+        compressed = compress_with_profile(
+            original, instance.COMPRESSION_PROFILE, upload_path=field_file.field.upload_to, stats=stats,
+        )
+    logger.info(
+        "Compressed %s: %sx%s decoded at %sx%s, %.1f MB of pixels at peak, quality %s",
+        upload.key, *stats['source_size'], *stats['decoded_size'], stats['peak_bytes'] / 2**20, stats['quality'],
+    )
+    field_file.save(compressed.name, compressed, save=False)
+    instance.file_size = compressed.size
+    instance.save(update_fields=[field_name, 'file_size'])
+    default_storage.delete(upload.key)
+
+
+# Upload targets. 'parent_field' is the model's foreign key to the parent
+# object, or None when the file field is on the parent itself (Issue.voice).
+# 'check' runs on the stored object before it is registered, 'process' in
+# the worker once it is.
+UPLOAD_TARGETS = {
+    'issue_image': {
+        'model': IssueImage, 'field': 'image', 'parent_field': 'issue', 'parents': _managed_issues,
+        'types': IMAGE_TYPES, 'max_size': MAX_IMAGE_SIZE, 'check': _check_image, 'process': _compress,
+    },
+    'issue_resolution_image': {
+        'model': IssueResolutionImage, 'field': 'image', 'parent_field': 'issue', 'parents': _managed_issues,
+        'types': IMAGE_TYPES, 'max_size': MAX_IMAGE_SIZE, 'check': _check_image, 'process': _compress,
+    },
+    'work_task_resolution_image': {
+        'model': WorkTaskResolutionImage, 'field': 'image', 'parent_field': 'work_task', 'parents': _work_tasks,
+        'types': IMAGE_TYPES, 'max_size': MAX_IMAGE_SIZE, 'check': _check_image, 'process': _compress,
+    },
+    'site_visit_image': {
+        'model': SiteVisitImage, 'field': 'image', 'parent_field': 'site_visit', 'parents': _site_visits,
+        'types': IMAGE_TYPES, 'max_size': MAX_IMAGE_SIZE, 'check': _check_image, 'process': _compress,
+    },
+    'issue_voice': {
+        'model': Issue, 'field': 'voice', 'parent_field': None, 'parents': _managed_issues,
+        'types': AUDIO_TYPES, 'max_size': MAX_VOICE_SIZE, 'check': None, 'process': None,
+    },
+}
+
+
+def _check_parent(target, parent):
+    if target['parent_field'] is None and getattr(parent, target['field']):
+        raise ValueError('This issue already has a voice recording. Delete it first to upload a new one.')
+
+
+def create_upload(user, target_name, parent_slug, content_type, size, resumable=False):
+    """
+    Check an upload request and create its pending DirectUpload.
+
+    Args:
+        user: The uploading user
+        target_name (str): Key of `UPLOAD_TARGETS`
+        parent_slug (str): Slug of the issue, work task or site visit
+        content_type (str): Content type of the file
+        size: File size in bytes as sent by the client
+        resumable (bool): Whether the file is sent in chunks through the
+            application (see `resumable_uploads`) instead of straight to storage
+
+    Returns:
+        DirectUpload: The pending upload
+
+    Raises:
+        ValueError: If the upload is not allowed
+    """
+    target = UPLOAD_TARGETS.get(target_name)
+    if target is None:
+        raise ValueError('Unknown upload target.')
+    extension = target['types'].get(content_type)
+    if extension is None:
+        raise ValueError('File type not supported.')
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise ValueError('File size is missing.')
+    if not 0 < size <= target['max_size']:
+        raise ValueError(f"File is too large. Maximum size is {target['max_size'] // (1024 * 1024)}MB.")
+
+    parent = target['parents'](user).filter(slug=parent_slug).first()
+    if parent is None:
+        raise ValueError('You cannot add files here.')
+    _check_parent(target, parent)
+
+    # Random names are practically unique; the unique key catches the rest
+    upload_to = target['model']._meta.get_field(target['field']).upload_to
+    return DirectUpload.objects.create(
+        user=user,
+        target=target_name,
+        parent_slug=parent_slug,
+        key=f"{upload_to}{generate_alphanumeric_filename(extension=extension)}",
+        content_type=content_type,
+        length=size,
+        offset=0 if resumable else None,
+    )
+
+
+def start_upload(user, target_name, parent_slug, content_type, size):
+    """
+    Create a pending upload and the policy for sending it to storage.
+
+    Arguments are those of `create_upload()`.
+
+    Returns:
+        tuple: (DirectUpload, dict with the policy 'url' and 'fields')
+
+    Raises:
+        ValueError: If the upload is not allowed
+    """
+    upload = create_upload(user, target_name, parent_slug, content_type, size)
+    # The policy only accepts the declared size or less
+    policy = default_storage.presigned_post(upload.key, content_type, upload.length)
+    return upload, policy
+
+
+def is_expired(upload, now=None):
+    """
+    Presigned uploads expire a while after they were started, resumable ones
+    when no chunk has arrived for `RESUMABLE_UPLOAD_EXPIRY`.
+    """
+    if upload.offset is None:
+        return (now or timezone.now()) - upload.created_at > UPLOAD_EXPIRY
+    return (now or timezone.now()) - upload.updated_at > RESUMABLE_UPLOAD_EXPIRY
+
+
+def _register(upload):
+    """Attach a stored upload to its model. Returns the final status."""
+    target = UPLOAD_TARGETS[upload.target]
+    if is_expired(upload):
+        raise ValueError('The upload has expired, please try again.')
+    if not default_storage.exists(upload.key):
+        raise ValueError('The file has not arrived in storage.')
+    upload.size = default_storage.size(upload.key)
+    if upload.size > target['max_size']:
+        raise ValueError('File is too large.')
+    if target['check']:
+        target['check'](upload.key)
+
+    parent = target['parents'](upload.user).select_for_update(of=('self',)).filter(slug=upload.parent_slug).first()
+    if parent is None:
+        raise ValueError('You cannot add files here anymore.')
+    _check_parent(target, parent)
+
+    if target['parent_field'] is None:
+        setattr(parent, target['field'], upload.key)
+        setattr(parent, f"{target['field']}_size", upload.size)
+        # Set the user who uploaded the file for activity tracking
+        parent._changed_by = upload.user
+        parent.save()
+        instance = parent
+    else:
+        instance = target['model'](**{
+            target['parent_field']: parent,
+            target['field']: upload.key,
+            'file_size': upload.size,
+        })
+        instance.save()
+    upload.object_id = instance.pk
+    return 'uploaded' if target['process'] else 'processed'
+
+
+def complete_uploads(user, upload_ids):
+    """
+    Register uploads the client finished sending to storage.
+
+    Each upload is registered in its own transaction; repeating the call for
+    an upload that was already registered returns its current status.
+
+    Args:
+        user: The uploading user
+        upload_ids: Primary keys returned by `start_upload()`
+
+    Returns:
+        list: One dict per upload with 'upload', 'status' and 'error'
+    """
+    results = []
+    for upload_id in list(upload_ids)[:MAX_UPLOADS_PER_COMPLETION]:
+        with transaction.atomic():
+            upload = DirectUpload.objects.select_for_update().filter(pk=upload_id, user=user).first()
+            if upload is None:
+                results.append({'upload': upload_id, 'status': 'failed', 'error': 'Unknown upload.'})
+                continue
+            if upload.status == 'pending':
+                try:
+                    with transaction.atomic():
+                        upload.status = _register(upload)
+                    upload.completed_at = timezone.now()
+                except ValueError as e:
+                    upload.status = 'failed'
+                    upload.error = str(e)
+                    # Nothing refers to the object, don't keep it
+                    transaction.on_commit(lambda key=upload.key: default_storage.delete(key))
+                upload.save()
+            results.append({'upload': upload.pk, 'status': upload.status, 'error': upload.error})
+    return results
+
+
+def queue_form_upload(user, target_name, parent, uploaded_file):
+    """
+    Store a file that was sent with a form as it is and register it like a
+    completed direct upload, so its post-processing (image compression) runs
+    in the `process_uploads` worker instead of the request.
+
+    The caller has validated the file and may add it to ``parent``.
+
+    Args:
+        user: The uploading user
+        target_name (str): Key of `UPLOAD_TARGETS` with a parent field
+        parent: The issue, work task or site visit the file is added to
+        uploaded_file: The uploaded file
+
+    Returns:
+        DirectUpload: The registered upload
+    """
+    target = UPLOAD_TARGETS[target_name]
+    upload_to = target['model']._meta.get_field(target['field']).upload_to
+    extension = target['types'].get(uploaded_file.content_type, 'bin')
+    key = default_storage.save(f"{upload_to}{generate_alphanumeric_filename(extension=extension)}", uploaded_file)
+    # If the transaction rolls back, the stored file is left for reconcile_media
+    instance = target['model'](**{
+        target['parent_field']: parent,
+        target['field']: key,
+        'file_size': uploaded_file.size,
+    })
+    # Set the user who uploaded the file for activity tracking
+    instance._uploaded_by = user
+    instance.save()
+    return DirectUpload.objects.create(
+        user=user,
+        target=target_name,
+        parent_slug=parent.slug,
+        key=key,
+        content_type=uploaded_file.content_type,
+        length=uploaded_file.size,
+        size=uploaded_file.size,
+        object_id=instance.pk,
+        status='uploaded' if target['process'] else 'processed',
+        completed_at=timezone.now(),
+    )
+
+
+def expire_stale_uploads(now=None):
+    """
+    Mark pending uploads that were left unfinished as expired and delete
+    anything the client sent, in storage or in the resumable upload store.
+
+    Returns:
+        int: Number of uploads expired
+    """
+    from issue_management.utils.resumable_uploads import discard_chunks
+
+    now = now or timezone.now()
+    stale = list(DirectUpload.objects.filter(status='pending').filter(
+        Q(offset__isnull=True, created_at__lt=now - UPLOAD_EXPIRY)
+        | Q(offset__isnull=False, updated_at__lt=now - RESUMABLE_UPLOAD_EXPIRY)
+    ).only('pk', 'key', 'offset'))
+    if not stale:
+        return 0
+    delete_files(upload.key for upload in stale)
+    for upload in stale:
+        if upload.offset is not None:
+            discard_chunks(upload)
+    DirectUpload.objects.filter(pk__in=[upload.pk for upload in stale], status='pending').update(status='expired')
+    return len(stale)
+
+
+def process_upload(upload):
+    """
+    Run the post-processing of one registered upload.
+
+    The upload is claimed with a conditional update first, so several
+    workers can run side by side without processing a file twice.
+
+    Returns:
+        bool: False if another worker claimed the upload
+    """
+    claimed = DirectUpload.objects.filter(pk=upload.pk, status='uploaded').update(status='processing')
+    if not claimed:
+        return False
+
+    target = UPLOAD_TARGETS[upload.target]
+    instance = None
+    try:
+        instance = target['model'].objects.get(pk=upload.object_id)
+        target['process'](upload, instance, target['field'])
+    except Exception as e:
+        logger.exception("Processing %s failed", upload.key)
+        upload.status = 'failed'
+        upload.error = str(e)
+        # Don't leave the unprocessed original public and attached
+        if instance is not None and getattr(instance, target['field']).name == upload.key:
+            instance.delete()
+        default_storage.delete(upload.key)
+    else:
+        upload.status = 'processed'
+        upload.processed_at = timezone.now()
+    upload.save(update_fields=['status', 'error', 'processed_at'])
+    return True
+
+
+def process_pending_uploads(limit=None):
+    """
+    Process registered uploads oldest first and expire abandoned ones.
+
+    Args:
+        limit (int, optional): Maximum number of uploads to process
+
+    Returns:
+        dict: 'processed', 'failed' and 'expired' counts and whether uploads
+        are 'remaining'
+    """
+    stats = {'processed': 0, 'failed': 0, 'expired': expire_stale_uploads()}
+    queryset = DirectUpload.objects.filter(status='uploaded').order_by('completed_at')
+    for upload in batch(queryset, limit):
+        if process_upload(upload):
+            stats['failed' if upload.status == 'failed' else 'processed'] += 1
+    stats['remaining'] = queryset.exists()
+    return stats
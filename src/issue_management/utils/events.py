@@ -0,0 +1,140 @@
+"""
+Utility module for live issue events sent to browsers as server-sent events.
+
+The signals publish small JSON messages (``activity``, ``comment`` and
+``status``) through `config.pubsub` on the channel of the issue and on the
+inbox channels of everyone whose issue list shows it:
+
+- ``org_<id>``: central admins of the organization
+- ``space_<id>``: space admins of the space
+- ``user_<id>``: the assignee and reviewers of the issue
+
+`event_stream_response()` turns a subscription into a ``text/event-stream``
+response. Under ASGI (uvicorn, see the Dockerfile) each client costs a
+coroutine, not a worker thread. Under WSGI a stream would hold a worker for
+as long as the page is open, so it is only served with DEBUG (runserver);
+otherwise browsers are told to stop and the pages work without live updates.
+"""
+
+import json
+import logging
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+
+from config.pubsub import get_broker, publish
+
+logger = logging.getLogger(__name__)
+
+# Comment lines sent while idle keep proxies from closing the connection
+HEARTBEAT_SECONDS = 15
+
+# How long browsers wait before reconnecting a dropped stream
+RETRY_MILLISECONDS = 5000
+
+
+def issue_channel(issue_id):
+    return f'issue_{issue_id}'
+
+
+def inbox_channels(user):
+    """Channels that feed the issue list of ``user``'s role"""
+    if user.user_type == 'central_admin' and user.organization_id:
+        return [f'org_{user.organization_id}']
+    if user.user_type == 'space_admin' and user.active_space_id:
+        return [f'space_{user.active_space_id}']
+    return [f'user_{user.pk}']
+
+
+def issue_inbox_channels(issue, reviewer_ids=None):
+    """
+    Inbox channels of everyone whose issue list contains ``issue``.
+    ``reviewer_ids`` spares the reviewer query when the caller has them.
+    """
+    channels = [f'org_{issue.org_id}']
+    if issue.space_id:
+        channels.append(f'space_{issue.space_id}')
+    if reviewer_ids is not None:
+        user_ids = set(reviewer_ids)
+    else:
+        user_ids = set(issue.reviewers.values_list('pk', flat=True)) if issue.pk else set()
+    if issue.assigned_to_id:
+        user_ids.add(issue.assigned_to_id)
+    channels.extend(f'user_{user_id}' for user_id in sorted(user_ids))
+    return channels
+
+
+def publish_issue_event(issue, event, data=None, inbox=True, reviewer_ids=None):
+    """
+    Publish an event about ``issue`` to its stream and, optionally, to inboxes.
+
+    Failures are logged and swallowed: live updates are a convenience and
+    must never break the save that triggered them.
+
+    Args:
+        issue: The Issue the event is about
+        event: Event name ('activity', 'comment' or 'status')
+        data: Extra JSON-serialisable fields for the message
+        inbox: Also publish to the inbox channels of the issue
+        reviewer_ids: Ids of the reviewers of the issue, if already known
+    """
+    message = {'event': event, 'issue': issue.slug, **(data or {})}
+    try:
+        channels = [issue_channel(issue.pk)]
+        if inbox:
+            channels.extend(issue_inbox_channels(issue, reviewer_ids))
+        for channel in channels:
+            publish(channel, message)
+    except Exception:
+        logger.exception('Could not publish %s event for issue %s', event, issue.pk)
+
+
+def format_event(message):
+    """Encode a message as one server-sent event block"""
+    return f"event: {message.get('event', 'message')}\ndata: {json.dumps(message)}\n\n"
+
+
+def _sync_stream(channels):
+    subscription = get_broker().subscribe(channels)
+    try:
+        yield f'retry: {RETRY_MILLISECONDS}\n\n'
+        while True:
+            message = subscription.get(timeout=HEARTBEAT_SECONDS)
+            yield format_event(message) if message else ': keep-alive\n\n'
+    finally:
+        subscription.close()
+
+
+async def _async_stream(channels):
+    # Subscribe from the event loop so messages are queued on it
+    subscription = await get_broker().asubscribe(channels)
+    try:
+        yield f'retry: {RETRY_MILLISECONDS}\n\n'
+        while True:
+            message = await subscription.aget(timeout=HEARTBEAT_SECONDS)
+            yield format_event(message) if message else ': keep-alive\n\n'
+    finally:
+        await subscription.aclose()
+
+
+def event_stream_response(request, channels):
+    """
+    Return a streaming response that relays messages on ``channels``.
+
+    Args:
+        request: The current request, used to pick the ASGI or WSGI stream
+        channels: Channel names to subscribe to
+    """
+    if isinstance(request, ASGIRequest):
+        stream = _async_stream
+    elif settings.DEBUG:
+        stream = _sync_stream
+    else:
+        # 204 tells EventSource not to reconnect
+        return HttpResponse(status=204)
+    response = StreamingHttpResponse(stream(channels), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -6,6 +6,7 @@ from firebase_admin import credentials, messaging
 from django.conf import settings
 import logging
 from datetime import timedelta
+from config.media import media_url
 
 logger = logging.getLogger(__name__)
 
@@ -276,13 +277,15 @@ def send_push_notification_to_multiple(fcm_tokens, title, body, data=None, high_
     }
 
 
-def send_issue_created_notification(issue, central_admins):
+def send_issue_created_notification(issue, central_admins, include_image=True):
     """
     Send notification to central admins when a new issue is created
     
     Args:
         issue: The Issue model instance
         central_admins: QuerySet or list of User instances with user_type='central_admin'
+        include_image: Whether to show the issue's first photo; off while its
+            photos are still waiting to be compressed
     
     Returns:
         dict: {
@@ -316,20 +319,17 @@ def send_issue_created_notification(issue, central_admins):
     is_high_priority = issue.priority in ['critical', 'high']
     
     # Get first issue image URL if available (for large notification image)
+    ttl_hours = 48  # Keep for 48 hours
     issue_image_url = None
-    if hasattr(issue, 'images') and issue.images.exists():
-        first_image = issue.images.first()
-        if first_image and first_image.image:
-            # Get absolute URL for the image
-            if hasattr(first_image.image, 'url'):
-                # In production, this will be the full CDN URL
-                # In development, we need to construct the full URL
-                if settings.ENVIRONMENT == 'development':
-                    site_url = getattr(settings, 'SITE_URL', 'http://localhost:7000')
-                    issue_image_url = f"{site_url}{first_image.image.url}"
-                else:
-                    issue_image_url = first_image.image.url
-    
+    first_image = issue.images.only('image').first() if include_image and hasattr(issue, 'images') else None
+    if first_image and first_image.image:
+        # Signed URLs come from the cache and must outlive the notification
+        issue_image_url = media_url(first_image.image, valid_for=ttl_hours * 3600)
+        if settings.ENVIRONMENT == 'development':
+            # In development, we need to construct the full URL
+            site_url = getattr(settings, 'SITE_URL', 'http://localhost:7000')
+            issue_image_url = f"{site_url}{issue_image_url}"
+
     # Send notifications (icon will default to logo-icon.svg from settings)
     result = send_push_notification_to_multiple(
         fcm_tokens, 
@@ -337,7 +337,7 @@ def send_issue_created_notification(issue, central_admins):
         body, 
         data,
         high_priority=is_high_priority,
-        ttl_hours=48,  # Keep for 48 hours
+        ttl_hours=ttl_hours,
         image=issue_image_url  # Include first issue image if available
     )
     
@@ -348,6 +348,38 @@ def send_issue_created_notification(issue, central_admins):
     return result
 
 
+def send_issues_summary_notification(user, issues, title, notification_type):
+    """
+    Send one notification to a user about several issues at once, instead
+    of one notification per issue
+    
+    Args:
+        user: The User to notify
+        issues: List of Issue model instances the notification is about
+        title: Notification title, e.g. "3 issues assigned to you"
+        notification_type: Value of 'notification_type' in the data payload
+    
+    Returns:
+        dict: {'success': bool, 'response': str or None, 'error': str or None}
+    """
+    if not user.fcm_token:
+        return {'success': False, 'response': None, 'error': 'No FCM token provided'}
+    
+    # Name the first few issues; the count in the title covers the rest
+    body = ', '.join(issue.title[:40] for issue in issues[:3])
+    if len(issues) > 3:
+        body += f" and {len(issues) - 3} more"
+    
+    data = {
+        'issue_count': str(len(issues)),
+        'notification_type': notification_type
+    }
+    if len(issues) == 1:
+        data['issue_slug'] = issues[0].slug
+    
+    return send_push_notification(user.fcm_token, title[:100], body[:200], data)
+
+
 def _cleanup_invalid_tokens(users, invalid_tokens):
     """
     Remove invalid FCM tokens from user records
@@ -0,0 +1,135 @@
+"""
+Utility module for running client requests at most once.
+
+Clients send a key they generate per submission (a hidden
+``idempotency_key`` field or an ``Idempotency-Key`` header). The first
+request with a key stores its outcome in an `IdempotencyKey` row together
+with a fingerprint of the request; repeats of the key get the stored outcome
+back without running again, so a double click or a retry after a lost
+response cannot create, toggle or upload twice. A key sent again with a
+different request is refused.
+
+The key is claimed in a short transaction of its own before the action
+runs, and the outcome stored once it is done, so no lock or transaction is
+held while a view encodes images or writes to storage. A repeat arriving
+while the first request still runs is refused (`KeyInProgress`) rather than
+run again; a claim left behind by a crashed request lapses after
+`CLAIM_TIMEOUT`. Outcomes that must not be kept, such as a form returned
+with errors, and actions that raise release the key so the request can be
+sent again with it. Keys are kept for ``IDEMPOTENCY_KEY_TTL`` seconds; an
+expired key counts as new, and `purge_expired_keys()` removes old rows.
+"""
+
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from issue_management.models import IdempotencyKey
+
+# Longest key accepted, the length of the key column
+MAX_KEY_LENGTH = 64
+
+# Form fields that differ between repeats of the same submission
+UNSIGNED_FIELDS = {'csrfmiddlewaretoken', 'idempotency_key'}
+
+# A claim whose request never finished (the process died) may be taken over
+# after this long; far longer than any request runs
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+class KeyReused(Exception):
+    """The key was already used for a different request"""
+
+
+class KeyInProgress(Exception):
+    """An earlier request with the key is still running"""
+
+
+def request_key(request):
+    """The client's idempotency key for a request, or '' if it sent none"""
+    return (request.headers.get('Idempotency-Key') or request.POST.get('idempotency_key', '')).strip()
+
+
+def request_fingerprint(request):
+    """Digest of the path, the form fields and the names and sizes of the files of a request"""
+    digest = hashlib.sha256(request.path.encode())
+    for name in sorted(request.POST):
+        if name not in UNSIGNED_FIELDS:
+            for value in request.POST.getlist(name):
+                digest.update(f'\0{name}={value}'.encode())
+    for name in sorted(request.FILES):
+        for upload in request.FILES.getlist(name):
+            digest.update(f'\0{name}:{upload.name}:{upload.size}'.encode())
+    return digest.hexdigest()
+
+
+def _claim(user, key, action, fingerprint):
+    """Create the key row in its own transaction; returns (record, created)"""
+    now = timezone.now()
+    with transaction.atomic():
+        IdempotencyKey.objects.filter(user=user, key=key).filter(
+            Q(created_at__lt=now - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL))
+            | Q(in_progress=True, created_at__lt=now - CLAIM_TIMEOUT)
+        ).delete()
+        return IdempotencyKey.objects.get_or_create(
+            user=user, key=key, defaults={'action': action, 'fingerprint': fingerprint, 'in_progress': True},
+        )
+
+
+def run_once(user, key, action, apply, fingerprint=''):
+    """
+    Run ``apply()`` at most once per user and idempotency key.
+
+    ``apply()`` runs outside the claim's transaction; callers whose action
+    must be all-or-nothing wrap it in ``transaction.atomic()``. If it raises
+    or returns None the key is released, so the action can be retried with it.
+
+    Args:
+        user: The user performing the action
+        key: Client-generated idempotency key
+        action: Action name, stored for auditing
+        apply: Callable performing the action and returning a JSON-serialisable
+            result, or None when nothing was done and the key may be used again
+        fingerprint (str): Identifies the request; a repeat of the key with a
+            different fingerprint is refused
+
+    Returns:
+        dict: The result, with ``duplicate`` set when it was stored by an earlier request
+
+    Raises:
+        KeyReused: If the key was stored for a different request
+        KeyInProgress: If an earlier request with the key has not finished
+    """
+    record, created = _claim(user, key, action, fingerprint)
+    if not created:
+        if fingerprint and record.fingerprint and fingerprint != record.fingerprint:
+            raise KeyReused(key)
+        if record.in_progress:
+            raise KeyInProgress(key)
+        return {**record.response, 'duplicate': True}
+    try:
+        result = apply()
+    except BaseException:
+        record.delete()
+        raise
+    if result is None:
+        record.delete()
+        return None
+    IdempotencyKey.objects.filter(pk=record.pk).update(response=result, in_progress=False)
+    return result
+
+
+def purge_expired_keys(now=None):
+    """
+    Delete keys older than ``IDEMPOTENCY_KEY_TTL``.
+
+    Returns:
+        int: Number of keys deleted
+    """
+    expired = (now or timezone.now()) - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=expired).delete()
+    return deleted
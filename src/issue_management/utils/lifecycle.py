@@ -0,0 +1,389 @@
+"""
+Utility module for the issue lifecycle: starting work, resolving, closing,
+cancelling, reopening, assigning and prioritising issues and requesting
+their review.
+
+`TRANSITIONS` lists the statuses each transition may start from. A transition
+is applied as a compare-and-set: the rows still in the status the user saw
+are locked with ``select_for_update`` and then updated, so of two people
+acting on the same issue at once only the first succeeds and the second is
+told the issue changed, instead of silently overwriting it. The issue pages
+post the status they showed as ``seen_status`` and the views pass it on
+with `as_seen`. Bulk actions compare against the status loaded for the
+request, which still keeps two requests from both applying. Issues are not
+saved through the model, which spares the pre_save re-fetch in signals.py;
+what the signals would do is done here once per call instead:
+
+- the activity entries are inserted with one ``bulk_create``
+- the workload counters are updated with one update per affected user
+- cached pages are expired and live events published after the commit
+
+Every transition takes a list of issues, so a batch costs one locking SELECT
+and one UPDATE per group of issues in the same state rather than one save
+per issue.
+"""
+
+import random
+import string
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from config.versions import bump, issue_page_scopes
+from core.models import User
+from issue_management.models import Issue, IssueActivity, IssueResolutionImage
+from issue_management.utils import workload
+from issue_management.utils.detail_sections import part_scope
+from issue_management.utils.events import publish_issue_event
+
+TERMINAL_STATUSES = ('resolved', 'closed', 'cancelled')
+ACTIVE_STATUSES = ('open', 'assigned', 'in_progress', 'escalated')
+
+# Statuses each transition may start from
+TRANSITIONS = {
+    'start_work': ('open', 'assigned', 'escalated'),
+    'resolve': ACTIVE_STATUSES,
+    'close': ACTIVE_STATUSES + ('resolved',),
+    'cancel': ACTIVE_STATUSES,
+    'reopen': TERMINAL_STATUSES,
+    'assign': ACTIVE_STATUSES + TERMINAL_STATUSES,
+    'set_priority': ACTIVE_STATUSES + TERMINAL_STATUSES,
+}
+
+# Shown when a transition lost the race against another change of the issue
+CHANGED_MESSAGE = 'This issue was changed by someone else in the meantime. Please check it and try again.'
+
+# Statuses recorded with their own activity type rather than 'status_changed'
+STATUS_ACTIVITIES = {
+    'resolved': ('resolved', 'Issue marked as resolved'),
+    'closed': ('closed', 'Issue closed'),
+    'cancelled': ('cancelled', 'Issue cancelled'),
+    'escalated': ('escalated', 'Issue escalated'),
+}
+
+
+def _status_display(status):
+    return dict(Issue.STATUS_CHOICES).get(status, status)
+
+
+def _priority_display(priority):
+    return dict(Issue.PRIORITY_CHOICES).get(priority, priority)
+
+
+def _activity_slug(issue):
+    # Random instead of checked one by one, so activities can be bulk-inserted
+    code = ''.join(random.choices(string.ascii_lowercase + string.digits, k=8))
+    return f"{slugify(f'{issue.slug}-activity')[:41]}-{code}"
+
+
+def _user_name(user):
+    return user.get_full_name() or str(user)
+
+
+def as_seen(issue, data):
+    """
+    Set the status of ``issue`` to the one the user saw, posted by the form
+    as ``seen_status``, so a transition is refused if the issue has changed
+    since the page was shown. Without it the status just loaded is compared.
+
+    Args:
+        issue: The issue as loaded for the request
+        data: The posted form data
+
+    Returns:
+        Issue: ``issue``
+    """
+    seen = data.get('seen_status')
+    if seen in dict(Issue.STATUS_CHOICES):
+        issue.status = seen
+    return issue
+
+
+def _compare_and_set(pks, expected, values):
+    """
+    Update the issues in ``pks`` whose columns still hold the ``expected`` values.
+
+    Must run in a transaction: the matching rows are locked, so they cannot
+    change between the check and the update.
+
+    Args:
+        pks: Primary keys of the issues
+        expected (dict): Field attname -> value the row must still have
+        values (dict): Field attname -> new value
+
+    Returns:
+        set: Primary keys of the issues that were updated
+    """
+    matching = set(
+        Issue.objects.filter(pk__in=pks, **expected).select_for_update().values_list('pk', flat=True)
+    )
+    if matching:
+        Issue.objects.filter(pk__in=matching).update(**values)
+    return matching
+
+
+def _activities(issue, old_status, old_assignee_id, old_priority, old_assignees, user):
+    """
+    Activity entries for the change of ``issue`` from its old status, assignee
+    and priority. ``old_assignees`` maps the ids of replaced assignees to the users.
+    """
+    activities = []
+    if issue.status != old_status:
+        activity_type, description = STATUS_ACTIVITIES.get(issue.status, ('status_changed', None))
+        if description is None and old_status in TERMINAL_STATUSES:
+            activity_type, description = 'reopened', 'Issue reopened'
+        elif description is None:
+            description = f'Status changed from {_status_display(old_status)} to {issue.get_status_display()}'
+        activities.append(IssueActivity(
+            issue=issue,
+            activity_type=activity_type,
+            user=user,
+            description=description,
+            old_value=_status_display(old_status),
+            new_value=issue.get_status_display(),
+        ))
+    if issue.assigned_to_id != old_assignee_id:
+        old_assignee = old_assignees.get(old_assignee_id)
+        if old_assignee is None:
+            activity = IssueActivity(
+                activity_type='assigned',
+                description=f'Issue assigned to {_user_name(issue.assigned_to)}',
+                new_value=str(issue.assigned_to),
+            )
+        else:
+            activity = IssueActivity(
+                activity_type='reassigned',
+                description=f'Issue reassigned from {_user_name(old_assignee)} to {_user_name(issue.assigned_to)}',
+                old_value=str(old_assignee),
+                new_value=str(issue.assigned_to),
+            )
+        activity.issue = issue
+        activity.user = user
+        activities.append(activity)
+    if issue.priority != old_priority:
+        activities.append(IssueActivity(
+            issue=issue,
+            activity_type='priority_changed',
+            user=user,
+            description=f'Priority changed from {_priority_display(old_priority)} to {issue.get_priority_display()}',
+            old_value=_priority_display(old_priority),
+            new_value=issue.get_priority_display(),
+        ))
+    for activity in activities:
+        activity.slug = _activity_slug(issue)
+    return activities
+
+
+def _after_commit(issues, activities, previous):
+    """Expire the pages showing the issues and publish their events once committed"""
+    reviewers = {}
+    for issue_id, user_id in Issue.reviewers.through.objects.filter(
+        issue_id__in=[issue.pk for issue in issues]
+    ).values_list('issue_id', 'user_id'):
+        reviewers.setdefault(issue_id, set()).add(user_id)
+
+    scopes = []
+    for issue in issues:
+        user_ids = {previous[issue.pk][1], *reviewers.get(issue.pk, ())}
+        scopes.extend([part_scope(issue.pk, 'timeline'), *issue_page_scopes(issue, user_ids)])
+
+    def publish():
+        bump(*dict.fromkeys(scopes))
+        for issue in issues:
+            if issue.status != previous[issue.pk][0]:
+                publish_issue_event(issue, 'status', {
+                    'status': issue.status,
+                    'status_display': issue.get_status_display(),
+                }, reviewer_ids=reviewers.get(issue.pk, ()))
+        for activity in activities:
+            publish_issue_event(activity.issue, 'activity', {
+                'activity_type': activity.activity_type,
+                'description': activity.description[:200],
+            }, reviewer_ids=reviewers.get(activity.issue.pk, ()))
+
+    transaction.on_commit(publish)
+
+
+def _transition(name, issues, user, changes, expect=(), related=None):
+    """
+    Apply transition ``name`` to every issue whose status allows it.
+
+    Args:
+        name: Key of `TRANSITIONS`
+        issues: Issues as the user saw them (see `as_seen`); their status
+            (and the fields in ``expect``) must still be the same in the database
+        user: The user making the change
+        changes: Callable returning the new field values (by attname) of an issue
+        expect: Attnames of other fields that must be unchanged
+        related (dict, optional): Related objects to set on the changed
+            issues, matching the ids among the new values
+
+    Returns:
+        list: The issues that changed, updated in place
+    """
+    now = timezone.now()
+    groups = {}
+    for issue in issues:
+        if issue.status not in TRANSITIONS[name]:
+            continue
+        expected = {attname: getattr(issue, attname) for attname in ('status', *expect)}
+        values = {**changes(issue), 'updated_at': now}
+        key = (tuple(expected.items()), tuple(values.items()))
+        groups.setdefault(key, (expected, values, []))[2].append(issue)
+
+    changed, activities, previous = [], [], {}
+    with transaction.atomic():
+        for expected, values, group in groups.values():
+            updated = _compare_and_set([issue.pk for issue in group], expected, values)
+            for issue in group:
+                if issue.pk not in updated:
+                    continue
+                previous[issue.pk] = (issue.status, issue.assigned_to_id, issue.priority)
+                before = workload.issue_state(issue)
+                for attname, value in values.items():
+                    setattr(issue, attname, value)
+                for field_name, obj in (related or {}).items():
+                    setattr(issue, field_name, obj)
+                changed.append((before, issue))
+        if not changed:
+            return []
+
+        # Only the replaced assignees are needed, for their names
+        old_assignees = User.objects.in_bulk({
+            previous[issue.pk][1] for _, issue in changed
+            if previous[issue.pk][1] not in (None, issue.assigned_to_id)
+        })
+        for before, issue in changed:
+            activities.extend(_activities(issue, *previous[issue.pk], old_assignees, user))
+        IssueActivity.objects.bulk_create(activities)
+        workload.apply_changes('issue', [(before, workload.issue_state(issue)) for before, issue in changed])
+        _after_commit([issue for _, issue in changed], activities, previous)
+    return [issue for _, issue in changed]
+
+
+def start_work(issues, user):
+    """Move issues to in progress; returns the issues that changed"""
+    return _transition('start_work', issues, user, lambda issue: {'status': 'in_progress'})
+
+
+def resolve(issues, user, resolution_notes=None):
+    """
+    Mark issues as resolved with ``resolution_notes``, or with the notes they
+    already have when None.
+
+    Returns:
+        list: The issues that changed
+    """
+    notes = {} if resolution_notes is None else {'resolution_notes': resolution_notes}
+    return _transition('resolve', issues, user, lambda issue: {'status': 'resolved', **notes})
+
+
+def close(issues, user):
+    """Close active and resolved issues; returns the issues that changed"""
+    return _transition('close', issues, user, lambda issue: {'status': 'closed'})
+
+
+def cancel(issues, user):
+    """Cancel active issues; returns the issues that changed"""
+    return _transition('cancel', issues, user, lambda issue: {'status': 'cancelled'})
+
+
+def reopen(issues, user):
+    """
+    Reopen resolved, closed or cancelled issues as assigned (or open, without
+    an assignee), dropping their resolution and review.
+
+    Returns:
+        list: The issues that changed
+    """
+    reopened = _transition('reopen', issues, user, lambda issue: {
+        'status': 'assigned' if issue.assigned_to_id else 'open',
+        'resolution_notes': None,
+        'reviewed_by_id': None,
+        'reviewed_at': None,
+        'review_notes': None,
+    }, expect=('assigned_to_id',))
+    if reopened:
+        # Through the model, so the image files and cached sections go too
+        IssueResolutionImage.objects.filter(issue__in=reopened).delete()
+    return reopened
+
+
+def assign(issues, user, assignee, requires_review=False):
+    """
+    Assign issues to a supervisor. Open issues become assigned; resolved,
+    closed and cancelled issues keep their status. ``requires_review=None``
+    keeps the review requirement of each issue.
+
+    Returns:
+        list: The issues that changed
+    """
+    assigned_at = timezone.now()
+    review = {} if requires_review is None else {'requires_review': requires_review}
+    return _transition('assign', issues, user, lambda issue: {
+        'assigned_to_id': assignee.pk,
+        'assigned_by_id': user.pk,
+        'assigned_at': assigned_at,
+        **review,
+        'status': issue.status if issue.status in TERMINAL_STATUSES else 'assigned',
+    }, expect=('assigned_to_id',), related={'assigned_to': assignee, 'assigned_by': user})
+
+
+def set_priority(issues, user, priority):
+    """Change the priority of issues; returns the issues that changed"""
+    return _transition(
+        'set_priority',
+        [issue for issue in issues if issue.priority != priority],
+        user,
+        lambda issue: {'priority': priority},
+        expect=('priority',),
+    )
+
+
+def request_review(issues, user, reviewers):
+    """
+    Require review of issues and add ``reviewers`` to them. Reviewers an
+    issue already has are skipped.
+
+    Returns:
+        dict: Issue -> list of the reviewers added to it
+    """
+    issues, reviewers = list(issues), list(reviewers)
+    through = Issue.reviewers.through
+    existing = set(through.objects.filter(
+        issue_id__in=[issue.pk for issue in issues],
+        user_id__in=[reviewer.pk for reviewer in reviewers],
+    ).values_list('issue_id', 'user_id'))
+    added = {}
+    for issue in issues:
+        new = [reviewer for reviewer in reviewers if (issue.pk, reviewer.pk) not in existing]
+        if new:
+            added[issue] = new
+    if not added:
+        return {}
+
+    activities = []
+    for issue, new in added.items():
+        issue.requires_review = True
+        activities.append(IssueActivity(
+            issue=issue,
+            activity_type='review_requested',
+            user=user,
+            description=f"Review requested from: {', '.join(_user_name(reviewer) for reviewer in new)}",
+            slug=_activity_slug(issue),
+        ))
+    with transaction.atomic():
+        Issue.objects.filter(pk__in=[issue.pk for issue in added]).update(
+            requires_review=True, updated_at=timezone.now(),
+        )
+        # Bypasses m2m_changed, whose activity and cache bumps are done here
+        through.objects.bulk_create(
+            [through(issue_id=issue.pk, user_id=reviewer.pk) for issue, new in added.items() for reviewer in new],
+            ignore_conflicts=True,
+        )
+        IssueActivity.objects.bulk_create(activities)
+        _after_commit(list(added), activities, {
+            issue.pk: (issue.status, issue.assigned_to_id, issue.priority) for issue in added
+        })
+    return added
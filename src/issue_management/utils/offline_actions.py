@@ -0,0 +1,168 @@
+"""
+Utility module for maintainer field actions queued offline.
+
+The maintainer service worker stores task and site visit actions in
+IndexedDB and replays them to `OfflineActionSyncView` with a client-generated
+idempotency key. Each action states the outcome the maintainer intended
+('complete_task', 'start_visit', ...) rather than repeating a toggle, so a
+replay that arrives after the world moved on can be resolved on the server:
+
+- applied: the change was made
+- resolved: the intended state already holds, nothing to do
+- conflict: the change is no longer possible (reassigned, cancelled, ...);
+  the server state wins and the maintainer is told why
+- invalid: the submitted data is incomplete
+
+The outcome is stored with the idempotency key so every repeat of the same
+request gets the same answer without applying the action twice.
+"""
+
+from django.db import transaction
+
+from issue_management.forms import SiteVisitCompleteForm
+from issue_management.models import SiteVisit, SiteVisitImage, WorkTask
+from issue_management.utils.idempotency import run_once
+
+
+def _result(outcome, message, **state):
+    return {'status': outcome, 'message': message, 'state': state}
+
+
+def complete_work_task(work_task, resolution_notes):
+    """Mark a work task as completed with its resolution notes"""
+    work_task.completed = True
+    work_task.resolution_notes = resolution_notes
+    work_task.save()
+
+
+def reopen_work_task(work_task):
+    """
+    Mark a completed work task as pending again, deleting its resolution images.
+
+    Returns:
+        int: Number of resolution images deleted
+    """
+    resolution_images = list(work_task.resolution_images.all())
+    for res_image in resolution_images:
+        # Delete the actual file from storage, then the record
+        if res_image.image:
+            res_image.image.delete(save=False)
+        res_image.delete()
+
+    work_task.completed = False
+    work_task.resolution_notes = None
+    work_task.save()
+    return len(resolution_images)
+
+
+def complete_site_visit(form, files):
+    """Save a valid SiteVisitCompleteForm, mark the visit completed and attach up to 3 images"""
+    site_visit = form.save(commit=False)
+    site_visit.mark_completed()
+    site_visit.save()
+
+    for i in range(1, 4):
+        image = files.get(f'image{i}')
+        if image:
+            SiteVisitImage.objects.create(site_visit=site_visit, image=image)
+    return site_visit
+
+
+def _own_work_task(user, slug):
+    return WorkTask.objects.filter(slug=slug, assigned_to=user).first()
+
+
+def _own_site_visit(user, slug):
+    return SiteVisit.objects.filter(slug=slug, assigned_to=user).first()
+
+
+def _complete_task(user, slug, data, files):
+    work_task = _own_work_task(user, slug)
+    if work_task is None:
+        return _result('conflict', 'This work task is no longer assigned to you.')
+    if work_task.completed:
+        return _result('resolved', f'Work task "{work_task.title}" was already completed.', completed=True)
+    resolution_notes = data.get('resolution_notes', '').strip()
+    if not resolution_notes:
+        return _result('invalid', 'Resolution notes are required to mark the task as completed.', completed=False)
+    complete_work_task(work_task, resolution_notes)
+    return _result('applied', f'Work task "{work_task.title}" marked as completed!', completed=True)
+
+
+def _reopen_task(user, slug, data, files):
+    work_task = _own_work_task(user, slug)
+    if work_task is None:
+        return _result('conflict', 'This work task is no longer assigned to you.')
+    if not work_task.completed:
+        return _result('resolved', f'Work task "{work_task.title}" is already pending.', completed=False)
+    reopen_work_task(work_task)
+    return _result('applied', f'Work task "{work_task.title}" marked as pending!', completed=False)
+
+
+def _start_visit(user, slug, data, files):
+    site_visit = _own_site_visit(user, slug)
+    if site_visit is None:
+        return _result('conflict', 'This site visit is no longer assigned to you.')
+    if site_visit.status == 'scheduled':
+        site_visit.mark_in_progress()
+        return _result('applied', f'Site visit "{site_visit.title}" has been started!', status=site_visit.status)
+    if site_visit.status in ['in_progress', 'completed']:
+        return _result('resolved', f'Site visit "{site_visit.title}" was already started.', status=site_visit.status)
+    return _result(
+        'conflict', f'Site visit "{site_visit.title}" was {site_visit.get_status_display().lower()} and cannot be started.',
+        status=site_visit.status,
+    )
+
+
+def _complete_visit(user, slug, data, files):
+    site_visit = _own_site_visit(user, slug)
+    if site_visit is None:
+        return _result('conflict', 'This site visit is no longer assigned to you.')
+    if site_visit.status not in ['scheduled', 'in_progress']:
+        return _result(
+            'conflict',
+            f'Site visit "{site_visit.title}" was already {site_visit.get_status_display().lower()}; '
+            'your findings were not saved.',
+            status=site_visit.status,
+        )
+    form = SiteVisitCompleteForm(data, files, instance=site_visit)
+    if not form.is_valid():
+        errors = '; '.join(f'{field}: {error}' for field, field_errors in form.errors.items() for error in field_errors)
+        return _result('invalid', errors, status=site_visit.status)
+    site_visit = complete_site_visit(form, files)
+    return _result('applied', f'Site visit "{site_visit.title}" has been marked as completed!', status=site_visit.status)
+
+
+OFFLINE_ACTIONS = {
+    'complete_task': _complete_task,
+    'reopen_task': _reopen_task,
+    'start_visit': _start_visit,
+    'complete_visit': _complete_visit,
+}
+
+
+def apply_offline_action(user, key, action, slug, data, files):
+    """
+    Apply one queued maintainer action.
+
+    Args:
+        user: The maintainer who queued the action
+        key: Idempotency key generated when the action was queued
+        action: Name from OFFLINE_ACTIONS
+        slug: Slug of the work task or site visit
+        data: Submitted form fields
+        files: Submitted files
+
+    Returns:
+        dict: ``{'status', 'message', 'state'}`` as described in the module docstring
+
+    Raises:
+        KeyInProgress: If an earlier request with the key is still running
+    """
+    handler = OFFLINE_ACTIONS[action]
+
+    def apply():
+        with transaction.atomic():
+            return handler(user, slug, data, files)
+
+    return run_once(user, key, action, apply)
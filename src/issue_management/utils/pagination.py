@@ -0,0 +1,94 @@
+"""
+Utility module for keyset (cursor) pagination on ``(created_at, id)``.
+
+Pages are fetched with ``WHERE (created_at, id) < cursor ORDER BY created_at
+DESC, id DESC LIMIT n`` instead of OFFSET, so a page costs the same on an
+issue with five comments as on one with five thousand, and rows added while a
+user scrolls never shift the pages they have already seen.
+
+Cursors are opaque strings of the form ``<microseconds since epoch>-<id>``.
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Q
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def to_micros(value):
+    """Microseconds since the epoch for an aware datetime"""
+    delta = value - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def from_micros(micros):
+    """Aware UTC datetime for microseconds since the epoch"""
+    return EPOCH + timedelta(microseconds=int(micros))
+
+
+def encode_cursor(obj):
+    """Return the cursor pointing at ``obj`` (anything with created_at and pk)"""
+    return f'{to_micros(obj.created_at)}-{obj.pk}'
+
+
+def decode_cursor(value):
+    """
+    Parse a cursor produced by `encode_cursor()`.
+
+    Args:
+        value: The cursor string; empty values mean "no cursor"
+
+    Returns:
+        tuple | None: ``(created_at, pk)``, or None for an empty value
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    if not value:
+        return None
+    micros, _, pk = value.partition('-')
+    return from_micros(micros), int(pk)
+
+
+def _before(cursor):
+    created_at, pk = cursor
+    return Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+
+
+def _after(cursor):
+    created_at, pk = cursor
+    return Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk)
+
+
+def older_page(queryset, before=None, size=20):
+    """
+    Return the newest ``size`` rows older than ``before``, oldest first.
+
+    Args:
+        queryset: Rows with ``created_at`` to paginate
+        before: Decoded cursor; None starts from the newest row
+        size: Rows per page
+
+    Returns:
+        tuple: ``(rows, has_older)`` where ``rows`` is in display order
+    """
+    if before is not None:
+        queryset = queryset.filter(_before(before))
+    rows = list(queryset.order_by('-created_at', '-pk')[:size + 1])
+    has_older = len(rows) > size
+    return rows[:size][::-1], has_older
+
+
+def newer_rows(queryset, since=None, limit=100):
+    """
+    Return up to ``limit`` rows newer than ``since``, oldest first.
+
+    Args:
+        queryset: Rows with ``created_at`` to paginate
+        since: Decoded cursor; None returns the oldest rows
+        limit: Maximum number of rows returned
+    """
+    if since is not None:
+        queryset = queryset.filter(_after(since))
+    return list(queryset.order_by('created_at', 'pk')[:limit])
@@ -0,0 +1,202 @@
+"""
+Utility module for recompressing images stored under older settings.
+
+Images uploaded before the WebP pipeline, or compressed with an earlier
+profile, stay as they were stored. The `recompress_media` management command
+walks every image model in primary key order, one chunk at a time, and hands
+the files of a chunk to a pool of worker processes:
+
+1. A worker reads the stored file, compresses it with the model's current
+   profile (see `config.utils.compress_with_profile`) and, unless this is a
+   dry run, saves the result under a new name.
+2. The command swaps the name on the row with a conditional update, so a row
+   whose image was replaced or deleted in the meantime is left alone, then
+   deletes whichever file is no longer referenced.
+
+Workers never touch the database. After every chunk the last primary key is
+written to a checkpoint file, so an interrupted run continues where it
+stopped.
+"""
+
+import json
+import logging
+import os
+
+from django.core.files.storage import default_storage
+
+from config.utils import compress_with_profile
+from config.versions import bump, issue_scope
+from issue_management.models import (
+    IssueImage,
+    IssueResolutionImage,
+    IssueReviewCommentImage,
+    SiteVisitImage,
+    WorkTaskResolutionImage,
+)
+
+logger = logging.getLogger(__name__)
+
+# Image models and the lookup of the issue whose pages show their images
+IMAGE_MODELS = {
+    IssueImage: 'issue__slug',
+    IssueResolutionImage: 'issue__slug',
+    WorkTaskResolutionImage: 'work_task__issue__slug',
+    SiteVisitImage: 'site_visit__issue__slug',
+    IssueReviewCommentImage: 'review_comment__issue__slug',
+}
+
+# Recompressed files must save at least this fraction of the original size;
+# smaller gains are not worth another lossy generation
+MIN_SAVING = 0.1
+
+
+def recompress_file(name, profile, upload_path, dry_run=False, min_saving=MIN_SAVING):
+    """
+    Compress one stored image with a profile. Runs in a worker process.
+
+    Args:
+        name (str): Storage name of the current image
+        profile (str): Name of a profile in ``IMAGE_COMPRESSION_PROFILES``
+        upload_path (str): Upload path of the model's image field
+        dry_run (bool): Only measure; nothing is saved
+        min_saving (float): Smallest fraction of the size that must be saved
+
+    Returns:
+        dict: 'name', 'old_size', 'new_size', 'new_name' (None when nothing
+        was saved) and 'error' (None or the reason the file was skipped)
+    """
+    result = {'name': name, 'old_size': 0, 'new_size': 0, 'new_name': None, 'error': None}
+    try:
+        with default_storage.open(name) as original:
+            result['old_size'] = original.size
+            compressed = compress_with_profile(original, profile, upload_path=upload_path)
+    except Exception as e:
+        result['error'] = str(e) or e.__class__.__name__
+        return result
+
+    result['new_size'] = compressed.size
+    if compressed.size > result['old_size'] * (1 - min_saving):
+        # Not worth it; report no saving
+        result['new_size'] = result['old_size']
+    elif not dry_run:
+        result['new_name'] = default_storage.save(f'{upload_path}{compressed.name}', compressed)
+    return result
+
+
+def apply_result(model, pk, result):
+    """
+    Point a row at its recompressed file if it still has the original.
+
+    Returns:
+        bool: False if the row changed meanwhile; the new file is then deleted
+    """
+    updated = model._base_manager.filter(pk=pk, image=result['name']).update(
+        image=result['new_name'],
+        file_size=result['new_size'],
+    )
+    if not updated:
+        default_storage.delete(result['new_name'])
+        return False
+    default_storage.delete(result['name'])
+    return True
+
+
+def pending_rows(model, after_pk=0, chunk_size=200):
+    """
+    The next chunk of rows with an image, in primary key order.
+
+    Returns:
+        list: (pk, image name, issue slug) tuples
+    """
+    return list(
+        model._base_manager.filter(pk__gt=after_pk)
+        .exclude(image='')
+        .order_by('pk')
+        .values_list('pk', 'image', IMAGE_MODELS[model])[:chunk_size]
+    )
+
+
+def load_checkpoint(path):
+    """Last processed primary key per model label, from a checkpoint file"""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def save_checkpoint(path, checkpoint):
+    """Write the checkpoint atomically, so an interrupted write leaves the previous one"""
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w') as handle:
+        json.dump(checkpoint, handle, indent=2, sort_keys=True)
+    os.replace(temporary, path)
+
+
+def recompress_model(model, run, dry_run=False, chunk_size=200, min_saving=MIN_SAVING,
+                     checkpoint=None, checkpoint_path=None, limit=None, progress=None):
+    """
+    Recompress the images of one model, chunk by chunk.
+
+    Args:
+        model: One of `IMAGE_MODELS`
+        run: Callable taking a list of argument tuples for `recompress_file`
+            and returning their results in order (a process pool's map, or
+            a plain loop)
+        dry_run (bool): Measure the savings without changing anything
+        chunk_size (int): Rows read and handed out at once
+        min_saving (float): Smallest fraction of a file's size worth saving
+        checkpoint (dict, optional): Last processed primary key per model
+            label; updated after every chunk
+        checkpoint_path (str, optional): File the checkpoint is written to
+        limit (int, optional): Stop after this many rows
+        progress (callable, optional): Receives the stats after every chunk
+
+    Returns:
+        dict: 'scanned', 'recompressed', 'skipped', 'failed', 'bytes_before'
+        and 'bytes_after' totals
+    """
+    checkpoint = {} if checkpoint is None else checkpoint
+    label = model._meta.label
+    field = model._meta.get_field('image')
+    stats = {'scanned': 0, 'recompressed': 0, 'skipped': 0, 'failed': 0, 'bytes_before': 0, 'bytes_after': 0}
+    after_pk = checkpoint.get(label, 0)
+
+    while limit is None or stats['scanned'] < limit:
+        size = chunk_size if limit is None else min(chunk_size, limit - stats['scanned'])
+        rows = pending_rows(model, after_pk, size)
+        if not rows:
+            break
+
+        results = run([(name, model.COMPRESSION_PROFILE, field.upload_to, dry_run, min_saving) for _, name, _ in rows])
+        changed_issues = set()
+        for (pk, name, issue_slug), result in zip(rows, results):
+            stats['scanned'] += 1
+            if result['error']:
+                logger.warning("Could not recompress %s(pk=%s) %s: %s", label, pk, name, result['error'])
+                stats['failed'] += 1
+                continue
+            stats['bytes_before'] += result['old_size']
+            if result['new_name'] and not apply_result(model, pk, result):
+                # Replaced or deleted while it was being compressed
+                stats['bytes_after'] += result['old_size']
+                stats['skipped'] += 1
+                continue
+            stats['bytes_after'] += result['new_size']
+            if result['new_size'] < result['old_size']:
+                stats['recompressed'] += 1
+                if result['new_name']:
+                    changed_issues.add(issue_slug)
+            else:
+                stats['skipped'] += 1
+
+        # Detail pages list the images, so their validators must change
+        if changed_issues:
+            bump(*(issue_scope(slug) for slug in changed_issues))
+        after_pk = rows[-1][0]
+        if not dry_run:
+            checkpoint[label] = after_pk
+            if checkpoint_path:
+                save_checkpoint(checkpoint_path, checkpoint)
+        if progress:
+            progress(label, stats)
+    return stats
@@ -0,0 +1,190 @@
+"""
+Utility module for issues reported by general users.
+
+Occupants report problems from their phones, so the reporting request is kept
+to a few inserts:
+
+- The slug and issue ID are drawn at random and the unique constraints catch
+  the rare collision (`create_reported_issue`), instead of checking every
+  candidate with a query first.
+- Photos arrive downscaled by the browser (see image-resizer.js) and are
+  stored as they are; the `process_uploads` worker compresses them
+  (see `direct_uploads.queue_form_upload`).
+- Central admins are notified by the `send_issue_notifications` worker
+  rather than during the request (`Issue.notify_pending`), once the photos
+  are compressed so the notification does not link the original that the
+  worker deletes.
+
+Every report carries a key generated with the form, and runs at most once
+per key (`idempotency.run_once`), so a form resent over a flaky
+connection creates one issue. Each user may report ``ISSUE_REPORT_RATE_LIMIT``
+issues per ``ISSUE_REPORT_RATE_WINDOW`` seconds.
+"""
+
+import logging
+import random
+import string
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from django.utils.text import slugify
+
+from core.models import User
+from issue_management.models import DirectUpload, Issue
+from issue_management.utils.direct_uploads import queue_form_upload
+from issue_management.utils.firebase_notifications import send_issue_created_notification
+from issue_management.utils.idempotency import run_once
+from issue_management.utils.workers import batch
+
+logger = logging.getLogger(__name__)
+
+RATE_KEY_PREFIX = 'issue-report-rate:'
+
+# Random slugs and issue IDs are drawn again this many times on a collision
+CREATE_ATTEMPTS = 5
+
+# How long a new issue's notification waits for its photos to be compressed;
+# after that (a stuck upload) it is sent without a photo
+NOTIFY_UPLOAD_WAIT = timedelta(minutes=10)
+
+
+class RateLimited(Exception):
+    """The user has reported too many issues; carries the seconds until the next window"""
+
+    def __init__(self, retry_after):
+        super().__init__('Too many reports.')
+        self.retry_after = retry_after
+
+
+def _code(length):
+    return ''.join(random.choices(string.ascii_lowercase + string.digits, k=length))
+
+
+def check_rate_limit(user):
+    """
+    Count one report against the user's limit for the current window.
+
+    Raises:
+        RateLimited: If the user has used up the window
+    """
+    window = settings.ISSUE_REPORT_RATE_WINDOW
+    now = int(time.time())
+    key = f'{RATE_KEY_PREFIX}{user.pk}:{now // window}'
+    cache.add(key, 0, timeout=window)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, 1, timeout=window)
+        count = 1
+    if count > settings.ISSUE_REPORT_RATE_LIMIT:
+        raise RateLimited(window - now % window)
+
+
+def create_reported_issue(user, title, description, space=None):
+    """
+    Create an issue reported by ``user`` with a random slug and issue ID.
+
+    Returns:
+        Issue: The new issue, waiting for its creation notification
+    """
+    base_slug = slugify(title)[:45] or 'issue'
+    org_prefix = user.organization.name[:3].upper() if user.organization else 'ISS'
+    for attempt in range(CREATE_ATTEMPTS):
+        issue = Issue(
+            title=title,
+            description=description,
+            space=space,
+            org=user.organization,
+            reporter=user,
+            slug=f"{base_slug}-{_code(4)}",
+            issue_id=f"{org_prefix}-{_code(6).upper()}",
+            notify_pending=True,
+        )
+        try:
+            with transaction.atomic():
+                issue.save()
+            return issue
+        except IntegrityError:
+            if attempt == CREATE_ATTEMPTS - 1:
+                raise
+            logger.info("Slug or issue ID of a new report was taken, drawing again")
+
+
+def report_issue(user, key, form):
+    """
+    Create the issue of a valid `IssueReportForm` and queue its photos,
+    at most once per key.
+
+    Returns:
+        dict: 'slug' and 'issue_id' of the issue, with ``duplicate`` set
+        when an earlier request with the same key created it
+
+    Raises:
+        RateLimited: If the user has reported too many issues; nothing is stored
+        KeyInProgress: If an earlier request with the key is still running
+    """
+    @transaction.atomic
+    def apply():
+        check_rate_limit(user)
+        issue = create_reported_issue(
+            user,
+            form.cleaned_data['title'],
+            form.cleaned_data['description'],
+            form.cleaned_data.get('space'),
+        )
+        for image in form.cleaned_data.get('images') or []:
+            queue_form_upload(user, 'issue_image', issue, image)
+        return {'slug': issue.slug, 'issue_id': issue.issue_id}
+
+    return run_once(user, key, 'report_issue', apply)
+
+
+def send_pending_notifications(limit=None):
+    """
+    Notify central admins of issues created with ``notify_pending``, oldest first.
+
+    An issue waits until the `process_uploads` worker has compressed its
+    photos, for at most ``NOTIFY_UPLOAD_WAIT``. Each issue is claimed with a
+    conditional update, so several workers can run side by side without
+    notifying twice.
+
+    Args:
+        limit (int, optional): Maximum number of issues to notify
+
+    Returns:
+        dict: 'notified' count and whether issues are 'remaining'
+    """
+    stats = {'notified': 0}
+    unprocessed = DirectUpload.objects.filter(
+        target='issue_image',
+        parent_slug=OuterRef('slug'),
+        status__in=('uploaded', 'processing'),
+    )
+    queryset = Issue.objects.filter(notify_pending=True).annotate(
+        photos_pending=Exists(unprocessed),
+    ).filter(
+        Q(photos_pending=False) | Q(created_at__lt=timezone.now() - NOTIFY_UPLOAD_WAIT),
+    ).select_related('reporter').order_by('created_at')
+    for issue in batch(queryset, limit):
+        if not Issue.objects.filter(pk=issue.pk, notify_pending=True).update(notify_pending=False):
+            continue
+        central_admins = User.objects.filter(
+            user_type='central_admin',
+            organization_id=issue.org_id,
+            is_active=True,
+        ).exclude(fcm_token__isnull=True).exclude(fcm_token='')
+        try:
+            send_issue_created_notification(issue, central_admins, include_image=not issue.photos_pending)
+        except Exception:
+            # Notifications are best effort, as when they were sent in the request
+            logger.exception("Notifying issue %s failed", issue.issue_id)
+        stats['notified'] += 1
+    # Issues still waiting for their photos are not counted as a backlog
+    stats['remaining'] = queryset.exists()
+    return stats
@@ -0,0 +1,203 @@
+"""
+Utility module for resumable uploads sent in chunks through the application.
+
+Presigned uploads (see `direct_uploads`) start again from zero when a
+connection drops. For large files on unreliable connections the browser can
+instead use a tus-like protocol served by the ``ResumableUpload*`` views:
+
+1. create: `start_resumable_upload()` makes a pending DirectUpload with
+   ``offset=0`` and an empty file in the temporary store
+2. PATCH: `append_chunk()` appends the bytes sent at the offset the client
+   states. A different offset is refused with the current one, so after a
+   dropped connection the client asks for the offset (HEAD) and resends only
+   what is missing.
+3. The last chunk moves the assembled file to its storage key, and the client
+   finalizes with the same completion call as for presigned uploads, which
+   registers the file on its image or voice model.
+
+Each chunk is a short request, so a slow connection never holds a worker for
+a whole file. The chunk is read into a file of its own before the upload row
+is locked, so a slow client holds neither a lock nor a transaction.
+
+Only the pages that upload files on their own (the admin image and voice
+upload pages, see direct-upload.js) use this. Forms that send photos with
+other fields, such as resolving an issue or completing a work task, still
+post them in one multipart request. The store (``RESUMABLE_UPLOAD_ROOT``) must be shared by every
+application server; files of uploads untouched for a day are removed by
+`direct_uploads.expire_stale_uploads()`.
+"""
+
+import os
+import shutil
+import uuid
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from issue_management.models import DirectUpload
+from issue_management.utils.direct_uploads import create_upload, is_expired
+
+# Largest chunk accepted in one request
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+
+READ_SIZE = 64 * 1024
+
+
+class OffsetMismatch(Exception):
+    """The client's offset differs from the bytes received; carries the current offset"""
+
+    def __init__(self, offset):
+        super().__init__(f'Expected offset {offset}')
+        self.offset = offset
+
+
+def chunk_path(upload):
+    """Path of the partial file of a resumable upload in the temporary store"""
+    return os.path.join(settings.RESUMABLE_UPLOAD_ROOT, f'{upload.pk}.part')
+
+
+def discard_chunks(upload):
+    """Remove the partial file of a resumable upload, if any"""
+    try:
+        os.remove(chunk_path(upload))
+    except FileNotFoundError:
+        pass
+
+
+def _receive(stream, path, limit):
+    """
+    Write the bytes of ``stream`` to a new file at ``path``.
+
+    Returns:
+        int: Number of bytes received; a dropped connection keeps what arrived
+
+    Raises:
+        ValueError: If the stream holds more than ``limit`` bytes
+    """
+    received = 0
+    with open(path, 'wb') as incoming:
+        while True:
+            try:
+                data = stream.read(READ_SIZE)
+            except OSError:
+                # Connection dropped: keep what arrived, the client resumes from there
+                break
+            if not data:
+                break
+            received += len(data)
+            if received > limit:
+                raise ValueError('Chunk goes past the declared length.')
+            incoming.write(data)
+    return received
+
+
+def start_resumable_upload(user, target_name, parent_slug, content_type, size):
+    """
+    Create a pending resumable upload and its empty partial file.
+
+    Arguments are those of `direct_uploads.create_upload()`.
+
+    Returns:
+        DirectUpload: The pending upload
+
+    Raises:
+        ValueError: If the upload is not allowed
+    """
+    upload = create_upload(user, target_name, parent_slug, content_type, size, resumable=True)
+    os.makedirs(settings.RESUMABLE_UPLOAD_ROOT, exist_ok=True)
+    open(chunk_path(upload), 'wb').close()
+    return upload
+
+
+def get_resumable_upload(user, upload_id):
+    """The user's unfinished resumable upload, or None"""
+    upload = DirectUpload.objects.filter(
+        pk=upload_id, user=user, status='pending', offset__isnull=False,
+    ).first()
+    if upload is None or is_expired(upload):
+        return None
+    return upload
+
+
+def append_chunk(user, upload_id, offset, stream):
+    """
+    Append the bytes of ``stream`` to a resumable upload at ``offset``.
+
+    The body is read into a file of its own first; only then is the upload
+    row locked, to check the offset again and append the chunk, so two
+    requests for the same upload cannot interleave. Bytes left in the
+    partial file by a chunk that failed half way are dropped first.
+
+    Args:
+        user: The uploading user
+        upload_id: Primary key of the DirectUpload
+        offset (int): Offset the client says the chunk starts at
+        stream: File-like request body
+
+    Returns:
+        DirectUpload: The upload with its new offset; once ``offset`` equals
+        ``length`` the file is in storage and ready to be completed
+
+    Raises:
+        LookupError: If there is no such unfinished upload
+        OffsetMismatch: If ``offset`` is not the number of bytes received
+        ValueError: If the chunk goes past the declared length
+    """
+    upload = get_resumable_upload(user, upload_id)
+    if upload is None:
+        raise LookupError('Unknown upload.')
+    if offset != upload.offset:
+        raise OffsetMismatch(upload.offset)
+    if upload.offset == upload.length:
+        return upload
+
+    incoming_path = f'{chunk_path(upload)}.{uuid.uuid4().hex}'
+    try:
+        received = _receive(stream, incoming_path, min(upload.length - offset, MAX_CHUNK_SIZE))
+        with transaction.atomic():
+            upload = DirectUpload.objects.select_for_update().filter(
+                pk=upload_id, user=user, status='pending', offset__isnull=False,
+            ).first()
+            if upload is None or is_expired(upload):
+                raise LookupError('Unknown upload.')
+            if offset != upload.offset:
+                # Another request appended while this one was reading
+                raise OffsetMismatch(upload.offset)
+
+            path = chunk_path(upload)
+            with open(path, 'r+b') as partial, open(incoming_path, 'rb') as incoming:
+                partial.seek(upload.offset)
+                partial.truncate()
+                shutil.copyfileobj(incoming, partial)
+
+            upload.offset += received
+            if upload.offset == upload.length:
+                # Assembled: hand the file over like a presigned upload would
+                with open(path, 'rb') as assembled:
+                    upload.key = default_storage.save(upload.key, File(assembled))
+                transaction.on_commit(lambda: discard_chunks(upload))
+            upload.save(update_fields=['offset', 'key', 'updated_at'])
+    finally:
+        try:
+            os.remove(incoming_path)
+        except FileNotFoundError:
+            pass
+    return upload
+
+
+def cancel_resumable_upload(user, upload_id):
+    """
+    Stop a resumable upload and remove what was received.
+
+    Returns:
+        bool: False if there is no such unfinished upload
+    """
+    upload = get_resumable_upload(user, upload_id)
+    if upload is None:
+        return False
+    DirectUpload.objects.filter(pk=upload.pk, status='pending').update(status='expired')
+    discard_chunks(upload)
+    default_storage.delete(upload.key)
+    return True
@@ -0,0 +1,247 @@
+"""
+Utility module for transcoding issue voice notes in the background.
+
+Recordings are stored as uploaded (MP3, WAV, M4A, WebM, ...), which can be
+several megabytes a minute. The `transcode_voice_notes` management command
+converts them with ffmpeg to mono Opus at a speech bitrate, capped at
+``VOICE_NOTE_MAX_SECONDS``, and records their duration and a downsampled
+peak waveform. Pages draw the waveform and show the length from those fields
+and only fetch the audio when it is played (see the voice_player partial).
+
+The converted file replaces the original with a conditional update, so a
+recording deleted or replaced while it was being transcoded is left alone.
+"""
+
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from array import array
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+from config.utils import generate_alphanumeric_filename
+from config.versions import bump, issue_scope
+from issue_management.models import Issue
+from issue_management.utils.workers import batch
+
+logger = logging.getLogger(__name__)
+
+# Number of levels in the stored waveform
+WAVEFORM_POINTS = 100
+
+# The waveform is measured on 8 kHz mono audio in blocks of 0.1 seconds
+WAVEFORM_SAMPLE_RATE = 8000
+WAVEFORM_BLOCK_SAMPLES = WAVEFORM_SAMPLE_RATE // 10
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class VoiceNoteError(Exception):
+    """ffmpeg could not read or convert a recording"""
+
+
+def _run(command, **kwargs):
+    try:
+        return subprocess.run(command, check=True, capture_output=True, **kwargs)
+    except subprocess.CalledProcessError as e:
+        raise VoiceNoteError(e.stderr.decode(errors='replace').strip() or str(e))
+
+
+def probe(path):
+    """
+    Read the codec, bitrate and duration of the first audio stream.
+
+    Returns:
+        tuple: (codec name, bitrate in bits per second or None, duration in seconds or None)
+    """
+    result = _run([
+        settings.FFPROBE_BINARY, '-v', 'error', '-select_streams', 'a:0',
+        '-show_entries', 'stream=codec_name,bit_rate:format=duration,bit_rate',
+        '-of', 'json', path,
+    ])
+    info = json.loads(result.stdout or b'{}')
+    if not info.get('streams'):
+        raise VoiceNoteError('No audio stream found')
+    stream, container = info['streams'][0], info.get('format', {})
+    bitrate = stream.get('bit_rate') or container.get('bit_rate')
+    duration = container.get('duration')
+    return (
+        stream.get('codec_name'),
+        int(bitrate) if bitrate else None,
+        float(duration) if duration else None,
+    )
+
+
+def needs_transcoding(codec, bitrate, duration):
+    """Recordings already in Opus at the target bitrate and length are kept as they are"""
+    return not (
+        codec == 'opus'
+        and bitrate is not None and bitrate <= settings.VOICE_NOTE_BITRATE * 1.1
+        and duration is not None and duration <= settings.VOICE_NOTE_MAX_SECONDS
+    )
+
+
+def transcode(source, destination):
+    """Convert any audio file ffmpeg can read to mono Ogg Opus tuned for speech"""
+    _run([
+        settings.FFMPEG_BINARY, '-nostdin', '-v', 'error', '-y', '-i', source,
+        '-vn', '-map_metadata', '-1', '-ac', '1',
+        '-c:a', 'libopus', '-b:a', str(settings.VOICE_NOTE_BITRATE), '-application', 'voip',
+        '-t', str(settings.VOICE_NOTE_MAX_SECONDS),
+        '-f', 'ogg', destination,
+    ])
+
+
+def block_peaks(stream):
+    """
+    Peak amplitude of every block of 16-bit little-endian mono PCM samples.
+
+    Args:
+        stream: Binary file object with the raw samples
+
+    Returns:
+        list: One peak (0-32768) per `WAVEFORM_BLOCK_SAMPLES` samples
+    """
+    peaks = []
+    block_bytes = WAVEFORM_BLOCK_SAMPLES * 2
+    while True:
+        data = stream.read(block_bytes)
+        if not data:
+            break
+        samples = array('h', data[:len(data) - len(data) % 2])
+        if sys.byteorder == 'big':
+            samples.byteswap()
+        if samples:
+            peaks.append(max(max(samples), -min(samples)))
+    return peaks
+
+
+def downsample(peaks, points=WAVEFORM_POINTS):
+    """
+    Reduce block peaks to at most `points` levels from 0 to 100, relative to the loudest block.
+
+    Returns:
+        list: Integer levels
+    """
+    if not peaks:
+        return []
+    group = -(-len(peaks) // points)
+    grouped = [max(peaks[start:start + group]) for start in range(0, len(peaks), group)]
+    loudest = max(grouped) or 1
+    return [round(peak * 100 / loudest) for peak in grouped]
+
+
+def waveform(path):
+    """Decode a recording to 8 kHz mono and return its downsampled peak levels"""
+    process = subprocess.Popen(
+        [
+            settings.FFMPEG_BINARY, '-nostdin', '-v', 'error', '-i', path,
+            '-ac', '1', '-ar', str(WAVEFORM_SAMPLE_RATE), '-f', 's16le', '-',
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    # Peaks are taken while decoding, so memory does not grow with the recording
+    peaks = block_peaks(process.stdout)
+    stderr = process.stderr.read()
+    if process.wait():
+        raise VoiceNoteError(stderr.decode(errors='replace').strip())
+    return downsample(peaks)
+
+
+def process_voice_note(issue):
+    """
+    Transcode an issue's voice note if needed and store its duration and waveform.
+
+    Args:
+        issue: Issue with a voice note
+
+    Returns:
+        bool: False if the recording changed while it was being processed
+
+    Raises:
+        VoiceNoteError: If ffmpeg cannot read the recording
+    """
+    original_name = issue.voice.name
+    extension = os.path.splitext(original_name)[1]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        source = os.path.join(workdir, f'source{extension}')
+        with default_storage.open(original_name) as stored, open(source, 'wb') as local:
+            shutil.copyfileobj(stored, local, COPY_CHUNK_SIZE)
+
+        codec, bitrate, duration = probe(source)
+        final_path, new_name = source, None
+        if needs_transcoding(codec, bitrate, duration):
+            final_path = os.path.join(workdir, 'voice.ogg')
+            transcode(source, final_path)
+            duration = probe(final_path)[2]
+            upload_to = Issue._meta.get_field('voice').upload_to
+            with open(final_path, 'rb') as converted:
+                new_name = default_storage.save(
+                    f"{upload_to}{generate_alphanumeric_filename(extension='ogg')}", File(converted),
+                )
+        levels = waveform(final_path)
+        size = os.path.getsize(final_path)
+
+    # Only if the issue still has the recording that was read
+    updated = Issue.all_objects.filter(pk=issue.pk, voice=original_name).update(
+        voice=new_name or original_name,
+        voice_size=size,
+        voice_duration=duration,
+        voice_waveform=levels,
+        voice_processed=True,
+    )
+    if not updated:
+        if new_name:
+            default_storage.delete(new_name)
+        return False
+    if new_name:
+        default_storage.delete(original_name)
+    # Detail pages show the player, so their validators must change
+    bump(issue_scope(issue.slug))
+    return True
+
+
+def pending_voice_notes(force=False):
+    """Issues whose voice note still has to be processed (all of them with ``force``)"""
+    queryset = Issue.objects.exclude(voice='').exclude(voice__isnull=True)
+    if not force:
+        queryset = queryset.filter(voice_processed=False)
+    return queryset.order_by('pk')
+
+
+def process_pending_voice_notes(limit=None, force=False):
+    """
+    Process voice notes oldest first.
+
+    Recordings ffmpeg cannot read are marked processed without metadata and
+    kept as they are, so they are not retried forever.
+
+    Args:
+        limit (int, optional): Maximum number of voice notes to process
+        force (bool): Also process voice notes that were already processed
+
+    Returns:
+        dict: 'processed', 'failed' and 'skipped' counts and whether voice
+        notes are 'remaining'
+    """
+    stats = {'processed': 0, 'failed': 0, 'skipped': 0}
+    queryset = pending_voice_notes(force).only('pk', 'slug', 'voice')
+    for issue in batch(queryset, limit):
+        try:
+            done = process_voice_note(issue)
+        except VoiceNoteError as e:
+            logger.warning("Voice note of issue %s could not be processed: %s", issue.pk, e)
+            Issue.all_objects.filter(pk=issue.pk, voice=issue.voice.name).update(voice_processed=True)
+            stats['failed'] += 1
+        else:
+            stats['processed' if done else 'skipped'] += 1
+    stats['remaining'] = not force and queryset.exists()
+    return stats
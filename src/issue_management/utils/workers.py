@@ -0,0 +1,25 @@
+"""
+Utility module for the batches of the background workers.
+
+A worker function works through a queryset of pending rows and returns a
+stats dict whose 'remaining' tells the worker command whether to carry on
+(see `issue_management.management.base.WorkerCommand`).
+"""
+
+
+def batch(queryset, limit=None):
+    """
+    The rows of ``queryset`` to work through in one run.
+
+    A copy is returned, so ``queryset`` is not filled with its results and
+    ``queryset.exists()`` afterwards is a fresh query telling whether rows
+    are left for the next run.
+
+    Args:
+        queryset: The pending rows, in the order to work through them
+        limit (int, optional): Maximum number of rows
+
+    Returns:
+        QuerySet: The first ``limit`` rows, or all of them
+    """
+    return queryset[:limit] if limit else queryset.all()
@@ -0,0 +1,251 @@
+"""
+Utility module for the per-user workload counters in `core.UserWorkloadStats`.
+
+Each issue, work task and site visit contributes to a few counters of the
+users it points at (reporter, assignee). The model signals compare the
+contribution before and after a save or delete and apply the difference with
+a single ``UPDATE ... SET field = field + n`` per affected user, so lists such
+as the people list can read the counters instead of aggregating every issue
+on each request.
+
+Bulk operations that bypass signals (queryset ``update()``/``delete()``) and
+the deletion worker use `refresh_user_stats()` instead, which recomputes the
+counters of the given users from scratch. The `reconcile_workload_stats`
+management command does the same for every user to correct any drift.
+"""
+
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+
+from core.models import User, UserWorkloadStats
+from issue_management.models import Issue, WorkTask, SiteVisit
+
+logger = logging.getLogger(__name__)
+
+ISSUE_STATUSES = [status for status, _ in Issue.STATUS_CHOICES]
+OPEN_VISIT_STATUSES = ('scheduled', 'in_progress')
+
+COUNTER_FIELDS = [
+    'reported_total',
+    'reported_resolved',
+    *[f'assigned_{status}' for status in ISSUE_STATUSES],
+    'open_tasks',
+    'open_visits',
+]
+
+_deferred_user_ids = ContextVar('deferred_workload_user_ids', default=None)
+
+
+def issue_state(issue):
+    """Fields of an issue that feed the counters"""
+    return (issue.reporter_id, issue.assigned_to_id, issue.status)
+
+
+def work_task_state(task):
+    """Fields of a work task that feed the counters"""
+    return (task.assigned_to_id, task.completed)
+
+
+def site_visit_state(visit):
+    """Fields of a site visit that feed the counters"""
+    return (visit.assigned_to_id, visit.status)
+
+
+def _issue_contribution(state):
+    reporter_id, assigned_to_id, status = state
+    contribution = {(reporter_id, 'reported_total'): 1}
+    if status == 'resolved':
+        contribution[(reporter_id, 'reported_resolved')] = 1
+    if assigned_to_id and status in ISSUE_STATUSES:
+        contribution[(assigned_to_id, f'assigned_{status}')] = 1
+    return contribution
+
+
+def _work_task_contribution(state):
+    assigned_to_id, completed = state
+    if assigned_to_id and not completed:
+        return {(assigned_to_id, 'open_tasks'): 1}
+    return {}
+
+
+def _site_visit_contribution(state):
+    assigned_to_id, status = state
+    if assigned_to_id and status in OPEN_VISIT_STATUSES:
+        return {(assigned_to_id, 'open_visits'): 1}
+    return {}
+
+
+CONTRIBUTIONS = {
+    'issue': _issue_contribution,
+    'work_task': _work_task_contribution,
+    'site_visit': _site_visit_contribution,
+}
+
+
+@contextmanager
+def defer_workload_updates():
+    """
+    Collect the ids of users whose counters would change instead of updating them.
+
+    Yields:
+        set: The collected user ids, to be passed to `refresh_user_stats()`
+        once the bulk operation has finished
+    """
+    user_ids = set()
+    token = _deferred_user_ids.set(user_ids)
+    try:
+        yield user_ids
+    finally:
+        _deferred_user_ids.reset(token)
+
+
+def apply_change(kind, before, after, create_missing=True):
+    """
+    Apply the counter difference between two states of one record.
+
+    Args:
+        kind: 'issue', 'work_task' or 'site_visit'
+        before: State before the change (None for a new record)
+        after: State after the change (None for a deleted record)
+        create_missing: Build the stats row of users that do not have one yet
+            from scratch. Disabled for deletions, where the user itself may be
+            in the middle of being deleted.
+    """
+    apply_changes(kind, [(before, after)], create_missing)
+
+
+def apply_changes(kind, changes, create_missing=True):
+    """
+    Apply the counter differences of several records at once, with one
+    update per affected user.
+
+    Args:
+        kind: 'issue', 'work_task' or 'site_visit'
+        changes: (before, after) state pairs, as for `apply_change()`
+        create_missing: See `apply_change()`
+    """
+    contribute = CONTRIBUTIONS[kind]
+    deltas = defaultdict(int)
+    for before, after in changes:
+        for key, value in (contribute(after) if after else {}).items():
+            deltas[key] += value
+        for key, value in (contribute(before) if before else {}).items():
+            deltas[key] -= value
+
+    by_user = defaultdict(dict)
+    for (user_id, field), delta in deltas.items():
+        if delta:
+            by_user[user_id][field] = delta
+    if not by_user:
+        return
+
+    deferred = _deferred_user_ids.get()
+    if deferred is not None:
+        deferred.update(by_user)
+        return
+
+    missing = []
+    for user_id, fields in by_user.items():
+        updated = UserWorkloadStats.objects.filter(user_id=user_id).update(
+            **{field: Greatest(F(field) + delta, 0) for field, delta in fields.items()}
+        )
+        if not updated:
+            missing.append(user_id)
+
+    if missing and create_missing:
+        # First change for these users: count everything instead of starting from zero
+        refresh_user_stats(missing)
+
+
+def compute_user_stats(user_ids):
+    """
+    Count the workload of the given users with four grouped queries.
+
+    Issues scheduled for deletion, and their tasks and visits, are left out
+    just as they are hidden everywhere else.
+
+    Args:
+        user_ids: Iterable of user primary keys
+
+    Returns:
+        dict: ``{user_id: {counter_field: value}}`` for every given id
+    """
+    user_ids = list(user_ids)
+    stats = {user_id: dict.fromkeys(COUNTER_FIELDS, 0) for user_id in user_ids}
+
+    reported = (
+        Issue.objects.filter(reporter_id__in=user_ids)
+        .values('reporter_id')
+        .annotate(total=Count('pk'), resolved=Count('pk', filter=Q(status='resolved')))
+    )
+    for row in reported:
+        stats[row['reporter_id']]['reported_total'] = row['total']
+        stats[row['reporter_id']]['reported_resolved'] = row['resolved']
+
+    assigned = (
+        Issue.objects.filter(assigned_to_id__in=user_ids, status__in=ISSUE_STATUSES)
+        .values('assigned_to_id', 'status')
+        .annotate(count=Count('pk'))
+    )
+    for row in assigned:
+        stats[row['assigned_to_id']][f"assigned_{row['status']}"] = row['count']
+
+    tasks = (
+        WorkTask.objects.filter(assigned_to_id__in=user_ids, completed=False, issue__deletion_requested_at__isnull=True)
+        .values('assigned_to_id')
+        .annotate(count=Count('pk'))
+    )
+    for row in tasks:
+        stats[row['assigned_to_id']]['open_tasks'] = row['count']
+
+    visits = (
+        SiteVisit.objects.filter(assigned_to_id__in=user_ids, status__in=OPEN_VISIT_STATUSES, issue__deletion_requested_at__isnull=True)
+        .values('assigned_to_id')
+        .annotate(count=Count('pk'))
+    )
+    for row in visits:
+        stats[row['assigned_to_id']]['open_visits'] = row['count']
+
+    return stats
+
+
+def refresh_user_stats(user_ids):
+    """
+    Recompute and store the counters of the given users.
+
+    Ids of users that no longer exist are ignored. Rows are written with one
+    upsert, so missing rows are created and existing ones overwritten.
+
+    Args:
+        user_ids: Iterable of user primary keys
+
+    Returns:
+        int: Number of users whose stored counters were missing or wrong
+    """
+    user_ids = list(User.objects.filter(pk__in=list(user_ids)).values_list('pk', flat=True))
+    if not user_ids:
+        return 0
+
+    computed = compute_user_stats(user_ids)
+    stored = {
+        row['user_id']: row
+        for row in UserWorkloadStats.objects.filter(user_id__in=user_ids).values('user_id', *COUNTER_FIELDS)
+    }
+    corrected = 0
+    for user_id, counters in computed.items():
+        row = stored.get(user_id)
+        if row is None or any(row[field] != value for field, value in counters.items()):
+            corrected += 1
+
+    UserWorkloadStats.objects.bulk_create(
+        [UserWorkloadStats(user_id=user_id, **counters) for user_id, counters in computed.items()],
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=[*COUNTER_FIELDS, 'updated_at'],
+    )
+    return corrected
@@ -2,24 +2,32 @@
 from django.urls import reverse_lazy, reverse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.http import Http404, JsonResponse, HttpResponse
 from django.utils import timezone
 from django.db.models import Case, When, IntegerField
 from ..models import Issue, IssueImage, WorkTask, IssueComment, SiteVisit, SiteVisitImage, PurchaseRequest, IssueActivity
-from ..forms import IssueForm, WorkTaskForm, WorkTaskUpdateForm, WorkTaskCompleteForm, IssueCommentForm, AdditionalImageUploadForm, VoiceUploadForm, IssueUpdateForm, IssueAssignmentForm, SiteVisitForm
+from ..forms import IssueForm, WorkTaskForm, WorkTaskUpdateForm, WorkTaskCompleteForm, IssueCommentForm, AdditionalImageUploadForm, VoiceUploadForm, IssueUpdateForm, IssueAssignmentForm, SiteVisitForm, BulkIssueActionForm
 from ..forms_reports import PerformanceReportForm
 from ..utils.performance_report import PerformanceReportGenerator
+from ..utils import bulk_actions, lifecycle
 from config.mixins.access_mixin import CentralAdminOnlyAccessMixin
+from config.mixins.conditional_mixin import ConditionalGetMixin
+from config.mixins.idempotency_mixin import IdempotentPostMixin
+from config.versions import issue_scope, org_scope
 from core.models import Space
 
 
-class IssueListView(CentralAdminOnlyAccessMixin, ListView):
+class IssueListView(CentralAdminOnlyAccessMixin, ConditionalGetMixin, ListView):
     template_name = "central_admin/issue_management/issue_list.html"
     context_object_name = "issues"
     model = Issue
     
+    def get_version_scopes(self):
+        return [org_scope(self.request.user.organization_id)]
+    
     def get_queryset(self):
-        queryset = Issue.objects.prefetch_related('images').select_related('org', 'space', 'reporter').all()
+        # Only the organization's issues, as the ETag follows only its scope
+        queryset = Issue.objects.filter(org=self.request.user.organization).prefetch_related('images').select_related('org', 'space', 'reporter')
         
         # Filter by status if provided
         status_filter = self.request.GET.get('status')
@@ -68,11 +76,45 @@ class IssueListView(CentralAdminOnlyAccessMixin, ListView):
         context['current_filter'] = self.request.GET.get('status', 'all')
         context['space_filter'] = self.request.GET.get('space', '')
         # Get all spaces for the filter dropdown
-        context['spaces'] = Space.objects.select_related('org').all().order_by('org__name', 'name')
+        context['spaces'] = Space.objects.filter(org=self.request.user.organization).order_by('name')
+        # Supervisors and reviewers for the bulk action bar
+        context['bulk_form'] = BulkIssueActionForm(issues=Issue.objects.none(), org=self.request.user.organization)
         return context
 
+
+class IssueBulkActionView(CentralAdminOnlyAccessMixin, IdempotentPostMixin, View):
+    """Apply one action (assign, priority, status or reviewers) to the issues selected in the list"""
     
-class IssueCreateView(CentralAdminOnlyAccessMixin, CreateView):
+    def get_issues(self):
+        """The issues this admin may act on"""
+        return Issue.objects.filter(org=self.request.user.organization)
+    
+    def post(self, request):
+        form = BulkIssueActionForm(request.POST, issues=self.get_issues(), org=request.user.organization)
+        if not form.is_valid():
+            for errors in form.errors.values():
+                for error in errors:
+                    messages.error(request, error)
+            return redirect('issue_management:central_admin:issue_list')
+        
+        selected = list(form.cleaned_data['issues'])
+        changed = bulk_actions.apply(
+            form.cleaned_data['action'],
+            selected,
+            request.user,
+            assignee=form.cleaned_data.get('assigned_to'),
+            priority=form.cleaned_data.get('priority'),
+            reviewers=form.cleaned_data.get('reviewers') or (),
+        )
+        action = dict(form.fields['action'].choices)[form.cleaned_data['action']]
+        messages.success(request, f'{action}: {len(changed)} of {len(selected)} selected issues updated.')
+        skipped = len(selected) - len(changed)
+        if skipped:
+            messages.info(request, f'{skipped} issue(s) were skipped because their status does not allow this action, nothing changed, or someone else changed them in the meantime.')
+        return redirect('issue_management:central_admin:issue_list')
+
+
+class IssueCreateView(CentralAdminOnlyAccessMixin, IdempotentPostMixin, CreateView):
     template_name = "central_admin/issue_management/issue_create.html"
     form_class = IssueForm
     success_url = reverse_lazy('issue_management:central_admin:issue_list')
@@ -92,19 +134,6 @@ class IssueCreateView(CentralAdminOnlyAccessMixin, CreateView):
             ).order_by('name')
         return form
     
-    def post(self, request, *args, **kwargs):
-        """Override post to prevent duplicate submissions"""
-        # Check if this form has already been submitted
-        form_token = request.POST.get('form_token', '')
-        if form_token:
-            # Check if token was already used
-            used_tokens = request.session.get('used_issue_create_tokens', [])
-            if form_token in used_tokens:
-                messages.warning(request, 'This issue has already been created. Please do not submit the form multiple times.')
-                return redirect(self.success_url)
-        
-        return super().post(request, *args, **kwargs)
-    
     def form_valid(self, form):
         # Set the reporter to the current user before saving
         form.instance.reporter = self.request.user
@@ -125,65 +154,49 @@ class IssueCreateView(CentralAdminOnlyAccessMixin, CreateView):
                 issue_image._uploaded_by = self.request.user
                 issue_image.save()
         
-        # Mark this form as submitted to prevent duplicates
-        form_token = self.request.POST.get('form_token', '')
-        if form_token:
-            used_tokens = self.request.session.get('used_issue_create_tokens', [])
-            used_tokens.append(form_token)
-            # Keep only the last 10 tokens to prevent session bloat
-            self.request.session['used_issue_create_tokens'] = used_tokens[-10:]
-        
         messages.success(self.request, f'Issue "{self.object.title}" created successfully!')
         return response
     
 
-class IssueDetailView(CentralAdminOnlyAccessMixin, DetailView):
+class IssueDetailView(CentralAdminOnlyAccessMixin, ConditionalGetMixin, DetailView):
     template_name = "central_admin/issue_management/issue_detail.html"
     context_object_name = "issue"
     model = Issue
     slug_field = 'slug'
     slug_url_kwarg = 'issue_slug'
     
+    def get_version_scopes(self):
+        return [issue_scope(self.kwargs['issue_slug'])]
+    
     def get_queryset(self):
-        return Issue.objects.prefetch_related(
-            'images', 
-            'comments', 
-            'work_tasks__assigned_to',
-            'work_tasks__resolution_images',
-            'site_visits__created_by',
-            'site_visits__assigned_to',
-            'site_visits__images',
-            'activities__user'
-        ).select_related('org', 'space')
+        # Tasks, visits, purchases, media and the timeline are loaded by IssueDetailSectionView
+        return Issue.objects.filter(org=self.request.user.organization).select_related(
+            'org', 'space', 'reporter', 'assigned_to', 'assigned_by', 'reviewed_by'
+        ).prefetch_related('images', 'reviewers')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Add work tasks to context sorted by completion status and issue priority
-        work_tasks = self.object.work_tasks.select_related('issue').prefetch_related('resolution_images').all().annotate(
-            priority_order=Case(
-                When(issue__priority='critical', then=1),
-                When(issue__priority='high', then=2),
-                When(issue__priority='medium', then=3),
-                When(issue__priority='low', then=4),
-                default=5,
-                output_field=IntegerField(),
-            )
-        ).order_by('completed', 'priority_order', 'due_date')
-        context['work_tasks'] = work_tasks
         # Check if there are any incomplete work tasks
-        context['has_incomplete_tasks'] = work_tasks.filter(completed=False).exists()
+        context['has_incomplete_tasks'] = self.object.work_tasks.filter(completed=False).exists()
         # Add comment form to context
         context['comment_form'] = IssueCommentForm()
-        # Add site visits to context
-        site_visits = self.object.site_visits.select_related('created_by', 'assigned_to').prefetch_related('images').all()
-        context['site_visits'] = site_visits
-        # Add purchase requests to context
-        purchase_requests = self.object.purchase_requests.select_related('requested_by', 'reviewed_by').all()
-        context['purchase_requests'] = purchase_requests
-        # Add activity history to context
-        activities = self.object.activities.select_related('user').all()
-        context['activities'] = activities
         return context
+
+
+class IssueDetailSectionView(CentralAdminOnlyAccessMixin, View):
+    """
+    HTMX endpoint rendering one lazily loaded section of the issue detail page
+    (tasks, visits, visit_summary, purchases or media) from the section cache.
+    """
+    
+    def get(self, request, issue_slug, section):
+        from ..utils.detail_sections import SECTIONS, section_context
+        
+        if section not in SECTIONS:
+            raise Http404
+        issue = get_object_or_404(Issue, slug=issue_slug, org=request.user.organization)
+        context = {'issue': issue, **section_context(issue, section)}
+        return render(request, f'central_admin/issue_management/partials/detail_{section}.html', context)
     
     
 class IssueUpdateView(CentralAdminOnlyAccessMixin, UpdateView):
@@ -207,7 +220,7 @@ class IssueUpdateView(CentralAdminOnlyAccessMixin, UpdateView):
         return reverse_lazy('issue_management:central_admin:issue_detail', kwargs={'issue_slug': self.object.slug})
 
 
-class WorkTaskCreateView(CentralAdminOnlyAccessMixin, CreateView):
+class WorkTaskCreateView(CentralAdminOnlyAccessMixin, IdempotentPostMixin, CreateView):
     template_name = "central_admin/issue_management/work_task_create.html"
     form_class = WorkTaskForm
     model = WorkTask
@@ -275,7 +288,7 @@ class WorkTaskUpdateView(CentralAdminOnlyAccessMixin, UpdateView):
         return context
 
 
-class WorkTaskCompleteView(CentralAdminOnlyAccessMixin, UpdateView):
+class WorkTaskCompleteView(CentralAdminOnlyAccessMixin, IdempotentPostMixin, UpdateView):
     """Complete a work task with resolution notes and images"""
     template_name = "central_admin/issue_management/work_task_complete.html"
     form_class = WorkTaskCompleteForm
@@ -328,7 +341,7 @@ class WorkTaskCompleteView(CentralAdminOnlyAccessMixin, UpdateView):
         return context
 
 
-class WorkTaskToggleCompleteView(CentralAdminOnlyAccessMixin, UpdateView):
+class WorkTaskToggleCompleteView(CentralAdminOnlyAccessMixin, IdempotentPostMixin, UpdateView):
     """Toggle the completion status of a work task"""
     model = WorkTask
     slug_field = 'slug'
@@ -410,35 +423,28 @@ class IssueDeleteView(CentralAdminOnlyAccessMixin, DeleteView):
     success_url = reverse_lazy('issue_management:central_admin:issue_list')
     
     def get_queryset(self):
-        return Issue.objects.prefetch_related('images', 'comments', 'work_tasks__shares').select_related('org', 'space', 'reporter')
+        return Issue.objects.select_related('org', 'space', 'reporter')
     
-    def delete(self, request, *args, **kwargs):
-        """Override delete to add success message"""
-        self.object = self.get_object()
-        issue_title = self.object.title
+    def form_valid(self, form):
+        """Schedule the issue for background deletion instead of cascading in the request"""
+        from ..utils.deletion import schedule_issue_deletion
         
-        # Django's CASCADE will automatically delete:
-        # - IssueImage instances (related via images)
-        # - IssueComment instances (related via comments) 
-        # - WorkTask instances (related via work_tasks)
-        # - WorkTaskShare instances (related via work_tasks__shares)
+        issue_title = self.object.title
         
-        success_url = self.get_success_url()
-        self.object.delete()
+        # Hide the issue right away; the process_deletions worker removes its
+        # images, comments, work tasks and shares in chunks and deletes the
+        # stored files in batches
+        schedule_issue_deletion(self.object)
         
-        messages.success(request, f'Issue "{issue_title}" and all its related data have been permanently deleted.')
+        messages.success(self.request, f'Issue "{issue_title}" has been scheduled for deletion. Its related data is being removed in the background.')
         
-        return redirect(success_url)
+        return redirect(self.get_success_url())
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Add counts of related objects that will be deleted
-        context['related_counts'] = {
-            'images': self.object.images.count(),
-            'comments': self.object.comments.count(),
-            'work_tasks': self.object.work_tasks.count(),
-            'work_task_shares': sum(task.shares.count() for task in self.object.work_tasks.all()),
-        }
+        # Add counts of related objects that will be deleted (one aggregate query per model)
+        from ..utils.cascade import issue_cascade_impact
+        context['related_counts'] = issue_cascade_impact(self.object)
         return context
 
 
@@ -491,7 +497,7 @@ class WorkTaskResolutionImageDeleteView(CentralAdminOnlyAccessMixin, View):
         return redirect('issue_management:central_admin:issue_detail', issue_slug=work_task.issue.slug)
 
 
-class IssueImageUploadView(CentralAdminOnlyAccessMixin, View):
+class IssueImageUploadView(CentralAdminOnlyAccessMixin, IdempotentPostMixin, View):
     """Upload additional images to an existing issue"""
     
     def get(self, request, issue_slug):
@@ -578,7 +584,7 @@ class IssueVoiceDeleteView(CentralAdminOnlyAccessMixin, View):
         return redirect('issue_management:central_admin:issue_detail', issue_slug=issue.slug)
 
 
-class IssueVoiceUploadView(CentralAdminOnlyAccessMixin, View):
+class IssueVoiceUploadView(CentralAdminOnlyAccessMixin, IdempotentPostMixin, View):
     """Upload a voice recording to an existing issue"""
     
     def get(self, request, issue_slug):
@@ -635,7 +641,7 @@ class IssueVoiceUploadView(CentralAdminOnlyAccessMixin, View):
         return render(request, 'central_admin/issue_management/voice_upload.html', context)
 
 
-class IssueAssignmentView(CentralAdminOnlyAccessMixin, UpdateView):
+class IssueAssignmentView(CentralAdminOnlyAccessMixin, IdempotentPostMixin, UpdateView):
     """Assign an issue to a supervisor with optional review requirement"""
     template_name = "central_admin/issue_management/issue_assignment.html"
     form_class = IssueAssignmentForm
@@ -653,41 +659,33 @@ class IssueAssignmentView(CentralAdminOnlyAccessMixin, UpdateView):
         return kwargs
     
     def form_valid(self, form):
-        # Set assignment metadata
-        form.instance.assigned_by = self.request.user
-        form.instance.assigned_at = timezone.now()
-        
-        # Update status to assigned when a supervisor is assigned
-        # Only change status if it's not already resolved, closed, or cancelled
-        if form.instance.status not in ['resolved', 'closed', 'cancelled']:
-            form.instance.status = 'assigned'
-        
-        # Set the user who is assigning for activity tracking
-        form.instance._changed_by = self.request.user
-        
-        # Save the form first (this saves the Issue instance)
-        response = super().form_valid(form)
+        # self.issue, with the status the user saw, is compared; the form has changed self.object
+        lifecycle.as_seen(self.issue, self.request.POST)
+        assignee = form.cleaned_data['assigned_to']
+        if not lifecycle.assign([self.issue], self.request.user, assignee, form.cleaned_data['requires_review']):
+            messages.error(self.request, lifecycle.CHANGED_MESSAGE)
+            return redirect(self.get_success_url())
         
         # Check if review is required
-        if form.instance.requires_review:
+        if self.issue.requires_review:
             # Redirect to reviewer selection page (Step 2)
             messages.info(
                 self.request,
                 'Issue assigned successfully. Now please select reviewers for this issue.'
             )
-            return redirect('issue_management:central_admin:issue_select_reviewers', issue_slug=self.object.slug)
+            return redirect('issue_management:central_admin:issue_select_reviewers', issue_slug=self.issue.slug)
         else:
             # No review required, clear any existing reviewers and show success message
-            self.object.reviewers.clear()
+            self.issue.reviewers.clear()
             
-            assigned_to_name = form.instance.assigned_to.get_full_name() or form.instance.assigned_to.email
+            assigned_to_name = assignee.get_full_name() or assignee.email
             
             messages.success(
                 self.request, 
-                f'Issue "{form.instance.title}" has been assigned to {assigned_to_name}.'
+                f'Issue "{self.issue.title}" has been assigned to {assigned_to_name}.'
             )
             
-            return response
+            return redirect(self.get_success_url())
     
     def get_success_url(self):
         return reverse_lazy('issue_management:central_admin:issue_detail', kwargs={'issue_slug': self.issue.slug})
@@ -698,7 +696,7 @@ class IssueAssignmentView(CentralAdminOnlyAccessMixin, UpdateView):
         return context
 
 
-class IssueReviewerSelectionView(CentralAdminOnlyAccessMixin, View):
+class IssueReviewerSelectionView(CentralAdminOnlyAccessMixin, IdempotentPostMixin, View):
     """Select reviewers for an issue that requires review (Step 2 after assignment)"""
     template_name = "central_admin/issue_management/issue_reviewer_selection.html"
     
@@ -748,12 +746,12 @@ class IssueReviewerSelectionView(CentralAdminOnlyAccessMixin, View):
         })
 
 
-class IssueReopenView(CentralAdminOnlyAccessMixin, View):
+class IssueReopenView(CentralAdminOnlyAccessMixin, IdempotentPostMixin, View):
     """Reopen a resolved, closed, or cancelled issue"""
     
     def post(self, request, issue_slug):
         # Get the issue
-        issue = get_object_or_404(Issue, slug=issue_slug)
+        issue = lifecycle.as_seen(get_object_or_404(Issue, slug=issue_slug), request.POST)
         
         # Check if issue can be reopened
         if issue.status not in ['resolved', 'closed', 'cancelled']:
@@ -764,26 +762,9 @@ class IssueReopenView(CentralAdminOnlyAccessMixin, View):
             # Store the previous status for the message
             previous_status = issue.get_status_display()
             
-            # Reopen the issue
-            if issue.assigned_to:
-                issue.status = 'assigned'
-            else:
-                issue.status = 'open'
-            
-            # Clear resolution notes when reopening
-            issue.resolution_notes = None
-            
-            # Delete all resolution images
-            issue.resolution_images.all().delete()
-            
-            # Clear review information when reopening
-            issue.reviewed_by = None
-            issue.reviewed_at = None
-            issue.review_notes = None
-            
-            # Set the user who is reopening the issue for activity tracking
-            issue._changed_by = request.user
-            issue.save()
+            if not lifecycle.reopen([issue], request.user):
+                messages.error(request, lifecycle.CHANGED_MESSAGE)
+                return redirect('issue_management:central_admin:issue_detail', issue_slug=issue.slug)
             
             messages.success(request, f'Issue "{issue.title}" has been reopened from {previous_status.lower()} status.')
             
@@ -794,7 +775,7 @@ class IssueReopenView(CentralAdminOnlyAccessMixin, View):
         return redirect('issue_management:central_admin:issue_detail', issue_slug=issue.slug)
 
 
-class IssueResolveView(CentralAdminOnlyAccessMixin, View):
+class IssueResolveView(CentralAdminOnlyAccessMixin, IdempotentPostMixin, View):
     """Mark an issue as resolved with resolution notes and images"""
     
     def post(self, request, issue_slug):
@@ -802,7 +783,7 @@ class IssueResolveView(CentralAdminOnlyAccessMixin, View):
         from ..forms import IssueResolveForm
         
         # Get the issue
-        issue = get_object_or_404(Issue, slug=issue_slug)
+        issue = lifecycle.as_seen(get_object_or_404(Issue, slug=issue_slug), request.POST)
         
         # Check if issue is already resolved, closed, or cancelled
         if issue.status in ['resolved', 'closed', 'cancelled']:
@@ -827,12 +808,9 @@ class IssueResolveView(CentralAdminOnlyAccessMixin, View):
             return redirect('issue_management:central_admin:issue_detail', issue_slug=issue.slug)
         
         try:
-            # Update the issue status and resolution notes
-            issue.status = 'resolved'
-            issue.resolution_notes = form.cleaned_data['resolution_notes']
-            # Set the user who is resolving the issue for activity tracking
-            issue._changed_by = request.user
-            issue.save()
+            if not lifecycle.resolve([issue], request.user, form.cleaned_data['resolution_notes']):
+                messages.error(request, lifecycle.CHANGED_MESSAGE)
+                return redirect('issue_management:central_admin:issue_detail', issue_slug=issue.slug)
             
             # Handle resolution images (up to 3)
             image_count = 0
@@ -858,12 +836,12 @@ class IssueResolveView(CentralAdminOnlyAccessMixin, View):
         return redirect('issue_management:central_admin:issue_detail', issue_slug=issue.slug)
 
 
-class IssueStartWorkView(CentralAdminOnlyAccessMixin, View):
+class IssueStartWorkView(CentralAdminOnlyAccessMixin, IdempotentPostMixin, View):
     """Start work on an issue by changing its status to in_progress"""
     
     def post(self, request, issue_slug):
         # Get the issue
-        issue = get_object_or_404(Issue, slug=issue_slug)
+        issue = lifecycle.as_seen(get_object_or_404(Issue, slug=issue_slug), request.POST)
         
         # Check if issue can be started
         if issue.status in ['resolved', 'closed', 'cancelled']:
@@ -878,13 +856,10 @@ class IssueStartWorkView(CentralAdminOnlyAccessMixin, View):
             # Store the previous status for the message
             previous_status = issue.get_status_display()
             
-            # Change status to in_progress
-            issue.status = 'in_progress'
-            # Set the user who is starting work for activity tracking
-            issue._changed_by = request.user
-            issue.save()
-            
-            messages.success(request, f'Started work on issue "{issue.title}". Status changed from {previous_status.lower()} to in progress.')
+            if lifecycle.start_work([issue], request.user):
+                messages.success(request, f'Started work on issue "{issue.title}". Status changed from {previous_status.lower()} to in progress.')
+            else:
+                messages.error(request, lifecycle.CHANGED_MESSAGE)
             
         except Exception as e:
             messages.error(request, f'Failed to start work on issue: {str(e)}')
@@ -893,7 +868,7 @@ class IssueStartWorkView(CentralAdminOnlyAccessMixin, View):
         return redirect('issue_management:central_admin:issue_detail', issue_slug=issue.slug)
 
 
-class SiteVisitCreateView(CentralAdminOnlyAccessMixin, CreateView):
+class SiteVisitCreateView(CentralAdminOnlyAccessMixin, IdempotentPostMixin, CreateView):
     """Create a new site visit for an issue"""
     template_name = "central_admin/issue_management/site_visit_create.html"
     form_class = SiteVisitForm
@@ -1170,7 +1145,7 @@ class PurchaseRequestDetailView(CentralAdminOnlyAccessMixin, DetailView):
         ).prefetch_related('issue__images')
 
 
-class PurchaseRequestApproveView(CentralAdminOnlyAccessMixin, View):
+class PurchaseRequestApproveView(CentralAdminOnlyAccessMixin, IdempotentPostMixin, View):
     """Approve a purchase request"""
     
     def post(self, request, purchase_request_slug):
@@ -1198,7 +1173,7 @@ class PurchaseRequestApproveView(CentralAdminOnlyAccessMixin, View):
         return redirect('issue_management:central_admin:purchase_request_detail', purchase_request_slug=purchase_request.slug)
 
 
-class PurchaseRequestRejectView(CentralAdminOnlyAccessMixin, View):
+class PurchaseRequestRejectView(CentralAdminOnlyAccessMixin, IdempotentPostMixin, View):
     """Reject a purchase request"""
     
     def post(self, request, purchase_request_slug):
@@ -5,32 +5,90 @@ These views handle functionality that is role-agnostic.
 from django.views.generic import View
 from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.auth.mixins import LoginRequiredMixin
+from config.mixins.idempotency_mixin import IdempotentPostMixin
 from django.contrib import messages
+from django.urls import reverse
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse
 from ..models import Issue, IssueReviewComment, IssueReviewCommentImage
 from ..forms import IssueCommentForm, IssueReviewCommentForm
+from ..utils.detail_sections import cached_part
+from ..utils.direct_uploads import complete_uploads, start_upload
+from ..utils.resumable_uploads import (
+    OffsetMismatch, append_chunk, cancel_resumable_upload, get_resumable_upload, start_resumable_upload,
+)
+from ..utils.events import event_stream_response, inbox_channels, issue_channel
+from ..utils.pagination import decode_cursor, encode_cursor, newer_rows, older_page
+from ..utils.timeline import decode_timeline_cursor, timeline_page
+
+
+COMMENT_PAGE_SIZE = 20
+
+
+def _read_cursor(data, name):
+    """Decode a cursor parameter; raises ValueError for malformed values"""
+    return decode_cursor(data.get(name, ''))
+
+
+def _render_new_comments(request, issue, comments):
+    """Render comments to append to the stream, plus the advanced polling cursor"""
+    return render(request, 'common/issue_management/partials/comment_new.html', {
+        'comments': comments,
+        'cursor': encode_cursor(comments[-1]),
+        'issue': issue,
+    })
 
 
 class IssueCommentListView(LoginRequiredMixin, View):
     """
-    HTMX endpoint to return the list of comments for an issue.
+    HTMX endpoint to return the comment stream for an issue.
     This view is role-agnostic and can be used by all authenticated users.
+
+    Without parameters the newest page is returned; ``before=<cursor>``
+    returns the page of older comments and ``since=<cursor>`` returns only
+    comments newer than the cursor, or 204 when there are none.
     """
     
     def get(self, request, issue_slug):
         issue = get_object_or_404(Issue, slug=issue_slug)
-        comments = issue.comments.select_related('user').all()
+        comments = issue.comments.select_related('user')
         
-        return render(request, 'common/issue_management/partials/comment_list.html', {
-            'comments': comments,
-            'issue': issue
-        })
+        try:
+            since = _read_cursor(request.GET, 'since')
+            before = _read_cursor(request.GET, 'before')
+        except ValueError:
+            return HttpResponseBadRequest('Invalid cursor')
+        
+        # Polling for new comments
+        if 'since' in request.GET:
+            new_comments = newer_rows(comments, since)
+            if not new_comments:
+                return HttpResponse(status=204)
+            return _render_new_comments(request, issue, new_comments)
+        
+        page, has_older = older_page(comments, before, size=COMMENT_PAGE_SIZE)
+        context = {
+            'comments': page,
+            'has_older': has_older,
+            'older_cursor': encode_cursor(page[0]) if page else '',
+            'cursor': encode_cursor(page[-1]) if page else '',
+            'issue': issue,
+        }
+        # "Load older" only needs the page itself, the first load needs the whole stream
+        template = 'comment_page.html' if before else 'comment_list.html'
+        return render(request, f'common/issue_management/partials/{template}', context)
 
 
-class IssueCommentCreateView(LoginRequiredMixin, View):
+class IssueCommentCreateView(LoginRequiredMixin, IdempotentPostMixin, View):
     """
     HTMX endpoint to create a new comment.
     This view is role-agnostic and can be used by all authenticated users.
+
+    Only the new comment fragment is returned. When the client sends its
+    polling cursor as ``since``, comments by others that arrived in the
+    meantime are included too so the stream stays gap-free.
     """
+    # Errors come back with status 400, so the fragment can be replayed
+    replay_content = True
     
     def post(self, request, issue_slug):
         issue = get_object_or_404(Issue, slug=issue_slug)
@@ -42,12 +100,15 @@ class IssueCommentCreateView(LoginRequiredMixin, View):
             comment.user = request.user
             comment.save()
             
-            # Return the updated comment list
-            comments = issue.comments.select_related('user').all()
-            return render(request, 'common/issue_management/partials/comment_list.html', {
-                'comments': comments,
-                'issue': issue
-            })
+            new_comments = [comment]
+            if 'since' in request.POST:
+                try:
+                    since = _read_cursor(request.POST, 'since')
+                    new_comments = newer_rows(issue.comments.select_related('user'), since) or new_comments
+                except ValueError:
+                    # A stale or tampered cursor only costs the catch-up, not the comment
+                    pass
+            return _render_new_comments(request, issue, new_comments)
         else:
             # Return form errors
             return render(request, 'common/issue_management/partials/comment_form.html', {
@@ -66,7 +127,7 @@ class IssueCommentCreateView(LoginRequiredMixin, View):
         })
 
 
-class IssueReviewCommentCreateView(LoginRequiredMixin, View):
+class IssueReviewCommentCreateView(LoginRequiredMixin, IdempotentPostMixin, View):
     """
     View to create a new review comment with optional images.
     This view is role-agnostic and can be used by all authenticated users.
@@ -98,3 +159,180 @@ class IssueReviewCommentCreateView(LoginRequiredMixin, View):
         else:
             messages.error(request, 'Error adding review comment. Please check the form.')
             return redirect(request.META.get('HTTP_REFERER', 'issue_management:reviewer:issue_detail'), issue_slug=issue_slug)
+
+
+class IssueTimelineView(LoginRequiredMixin, View):
+    """
+    HTMX endpoint returning one page of the unified issue timeline
+    (activities, comments and review comments), newest first.
+    Pass ``before=<cursor>`` to continue after the last entry shown.
+    """
+    
+    def get(self, request, issue_slug):
+        issue = get_object_or_404(Issue, slug=issue_slug)
+        if issue.org_id != request.user.organization_id:
+            raise Http404
+        
+        try:
+            before = decode_timeline_cursor(request.GET.get('before', ''))
+        except ValueError:
+            return HttpResponseBadRequest('Invalid cursor')
+        
+        if before is None:
+            # The first page is what every visit to the issue loads
+            entries, next_cursor = cached_part(issue, 'timeline', timeline_page)
+        else:
+            entries, next_cursor = timeline_page(issue, before)
+        return render(request, 'common/issue_management/partials/timeline_page.html', {
+            'entries': entries,
+            'next_cursor': next_cursor,
+            'first_page': before is None,
+            'issue': issue,
+        })
+
+
+class IssueEventStreamView(LoginRequiredMixin, View):
+    """
+    Server-sent event stream of activity, comment and status events for one issue.
+    This view is role-agnostic and can be used by all authenticated users.
+    """
+    
+    def get(self, request, issue_slug):
+        issue = get_object_or_404(Issue, slug=issue_slug)
+        if issue.org_id != request.user.organization_id:
+            raise Http404
+        return event_stream_response(request, [issue_channel(issue.pk)])
+
+
+class InboxEventStreamView(LoginRequiredMixin, View):
+    """
+    Server-sent event stream for the issues shown in the user's role inbox:
+    the organization for central admins, the active space for space admins
+    and the user's own assignments and reviews for everyone else.
+    """
+    
+    def get(self, request):
+        return event_stream_response(request, inbox_channels(request.user))
+
+
+class DirectUploadStartView(LoginRequiredMixin, View):
+    """
+    Issue a presigned POST policy for sending one file straight to storage.
+
+    Expects ``target`` (see utils/direct_uploads.py), ``parent`` (slug of the
+    issue, work task or site visit), ``content_type`` and ``size``.
+    """
+    
+    def post(self, request):
+        try:
+            upload, policy = start_upload(
+                request.user,
+                request.POST.get('target', ''),
+                request.POST.get('parent', ''),
+                request.POST.get('content_type', ''),
+                request.POST.get('size'),
+            )
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        return JsonResponse({'upload': upload.pk, 'url': policy['url'], 'fields': policy['fields']})
+
+
+class DirectUploadCompleteView(LoginRequiredMixin, IdempotentPostMixin, View):
+    """
+    Register files the browser finished sending to storage.
+    Expects one or more ``upload`` ids returned by DirectUploadStartView.
+    """
+    
+    def post(self, request):
+        try:
+            upload_ids = [int(upload_id) for upload_id in request.POST.getlist('upload')]
+        except ValueError:
+            return HttpResponseBadRequest('Invalid upload id')
+        if not upload_ids:
+            return HttpResponseBadRequest('No uploads given')
+        
+        results = complete_uploads(request.user, upload_ids)
+        
+        # Shown on the page the browser moves on to
+        registered = sum(result['status'] != 'failed' for result in results)
+        if registered:
+            messages.success(request, f"Successfully uploaded {registered} file{'s' if registered != 1 else ''}.")
+        for result in results:
+            if result['status'] == 'failed':
+                messages.error(request, f"Upload failed: {result['error']}")
+        return JsonResponse({'uploads': results})
+
+
+def _offset_response(upload, status=204):
+    response = HttpResponse(status=status)
+    response['Upload-Offset'] = upload.offset
+    response['Upload-Length'] = upload.length
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+class ResumableUploadCreateView(LoginRequiredMixin, IdempotentPostMixin, View):
+    """
+    Start an upload sent in resumable chunks (see utils/resumable_uploads.py).
+    Takes the same fields as DirectUploadStartView and answers 201 with the
+    URL to send the chunks to.
+    """
+    
+    def post(self, request):
+        try:
+            upload = start_resumable_upload(
+                request.user,
+                request.POST.get('target', ''),
+                request.POST.get('parent', ''),
+                request.POST.get('content_type', ''),
+                request.POST.get('size'),
+            )
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        url = reverse('issue_management:resumable_upload', kwargs={'upload_id': upload.pk})
+        response = JsonResponse({'upload': upload.pk, 'url': url}, status=201)
+        response['Location'] = url
+        response['Upload-Offset'] = upload.offset
+        response['Upload-Length'] = upload.length
+        return response
+
+
+class ResumableUploadView(LoginRequiredMixin, View):
+    """
+    One resumable upload.
+
+    HEAD reports the bytes received in ``Upload-Offset``. PATCH appends the
+    request body at the ``Upload-Offset`` request header; a stale offset is
+    refused with 409 and the current offset. DELETE cancels the upload.
+    Once the offset reaches ``Upload-Length`` the file is finalized with
+    DirectUploadCompleteView.
+    """
+    
+    def head(self, request, upload_id):
+        upload = get_resumable_upload(request.user, upload_id)
+        if upload is None:
+            raise Http404
+        return _offset_response(upload, status=200)
+    
+    def patch(self, request, upload_id):
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+        except ValueError:
+            return HttpResponseBadRequest('Upload-Offset header required')
+        
+        try:
+            upload = append_chunk(request.user, upload_id, offset, request)
+        except LookupError:
+            raise Http404
+        except OffsetMismatch as e:
+            response = HttpResponse(status=409)
+            response['Upload-Offset'] = e.offset
+            return response
+        except ValueError as e:
+            return HttpResponse(str(e), status=413)
+        return _offset_response(upload)
+    
+    def delete(self, request, upload_id):
+        if not cancel_resumable_upload(request.user, upload_id):
+            raise Http404
+        return HttpResponse(status=204)
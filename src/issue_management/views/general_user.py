@@ -0,0 +1,61 @@
+import uuid
+
+from django.contrib import messages
+from django.shortcuts import redirect, render
+from django.views.generic import ListView, View
+
+from ..forms import IssueReportForm
+from ..models import Issue
+from ..utils.idempotency import KeyInProgress
+from ..utils.reporting import RateLimited, report_issue
+from config.mixins.access_mixin import GeneralUserOnlyAccessMixin
+
+
+class IssueReportView(GeneralUserOnlyAccessMixin, View):
+    """
+    Mobile reporting page for general users.
+    Photos are queued for compression and admins are notified by background
+    workers, so the request only stores the issue and the files.
+    """
+    template_name = "general_user/issue_management/issue_report.html"
+
+    def render_form(self, form, status=200):
+        return render(self.request, self.template_name, {'form': form}, status=status)
+
+    def get(self, request):
+        # The key is sent back with the form so a resubmission creates nothing new
+        form = IssueReportForm(current_user=request.user, initial={'key': uuid.uuid4().hex})
+        return self.render_form(form)
+
+    def post(self, request):
+        form = IssueReportForm(request.POST, request.FILES, current_user=request.user)
+        if not form.is_valid():
+            return self.render_form(form, status=400)
+
+        try:
+            result = report_issue(request.user, form.cleaned_data['key'], form)
+        except RateLimited as e:
+            minutes = max(1, round(e.retry_after / 60))
+            form.add_error(None, f"You have reported many issues recently. Please try again in {minutes} minute(s).")
+            response = self.render_form(form, status=429)
+            response['Retry-After'] = str(e.retry_after)
+            return response
+        except KeyInProgress:
+            form.add_error(None, "Your report is still being sent. Please wait a moment before trying again.")
+            return self.render_form(form, status=409)
+
+        if not result.get('duplicate'):
+            messages.success(request, f"Thank you! Your report {result['issue_id']} has been sent.")
+        return redirect('issue_management:general_user:issue_list')
+
+
+class IssueListView(GeneralUserOnlyAccessMixin, ListView):
+    """The general user's own reports, newest first"""
+    template_name = "general_user/issue_management/issue_list.html"
+    context_object_name = "issues"
+    paginate_by = 20
+
+    def get_queryset(self):
+        return Issue.objects.filter(reporter=self.request.user).only(
+            'title', 'issue_id', 'status', 'created_at', 'slug'
+        ).order_by('-created_at')
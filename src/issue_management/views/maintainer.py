@@ -1,14 +1,21 @@
 from django.shortcuts import get_object_or_404, redirect, render
+from django.http import JsonResponse
 from django.views.generic import ListView, DetailView, View
 from django.contrib import messages
 from django.db.models import Case, When, IntegerField
 from django.utils import timezone
-from ..models import WorkTask, SiteVisit, SiteVisitImage
+from ..models import WorkTask, SiteVisit
 from ..forms import SiteVisitCompleteForm
+from ..utils.idempotency import KeyInProgress
+from ..utils.offline_actions import (
+    OFFLINE_ACTIONS, apply_offline_action, complete_site_visit, complete_work_task, reopen_work_task,
+)
 from config.mixins.access_mixin import MaintainerOnlyAccessMixin
+from config.mixins.conditional_mixin import ConditionalGetMixin
+from config.mixins.idempotency_mixin import IdempotentPostMixin
 
 
-class WorkTaskListView(MaintainerOnlyAccessMixin, ListView):
+class WorkTaskListView(MaintainerOnlyAccessMixin, ConditionalGetMixin, ListView):
     """List all work tasks assigned to the maintainer"""
     model = WorkTask
     template_name = "maintainer/issue_management/work_task_list.html"
@@ -67,7 +74,7 @@ class WorkTaskDetailView(MaintainerOnlyAccessMixin, DetailView):
         return context
 
 
-class WorkTaskToggleCompleteView(MaintainerOnlyAccessMixin, View):
+class WorkTaskToggleCompleteView(MaintainerOnlyAccessMixin, IdempotentPostMixin, View):
     """Toggle the completion status of a work task with resolution notes"""
     
     def post(self, request, work_task_slug):
@@ -92,33 +99,14 @@ class WorkTaskToggleCompleteView(MaintainerOnlyAccessMixin, View):
                     work_task_slug=work_task.slug
                 )
             
-            work_task.completed = True
-            work_task.resolution_notes = resolution_notes
-            work_task.save()
+            complete_work_task(work_task, resolution_notes)
             messages.success(
                 request, 
                 f'Work task "{work_task.title}" marked as completed!'
             )
         else:
-            # Reopening completed task
-            from ..models import WorkTaskResolutionImage
-            
-            # Delete all resolution images when marking as pending
-            resolution_images = work_task.resolution_images.all()
-            image_count = resolution_images.count()
-            
-            # Delete image files and database records
-            for res_image in resolution_images:
-                # Delete the actual file from storage
-                if res_image.image:
-                    res_image.image.delete(save=False)
-                # Delete the database record
-                res_image.delete()
-            
-            # Mark task as pending
-            work_task.completed = False
-            work_task.resolution_notes = None  # Clear resolution notes
-            work_task.save()
+            # Reopening completed task deletes its resolution images
+            image_count = reopen_work_task(work_task)
             
             if image_count > 0:
                 messages.success(
@@ -252,7 +240,7 @@ class SiteVisitCancelView(MaintainerOnlyAccessMixin, View):
         )
 
 
-class SiteVisitCompleteView(MaintainerOnlyAccessMixin, View):
+class SiteVisitCompleteView(MaintainerOnlyAccessMixin, IdempotentPostMixin, View):
     """Complete a site visit with findings, actions, and recommendations"""
     
     def post(self, request, site_visit_slug):
@@ -276,21 +264,8 @@ class SiteVisitCompleteView(MaintainerOnlyAccessMixin, View):
         form = SiteVisitCompleteForm(request.POST, request.FILES, instance=site_visit)
         
         if form.is_valid():
-            # Save the site visit with findings, actions, and recommendations
-            site_visit = form.save(commit=False)
-            site_visit.mark_completed()
-            site_visit.save()
-            
-            # Handle image uploads (up to 3 images)
-            for i in range(1, 4):
-                image_field_name = f'image{i}'
-                image = request.FILES.get(image_field_name)
-                
-                if image:
-                    SiteVisitImage.objects.create(
-                        site_visit=site_visit,
-                        image=image
-                    )
+            # Save the findings, mark the visit completed and attach the images
+            site_visit = complete_site_visit(form, request.FILES)
             
             messages.success(
                 request,
@@ -311,3 +286,38 @@ class SiteVisitCompleteView(MaintainerOnlyAccessMixin, View):
                 'issue_management:maintainer:site_visit_detail',
                 site_visit_slug=site_visit.slug
             )
+
+
+class OfflineActionSyncView(MaintainerOnlyAccessMixin, View):
+    """
+    Apply a task or site visit action queued by the maintainer service worker.
+
+    Expects ``offline_action``, ``slug`` and ``idempotency_key`` plus the
+    action's form fields and images, and answers with the JSON outcome
+    described in utils/offline_actions.py. Repeats of a key get the stored
+    outcome, so the worker can safely retry after a lost response.
+    """
+    
+    def post(self, request):
+        action = request.POST.get('offline_action', '')
+        slug = request.POST.get('slug', '')
+        key = request.POST.get('idempotency_key', '').strip()
+        
+        if action not in OFFLINE_ACTIONS or not slug or not key or len(key) > 64:
+            return JsonResponse({'status': 'invalid', 'message': 'Malformed offline action.'}, status=400)
+        
+        try:
+            result = apply_offline_action(request.user, key, action, slug, request.POST, request.FILES)
+        except KeyInProgress:
+            # The service worker keeps the action queued and sends it again later
+            response = JsonResponse({'status': 'pending', 'message': 'This action is still being applied.'}, status=503)
+            response['Retry-After'] = '5'
+            return response
+        
+        # Shown on the next page the maintainer opens
+        if not result.get('duplicate'):
+            if result['status'] == 'applied':
+                messages.success(request, result['message'])
+            elif result['status'] in ['conflict', 'invalid']:
+                messages.warning(request, result['message'])
+        return JsonResponse(result)
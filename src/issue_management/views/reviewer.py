@@ -2,9 +2,11 @@ from django.views.generic import ListView, DetailView
 from django.db.models import Case, When, IntegerField
 from ..models import Issue
 from config.mixins.access_mixin import ReviewerOnlyAccessMixin
+from config.mixins.conditional_mixin import ConditionalGetMixin
+from config.versions import issue_scope
 
 
-class ReviewerIssueListView(ReviewerOnlyAccessMixin, ListView):
+class ReviewerIssueListView(ReviewerOnlyAccessMixin, ConditionalGetMixin, ListView):
     """
     View to list all issues where the reviewer is assigned as a reviewer.
     Only shows issues that have the current user in the reviewers field.
@@ -71,7 +73,7 @@ class ReviewerIssueListView(ReviewerOnlyAccessMixin, ListView):
         return context
 
 
-class IssueDetailView(ReviewerOnlyAccessMixin, DetailView):
+class IssueDetailView(ReviewerOnlyAccessMixin, ConditionalGetMixin, DetailView):
     """
     View details of a specific issue assigned to the reviewer.
     """
@@ -81,6 +83,9 @@ class IssueDetailView(ReviewerOnlyAccessMixin, DetailView):
     slug_field = 'slug'
     slug_url_kwarg = 'issue_slug'
     
+    def get_version_scopes(self):
+        return [issue_scope(self.kwargs['issue_slug'])]
+    
     def get_queryset(self):
         """
         Only show issues where the current user is assigned as a reviewer.
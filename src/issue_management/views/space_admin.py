@@ -3,17 +3,23 @@ from django.urls import reverse_lazy
 from django.shortcuts import get_object_or_404, redirect, render
 from django.contrib import messages
 from django.http import JsonResponse, HttpResponse
-from django.utils import timezone
 from django.db.models import Case, When, IntegerField
 from ..models import Issue, IssueImage, WorkTask, IssueComment, SiteVisit, SiteVisitImage, PurchaseRequest, IssueActivity
-from ..forms import IssueForm, SpaceAdminIssueForm, WorkTaskForm, WorkTaskUpdateForm, WorkTaskCompleteForm, IssueCommentForm, AdditionalImageUploadForm, VoiceUploadForm, IssueUpdateForm, IssueAssignmentForm, SiteVisitForm, PurchaseRequestForm
+from ..forms import IssueForm, SpaceAdminIssueForm, WorkTaskForm, WorkTaskUpdateForm, WorkTaskCompleteForm, IssueCommentForm, AdditionalImageUploadForm, VoiceUploadForm, IssueUpdateForm, IssueAssignmentForm, SiteVisitForm, PurchaseRequestForm, BulkIssueActionForm
+from ..utils import bulk_actions, lifecycle
 from config.mixins.access_mixin import SpaceAdminOnlyAccessMixin, SpaceAdminWithActiveSpaceMixin
+from config.mixins.conditional_mixin import ConditionalGetMixin
+from config.mixins.idempotency_mixin import IdempotentPostMixin
+from config.versions import issue_scope, space_scope
 
-class IssueListView(SpaceAdminWithActiveSpaceMixin, ListView):
+class IssueListView(SpaceAdminWithActiveSpaceMixin, ConditionalGetMixin, ListView):
     template_name = "space_admin/issue_management/issue_list.html"
     context_object_name = "issues"
     model = Issue
     
+    def get_version_scopes(self):
+        return [space_scope(self.request.user.active_space_id)]
+    
     def get_queryset(self):
         queryset = Issue.objects.prefetch_related('images').select_related('org', 'space', 'reporter').all()
         
@@ -56,10 +62,44 @@ class IssueListView(SpaceAdminWithActiveSpaceMixin, ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['current_filter'] = self.request.GET.get('status', 'all')
+        # Supervisors and reviewers for the bulk action bar
+        context['bulk_form'] = BulkIssueActionForm(issues=Issue.objects.none(), org=self.request.user.active_space.org)
         return context
+
+
+class IssueBulkActionView(SpaceAdminWithActiveSpaceMixin, IdempotentPostMixin, View):
+    """Apply one action (assign, priority, status or reviewers) to the issues selected in the list"""
+    
+    def get_issues(self):
+        """The issues this admin may act on"""
+        return Issue.objects.filter(space=self.request.user.active_space)
     
+    def post(self, request):
+        form = BulkIssueActionForm(request.POST, issues=self.get_issues(), org=request.user.active_space.org)
+        if not form.is_valid():
+            for errors in form.errors.values():
+                for error in errors:
+                    messages.error(request, error)
+            return redirect('issue_management:space_admin:issue_list')
+        
+        selected = list(form.cleaned_data['issues'])
+        changed = bulk_actions.apply(
+            form.cleaned_data['action'],
+            selected,
+            request.user,
+            assignee=form.cleaned_data.get('assigned_to'),
+            priority=form.cleaned_data.get('priority'),
+            reviewers=form.cleaned_data.get('reviewers') or (),
+        )
+        action = dict(form.fields['action'].choices)[form.cleaned_data['action']]
+        messages.success(request, f'{action}: {len(changed)} of {len(selected)} selected issues updated.')
+        skipped = len(selected) - len(changed)
+        if skipped:
+            messages.info(request, f'{skipped} issue(s) were skipped because their status does not allow this action, nothing changed, or someone else changed them in the meantime.')
+        return redirect('issue_management:space_admin:issue_list')
+
 
-class IssueCreateView(SpaceAdminWithActiveSpaceMixin, CreateView):
+class IssueCreateView(SpaceAdminWithActiveSpaceMixin, IdempotentPostMixin, CreateView):
     template_name = "space_admin/issue_management/issue_create.html"
     form_class = SpaceAdminIssueForm
     success_url = reverse_lazy('issue_management:space_admin:issue_list')
@@ -71,19 +111,6 @@ class IssueCreateView(SpaceAdminWithActiveSpaceMixin, CreateView):
         kwargs['active_space'] = self.request.user.active_space if self.request.user.is_space_admin else None
         return kwargs
     
-    def post(self, request, *args, **kwargs):
-        """Override post to prevent duplicate submissions"""
-        # Check if this form has already been submitted
-        form_token = request.POST.get('form_token', '')
-        if form_token:
-            # Check if token was already used
-            used_tokens = request.session.get('used_issue_create_tokens', [])
-            if form_token in used_tokens:
-                messages.warning(request, 'This issue has already been created. Please do not submit the form multiple times.')
-                return redirect(self.success_url)
-        
-        return super().post(request, *args, **kwargs)
-    
     def form_valid(self, form):
         # Set the reporter and space BEFORE saving the instance
         form.instance.reporter = self.request.user
@@ -112,25 +139,20 @@ class IssueCreateView(SpaceAdminWithActiveSpaceMixin, CreateView):
                 issue_image._uploaded_by = self.request.user
                 issue_image.save()
         
-        # Mark this form as submitted to prevent duplicates
-        form_token = self.request.POST.get('form_token', '')
-        if form_token:
-            used_tokens = self.request.session.get('used_issue_create_tokens', [])
-            used_tokens.append(form_token)
-            # Keep only the last 10 tokens to prevent session bloat
-            self.request.session['used_issue_create_tokens'] = used_tokens[-10:]
-        
         messages.success(self.request, f'Issue "{self.object.title}" created successfully!')
         return response    
 
 
-class IssueDetailView(SpaceAdminWithActiveSpaceMixin, DetailView):
+class IssueDetailView(SpaceAdminWithActiveSpaceMixin, ConditionalGetMixin, DetailView):
     template_name = "space_admin/issue_management/issue_detail.html"
     context_object_name = "issue"
     model = Issue
     slug_field = 'slug'
     slug_url_kwarg = 'issue_slug'
     
+    def get_version_scopes(self):
+        return [issue_scope(self.kwargs['issue_slug'])]
+    
     def get_queryset(self):
         queryset = Issue.objects.prefetch_related(
             'images', 
@@ -202,7 +224,7 @@ class IssueImageDeleteView(SpaceAdminWithActiveSpaceMixin, View):
         return redirect('issue_management:space_admin:issue_detail', issue_slug=issue.slug)
 
 
-class IssueImageUploadView(SpaceAdminWithActiveSpaceMixin, View):
+class IssueImageUploadView(SpaceAdminWithActiveSpaceMixin, IdempotentPostMixin, View):
     """Upload additional images to an existing issue"""
     
     def get(self, request, issue_slug):
@@ -284,7 +306,7 @@ class IssueVoiceDeleteView(SpaceAdminWithActiveSpaceMixin, View):
         return redirect('issue_management:space_admin:issue_detail', issue_slug=issue.slug)
 
 
-class IssueVoiceUploadView(SpaceAdminWithActiveSpaceMixin, View):
+class IssueVoiceUploadView(SpaceAdminWithActiveSpaceMixin, IdempotentPostMixin, View):
     """Upload a voice recording to an existing issue"""
     
     def get(self, request, issue_slug):
@@ -339,7 +361,7 @@ class IssueVoiceUploadView(SpaceAdminWithActiveSpaceMixin, View):
         return render(request, 'space_admin/issue_management/voice_upload.html', context)
 
 
-class IssueResolveView(SpaceAdminWithActiveSpaceMixin, View):
+class IssueResolveView(SpaceAdminWithActiveSpaceMixin, IdempotentPostMixin, View):
     """Mark an issue as resolved with resolution notes and images"""
     
     def post(self, request, issue_slug):
@@ -347,7 +369,7 @@ class IssueResolveView(SpaceAdminWithActiveSpaceMixin, View):
         from ..forms import IssueResolveForm
         
         # Get the issue
-        issue = get_object_or_404(Issue, slug=issue_slug)
+        issue = lifecycle.as_seen(get_object_or_404(Issue, slug=issue_slug), request.POST)
         
         # Check if issue is already resolved, closed, or cancelled
         if issue.status in ['resolved', 'closed', 'cancelled']:
@@ -372,10 +394,9 @@ class IssueResolveView(SpaceAdminWithActiveSpaceMixin, View):
             return redirect('issue_management:space_admin:issue_detail', issue_slug=issue.slug)
         
         try:
-            # Update the issue status and resolution notes
-            issue.status = 'resolved'
-            issue.resolution_notes = form.cleaned_data['resolution_notes']
-            issue.save()
+            if not lifecycle.resolve([issue], request.user, form.cleaned_data['resolution_notes']):
+                messages.error(request, lifecycle.CHANGED_MESSAGE)
+                return redirect('issue_management:space_admin:issue_detail', issue_slug=issue.slug)
             
             # Handle resolution images (up to 3)
             image_count = 0
@@ -420,7 +441,7 @@ class IssueUpdateView(SpaceAdminWithActiveSpaceMixin, UpdateView):
         return reverse_lazy('issue_management:space_admin:issue_detail', kwargs={'issue_slug': self.object.slug})
 
 
-class WorkTaskCreateView(SpaceAdminWithActiveSpaceMixin, CreateView):
+class WorkTaskCreateView(SpaceAdminWithActiveSpaceMixin, IdempotentPostMixin, CreateView):
     template_name = "space_admin/issue_management/work_task_create.html"
     form_class = WorkTaskForm
     model = WorkTask
@@ -484,7 +505,7 @@ class WorkTaskUpdateView(SpaceAdminWithActiveSpaceMixin, UpdateView):
         return context
 
 
-class WorkTaskCompleteView(SpaceAdminWithActiveSpaceMixin, UpdateView):
+class WorkTaskCompleteView(SpaceAdminWithActiveSpaceMixin, IdempotentPostMixin, UpdateView):
     """Complete a work task with resolution notes and images"""
     template_name = "space_admin/issue_management/work_task_complete.html"
     form_class = WorkTaskCompleteForm
@@ -535,7 +556,7 @@ class WorkTaskCompleteView(SpaceAdminWithActiveSpaceMixin, UpdateView):
         return context
 
 
-class WorkTaskToggleCompleteView(SpaceAdminWithActiveSpaceMixin, UpdateView):
+class WorkTaskToggleCompleteView(SpaceAdminWithActiveSpaceMixin, IdempotentPostMixin, UpdateView):
     """Toggle the completion status of a work task"""
     model = WorkTask
     slug_field = 'slug'
@@ -636,39 +657,32 @@ class IssueDeleteView(SpaceAdminWithActiveSpaceMixin, DeleteView):
     success_url = reverse_lazy('issue_management:space_admin:issue_list')
     
     def get_queryset(self):
-        return Issue.objects.prefetch_related('images', 'comments', 'work_tasks__shares').select_related('org', 'space', 'reporter')
+        return Issue.objects.select_related('org', 'space', 'reporter')
     
-    def delete(self, request, *args, **kwargs):
-        """Override delete to add success message"""
-        self.object = self.get_object()
-        issue_title = self.object.title
+    def form_valid(self, form):
+        """Schedule the issue for background deletion instead of cascading in the request"""
+        from ..utils.deletion import schedule_issue_deletion
         
-        # Django's CASCADE will automatically delete:
-        # - IssueImage instances (related via images)
-        # - IssueComment instances (related via comments) 
-        # - WorkTask instances (related via work_tasks)
-        # - WorkTaskShare instances (related via work_tasks__shares)
+        issue_title = self.object.title
         
-        success_url = self.get_success_url()
-        self.object.delete()
+        # Hide the issue right away; the process_deletions worker removes its
+        # images, comments, work tasks and shares in chunks and deletes the
+        # stored files in batches
+        schedule_issue_deletion(self.object)
         
-        messages.success(request, f'Issue "{issue_title}" and all its related data have been permanently deleted.')
+        messages.success(self.request, f'Issue "{issue_title}" has been scheduled for deletion. Its related data is being removed in the background.')
         
-        return redirect(success_url)
+        return redirect(self.get_success_url())
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Add counts of related objects that will be deleted
-        context['related_counts'] = {
-            'images': self.object.images.count(),
-            'comments': self.object.comments.count(),
-            'work_tasks': self.object.work_tasks.count(),
-            'work_task_shares': sum(task.shares.count() for task in self.object.work_tasks.all()),
-        }
+        # Add counts of related objects that will be deleted (one aggregate query per model)
+        from ..utils.cascade import issue_cascade_impact
+        context['related_counts'] = issue_cascade_impact(self.object)
         return context
 
 
-class IssueAssignmentView(SpaceAdminWithActiveSpaceMixin, UpdateView):
+class IssueAssignmentView(SpaceAdminWithActiveSpaceMixin, IdempotentPostMixin, UpdateView):
     """Assign an issue to a supervisor with optional review requirement"""
     template_name = "space_admin/issue_management/issue_assignment.html"
     form_class = IssueAssignmentForm
@@ -686,38 +700,33 @@ class IssueAssignmentView(SpaceAdminWithActiveSpaceMixin, UpdateView):
         return kwargs
     
     def form_valid(self, form):
-        # Set assignment metadata
-        form.instance.assigned_by = self.request.user
-        form.instance.assigned_at = timezone.now()
-        
-        # Update status to assigned when a supervisor is assigned
-        # Only change status if it's not already resolved, closed, or cancelled
-        if form.instance.status not in ['resolved', 'closed', 'cancelled']:
-            form.instance.status = 'assigned'
-        
-        # Save the form first (this saves the Issue instance)
-        response = super().form_valid(form)
+        # self.issue, with the status the user saw, is compared; the form has changed self.object
+        lifecycle.as_seen(self.issue, self.request.POST)
+        assignee = form.cleaned_data['assigned_to']
+        if not lifecycle.assign([self.issue], self.request.user, assignee, form.cleaned_data['requires_review']):
+            messages.error(self.request, lifecycle.CHANGED_MESSAGE)
+            return redirect(self.get_success_url())
         
         # Check if review is required
-        if form.instance.requires_review:
+        if self.issue.requires_review:
             # Redirect to reviewer selection page (Step 2)
             messages.info(
                 self.request,
                 'Issue assigned successfully. Now please select reviewers for this issue.'
             )
-            return redirect('issue_management:space_admin:issue_select_reviewers', issue_slug=self.object.slug)
+            return redirect('issue_management:space_admin:issue_select_reviewers', issue_slug=self.issue.slug)
         else:
             # No review required, clear any existing reviewers and show success message
-            self.object.reviewers.clear()
+            self.issue.reviewers.clear()
             
-            assigned_to_name = form.instance.assigned_to.get_full_name() or form.instance.assigned_to.email
+            assigned_to_name = assignee.get_full_name() or assignee.email
             
             messages.success(
                 self.request, 
-                f'Issue "{form.instance.title}" has been assigned to {assigned_to_name}.'
+                f'Issue "{self.issue.title}" has been assigned to {assigned_to_name}.'
             )
             
-            return response
+            return redirect(self.get_success_url())
     
     def get_success_url(self):
         return reverse_lazy('issue_management:space_admin:issue_detail', kwargs={'issue_slug': self.issue.slug})
@@ -728,7 +737,7 @@ class IssueAssignmentView(SpaceAdminWithActiveSpaceMixin, UpdateView):
         return context
 
 
-class IssueReviewerSelectionView(SpaceAdminWithActiveSpaceMixin, View):
+class IssueReviewerSelectionView(SpaceAdminWithActiveSpaceMixin, IdempotentPostMixin, View):
     """Select reviewers for an issue that requires review (Step 2 after assignment)"""
     template_name = "space_admin/issue_management/issue_reviewer_selection.html"
     
@@ -776,12 +785,12 @@ class IssueReviewerSelectionView(SpaceAdminWithActiveSpaceMixin, View):
         })
 
 
-class IssueReopenView(SpaceAdminWithActiveSpaceMixin, View):
+class IssueReopenView(SpaceAdminWithActiveSpaceMixin, IdempotentPostMixin, View):
     """Reopen a resolved, closed, or cancelled issue"""
     
     def post(self, request, issue_slug):
         # Get the issue
-        issue = get_object_or_404(Issue, slug=issue_slug)
+        issue = lifecycle.as_seen(get_object_or_404(Issue, slug=issue_slug), request.POST)
         
         # Check if issue can be reopened
         if issue.status not in ['resolved', 'closed', 'cancelled']:
@@ -792,24 +801,9 @@ class IssueReopenView(SpaceAdminWithActiveSpaceMixin, View):
             # Store the previous status for the message
             previous_status = issue.get_status_display()
             
-            # Reopen the issue
-            if issue.assigned_to:
-                issue.status = 'assigned'
-            else:
-                issue.status = 'open'
-            
-            # Clear resolution notes when reopening
-            issue.resolution_notes = None
-            
-            # Delete all resolution images
-            issue.resolution_images.all().delete()
-            
-            # Clear review information when reopening
-            issue.reviewed_by = None
-            issue.reviewed_at = None
-            issue.review_notes = None
-            
-            issue.save()
+            if not lifecycle.reopen([issue], request.user):
+                messages.error(request, lifecycle.CHANGED_MESSAGE)
+                return redirect('issue_management:space_admin:issue_detail', issue_slug=issue.slug)
             
             messages.success(request, f'Issue "{issue.title}" has been reopened from {previous_status.lower()} status.')
             
@@ -820,12 +814,12 @@ class IssueReopenView(SpaceAdminWithActiveSpaceMixin, View):
         return redirect('issue_management:space_admin:issue_detail', issue_slug=issue.slug)
 
 
-class IssueStartWorkView(SpaceAdminWithActiveSpaceMixin, View):
+class IssueStartWorkView(SpaceAdminWithActiveSpaceMixin, IdempotentPostMixin, View):
     """Start work on an issue by changing its status to in_progress"""
     
     def post(self, request, issue_slug):
         # Get the issue
-        issue = get_object_or_404(Issue, slug=issue_slug)
+        issue = lifecycle.as_seen(get_object_or_404(Issue, slug=issue_slug), request.POST)
         
         # Check if issue can be started
         if issue.status in ['resolved', 'closed', 'cancelled']:
@@ -840,11 +834,10 @@ class IssueStartWorkView(SpaceAdminWithActiveSpaceMixin, View):
             # Store the previous status for the message
             previous_status = issue.get_status_display()
             
-            # Change status to in_progress
-            issue.status = 'in_progress'
-            issue.save()
-            
-            messages.success(request, f'Started work on issue "{issue.title}". Status changed from {previous_status.lower()} to in progress.')
+            if lifecycle.start_work([issue], request.user):
+                messages.success(request, f'Started work on issue "{issue.title}". Status changed from {previous_status.lower()} to in progress.')
+            else:
+                messages.error(request, lifecycle.CHANGED_MESSAGE)
             
         except Exception as e:
             messages.error(request, f'Failed to start work on issue: {str(e)}')
@@ -853,7 +846,7 @@ class IssueStartWorkView(SpaceAdminWithActiveSpaceMixin, View):
         return redirect('issue_management:space_admin:issue_detail', issue_slug=issue.slug)
 
 
-class SiteVisitCreateView(SpaceAdminWithActiveSpaceMixin, CreateView):
+class SiteVisitCreateView(SpaceAdminWithActiveSpaceMixin, IdempotentPostMixin, CreateView):
     """Create a new site visit for an issue"""
     template_name = "space_admin/issue_management/site_visit_create.html"
     form_class = SiteVisitForm
@@ -1003,7 +996,7 @@ class SiteVisitDetailView(SpaceAdminWithActiveSpaceMixin, DetailView):
         return queryset
 
 
-class PurchaseRequestCreateView(SpaceAdminWithActiveSpaceMixin, CreateView):
+class PurchaseRequestCreateView(SpaceAdminWithActiveSpaceMixin, IdempotentPostMixin, CreateView):
     """Create a purchase request for an issue"""
     model = PurchaseRequest
     form_class = PurchaseRequestForm
@@ -7,11 +7,15 @@ from .. forms import IssueCommentForm, WorkTaskForm, WorkTaskUpdateForm, WorkTas
 from django.contrib import messages
 from .. models import Issue, WorkTask, SiteVisit, SiteVisitImage
 from django.shortcuts import redirect
+from .. utils import lifecycle
 from config.mixins.access_mixin import SupervisorOnlyAccessMixin
+from config.mixins.conditional_mixin import ConditionalGetMixin
+from config.mixins.idempotency_mixin import IdempotentPostMixin
+from config.versions import issue_scope
 from core.models import Space
 
 
-class WorkTaskListView(SupervisorOnlyAccessMixin, ListView):
+class WorkTaskListView(SupervisorOnlyAccessMixin, ConditionalGetMixin, ListView):
     """List all work tasks assigned to the supervisor"""
     model = WorkTask
     template_name = "supervisor/issue_management/work_task_list.html"
@@ -62,7 +66,7 @@ class WorkTaskDetailView(SupervisorOnlyAccessMixin, DetailView):
         return context
 
 
-class SupervisorIssueListView(SupervisorOnlyAccessMixin, ListView):
+class SupervisorIssueListView(SupervisorOnlyAccessMixin, ConditionalGetMixin, ListView):
     model = Issue
     template_name = "supervisor/issue_management/issue_list.html"
     context_object_name = "issues"
@@ -126,13 +130,16 @@ class SupervisorIssueListView(SupervisorOnlyAccessMixin, ListView):
         return context
     
     
-class IssueDetailView(SupervisorOnlyAccessMixin, DetailView):
+class IssueDetailView(SupervisorOnlyAccessMixin, ConditionalGetMixin, DetailView):
     template_name = "supervisor/issue_management/issue_detail.html"
     context_object_name = "issue"
     model = Issue
     slug_field = 'slug'
     slug_url_kwarg = 'issue_slug'
     
+    def get_version_scopes(self):
+        return [issue_scope(self.kwargs['issue_slug'])]
+    
     def get_queryset(self):
         return Issue.objects.prefetch_related(
             'images', 
@@ -167,7 +174,7 @@ class IssueDetailView(SupervisorOnlyAccessMixin, DetailView):
         return context
     
 
-class IssueResolveView(SupervisorOnlyAccessMixin, View):
+class IssueResolveView(SupervisorOnlyAccessMixin, IdempotentPostMixin, View):
     """Mark an issue as resolved with resolution notes and images"""
     
     def post(self, request, issue_slug):
@@ -175,7 +182,7 @@ class IssueResolveView(SupervisorOnlyAccessMixin, View):
         from ..forms import IssueResolveForm
         
         # Get the issue
-        issue = get_object_or_404(Issue, slug=issue_slug)
+        issue = lifecycle.as_seen(get_object_or_404(Issue, slug=issue_slug), request.POST)
         
         # Check if issue is already resolved, closed, or cancelled
         if issue.status in ['resolved', 'closed', 'cancelled']:
@@ -200,12 +207,9 @@ class IssueResolveView(SupervisorOnlyAccessMixin, View):
             return redirect('issue_management:supervisor:issue_detail', issue_slug=issue.slug)
         
         try:
-            # Update the issue status and resolution notes
-            issue.status = 'resolved'
-            issue.resolution_notes = form.cleaned_data['resolution_notes']
-            # Set the user who is resolving the issue for activity tracking
-            issue._changed_by = request.user
-            issue.save()
+            if not lifecycle.resolve([issue], request.user, form.cleaned_data['resolution_notes']):
+                messages.error(request, lifecycle.CHANGED_MESSAGE)
+                return redirect('issue_management:supervisor:issue_detail', issue_slug=issue.slug)
             
             # Handle resolution images (up to 3)
             image_count = 0
@@ -232,7 +236,7 @@ class IssueResolveView(SupervisorOnlyAccessMixin, View):
 
     
 
-class WorkTaskCreateView(SupervisorOnlyAccessMixin, CreateView):
+class WorkTaskCreateView(SupervisorOnlyAccessMixin, IdempotentPostMixin, CreateView):
     template_name = "supervisor/issue_management/work_task_create.html"
     form_class = WorkTaskForm
     model = WorkTask
@@ -300,7 +304,7 @@ class WorkTaskUpdateView(SupervisorOnlyAccessMixin,UpdateView):
         return context
 
 
-class WorkTaskCompleteView(SupervisorOnlyAccessMixin, UpdateView):
+class WorkTaskCompleteView(SupervisorOnlyAccessMixin, IdempotentPostMixin, UpdateView):
     """Complete a work task with resolution notes and images"""
     template_name = "supervisor/issue_management/work_task_complete.html"
     form_class = WorkTaskCompleteForm
@@ -360,7 +364,7 @@ class WorkTaskCompleteView(SupervisorOnlyAccessMixin, UpdateView):
         return context
 
 
-class WorkTaskToggleCompleteView(SupervisorOnlyAccessMixin, UpdateView):
+class WorkTaskToggleCompleteView(SupervisorOnlyAccessMixin, IdempotentPostMixin, UpdateView):
     """Toggle the completion status of a work task"""
     model = WorkTask
     slug_field = 'slug'
@@ -456,12 +460,16 @@ class WorkTaskResolutionImageDeleteView(SupervisorOnlyAccessMixin, View):
         return redirect('issue_management:supervisor:issue_detail', issue_slug=work_task.issue.slug)
     
 
-class IssueStartWorkView(SupervisorOnlyAccessMixin, View):
+class IssueStartWorkView(SupervisorOnlyAccessMixin, IdempotentPostMixin, View):
     """Start work on an issue by changing its status to in_progress"""
     
     def post(self, request, issue_slug):
         # Get the issue
-        issue = get_object_or_404(Issue, slug=issue_slug)
+        issue = lifecycle.as_seen(get_object_or_404(Issue, slug=issue_slug), request.POST)
+
+        if issue.status in lifecycle.TERMINAL_STATUSES:
+            messages.error(request, f'Cannot start work on {issue.get_status_display().lower()} issues.')
+            return redirect('issue_management:supervisor:issue_detail', issue_slug=issue.slug)
 
         if issue.status == 'in_progress':
             messages.info(request, 'Work is already in progress on this issue.')
@@ -471,13 +479,10 @@ class IssueStartWorkView(SupervisorOnlyAccessMixin, View):
             # Store the previous status for the message
             previous_status = issue.get_status_display()
             
-            # Change status to in_progress
-            issue.status = 'in_progress'
-            # Set the user who is starting work for activity tracking
-            issue._changed_by = request.user
-            issue.save()
-            
-            messages.success(request, f'Started work on issue "{issue.title}". Status changed from {previous_status.lower()} to in progress.')
+            if lifecycle.start_work([issue], request.user):
+                messages.success(request, f'Started work on issue "{issue.title}". Status changed from {previous_status.lower()} to in progress.')
+            else:
+                messages.error(request, lifecycle.CHANGED_MESSAGE)
             
         except Exception as e:
             messages.error(request, f'Failed to start work on issue: {str(e)}')
@@ -486,7 +491,7 @@ class IssueStartWorkView(SupervisorOnlyAccessMixin, View):
         return redirect('issue_management:supervisor:issue_detail', issue_slug=issue.slug)
 
 
-class SiteVisitCreateView(SupervisorOnlyAccessMixin, CreateView):
+class SiteVisitCreateView(SupervisorOnlyAccessMixin, IdempotentPostMixin, CreateView):
     """Create a new site visit for an issue"""
     template_name = "supervisor/issue_management/site_visit_create.html"
     form_class = SiteVisitForm
@@ -694,7 +699,7 @@ class SiteVisitCancelView(SupervisorOnlyAccessMixin, View):
         )
 
 
-class SiteVisitCompleteView(SupervisorOnlyAccessMixin, View):
+class SiteVisitCompleteView(SupervisorOnlyAccessMixin, IdempotentPostMixin, View):
     """Complete a site visit with findings, actions, and recommendations"""
     
     def post(self, request, site_visit_slug):
@@ -0,0 +1,33 @@
+// Bulk actions on the issue lists: selection, and the field each action needs
+document.addEventListener('DOMContentLoaded', function() {
+    const form = document.querySelector('[data-bulk-actions]');
+    if (!form) {
+        return;
+    }
+
+    const selectAll = form.querySelector('[data-bulk-select-all]');
+    const count = form.querySelector('[data-bulk-count]');
+    const submit = form.querySelector('[data-bulk-submit]');
+    const action = form.querySelector('select[name="action"]');
+    // The issue checkboxes sit in the cards, outside the form
+    const boxes = document.querySelectorAll('input[name="issues"][form="' + form.id + '"]');
+
+    function update() {
+        const selected = Array.from(boxes).filter((box) => box.checked).length;
+        count.textContent = selected;
+        selectAll.checked = selected > 0 && selected === boxes.length;
+        selectAll.indeterminate = selected > 0 && selected < boxes.length;
+        submit.disabled = selected === 0 || !action.value;
+        form.querySelectorAll('[data-bulk-field]').forEach(function(field) {
+            field.classList.toggle('d-none', field.dataset.bulkField !== action.value);
+        });
+    }
+
+    selectAll.addEventListener('change', function() {
+        boxes.forEach((box) => { box.checked = selectAll.checked; });
+        update();
+    });
+    boxes.forEach((box) => box.addEventListener('change', update));
+    action.addEventListener('change', update);
+    update();
+});
@@ -51,23 +51,42 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
 
-    // Clear form after successful submission
+    // New comments are appended to the stream by the form and the poller
     document.addEventListener('htmx:afterSwap', function(e) {
-        if (e.target && e.target.id === 'comments-list-area') {
-            // Find the comment form and clear it
-            const commentForm = document.querySelector('#comment-form-sticky .comment-form');
-            if (commentForm) {
-                const textarea = commentForm.querySelector('textarea');
-                if (textarea) {
-                    textarea.value = '';
-                    textarea.style.height = 'auto';
-                }
+        if (e.target && e.target.id === 'comments-items') {
+            const commentsItems = e.target;
+
+            // The first comment replaces the empty state
+            const emptyState = commentsItems.querySelector('.comments-empty');
+            if (emptyState && commentsItems.querySelector('.comment-item')) {
+                emptyState.remove();
             }
-            
-            // Scroll to bottom of comments list on mobile
-            const commentsArea = document.getElementById('comments-list-area');
-            if (commentsArea && window.innerWidth <= 768) {
-                commentsArea.scrollTop = commentsArea.scrollHeight;
+
+            // A poll and a post can race and deliver the same comment twice
+            const seen = new Set();
+            commentsItems.querySelectorAll('.comment-item[id]').forEach(function(item) {
+                if (seen.has(item.id)) {
+                    item.remove();
+                } else {
+                    seen.add(item.id);
+                }
+            });
+
+            // Clear the comment form after a successful post and show the new comment
+            if (e.detail.requestConfig && e.detail.requestConfig.verb === 'post') {
+                const commentForm = document.querySelector('#comment-form-sticky .comment-form');
+                if (commentForm) {
+                    const textarea = commentForm.querySelector('textarea');
+                    if (textarea) {
+                        textarea.value = '';
+                        textarea.style.height = 'auto';
+                    }
+                }
+
+                const commentsArea = document.getElementById('comments-list-area');
+                if (commentsArea) {
+                    commentsArea.scrollTop = commentsArea.scrollHeight;
+                }
             }
         }
     });
@@ -0,0 +1,268 @@
+/**
+ * Direct Upload
+ * Sends the files of a form straight to object storage with presigned POST
+ * policies, so the server never waits on a slow connection, then registers
+ * them with one request and opens the next page.
+ *
+ * Enhances forms marked with:
+ *   data-direct-upload="<target>"       issue_image, issue_voice, ... (see utils/direct_uploads.py)
+ *   data-direct-upload-parent="<slug>"  slug of the issue, work task or site visit
+ *   data-direct-upload-next="<url>"     page to open when done
+ *
+ * Photos are resized first when image-resizer.js is loaded. Files above
+ * resumableThreshold are sent in chunks through the application instead
+ * (utils/resumable_uploads.py), so a dropped connection only costs the chunk
+ * in flight; the upload is resumed from the server's offset, even after the
+ * page is reloaded. If no upload can be started the form is submitted the
+ * usual way.
+ */
+class DirectUploader {
+    static startUrl = '/issues/uploads/';
+    static completeUrl = '/issues/uploads/complete/';
+    static resumableUrl = '/issues/uploads/resumable/';
+    static resumableThreshold = 4 * 1024 * 1024;
+    static chunkSize = 1024 * 1024;
+    static maxRetries = 8;
+
+    constructor(form) {
+        this.form = form;
+        this.target = form.dataset.directUpload;
+        this.parent = form.dataset.directUploadParent;
+        this.next = form.dataset.directUploadNext;
+        this.resizer = window.ImageResizer && ImageResizer.isSupported() ? new ImageResizer() : null;
+        form.addEventListener('submit', (event) => this.handleSubmit(event));
+    }
+
+    static isSupported() {
+        return !!(window.fetch && window.FormData);
+    }
+
+    get csrfToken() {
+        const input = this.form.querySelector('[name=csrfmiddlewaretoken]');
+        return input ? input.value : '';
+    }
+
+    files() {
+        return Array.from(this.form.querySelectorAll('input[type="file"]'))
+            .flatMap((input) => Array.from(input.files));
+    }
+
+    async handleSubmit(event) {
+        const files = this.files();
+        if (!files.length || this.form.dataset.directUploadFallback) {
+            return;
+        }
+        event.preventDefault();
+
+        const buttons = this.form.querySelectorAll('button[type="submit"], input[type="submit"]');
+        buttons.forEach((button) => { button.disabled = true; });
+
+        const uploads = [];
+        try {
+            for (const [index, original] of files.entries()) {
+                this.showStatus(`Uploading ${index + 1} of ${files.length}...`);
+                const file = this.resizer && original.type.startsWith('image/')
+                    ? await this.resizer.resize(original)
+                    : original;
+                uploads.push(file.size > DirectUploader.resumableThreshold
+                    ? await this.uploadResumable(file, index, files.length)
+                    : await this.upload(file));
+            }
+            this.showStatus('Saving...');
+            await this.complete(uploads);
+            window.location.href = this.next;
+        } catch (error) {
+            buttons.forEach((button) => { button.disabled = false; });
+            this.showStatus('');
+            if (error.fallback && !uploads.length) {
+                // The upload API is unavailable: send the form through the server
+                this.form.dataset.directUploadFallback = '1';
+                this.form.requestSubmit();
+            } else {
+                alert(error.message);
+            }
+        }
+    }
+
+    async post(url, data) {
+        const body = new FormData();
+        Object.entries(data).forEach(([name, value]) => {
+            [].concat(value).forEach((item) => body.append(name, item));
+        });
+        return fetch(url, {
+            method: 'POST',
+            body: body,
+            credentials: 'same-origin',
+            headers: { 'X-CSRFToken': this.csrfToken }
+        });
+    }
+
+    async start(url, file) {
+        let response;
+        try {
+            response = await this.post(url, {
+                target: this.target,
+                parent: this.parent,
+                content_type: file.type,
+                size: file.size
+            });
+        } catch (networkError) {
+            throw Object.assign(new Error('Upload could not be started.'), { fallback: true });
+        }
+        if (response.status === 400) {
+            const data = await response.json();
+            throw new Error(data.error);
+        }
+        if (!response.ok) {
+            throw Object.assign(new Error('Upload could not be started.'), { fallback: true });
+        }
+        return response.json();
+    }
+
+    async upload(file) {
+        const policy = await this.start(DirectUploader.startUrl, file);
+
+        // The file must be the last field of a presigned POST
+        const body = new FormData();
+        Object.entries(policy.fields).forEach(([name, value]) => body.append(name, value));
+        body.append('file', file);
+        const stored = await fetch(policy.url, { method: 'POST', body: body, credentials: 'omit' });
+        if (!stored.ok) {
+            throw new Error(`"${file.name}" could not be uploaded. Please try again.`);
+        }
+        return policy.upload;
+    }
+
+    fingerprint(file) {
+        return ['direct-upload', this.target, this.parent, file.name, file.size, file.lastModified].join(':');
+    }
+
+    remember(file, session) {
+        try {
+            if (session) {
+                localStorage.setItem(this.fingerprint(file), JSON.stringify(session));
+            } else {
+                localStorage.removeItem(this.fingerprint(file));
+            }
+        } catch (error) {
+            // Storage disabled: uploads still resume within this page
+        }
+    }
+
+    recall(file) {
+        try {
+            return JSON.parse(localStorage.getItem(this.fingerprint(file)));
+        } catch (error) {
+            return null;
+        }
+    }
+
+    /**
+     * Ask the server how many bytes it has.
+     * Resolves with the offset, null if the upload is gone, or undefined when offline.
+     */
+    async serverOffset(url) {
+        try {
+            const response = await fetch(url, { method: 'HEAD', credentials: 'same-origin', cache: 'no-store' });
+            if (response.status === 404) {
+                return null;
+            }
+            return response.ok ? Number(response.headers.get('Upload-Offset')) : undefined;
+        } catch (networkError) {
+            return undefined;
+        }
+    }
+
+    async uploadResumable(file, index, count) {
+        let session = this.recall(file);
+        let offset = session ? await this.serverOffset(session.url) : null;
+        if (offset === null) {
+            session = await this.start(DirectUploader.resumableUrl, file);
+            this.remember(file, session);
+            offset = 0;
+        } else if (offset === undefined) {
+            offset = 0;
+        }
+
+        let failures = 0;
+        while (offset < file.size) {
+            this.showStatus(`Uploading ${index + 1} of ${count} (${Math.floor(offset * 100 / file.size)}%)...`);
+            let response = null;
+            try {
+                response = await fetch(session.url, {
+                    method: 'PATCH',
+                    body: file.slice(offset, offset + DirectUploader.chunkSize),
+                    credentials: 'same-origin',
+                    headers: {
+                        'X-CSRFToken': this.csrfToken,
+                        'Upload-Offset': String(offset),
+                        'Content-Type': 'application/offset+octet-stream'
+                    }
+                });
+            } catch (networkError) {
+                response = null;
+            }
+
+            // 409: the server has a different offset, continue from there
+            if (response && (response.ok || response.status === 409)) {
+                offset = Number(response.headers.get('Upload-Offset'));
+                failures = 0;
+                continue;
+            }
+            if (response && response.status === 404) {
+                this.remember(file, null);
+                throw new Error(`The upload of "${file.name}" expired. Please try again.`);
+            }
+            if (response && response.status < 500) {
+                throw new Error(`"${file.name}" could not be uploaded. Please try again.`);
+            }
+
+            // Connection lost or server trouble: wait, then resume from what arrived
+            failures += 1;
+            if (failures > DirectUploader.maxRetries) {
+                throw new Error('The connection was lost. Submit again to continue the upload where it stopped.');
+            }
+            this.showStatus('Connection lost, retrying...');
+            await new Promise((resolve) => setTimeout(resolve, Math.min(30000, 1000 * 2 ** failures)));
+            const current = await this.serverOffset(session.url);
+            if (current === null) {
+                this.remember(file, null);
+                throw new Error(`The upload of "${file.name}" expired. Please try again.`);
+            }
+            if (current !== undefined) {
+                offset = current;
+            }
+        }
+
+        this.remember(file, null);
+        return session.upload;
+    }
+
+    async complete(uploads) {
+        const response = await this.post(DirectUploader.completeUrl, { upload: uploads });
+        if (!response.ok) {
+            throw new Error('The uploaded files could not be saved. Please try again.');
+        }
+        // Per-file failures are shown as messages on the next page
+        return response.json();
+    }
+
+    showStatus(text) {
+        let status = this.form.querySelector('.direct-upload-status');
+        if (!status) {
+            status = document.createElement('div');
+            status.className = 'direct-upload-status small text-muted mt-2 text-end';
+            this.form.appendChild(status);
+        }
+        status.textContent = text;
+    }
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    if (!DirectUploader.isSupported()) {
+        return;
+    }
+    document.querySelectorAll('form[data-direct-upload]').forEach((form) => new DirectUploader(form));
+});
+
+window.DirectUploader = DirectUploader;
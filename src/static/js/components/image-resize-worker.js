@@ -0,0 +1,28 @@
+/**
+ * Image Resize Worker
+ * Decodes, downscales and encodes one photo off the main thread.
+ *
+ * Message in:  { id, file, maxWidth, maxHeight, quality, type }
+ * Message out: { id, blob, width, height } or { id, error }
+ */
+self.addEventListener('message', async (event) => {
+    const { id, file, maxWidth, maxHeight, quality, type } = event.data;
+    try {
+        // Apply the EXIF rotation while decoding so the server never has to
+        const bitmap = await createImageBitmap(file, { imageOrientation: 'from-image' });
+        const scale = Math.min(1, maxWidth / bitmap.width, maxHeight / bitmap.height);
+        const width = Math.max(1, Math.round(bitmap.width * scale));
+        const height = Math.max(1, Math.round(bitmap.height * scale));
+
+        const canvas = new OffscreenCanvas(width, height);
+        const context = canvas.getContext('2d');
+        context.imageSmoothingQuality = 'high';
+        context.drawImage(bitmap, 0, 0, width, height);
+        bitmap.close();
+
+        const blob = await canvas.convertToBlob({ type: type, quality: quality });
+        self.postMessage({ id, blob, width, height });
+    } catch (error) {
+        self.postMessage({ id, error: String(error) });
+    }
+});
@@ -0,0 +1,122 @@
+/**
+ * Image Resizer
+ * Downscales photos to the server's target size and encodes them as WebP in
+ * the browser before upload, so a 5-12 MB phone photo is sent as a few
+ * hundred KB. Files that match the target are stored by the server without
+ * being compressed again (see config.utils.is_within_target).
+ *
+ * The work runs in image-resize-worker.js with OffscreenCanvas where
+ * available, falling back to a canvas on the main thread.
+ */
+class ImageResizer {
+    // Keep in step with compress_image() defaults
+    static defaults = {
+        maxWidth: 1920,
+        maxHeight: 1920,
+        quality: 0.85,
+        type: 'image/webp'
+    };
+
+    static workerUrl = (() => {
+        const script = document.currentScript;
+        return script ? new URL('image-resize-worker.js', script.src).href : null;
+    })();
+
+    constructor(options = {}) {
+        this.options = { ...ImageResizer.defaults, ...options };
+        this.pending = new Map();
+        this.nextId = 0;
+        this.worker = null;
+
+        if (window.Worker && window.OffscreenCanvas && ImageResizer.workerUrl) {
+            try {
+                this.worker = new Worker(ImageResizer.workerUrl);
+                this.worker.addEventListener('message', (event) => this.handleMessage(event.data));
+                this.worker.addEventListener('error', () => this.disableWorker());
+            } catch (error) {
+                this.worker = null;
+            }
+        }
+    }
+
+    static isSupported() {
+        return !!(window.createImageBitmap && window.HTMLCanvasElement && window.DataTransfer);
+    }
+
+    /**
+     * Resize and encode a file.
+     * Resolves with a new File, or with the original when it is already
+     * smaller or the browser cannot encode the target format.
+     */
+    async resize(file) {
+        let result;
+        try {
+            result = this.worker ? await this.resizeInWorker(file) : await this.resizeOnMainThread(file);
+        } catch (error) {
+            console.warn('Image resize failed, uploading original:', error);
+            return file;
+        }
+
+        // Browsers without a WebP encoder silently return PNG
+        if (!result.blob || result.blob.type !== this.options.type || result.blob.size >= file.size) {
+            return file;
+        }
+        const baseName = file.name.replace(/\.[^.]+$/, '') || 'photo';
+        const extension = this.options.type.split('/')[1];
+        return new File([result.blob], `${baseName}.${extension}`, {
+            type: result.blob.type,
+            lastModified: file.lastModified
+        });
+    }
+
+    resizeInWorker(file) {
+        return new Promise((resolve, reject) => {
+            const id = this.nextId++;
+            this.pending.set(id, { resolve, reject, file });
+            this.worker.postMessage({ id, file, ...this.options });
+        });
+    }
+
+    handleMessage(data) {
+        const request = this.pending.get(data.id);
+        if (!request) {
+            return;
+        }
+        this.pending.delete(data.id);
+        if (data.error) {
+            request.reject(new Error(data.error));
+        } else {
+            request.resolve(data);
+        }
+    }
+
+    disableWorker() {
+        // Finish whatever was queued on the main thread instead
+        this.worker = null;
+        this.pending.forEach((request) => {
+            this.resizeOnMainThread(request.file).then(request.resolve, request.reject);
+        });
+        this.pending.clear();
+    }
+
+    async resizeOnMainThread(file) {
+        const bitmap = await createImageBitmap(file, { imageOrientation: 'from-image' });
+        const { maxWidth, maxHeight, quality, type } = this.options;
+        const scale = Math.min(1, maxWidth / bitmap.width, maxHeight / bitmap.height);
+        const width = Math.max(1, Math.round(bitmap.width * scale));
+        const height = Math.max(1, Math.round(bitmap.height * scale));
+
+        const canvas = document.createElement('canvas');
+        canvas.width = width;
+        canvas.height = height;
+        const context = canvas.getContext('2d');
+        context.imageSmoothingQuality = 'high';
+        context.drawImage(bitmap, 0, 0, width, height);
+        bitmap.close();
+
+        const blob = await new Promise((resolve) => canvas.toBlob(resolve, type, quality));
+        return { blob, width, height };
+    }
+}
+
+window.ImageResizer = ImageResizer;
@@ -1,5 +1,7 @@
 class ImageUploadManager {
     constructor() {
+        // Photos are downscaled and re-encoded in the browser when possible
+        this.resizer = window.ImageResizer && ImageResizer.isSupported() ? new ImageResizer() : null;
         this.init();
     }
 
@@ -30,8 +32,9 @@ class ImageUploadManager {
         });
     }
 
-    handleImageChange(event, imageNumber) {
-        const file = event.target.files[0];
+    async handleImageChange(event, imageNumber) {
+        const input = event.target;
+        let file = input.files[0];
         const previewContainer = document.getElementById(`preview-container-${imageNumber}`);
         
         // Clear previous preview
@@ -45,6 +48,10 @@ class ImageUploadManager {
                 return;
             }
             
+            if (this.resizer) {
+                file = await this.resizeInput(input, file, previewContainer);
+            }
+            
             // Validate file size (max 10MB)
             if (file.size > 10 * 1024 * 1024) {
                 this.showError(previewContainer, 'Image size must be less than 10MB.');
@@ -89,6 +96,26 @@ class ImageUploadManager {
         reader.readAsDataURL(file);
     }
 
+    async resizeInput(input, file, container) {
+        // Hold the form until the smaller file has replaced the original
+        const submitButtons = input.form ? input.form.querySelectorAll('button[type="submit"], input[type="submit"]') : [];
+        submitButtons.forEach((button) => { button.disabled = true; });
+        container.innerHTML = '<small class="text-muted"><span class="spinner-border spinner-border-sm me-1"></span>Optimizing photo...</small>';
+        
+        try {
+            const resized = await this.resizer.resize(file);
+            if (resized !== file) {
+                const transfer = new DataTransfer();
+                transfer.items.add(resized);
+                input.files = transfer.files;
+            }
+            return resized;
+        } finally {
+            container.innerHTML = '';
+            submitButtons.forEach((button) => { button.disabled = false; });
+        }
+    }
+
     showError(container, message) {
         container.innerHTML = `
             <div class="alert alert-danger alert-sm p-2 mt-2" role="alert">
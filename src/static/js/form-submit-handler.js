@@ -1,6 +1,9 @@
 /**
  * Form Submit Handler with Loading Animation
- * Prevents multiple form submissions and shows loading state on submit buttons
+ * Prevents multiple form submissions and shows loading state on submit buttons.
+ * POST forms get an idempotency key, so a submission repeated anyway (a retry
+ * after a lost response, a second tab) is answered by the server without
+ * running twice (see config/mixins/idempotency_mixin.py).
  */
 
 (function() {
@@ -22,6 +25,21 @@
     function init() {
         // Handle all forms with submit buttons
         document.addEventListener('submit', handleFormSubmit, true);
+
+        // A form kept on the page after an HTMX submission is a new submission next time
+        document.addEventListener('htmx:afterRequest', (event) => {
+            const form = event.detail.elt && event.detail.elt.closest('form');
+            if (form && event.detail.successful) {
+                clearIdempotencyKey(form);
+            }
+        });
+
+        // Pages restored from the back/forward cache must not replay their old keys
+        window.addEventListener('pageshow', (event) => {
+            if (event.persisted) {
+                document.querySelectorAll('form').forEach(clearIdempotencyKey);
+            }
+        });
         
         // Handle forms that might be dynamically added (HTMX, etc.)
         observeFormChanges();
@@ -39,6 +57,8 @@
             return false;
         }
 
+        addIdempotencyKey(form);
+
         // Find the submit button that was clicked
         const submitButton = form.querySelector('button[type="submit"]:focus, input[type="submit"]:focus') 
             || form.querySelector('button[type="submit"], input[type="submit"]');
@@ -73,6 +93,31 @@
         }, CONFIG.reEnableDelay);
     }
 
+    /**
+     * Add a hidden idempotency key to a POST form that has none yet.
+     * The key stays until the submission succeeded, so every retry sends it.
+     */
+    function addIdempotencyKey(form) {
+        const isPost = (form.getAttribute('method') || '').toLowerCase() === 'post' || form.hasAttribute('hx-post');
+        if (!isPost || form.querySelector('input[name="idempotency_key"]')) {
+            return;
+        }
+        const input = document.createElement('input');
+        input.type = 'hidden';
+        input.name = 'idempotency_key';
+        input.value = window.crypto && crypto.randomUUID
+            ? crypto.randomUUID()
+            : Date.now().toString(36) + '-' + Math.random().toString(36).slice(2);
+        form.appendChild(input);
+    }
+
+    /**
+     * Remove the idempotency key of a form, so its next submission gets a new one
+     */
+    function clearIdempotencyKey(form) {
+        form.querySelectorAll('input[name="idempotency_key"]').forEach((input) => input.remove());
+    }
+
     /**
      * Set loading state on submit button
      */
@@ -0,0 +1,41 @@
+// Live updates over server-sent events
+document.addEventListener('DOMContentLoaded', function() {
+    const banner = document.querySelector('[data-live-events]');
+    if (!banner || !window.EventSource) {
+        return;
+    }
+
+    // One long-lived connection per page; the browser reconnects on its own
+    const source = new EventSource(banner.dataset.liveEvents);
+
+    ['activity', 'comment', 'status'].forEach(function(eventName) {
+        source.addEventListener(eventName, function(e) {
+            let detail;
+            try {
+                detail = JSON.parse(e.data);
+            } catch (err) {
+                return;
+            }
+
+            // HTMX elements refresh themselves, e.g. hx-trigger="live:comment from:body"
+            if (window.htmx) {
+                htmx.trigger(document.body, 'live:' + eventName, detail);
+            }
+
+            // New comments are swapped in place; anything else asks for a refresh
+            if (eventName !== 'comment') {
+                const message = banner.querySelector('.live-updates-message');
+                if (eventName === 'status') {
+                    message.textContent = 'Status changed to ' + detail.status_display + '.';
+                } else if (detail.description) {
+                    message.textContent = detail.description;
+                }
+                banner.classList.remove('d-none');
+            }
+        });
+    });
+
+    window.addEventListener('beforeunload', function() {
+        source.close();
+    });
+});
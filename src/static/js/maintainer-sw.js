@@ -0,0 +1,326 @@
+/**
+ * Maintainer Offline Service Worker
+ * Keeps the maintainer's task and site visit pages available offline and
+ * queues field actions (complete/reopen task, start/complete visit, with
+ * photos) in IndexedDB until they can be replayed to the server.
+ *
+ * Registered by offline-actions.js with scope /issues/maintainer/.
+ */
+
+const CACHE_VERSION = 'v1';
+const PAGE_CACHE = `maintainer-pages-${CACHE_VERSION}`;
+const STATIC_CACHE = `maintainer-static-${CACHE_VERSION}`;
+const SCOPE_PATH = '/issues/maintainer/';
+const SYNC_URL = '/issues/maintainer/offline-actions/';
+const SYNC_TAG = 'maintainer-actions';
+const PRECACHE_PAGES = [`${SCOPE_PATH}tasks/`, `${SCOPE_PATH}site-visits/`];
+
+// How long an action waits for the network before the page moves on
+const ACTION_WAIT_MS = 3000;
+// How long a page waits for the network before the cached copy is shown
+const PAGE_WAIT_MS = 4000;
+
+const DB_NAME = 'maintainer-offline';
+const DB_VERSION = 1;
+
+// IndexedDB helpers
+
+function openDatabase() {
+    return new Promise((resolve, reject) => {
+        const request = indexedDB.open(DB_NAME, DB_VERSION);
+        request.onupgradeneeded = () => {
+            const db = request.result;
+            db.createObjectStore('queue', { keyPath: 'key' });
+            db.createObjectStore('conflicts', { keyPath: 'key' });
+            db.createObjectStore('meta');
+        };
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+async function withStore(name, mode, callback) {
+    const db = await openDatabase();
+    return new Promise((resolve, reject) => {
+        const transaction = db.transaction(name, mode);
+        const store = transaction.objectStore(name);
+        let result;
+        Promise.resolve(callback(store)).then((value) => { result = value; });
+        transaction.oncomplete = () => resolve(result);
+        transaction.onerror = () => reject(transaction.error);
+    });
+}
+
+function requestResult(request) {
+    return new Promise((resolve, reject) => {
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+const putEntry = (name, entry) => withStore(name, 'readwrite', (store) => { store.put(entry); });
+const deleteEntry = (name, key) => withStore(name, 'readwrite', (store) => { store.delete(key); });
+const allEntries = (name) => withStore(name, 'readonly', (store) => requestResult(store.getAll()));
+const getMeta = (key) => withStore('meta', 'readonly', (store) => requestResult(store.get(key)));
+const setMeta = (key, value) => withStore('meta', 'readwrite', (store) => { store.put(value, key); });
+
+// Queue
+
+/**
+ * Turn a submitted action form into a queue entry.
+ * Files are kept as Blobs, which IndexedDB stores natively.
+ */
+async function queueAction(request) {
+    const formData = await request.clone().formData();
+    const url = new URL(request.url);
+    const segments = url.pathname.split('/').filter(Boolean);
+    const fields = [];
+    for (const [name, value] of formData.entries()) {
+        // Empty file inputs arrive as nameless, empty files
+        if (value instanceof File && !value.size) {
+            continue;
+        }
+        fields.push([name, value]);
+    }
+
+    const entry = {
+        key: formData.get('idempotency_key') || self.crypto.randomUUID(),
+        action: formData.get('offline_action'),
+        slug: segments[segments.length - 2],
+        returnUrl: url.pathname.replace(/[^/]+\/$/, ''),
+        csrfToken: formData.get('csrfmiddlewaretoken'),
+        user: await getMeta('user'),
+        fields: fields,
+        queuedAt: Date.now()
+    };
+    await putEntry('queue', entry);
+    return entry;
+}
+
+async function sendAction(entry) {
+    const body = new FormData();
+    for (const [name, value] of entry.fields) {
+        if (!['offline_action', 'slug', 'idempotency_key'].includes(name)) {
+            body.append(name, value);
+        }
+    }
+    body.append('offline_action', entry.action);
+    body.append('slug', entry.slug);
+    body.append('idempotency_key', entry.key);
+
+    return fetch(SYNC_URL, {
+        method: 'POST',
+        body: body,
+        credentials: 'same-origin',
+        headers: { 'X-CSRFToken': entry.csrfToken || '' }
+    });
+}
+
+let replaying = null;
+
+/**
+ * Send queued actions oldest first. Stops at the first network or
+ * authentication failure so actions are applied in the order they were made.
+ */
+function replayQueue() {
+    if (!replaying) {
+        replaying = (async () => {
+            const user = await getMeta('user');
+            const entries = (await allEntries('queue')).sort((a, b) => a.queuedAt - b.queuedAt);
+            for (const entry of entries) {
+                // Another maintainer's leftovers are dropped, the server would reject them anyway
+                if (entry.user && user && entry.user !== user) {
+                    await deleteEntry('queue', entry.key);
+                    continue;
+                }
+                let response;
+                try {
+                    response = await sendAction(entry);
+                } catch (error) {
+                    break;
+                }
+                if (response.status === 403 || response.redirected || response.status >= 500) {
+                    // Logged out, CSRF token expired or server trouble: keep the queue
+                    break;
+                }
+                const result = await response.json().catch(() => ({ status: 'invalid', message: 'Unexpected server response.' }));
+                if (result.status === 'conflict' || result.status === 'invalid') {
+                    await putEntry('conflicts', {
+                        key: entry.key,
+                        action: entry.action,
+                        returnUrl: entry.returnUrl,
+                        message: result.message,
+                        queuedAt: entry.queuedAt
+                    });
+                }
+                await deleteEntry('queue', entry.key);
+                // The page for this item changed on the server
+                const cache = await caches.open(PAGE_CACHE);
+                await cache.delete(entry.returnUrl);
+            }
+            await notifyClients();
+        })().finally(() => { replaying = null; });
+    }
+    return replaying;
+}
+
+async function notifyClients() {
+    const status = {
+        type: 'OFFLINE_QUEUE',
+        pending: (await allEntries('queue')).length,
+        conflicts: await allEntries('conflicts')
+    };
+    const windows = await self.clients.matchAll({ type: 'window' });
+    windows.forEach((client) => client.postMessage(status));
+}
+
+function timeout(ms) {
+    return new Promise((resolve) => setTimeout(resolve, ms));
+}
+
+async function handleAction(event) {
+    const entry = await queueAction(event.request);
+    if (self.registration.sync) {
+        self.registration.sync.register(SYNC_TAG).catch(() => {});
+    }
+    // Give the network a moment so an online submit shows the fresh page;
+    // a replay already running may have started before this entry was queued
+    await Promise.race([replayQueue().then(replayQueue), timeout(ACTION_WAIT_MS)]);
+    await notifyClients();
+    return Response.redirect(entry.returnUrl, 303);
+}
+
+// Pages
+
+async function handlePage(request) {
+    const cache = await caches.open(PAGE_CACHE);
+    const network = fetch(request).then((response) => {
+        if (response.ok && !response.redirected) {
+            cache.put(request, response.clone());
+        }
+        return response;
+    });
+    // Served from the cache if this fails; the rejection is handled below
+    network.catch(() => {});
+
+    try {
+        return await Promise.race([
+            network,
+            timeout(PAGE_WAIT_MS).then(() => { throw new Error('timeout'); })
+        ]);
+    } catch (error) {
+        const cached = await cache.match(request, { ignoreSearch: false });
+        if (cached) {
+            return cached;
+        }
+        // Nothing cached: wait for the network after all
+        return network.catch(() => new Response(
+            '<h1>Offline</h1><p>This page has not been saved for offline use yet.</p>',
+            { status: 503, headers: { 'Content-Type': 'text/html' } }
+        ));
+    }
+}
+
+async function handleStatic(request) {
+    const cache = await caches.open(STATIC_CACHE);
+    const cached = await cache.match(request);
+    const network = fetch(request).then((response) => {
+        if (response.ok) {
+            cache.put(request, response.clone());
+        }
+        return response;
+    });
+    return cached || network;
+}
+
+async function prefetchPages(urls) {
+    const cache = await caches.open(PAGE_CACHE);
+    await Promise.all(urls.map(async (url) => {
+        try {
+            const response = await fetch(url, { credentials: 'same-origin' });
+            if (response.ok && !response.redirected) {
+                await cache.put(url, response);
+            }
+        } catch (error) {
+            // Offline: keep whatever is cached
+        }
+    }));
+}
+
+// Lifecycle
+
+self.addEventListener('install', (event) => {
+    event.waitUntil(prefetchPages(PRECACHE_PAGES).then(() => self.skipWaiting()));
+});
+
+self.addEventListener('activate', (event) => {
+    event.waitUntil((async () => {
+        const names = await caches.keys();
+        await Promise.all(names
+            .filter((name) => name.startsWith('maintainer-') && ![PAGE_CACHE, STATIC_CACHE].includes(name))
+            .map((name) => caches.delete(name)));
+        await self.clients.claim();
+    })());
+});
+
+self.addEventListener('fetch', (event) => {
+    const request = event.request;
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) {
+        return;
+    }
+
+    if (request.method === 'POST' && url.pathname.startsWith(SCOPE_PATH) && url.pathname !== SYNC_URL) {
+        const type = request.headers.get('Content-Type') || '';
+        if (type.includes('form')) {
+            event.respondWith((async () => {
+                const formData = await request.clone().formData();
+                // Only forms marked for offline use are queued
+                return formData.get('offline_action') ? handleAction(event) : fetch(request);
+            })());
+        }
+        return;
+    }
+
+    if (request.method !== 'GET') {
+        return;
+    }
+    if (request.mode === 'navigate' && url.pathname.startsWith(SCOPE_PATH)) {
+        event.respondWith(handlePage(request));
+    } else if (url.pathname.startsWith('/static/')) {
+        event.respondWith(handleStatic(request));
+    }
+});
+
+self.addEventListener('sync', (event) => {
+    if (event.tag === SYNC_TAG) {
+        event.waitUntil(replayQueue().then(async () => {
+            // Ask the browser to try again later while actions remain
+            if ((await allEntries('queue')).length) {
+                throw new Error('Offline actions still pending');
+            }
+        }));
+    }
+});
+
+self.addEventListener('message', (event) => {
+    const data = event.data || {};
+    if (data.type === 'HELLO') {
+        event.waitUntil((async () => {
+            const previous = await getMeta('user');
+            if (previous && previous !== data.user) {
+                // Another maintainer signed in on this device
+                await caches.delete(PAGE_CACHE);
+                await withStore('conflicts', 'readwrite', (store) => { store.clear(); });
+            }
+            await setMeta('user', data.user);
+            await replayQueue();
+        })());
+    } else if (data.type === 'REPLAY') {
+        event.waitUntil(replayQueue());
+    } else if (data.type === 'PREFETCH') {
+        event.waitUntil(prefetchPages(data.urls || []));
+    } else if (data.type === 'DISMISS_CONFLICT') {
+        event.waitUntil(deleteEntry('conflicts', data.key).then(notifyClients));
+    }
+});
@@ -0,0 +1,119 @@
+/**
+ * Offline support for maintainer pages
+ * Registers the maintainer service worker, tags action forms with
+ * idempotency keys, asks the worker to keep linked pages available offline
+ * and shows queued or conflicting actions.
+ */
+(function() {
+    'use strict';
+
+    const SCOPE = '/issues/maintainer/';
+    const DETAIL_LINK = /^\/issues\/maintainer\/(work-tasks|site-visits)\/[^/]+\/$/;
+    const script = document.currentScript;
+
+    if (!('serviceWorker' in navigator) || !window.indexedDB) {
+        return;
+    }
+
+    function newKey() {
+        if (window.crypto && crypto.randomUUID) {
+            return crypto.randomUUID();
+        }
+        return Date.now().toString(36) + Math.random().toString(36).slice(2);
+    }
+
+    // A fresh key per submit; the worker replays the same key until the server answers
+    document.addEventListener('submit', function(event) {
+        const form = event.target;
+        if (!form.querySelector('input[name="offline_action"]')) {
+            return;
+        }
+        let input = form.querySelector('input[name="idempotency_key"]');
+        if (!input) {
+            input = document.createElement('input');
+            input.type = 'hidden';
+            input.name = 'idempotency_key';
+            form.appendChild(input);
+        }
+        input.value = newKey();
+    }, true);
+
+    function statusBanner() {
+        let banner = document.getElementById('offline-queue-status');
+        if (!banner) {
+            banner = document.createElement('div');
+            banner.id = 'offline-queue-status';
+            banner.className = 'position-fixed bottom-0 start-0 end-0 p-2 d-none';
+            banner.style.zIndex = 1080;
+            document.body.appendChild(banner);
+        }
+        return banner;
+    }
+
+    function renderStatus(data) {
+        const banner = statusBanner();
+        banner.innerHTML = '';
+
+        if (data.pending) {
+            const pending = document.createElement('div');
+            pending.className = 'alert alert-warning py-2 mb-1 shadow-sm';
+            pending.textContent = data.pending + ' action' + (data.pending === 1 ? '' : 's') +
+                ' saved on this device, waiting for a connection.';
+            banner.appendChild(pending);
+        }
+
+        (data.conflicts || []).forEach(function(conflict) {
+            const alert = document.createElement('div');
+            alert.className = 'alert alert-danger py-2 mb-1 shadow-sm d-flex justify-content-between align-items-center';
+            const text = document.createElement('a');
+            text.href = conflict.returnUrl;
+            text.className = 'alert-link me-2';
+            text.textContent = conflict.message;
+            const dismiss = document.createElement('button');
+            dismiss.type = 'button';
+            dismiss.className = 'btn-close';
+            dismiss.setAttribute('aria-label', 'Dismiss');
+            dismiss.addEventListener('click', function() {
+                post({ type: 'DISMISS_CONFLICT', key: conflict.key });
+            });
+            alert.appendChild(text);
+            alert.appendChild(dismiss);
+            banner.appendChild(alert);
+        });
+
+        banner.classList.toggle('d-none', !banner.children.length);
+    }
+
+    function post(message) {
+        if (navigator.serviceWorker.controller) {
+            navigator.serviceWorker.controller.postMessage(message);
+        }
+    }
+
+    navigator.serviceWorker.addEventListener('message', function(event) {
+        if (event.data && event.data.type === 'OFFLINE_QUEUE') {
+            renderStatus(event.data);
+        }
+    });
+
+    navigator.serviceWorker.register('/maintainer-sw.js', { scope: SCOPE }).then(function() {
+        return navigator.serviceWorker.ready;
+    }).then(function() {
+        post({ type: 'HELLO', user: script.dataset.user });
+
+        // Keep the detail pages linked from this page available offline
+        const urls = Array.from(document.querySelectorAll('a[href]'))
+            .map(function(link) { return new URL(link.href, window.location.href); })
+            .filter(function(url) { return url.origin === window.location.origin && DETAIL_LINK.test(url.pathname); })
+            .map(function(url) { return url.pathname; });
+        if (urls.length) {
+            post({ type: 'PREFETCH', urls: Array.from(new Set(urls)) });
+        }
+    }).catch(function(error) {
+        console.warn('Offline support unavailable:', error);
+    });
+
+    window.addEventListener('online', function() {
+        post({ type: 'REPLAY' });
+    });
+})();